@@ -0,0 +1 @@
+"""Performance benchmarks for InvisibleCrawler (not part of the test suite)."""
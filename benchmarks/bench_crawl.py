@@ -0,0 +1,351 @@
+"""End-to-end crawl throughput benchmark against a synthetic website.
+
+Starts a local Twisted server that generates a configurable web: SITES
+sites (one loopback address each, 127.0.0.2, 127.0.0.3, ..., so every
+site is its own domain and downloader slot), PAGES pages per site with
+LINKS same-site links and IMAGES_PER_PAGE <img> tags each, served after
+LATENCY seconds, with ERROR_RATE of URLs answering 500. Images are real
+JPEGs of the configured dimensions; every image URL gets distinct bytes
+(a JPEG comment carrying the URL and a per-run nonce), so the pipeline
+validates, hashes and stores each one as new.
+
+DiscoverySpider then crawls the sites in a fresh process with the
+project settings and the real ImageProcessingPipeline, and the run is
+reported as JSON: pages/s, images/s, CPU seconds and database statements
+per image, peak RSS, plus the configuration and git commit, so results
+from different commits can be compared (--compare).
+
+Backends:
+
+- local: Postgres from DATABASE_URL and Redis from REDIS_URL, with the
+  scheduler the project settings select. Redis keys live under a
+  throwaway QUEUE_NAMESPACE and are dropped when the crawl ends.
+- memory: Scrapy's in-memory scheduler and dupefilter, and the Redis
+  backed caches (robots, DNS, image hashes, persistent dupefilter)
+  switched off, so only Postgres is needed.
+
+Images are written to the DATABASE_URL database either way, so point it
+at a scratch database with the migrations applied (alembic upgrade head).
+Needs Linux (the whole 127.0.0.0/8 range on the loopback interface).
+
+Usage:
+    python -m benchmarks.bench_crawl [--sites N] [--pages N] [--images-per-page N]
+        [--image-size WxH] [--latency S] [--error-rate F] [--backend local|memory]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import datetime
+import io
+import json
+import os
+import random
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, cast
+
+# Reported metrics and whether higher is better, for --compare
+RESULT_METRICS = {
+    "pages_per_second": True,
+    "images_per_second": True,
+    "cpu_seconds_per_image": False,
+    "db_statements_per_image": False,
+    "peak_rss_mb": False,
+}
+
+
+def site_host(index: int) -> str:
+    """Return the loopback address serving site `index`."""
+    return f"127.0.0.{index + 2}"
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    """Return a noisy RGB JPEG (noise keeps the encoded size realistic)."""
+    from PIL import Image
+
+    noise = Image.effect_noise((width, height), 64).convert("RGB")
+    buffer = io.BytesIO()
+    noise.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def unique_jpeg(base: bytes, tag: str) -> bytes:
+    """Return `base` with a COM segment after SOI, so each tag hashes differently."""
+    payload = tag.encode()
+    return base[:2] + b"\xff\xfe" + struct.pack(">H", len(payload) + 2) + payload + base[2:]
+
+
+def is_error(host: str, path: str, error_rate: float) -> bool:
+    """Return whether a URL answers 500 (stable across requests and retries)."""
+    return zlib.crc32(f"{host}{path}".encode()) % 10_000 < error_rate * 10_000
+
+
+def page_html(args: argparse.Namespace, page: int) -> bytes:
+    """Return the HTML of one page of a synthetic site."""
+    rng = random.Random(page)
+    images = [
+        f'<img src="/img/{args.nonce}/{(page * args.images_per_page + j) % args.images_per_site}.jpg">'
+        for j in range(args.images_per_page)
+    ]
+    links = [f'<a href="/page/{rng.randrange(args.pages)}">more</a>' for _ in range(args.links)]
+    body = "\n".join(images + links)
+    return f"<html><head><title>Page {page}</title></head><body>\n{body}\n</body></html>".encode()
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the synthetic website (blocking)."""
+    from twisted.internet import reactor as installed_reactor
+    from twisted.web import resource, server
+
+    # The installed reactor is typed as a module; treat it as the reactor instance
+    reactor = cast(Any, installed_reactor)
+
+    width, height = (int(value) for value in args.image_size.split("x"))
+    base_jpeg = make_jpeg(width, height)
+
+    class Site(resource.Resource):
+        isLeaf = True  # noqa: N815
+
+        def render_GET(self, request: Any) -> bytes | int:  # noqa: N802
+            host = request.getHost().host
+            path = request.path.decode()
+            if path == "/robots.txt":
+                request.setHeader(b"Content-Type", b"text/plain")
+                return b"User-agent: *\nAllow: /\n"
+            if is_error(host, path, args.error_rate):
+                request.setResponseCode(500)
+                return b"error"
+            if path.startswith("/img/"):
+                request.setHeader(b"Content-Type", b"image/jpeg")
+                body = unique_jpeg(base_jpeg, f"{host}{path}")
+            elif path == "/" or path.startswith("/page/"):
+                page = 0 if path == "/" else int(path.removeprefix("/page/"))
+                request.setHeader(b"Content-Type", b"text/html; charset=utf-8")
+                body = page_html(args, page % args.pages)
+            else:
+                request.setResponseCode(404)
+                return b"not found"
+            if args.latency <= 0:
+                return body
+
+            def finish() -> None:
+                request.setHeader(b"Content-Length", str(len(body)).encode())
+                request.write(body)
+                request.finish()
+
+            reactor.callLater(args.latency, finish)
+            return server.NOT_DONE_YET
+
+    site = server.Site(Site())  # type: ignore[no-untyped-call]
+    for index in range(args.sites):
+        reactor.listenTCP(args.port, site, interface=site_host(index))
+    reactor.run()
+
+
+def crawl(args: argparse.Namespace, seeds_path: str) -> None:
+    """Crawl the synthetic sites and print the run's measurements as JSON."""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from crawler import metrics
+    from crawler.spiders.discovery_spider import DiscoverySpider
+    from storage.db import get_db_pool_stats
+
+    settings = get_project_settings()
+    overrides: dict[str, Any] = {
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "SCHEDULER_PERSIST": False,
+        "LOG_LEVEL": args.log_level,
+    }
+    if args.backend == "memory":
+        if settings.get("SCHEDULER", "").startswith("scrapy_redis"):
+            overrides["SCHEDULER"] = "scrapy.core.scheduler.Scheduler"
+        overrides["DUPEFILTER_CLASS"] = "scrapy.dupefilters.RFPDupeFilter"
+    settings.setdict(overrides, priority="cmdline")
+
+    statements_before = get_db_pool_stats()["statements_executed"]
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(DiscoverySpider)
+    process.crawl(crawler, seeds=seeds_path, max_pages=0, allowlist="", blocklist="")
+    process.start()
+
+    spider = cast(DiscoverySpider, crawler.spider)
+    stats = crawler.stats.get_stats()
+    elapsed = stats.get("elapsed_time_seconds", 0.0) or 0.0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_seconds = usage.ru_utime + usage.ru_stime
+    images_processed = metrics.IMAGES.get("received")
+    images_stored = metrics.IMAGES.get("downloaded")
+    statements = get_db_pool_stats()["statements_executed"] - statements_before
+    per_image = max(images_processed, 1)
+    print(
+        json.dumps(
+            {
+                "elapsed_seconds": round(elapsed, 3),
+                "pages": spider.pages_crawled,
+                "images_processed": images_processed,
+                "images_stored": images_stored,
+                "images_failed": metrics.IMAGES.get("failed"),
+                "responses": stats.get("downloader/response_count", 0),
+                "pages_per_second": round(spider.pages_crawled / elapsed, 2) if elapsed else 0.0,
+                "images_per_second": round(images_stored / elapsed, 2) if elapsed else 0.0,
+                "cpu_seconds": round(cpu_seconds, 3),
+                "cpu_seconds_per_image": round(cpu_seconds / per_image, 5),
+                "db_statements": statements,
+                "db_statements_per_image": round(statements / per_image, 2),
+                # ru_maxrss is in kilobytes on Linux
+                "peak_rss_mb": round(usage.ru_maxrss / 1024, 1),
+            }
+        )
+    )
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _wait_for_server(url: str) -> None:
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url, timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Synthetic site did not start: {url}")
+
+
+def compare(result: dict[str, Any], baseline: dict[str, Any]) -> None:
+    """Print each metric against a baseline result file."""
+    print(f"\nvs {baseline.get('commit') or 'baseline'}:")
+    for name, higher_is_better in RESULT_METRICS.items():
+        old, new = baseline["results"].get(name), result["results"].get(name)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = (change > 0) == higher_is_better
+        verdict = "" if abs(change) < 1 else (" better" if better else " worse")
+        print(f"  {name:<26}{old:>12}{new:>12}{change:>+9.1f}%{verdict}")
+
+
+def main() -> int:
+    """Serve the synthetic web, crawl it and report the run."""
+    parser = argparse.ArgumentParser(description="End-to-end crawl throughput benchmark")
+    parser.add_argument("--sites", type=int, default=8, help="Synthetic sites (domains)")
+    parser.add_argument("--pages", type=int, default=50, help="Pages per site")
+    parser.add_argument("--links", type=int, default=5, help="Same-site links per page")
+    parser.add_argument("--images-per-page", type=int, default=10)
+    parser.add_argument(
+        "--images-per-site",
+        type=int,
+        help="Distinct images per site; fewer than pages x images-per-page reuses images "
+        "across pages (default: no reuse)",
+    )
+    parser.add_argument("--image-size", default="800x600", help="Image dimensions (WxH)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server delay per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of URLs answering 500")
+    parser.add_argument("--backend", choices=["local", "memory"], default="memory")
+    parser.add_argument("--concurrency", type=int, help="SCRAPY_CONCURRENT_REQUESTS")
+    parser.add_argument("--per-domain", type=int, help="SCRAPY_CONCURRENT_REQUESTS_PER_DOMAIN")
+    parser.add_argument("--port", type=int, default=8480)
+    parser.add_argument("--output", help="Write the result JSON to this file")
+    parser.add_argument("--compare", help="Result JSON of an earlier run to compare against")
+    parser.add_argument("--log-level", default="ERROR", help="Crawler log level")
+    parser.add_argument("--nonce", default=uuid.uuid4().hex[:12], help=argparse.SUPPRESS)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--crawl", metavar="SEEDS", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.images_per_site = args.images_per_site or args.pages * args.images_per_page
+
+    if args.serve:
+        serve(args)
+        return 0
+    if args.crawl:
+        crawl(args, args.crawl)
+        return 0
+
+    passthrough = [
+        *("--sites", str(args.sites), "--pages", str(args.pages), "--links", str(args.links)),
+        *("--images-per-page", str(args.images_per_page)),
+        *("--images-per-site", str(args.images_per_site), "--image-size", args.image_size),
+        *("--latency", str(args.latency), "--error-rate", str(args.error_rate)),
+        *("--backend", args.backend, "--port", str(args.port), "--nonce", args.nonce),
+        *("--log-level", args.log_level),
+    ]
+    module = [sys.executable, "-m", "benchmarks.bench_crawl"]
+    env = {**os.environ, "QUEUE_NAMESPACE": f"bench-{args.nonce}"}
+    if args.backend == "memory":
+        env.update(
+            {
+                "ENABLE_PERSISTENT_DUPEFILTER": "false",
+                "ENABLE_IMAGE_HASH_CACHE_REDIS": "false",
+                "ENABLE_SHARED_ROBOTS_CACHE": "false",
+                "ENABLE_SHARED_DNS_CACHE": "false",
+            }
+        )
+    if args.concurrency:
+        env["SCRAPY_CONCURRENT_REQUESTS"] = str(args.concurrency)
+    if args.per_domain:
+        env["SCRAPY_CONCURRENT_REQUESTS_PER_DOMAIN"] = str(args.per_domain)
+
+    server = subprocess.Popen(module + passthrough + ["--serve"])
+    try:
+        _wait_for_server(f"http://{site_host(args.sites - 1)}:{args.port}/robots.txt")
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as seeds:
+            for index in range(args.sites):
+                seeds.write(f"http://{site_host(index)}:{args.port}/\n")
+        try:
+            completed = subprocess.run(
+                module + passthrough + ["--crawl", seeds.name],
+                env=env,
+                stdout=subprocess.PIPE,
+                text=True,
+                check=True,
+            )
+        finally:
+            os.unlink(seeds.name)
+    finally:
+        server.terminate()
+        server.wait()
+
+    config = {
+        key: value
+        for key, value in vars(args).items()
+        if key not in ("output", "compare", "serve", "crawl", "log_level")
+    }
+    result = {
+        "benchmark": "bench_crawl",
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+        "config": config,
+        "results": json.loads(completed.stdout.strip().splitlines()[-1]),
+    }
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if args.compare:
+        compare(result, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,98 @@
+"""Microbenchmark for domain canonicalization.
+
+Times canonicalize_domain over the inputs exercised by
+tests/test_domain_canonicalization.py, both cold (cache cleared before every
+call) and warm (memoized), plus a crawl-like workload where many page URLs
+share a handful of hosts.
+
+Usage:
+    python -m benchmarks.bench_domain_canonicalization [--iterations N]
+"""
+
+import argparse
+import timeit
+
+from processor.domain_canonicalization import (
+    canonicalization_cache_info,
+    canonicalize_domain,
+    clear_canonicalization_cache,
+    get_public_suffix_list,
+)
+
+# (input, strip_subdomains) pairs mirroring the unit test cases
+TEST_CASES: list[tuple[str, bool]] = [
+    ("example.com", False),
+    ("https://example.com", False),
+    ("http://example.com", False),
+    ("https://example.com/path/to/page", False),
+    ("www.example.com", False),
+    ("https://www.example.com", False),
+    ("http://www.example.com/path", False),
+    ("Example.COM", False),
+    ("HTTPS://EXAMPLE.COM", False),
+    ("WWW.EXAMPLE.COM", False),
+    ("example.com:443", False),
+    ("example.com:80", False),
+    ("https://example.com:443/path", False),
+    ("example.com.", False),
+    ("www.example.com.", False),
+    ("blog.example.com", False),
+    ("shop.example.com", False),
+    ("a.b.c.example.com", False),
+    ("blog.example.com", True),
+    ("münchen.de", False),
+    ("пример.рф", False),
+    ("www.münchen.de", False),
+    ("HTTPS://WWW.Example.COM:443/Path?query=1", False),
+]
+
+
+def _crawl_urls(pages_per_host: int) -> list[str]:
+    """Build a page URL list where every host repeats pages_per_host times."""
+    hosts = ["example.com", "www.example.org", "blog.example.net", "münchen.de", "пример.рф"]
+    return [
+        f"https://{host}/section/{i}/page.html?ref={i % 7}"
+        for i in range(pages_per_host)
+        for host in hosts
+    ]
+
+
+def _run_cases(cases: list[tuple[str, bool]], cold: bool) -> None:
+    for url, strip in cases:
+        if cold:
+            clear_canonicalization_cache()
+        canonicalize_domain(url, strip)
+
+
+def main() -> int:
+    """Run the benchmark and print per-call timings."""
+    parser = argparse.ArgumentParser(description="Benchmark canonicalize_domain")
+    parser.add_argument("--iterations", type=int, default=500, help="Passes over each workload")
+    args = parser.parse_args()
+
+    get_public_suffix_list()
+    crawl_urls = _crawl_urls(20)
+
+    workloads = [
+        ("test cases, cold cache", TEST_CASES, lambda: _run_cases(TEST_CASES, cold=True)),
+        ("test cases, warm cache", TEST_CASES, lambda: _run_cases(TEST_CASES, cold=False)),
+        (
+            "crawl URLs, warm cache",
+            crawl_urls,
+            lambda: [canonicalize_domain(url) for url in crawl_urls],
+        ),
+    ]
+
+    for name, inputs, func in workloads:
+        clear_canonicalization_cache()
+        func()  # warm-up (fills the cache for warm workloads)
+        elapsed = timeit.timeit(func, number=args.iterations)
+        calls = args.iterations * len(inputs)
+        print(f"{name:<28} {elapsed / calls * 1e6:8.2f} us/call  ({calls} calls)")
+
+    print(f"cache: {canonicalization_cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
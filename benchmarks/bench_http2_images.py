@@ -0,0 +1,238 @@
+"""Benchmark HTTP/1.1 vs HTTP/2 image downloads against a local h2 server.
+
+Starts a local TLS server (Twisted, ALPN h2 + http/1.1, self-signed
+certificate) that serves small fake images and counts TCP connections, then
+crawls the same image URLs once per mode in a fresh process:
+
+- http1: Scrapy's HTTP/1.1 handler (ENABLE_HTTP2_IMAGES=false)
+- http2: crawler.http2.ImageHttp2DownloadHandler (ENABLE_HTTP2_IMAGES=true)
+
+Reports requests/second and server-side connection count for each mode.
+Needs h2 (client and server) and priority (Twisted's h2 server).
+
+Usage:
+    python -m benchmarks.bench_http2_images [--requests N] [--per-host N] [--latency S]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+IMAGE_BODY = b"\xff\xd8\xff\xe0" + b"\0" * 4096
+
+
+def _write_certificate(directory: Path) -> tuple[Path, Path]:
+    """Write a self-signed localhost certificate and key."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = directory / "cert.pem", directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        )
+    )
+    return cert_path, key_path
+
+
+def serve(port: int, cert_path: str, key_path: str, latency: float) -> None:
+    """Run the h2 test server (blocking).
+
+    GET /stats returns {"connections": N}; GET /reset zeroes the counter;
+    anything else is a JPEG-ish body after `latency` seconds.
+    """
+    from OpenSSL import crypto
+    from twisted.internet import reactor, ssl
+    from twisted.web import resource, server
+
+    connections = {"count": 0}
+
+    class Image(resource.Resource):
+        isLeaf = True  # noqa: N815
+
+        def render_GET(self, request):  # noqa: N802
+            path = request.path.decode()
+            if path == "/stats":
+                return json.dumps({"connections": connections["count"]}).encode()
+            if path == "/reset":
+                connections["count"] = 0
+                return b"ok"
+            request.setHeader(b"Content-Type", b"image/jpeg")
+            if latency <= 0:
+                return IMAGE_BODY
+
+            def finish():
+                request.write(IMAGE_BODY)
+                request.finish()
+
+            reactor.callLater(latency, finish)
+            return server.NOT_DONE_YET
+
+    class CountingSite(server.Site):
+        def buildProtocol(self, addr):  # noqa: N802
+            connections["count"] += 1
+            return super().buildProtocol(addr)
+
+    options = ssl.CertificateOptions(
+        privateKey=crypto.load_privatekey(crypto.FILETYPE_PEM, Path(key_path).read_bytes()),
+        certificate=crypto.load_certificate(crypto.FILETYPE_PEM, Path(cert_path).read_bytes()),
+        acceptableProtocols=[b"h2", b"http/1.1"],
+    )
+    reactor.listenSSL(port, CountingSite(Image()), options, interface="127.0.0.1")
+    reactor.run()
+
+
+def crawl(port: int, requests: int) -> None:
+    """Download `requests` image URLs from the test server and print crawl stats as JSON."""
+    from scrapy import Request, Spider
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from crawler.lanes import IMAGE_LANE
+
+    class ImageSpider(Spider):
+        name = "bench_http2_images"
+
+        async def start(self):
+            for i in range(requests):
+                yield Request(
+                    f"https://localhost:{port}/img/{i}.jpg",
+                    meta={"lane": IMAGE_LANE},
+                    dont_filter=True,
+                )
+
+        def parse(self, response):
+            pass
+
+    settings = get_project_settings()
+    settings.setdict(
+        {
+            "SCHEDULER": "scrapy.core.scheduler.Scheduler",
+            "DUPEFILTER_CLASS": "scrapy.dupefilters.BaseDupeFilter",
+            "ROBOTSTXT_OBEY": False,
+            "ITEM_PIPELINES": {},
+            "EXTENSIONS": {},
+            "AUTOTHROTTLE_ENABLED": False,
+            "DOWNLOAD_DELAY": 0,
+            "LOG_LEVEL": "ERROR",
+        },
+        priority="cmdline",
+    )
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(ImageSpider)
+    process.crawl(crawler)
+    process.start()
+    stats = crawler.stats.get_stats()
+    print(
+        json.dumps(
+            {
+                "elapsed": stats.get("elapsed_time_seconds", 0.0),
+                "responses": stats.get("downloader/response_count", 0),
+                "http2_requests": stats.get("http2/requests", 0),
+            }
+        )
+    )
+
+
+def _fetch_json(url: str) -> dict:
+    import ssl
+
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    with urllib.request.urlopen(url, context=context, timeout=5) as response:
+        body = response.read()
+    return json.loads(body) if body.startswith(b"{") else {}
+
+
+def main() -> int:
+    """Run both modes against a local server and print a comparison."""
+    parser = argparse.ArgumentParser(description="Benchmark HTTP/2 image downloads")
+    parser.add_argument("--requests", type=int, default=500, help="Image requests per mode")
+    parser.add_argument("--per-host", type=int, default=32, help="Concurrent requests per host")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server delay per image")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--serve", nargs=2, metavar=("CERT", "KEY"), help=argparse.SUPPRESS)
+    parser.add_argument("--crawl", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.serve[0], args.serve[1], args.latency)
+        return 0
+    if args.crawl:
+        crawl(args.port, args.requests)
+        return 0
+
+    base = f"https://localhost:{args.port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        cert_path, key_path = _write_certificate(Path(tmp))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_http2_images", "--port", str(args.port)]
+            + ["--latency", str(args.latency), "--serve", str(cert_path), str(key_path)]
+        )
+        try:
+            for _ in range(50):
+                try:
+                    _fetch_json(f"{base}/stats")
+                    break
+                except OSError:
+                    time.sleep(0.1)
+
+            print(f"{args.requests} image requests, {args.per_host} per host")
+            print(f"{'mode':<8}{'req/s':>10}{'connections':>14}{'h2 requests':>14}")
+            for mode, enabled in (("http1", "false"), ("http2", "true")):
+                _fetch_json(f"{base}/reset")
+                env = {
+                    **os.environ,
+                    "ENABLE_HTTP2_IMAGES": enabled,
+                    "ENABLE_IMAGE_LANE": "true",
+                    "IMAGE_CONCURRENT_REQUESTS": str(args.per_host),
+                    "IMAGE_CONCURRENT_REQUESTS_PER_HOST": str(args.per_host),
+                    "SCRAPY_CONCURRENT_REQUESTS": str(args.per_host),
+                }
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_http2_images", "--crawl"]
+                    + ["--port", str(args.port), "--requests", str(args.requests)],
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                run = json.loads(result.stdout.strip().splitlines()[-1])
+                connections = _fetch_json(f"{base}/stats")["connections"]
+                rate = run["responses"] / run["elapsed"] if run["elapsed"] else 0.0
+                print(f"{mode:<8}{rate:>10.1f}{connections:>14}{run['http2_requests']:>14}")
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
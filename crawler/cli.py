@@ -4,15 +4,18 @@ Provides management commands for:
 - Seed ingestion from various sources
 - Crawl run management
 - Queue inspection
+- Near-duplicate image search
+- Profiling of running workers
 """
 
 import argparse
 import csv
 import logging
 import sys
+import time
 from collections.abc import Callable
 from pathlib import Path
-from typing import Any, cast
+from typing import cast
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -23,7 +26,13 @@ from crawler.redis_keys import (
     start_urls_key,
 )
 from crawler.scheduler import check_redis_available
-from env_config import get_redis_url
+from env_config import (
+    get_near_duplicate_index_path,
+    get_near_duplicate_max_distance,
+    get_profile_duration_seconds,
+    get_redis_url,
+)
+from storage.redis_client import close_redis_clients, get_redis_client
 
 logging.basicConfig(
     level=logging.INFO,
@@ -32,13 +41,6 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def _redis_from_url(redis_url: str) -> Any:
-    import redis
-
-    redis_module = cast(Any, redis)
-    return redis_module.from_url(redis_url)
-
-
 def ingest_seeds_command(args: argparse.Namespace) -> int:
     """Ingest seeds from a source into the URL frontier.
 
@@ -128,7 +130,7 @@ def ingest_from_csv(
         "errors": 0,
     }
 
-    client = _redis_from_url(redis_url)
+    client = get_redis_client(redis_url)
     queue_key = start_urls_key("discovery")
     seen_key = seen_domains_key("discovery")
 
@@ -260,7 +262,7 @@ def queue_status_command(args: argparse.Namespace) -> int:
         return 1
 
     try:
-        client = _redis_from_url(redis_url)
+        client = get_redis_client(redis_url)
 
         # Get queue info
         start_urls_redis_key = start_urls_key("discovery")
@@ -806,9 +808,7 @@ def cleanup_fingerprints_command(args: argparse.Namespace) -> int:
     redis_url = args.redis_url or get_redis_url()
 
     try:
-        import redis
-
-        client: Any = redis.from_url(redis_url)  # type: ignore[no-untyped-call]
+        client = get_redis_client(redis_url)
         key = "dupefilter:fingerprints"
 
         if not client.exists(key):
@@ -832,6 +832,216 @@ def cleanup_fingerprints_command(args: argparse.Namespace) -> int:
         return 1
 
 
+def build_near_duplicate_index_command(args: argparse.Namespace) -> int:
+    """Rebuild the near-duplicate index snapshots from the images table.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        Exit code (0 for success, 1 for failure).
+    """
+    output = args.output or get_near_duplicate_index_path()
+
+    try:
+        from processor.near_duplicate_index import NearDuplicateIndexSet
+        from storage.image_repository import iter_image_hashes
+
+        index_set = NearDuplicateIndexSet(output)
+        started = time.monotonic()
+        count = 0
+        for image_id, phash, dhash in iter_image_hashes(batch_size=args.batch_size):
+            index_set.add(image_id, phash, dhash)
+            count += 1
+            if count % 100000 == 0:
+                logger.info(f"Indexed {count} images...")
+
+        index_set.save(merge_existing=False)
+        elapsed = time.monotonic() - started
+
+        print(f"\nIndexed {count} images in {elapsed:.1f}s")
+        for kind, index in index_set.indexes.items():
+            print(f"  {kind}: {len(index)} hashes -> {index_set.path_for(kind)}")
+        return 0
+
+    except Exception as e:
+        logger.error(f"Failed to build near-duplicate index: {e}")
+        return 1
+
+
+def find_near_duplicates_command(args: argparse.Namespace) -> int:
+    """List indexed images within a Hamming distance of an image or hash.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        Exit code (0 for success, 1 for failure).
+    """
+    index_path = args.index or get_near_duplicate_index_path()
+    distance = args.distance if args.distance is not None else get_near_duplicate_max_distance()
+
+    try:
+        from processor.near_duplicate_index import NearDuplicateIndexSet, hash_to_int
+        from storage.image_repository import find_image, get_image_urls
+
+        index_set = NearDuplicateIndexSet.load(index_path)
+        if not len(index_set.indexes[args.hash]):
+            print(f"No {args.hash} index at {index_set.path_for(args.hash)}")
+            print("Run 'build-near-duplicate-index' first")
+            return 1
+
+        # A bare 16-hex-digit value is a hash; anything else is an image ID or SHA-256
+        target_id = None
+        hash_value = hash_to_int(args.target) if len(args.target) == 16 else None
+        if hash_value is None:
+            image = find_image(args.target)
+            if not image:
+                print(f"Image '{args.target}' not found")
+                return 1
+            target_id = image["id"]
+            hash_value = hash_to_int(image[args.hash])
+            if hash_value is None:
+                print(f"Image {target_id} has no {args.hash}")
+                return 1
+
+        matches = [
+            (image_id, bits)
+            for image_id, bits in index_set.query(args.hash, hash_value, distance)
+            if image_id != target_id
+        ][: args.limit]
+
+        print(f"\n{len(matches)} images within {distance} bits ({args.hash} {hash_value:016x})")
+        if not matches:
+            return 0
+
+        urls = get_image_urls([image_id for image_id, _ in matches])
+        print(f"{'Dist':>4}  {'Image ID':<36}  URL")
+        print("-" * 100)
+        for image_id, bits in matches:
+            print(f"{bits:>4}  {image_id:<36}  {urls.get(image_id, '')}")
+        return 0
+
+    except Exception as e:
+        logger.error(f"Failed to find near-duplicates: {e}")
+        return 1
+
+
+def backfill_perceptual_hashes_command(args: argparse.Namespace) -> int:
+    """Copy hex pHash/dHash values into the BIGINT hash columns.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        Exit code (0 for success, 1 for failure).
+    """
+    try:
+        from storage.image_repository import backfill_hash_ints, count_missing_hash_ints
+
+        missing = count_missing_hash_ints()
+        print("\nRows needing BIGINT hashes:")
+        for table, count in missing.items():
+            print(f"  {table}: {count}")
+
+        if args.dry_run:
+            print("DRY RUN: No changes made")
+            return 0
+
+        started = time.monotonic()
+        updated = backfill_hash_ints(batch_size=args.batch_size)
+        elapsed = time.monotonic() - started
+
+        print(f"\nBackfill complete in {elapsed:.1f}s:")
+        for table, count in updated.items():
+            print(f"  {table}: {count} rows updated")
+        return 0
+
+    except Exception as e:
+        logger.error(f"Perceptual hash backfill failed: {e}")
+        return 1
+
+
+def cluster_near_duplicates_command(args: argparse.Namespace) -> int:
+    """Cluster near-duplicate images and write cluster IDs back to the images table.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        Exit code (0 for success, 1 for failure).
+    """
+    threshold = args.threshold if args.threshold is not None else get_near_duplicate_max_distance()
+    try:
+        from processor.near_duplicate_clustering import cluster_hashes
+        from storage.image_repository import iter_image_hashes, write_near_duplicate_clusters
+
+        hash_column = 1 if args.hash == "phash" else 2
+        rows = ((row[0], row[hash_column]) for row in iter_image_hashes(batch_size=args.batch_size))
+        result = cluster_hashes(
+            rows,
+            threshold=threshold,
+            bands=args.bands,
+            workers=args.workers,
+            max_bucket_size=args.max_bucket_size,
+        )
+        stats = result.stats.as_dict()
+
+        # Writing resets every image missing from the assignments, so a run
+        # with skipped buckets would wipe clusters those buckets still hold
+        refused = result.stats.buckets_skipped > 0 and not args.force and not args.dry_run
+        if args.dry_run:
+            print("\nDRY RUN: cluster IDs not written")
+        elif refused:
+            print(
+                f"\nRefusing to write: {result.stats.buckets_skipped} oversized buckets skipped "
+                f"({result.stats.images_in_skipped_buckets} images); raise "
+                f"--max-bucket-size or pass --force to write anyway"
+            )
+        else:
+            started = time.monotonic()
+            written = write_near_duplicate_clusters(result.assignments())
+            stats.update({f"rows_{key}": value for key, value in written.items()})
+            stats["write_seconds"] = round(time.monotonic() - started, 2)
+
+        print(f"\nNear-duplicate clustering ({args.hash}, <= {threshold} bits):")
+        for key, value in stats.items():
+            if isinstance(value, float):
+                value = round(value, 2)
+            print(f"  {key}: {value}")
+        return 1 if refused else 0
+
+    except Exception as e:
+        logger.error(f"Near-duplicate clustering failed: {e}")
+        return 1
+
+
+def profile_worker_command(args: argparse.Namespace) -> int:
+    """Ask a running worker (ENABLE_PROFILING) to write a CPU or memory profile.
+
+    Args:
+        args: Command line arguments.
+
+    Returns:
+        Exit code (0 for success, 1 for failure).
+    """
+    seconds = args.seconds or get_profile_duration_seconds()
+
+    try:
+        from crawler.profiling import request_profile
+
+        request_profile(args.worker_id, args.mode, seconds, args.redis_url or get_redis_url())
+        print(
+            f"\nRequested {seconds}s {args.mode} profile from {args.worker_id}; "
+            f"the worker writes it to its PROFILE_OUTPUT_DIR"
+        )
+        return 0
+
+    except Exception as e:
+        logger.error(f"Failed to request profile: {e}")
+        return 1
+
+
 def main() -> int:
     """Main CLI entry point.
 
@@ -1035,6 +1245,153 @@ def main() -> int:
     )
     cleanup_fp_parser.set_defaults(func=cleanup_fingerprints_command)
 
+    # build-near-duplicate-index command
+    build_index_parser = subparsers.add_parser(
+        "build-near-duplicate-index",
+        help="Rebuild the pHash/dHash near-duplicate index from the images table",
+    )
+    build_index_parser.add_argument(
+        "--output",
+        type=str,
+        help="Index directory (default: from NEAR_DUPLICATE_INDEX_PATH env var)",
+    )
+    build_index_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="Rows fetched per database round trip (default: 10000)",
+    )
+    build_index_parser.set_defaults(func=build_near_duplicate_index_command)
+
+    # find-near-duplicates command
+    near_dup_parser = subparsers.add_parser(
+        "find-near-duplicates",
+        help="List images within a Hamming distance of an image or hash",
+    )
+    near_dup_parser.add_argument(
+        "target",
+        help="Image ID, SHA-256 of the image content, or a 16-digit hex hash",
+    )
+    near_dup_parser.add_argument(
+        "--distance",
+        type=int,
+        help="Maximum Hamming distance in bits (default: from NEAR_DUPLICATE_MAX_DISTANCE)",
+    )
+    near_dup_parser.add_argument(
+        "--hash",
+        choices=["phash", "dhash"],
+        default="phash",
+        help="Perceptual hash to compare (default: phash)",
+    )
+    near_dup_parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Maximum matches to show (default: 50)",
+    )
+    near_dup_parser.add_argument(
+        "--index",
+        type=str,
+        help="Index directory (default: from NEAR_DUPLICATE_INDEX_PATH env var)",
+    )
+    near_dup_parser.set_defaults(func=find_near_duplicates_command)
+
+    # backfill-perceptual-hashes command
+    backfill_hashes_parser = subparsers.add_parser(
+        "backfill-perceptual-hashes",
+        help="Populate BIGINT pHash/dHash columns from the hex hash columns",
+    )
+    backfill_hashes_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5000,
+        help="Rows updated per transaction (default: 5000)",
+    )
+    backfill_hashes_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many rows need backfilling",
+    )
+    backfill_hashes_parser.set_defaults(func=backfill_perceptual_hashes_command)
+
+    # cluster-near-duplicates command
+    cluster_parser = subparsers.add_parser(
+        "cluster-near-duplicates",
+        help="Cluster visually identical images and write near_duplicate_cluster_id",
+    )
+    cluster_parser.add_argument(
+        "--hash",
+        choices=["phash", "dhash"],
+        default="phash",
+        help="Perceptual hash to compare (default: phash)",
+    )
+    cluster_parser.add_argument(
+        "--threshold",
+        type=int,
+        help="Maximum Hamming distance in bits (default: from NEAR_DUPLICATE_MAX_DISTANCE)",
+    )
+    cluster_parser.add_argument(
+        "--bands",
+        type=int,
+        help="Bands per 64-bit hash, 3-64 (default: cheapest for the corpus size; "
+        "every band count finds all pairs within the threshold)",
+    )
+    cluster_parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for comparisons (default: CPU count)",
+    )
+    cluster_parser.add_argument(
+        "--max-bucket-size",
+        type=int,
+        default=5000,
+        help="Skip LSH buckets with more images than this (default: 5000)",
+    )
+    cluster_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Write cluster IDs even if oversized buckets were skipped",
+    )
+    cluster_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="Rows fetched per database round trip (default: 10000)",
+    )
+    cluster_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Compute clusters and report stats without writing",
+    )
+    cluster_parser.set_defaults(func=cluster_near_duplicates_command)
+
+    # profile-worker command
+    profile_parser = subparsers.add_parser(
+        "profile-worker",
+        help="Request a CPU or memory profile from a running worker",
+    )
+    profile_parser.add_argument(
+        "worker_id",
+        help="Worker id (hostname-pid, as in domains.claimed_by)",
+    )
+    profile_parser.add_argument(
+        "--mode",
+        choices=["cpu", "memory"],
+        default="cpu",
+        help="Stack sampling (cpu) or tracemalloc growth (memory) (default: cpu)",
+    )
+    profile_parser.add_argument(
+        "--seconds",
+        type=int,
+        help="Profile length (default: from PROFILE_DURATION_SECONDS)",
+    )
+    profile_parser.add_argument(
+        "--redis-url",
+        type=str,
+        help="Redis connection URL (default: from REDIS_URL env var)",
+    )
+    profile_parser.set_defaults(func=profile_worker_command)
+
     args = parser.parse_args()
 
     if not args.command:
@@ -1042,7 +1399,11 @@ def main() -> int:
         return 1
 
     handler = cast(Callable[[argparse.Namespace], int], args.func)
-    return handler(args)
+    try:
+        return handler(args)
+    finally:
+        # Release the shared Redis pools opened by whichever command ran
+        close_redis_clients()
 
 
 if __name__ == "__main__":
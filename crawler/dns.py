@@ -0,0 +1,311 @@
+"""Caching DNS resolver shared by crawler processes.
+
+SharedCachingResolver replaces Scrapy's CachingThreadedResolver (set as
+TWISTED_DNS_RESOLVER, installed on the asyncio reactor by Scrapy). Lookups still
+go through the system resolver (getaddrinfo in the reactor thread pool),
+so /etc/hosts and container DNS behave as before, but results are kept in
+a large in-process LRU with an expiry and, optionally, in Redis so that
+crawler containers on the same host share them.
+
+getaddrinfo does not report record TTLs, so positive entries live for
+DNS_CACHE_TTL_SECONDS. Names that do not exist (NXDOMAIN) are cached for
+DNS_CACHE_NEGATIVE_TTL_SECONDS and fail immediately; the discovery spider
+uses is_nxdomain() to mark such domains unreachable. Temporary failures
+(timeouts, SERVFAIL) are never cached.
+
+Concurrent lookups of the same name share one resolution, and hostnames
+of newly claimed domains can be resolved ahead of their first request
+with prefetch_hostnames().
+"""
+
+import logging
+import socket
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+from twisted.internet import defer, threads
+from twisted.internet.error import DNSLookupError
+from twisted.internet.interfaces import IResolverSimple
+from twisted.python.failure import Failure
+from zope.interface import implementer
+
+from crawler.redis_keys import dns_key
+from env_config import (
+    get_dns_cache_negative_ttl_seconds,
+    get_dns_cache_size,
+    get_dns_cache_ttl_seconds,
+    get_enable_dns_prefetch,
+    get_enable_shared_dns_cache,
+)
+from storage.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# getaddrinfo errors meaning the name does not exist (as opposed to EAI_AGAIN etc.)
+_NXDOMAIN_ERRNOS = {
+    code
+    for code in (getattr(socket, "EAI_NONAME", None), getattr(socket, "EAI_NODATA", None))
+    if code is not None
+}
+
+# Redis value marking a name that does not exist
+_NEGATIVE = "-"
+
+_resolver: "SharedCachingResolver | None" = None
+
+
+class NameNotFoundError(Exception):
+    """The resolver answered that the name does not exist."""
+
+
+def _resolve_ipv4(name: str) -> str:
+    """Resolve a name with the system resolver, flagging NXDOMAIN."""
+    try:
+        return socket.gethostbyname(name)
+    except socket.gaierror as e:
+        if e.errno in _NXDOMAIN_ERRNOS:
+            raise NameNotFoundError(name) from e
+        raise
+
+
+@implementer(IResolverSimple)
+class SharedCachingResolver:
+    """IPv4 resolver with an expiring LRU, optional Redis tier and NXDOMAIN cache.
+
+    Attributes:
+        max_entries: Maximum names held in process.
+        ttl: Lifetime in seconds of resolved addresses.
+        negative_ttl: Lifetime in seconds of NXDOMAIN entries.
+        stats: Counters (local_hit, redis_hit, negative_hit, miss, coalesced,
+            nxdomain, failed, prefetch, evictions, redis_error).
+    """
+
+    def __init__(
+        self,
+        reactor: Any,
+        max_entries: int,
+        timeout: float,
+        ttl: int,
+        negative_ttl: int,
+        redis_client: Any = None,
+        resolve: Callable[[str], str] = _resolve_ipv4,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the resolver.
+
+        Args:
+            reactor: Twisted reactor whose thread pool runs lookups
+            max_entries: Maximum names held in process
+            timeout: Lookup timeout in seconds (DNS_TIMEOUT)
+            ttl: Lifetime of resolved addresses
+            negative_ttl: Lifetime of NXDOMAIN entries
+            redis_client: Optional Redis client shared by crawler processes
+            resolve: Blocking name -> IPv4 function run in the thread pool
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.reactor = reactor
+        self.max_entries = max(1, max_entries)
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._redis = redis_client
+        self._resolve = resolve
+        self._clock = clock
+        # name -> (address or None for NXDOMAIN, expiry)
+        self._entries: OrderedDict[str, tuple[str | None, float]] = OrderedDict()
+        self._pending: dict[str, list[defer.Deferred[str]]] = {}
+        self.stats: dict[str, int] = {
+            key: 0
+            for key in (
+                "local_hit",
+                "redis_hit",
+                "negative_hit",
+                "miss",
+                "coalesced",
+                "nxdomain",
+                "failed",
+                "prefetch",
+                "evictions",
+                "redis_error",
+            )
+        }
+
+    @classmethod
+    def from_crawler(cls, crawler: Any, reactor: Any) -> "SharedCachingResolver":
+        """Create the resolver from settings and the environment.
+
+        Scrapy builds resolvers once per process, passing the CrawlerProcess
+        (settings only, no stats) as crawler.
+        """
+        redis_client = None
+        if get_enable_shared_dns_cache():
+            try:
+                redis_client = get_redis_client(
+                    crawler.settings.get("REDIS_URL", "redis://localhost:6379/0"),
+                    decode_responses=True,
+                )
+            except Exception as e:
+                logger.warning(f"DNS cache running without Redis: {e}")
+        return cls(
+            reactor,
+            max_entries=get_dns_cache_size(),
+            timeout=crawler.settings.getfloat("DNS_TIMEOUT"),
+            ttl=get_dns_cache_ttl_seconds(),
+            negative_ttl=get_dns_cache_negative_ttl_seconds(),
+            redis_client=redis_client,
+        )
+
+    def install_on_reactor(self) -> None:
+        """Install as the reactor resolver and make it reachable for prefetch."""
+        global _resolver
+        self.reactor.installResolver(self)
+        _resolver = self
+
+    def getHostByName(  # noqa: N802
+        self, name: str, timeout: Sequence[int] = ()
+    ) -> defer.Deferred[str]:
+        """Resolve a hostname (IResolverSimple)."""
+        name = name.lower()
+        cached = self._get_local(name)
+        if cached is None:
+            cached = self._get_redis(name)
+        if cached is not None:
+            address = cached[0]
+            if address is None:
+                self._inc("negative_hit")
+                return defer.fail(DNSLookupError(f"address {name!r} not found: NXDOMAIN"))
+            return defer.succeed(address)
+
+        d: defer.Deferred[str] = defer.Deferred()
+        waiters = self._pending.get(name)
+        if waiters is not None:
+            self._inc("coalesced")
+            waiters.append(d)
+            return d
+
+        self._inc("miss")
+        self._pending[name] = [d]
+        lookup = threads.deferToThreadPool(
+            self.reactor, self.reactor.getThreadPool(), self._resolve, name
+        )
+        lookup.addTimeout(self.timeout, self.reactor)
+        lookup.addCallbacks(self._resolved, self._failed, callbackArgs=(name,), errbackArgs=(name,))
+        return d
+
+    def prefetch(self, names: Iterable[str]) -> int:
+        """Start resolving names not already cached, ignoring the results.
+
+        Returns:
+            Number of lookups started.
+        """
+        started = 0
+        for name in names:
+            name = name.lower()
+            if not name or self._get_local(name, count=False) is not None or name in self._pending:
+                continue
+            started += 1
+            self._inc("prefetch")
+            self.getHostByName(name).addErrback(lambda _: None)
+        return started
+
+    def is_nxdomain(self, name: str) -> bool:
+        """Whether a name is currently cached as non-existent."""
+        entry = self._entries.get(name.lower())
+        return entry is not None and entry[0] is None and entry[1] > self._clock()
+
+    def _resolved(self, address: str, name: str) -> None:
+        self._store(name, address, self.ttl)
+        for d in self._pending.pop(name, []):
+            d.callback(address)
+
+    def _failed(self, failure: Failure, name: str) -> None:
+        if isinstance(failure.value, NameNotFoundError):
+            self._inc("nxdomain")
+            self._store(name, None, self.negative_ttl)
+            reason = "NXDOMAIN"
+        else:
+            self._inc("failed")
+            reason = failure.getErrorMessage() or type(failure.value).__name__
+        for d in self._pending.pop(name, []):
+            d.errback(DNSLookupError(f"address {name!r} not found: {reason}"))
+
+    def _get_local(self, name: str, count: bool = True) -> tuple[str | None, float] | None:
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            del self._entries[name]
+            return None
+        self._entries.move_to_end(name)
+        if count:
+            self._inc("local_hit")
+        return entry
+
+    def _get_redis(self, name: str) -> tuple[str | None, float] | None:
+        if self._redis is None:
+            return None
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(dns_key(name))
+            pipe.ttl(dns_key(name))
+            value, ttl = pipe.execute()
+        except Exception as e:
+            self._inc("redis_error")
+            logger.debug(f"DNS cache Redis lookup failed for {name}: {e}")
+            return None
+        if not value or not ttl or ttl <= 0:
+            return None
+        self._inc("redis_hit")
+        address = None if value == _NEGATIVE else str(value)
+        self._store_local(name, address, ttl)
+        return address, ttl
+
+    def _store(self, name: str, address: str | None, ttl: int) -> None:
+        self._store_local(name, address, ttl)
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(dns_key(name), address or _NEGATIVE, ex=ttl)
+        except Exception as e:
+            self._inc("redis_error")
+            logger.debug(f"DNS cache Redis write failed for {name}: {e}")
+
+    def _store_local(self, name: str, address: str | None, ttl: float) -> None:
+        self._entries[name] = (address, self._clock() + ttl)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._inc("evictions")
+
+    def _inc(self, key: str) -> None:
+        self.stats[key] += 1
+
+
+def prefetch_hostnames(names: Iterable[str]) -> int:
+    """Resolve hostnames ahead of their first request (no-op without the resolver).
+
+    Must be called from the reactor thread, e.g. from start_requests or a
+    spider_idle handler.
+
+    Returns:
+        Number of lookups started.
+    """
+    if _resolver is None or not get_enable_dns_prefetch():
+        return 0
+    try:
+        return _resolver.prefetch(names)
+    except Exception as e:
+        logger.debug(f"DNS prefetch failed: {e}")
+        return 0
+
+
+def is_nxdomain(name: str) -> bool:
+    """Whether the installed resolver has a name cached as non-existent."""
+    return _resolver is not None and _resolver.is_nxdomain(name)
+
+
+def get_dns_cache_stats() -> dict[str, int]:
+    """Return the installed resolver's counters (empty without the resolver)."""
+    return dict(_resolver.stats) if _resolver is not None else {}
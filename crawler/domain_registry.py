@@ -0,0 +1,163 @@
+"""Per-domain crawl state for the discovery spider.
+
+Everything the spider tracks about a domain during a run (claim identity,
+page/image/error counters, the portion already flushed to the database,
+and the pending frontier) lives in one DomainState record. Records are
+kept in a DomainRegistry keyed by canonical domain, so every lookup from
+parse, error handling, flushing and shutdown is a single dict access.
+"""
+
+import threading
+from collections import deque
+from collections.abc import Iterator
+from typing import Any
+from uuid import UUID
+
+
+class DomainState:
+    """Crawl state for a single canonical domain.
+
+    Attributes:
+        domain: Canonical domain name (registry key).
+        domain_id: domains.id while this worker holds a claim, else None.
+        version: Claim version for optimistic locking (valid while claimed).
+        pages: Pages parsed this run (also the per-domain budget counter).
+        images_found: Image URLs extracted this run.
+        errors: Failed requests this run.
+        links_discovered: Same-domain links extracted this run.
+        flushed_pages: Value of ``pages`` at the last mid-crawl flush.
+        flushed_images_found: Value of ``images_found`` at the last flush.
+        flushed_errors: Value of ``errors`` at the last flush.
+        flushed_links_discovered: Value of ``links_discovered`` at the last flush.
+        frontier: URLs deferred by the budget (dicts with url and depth).
+    """
+
+    __slots__ = (
+        "domain",
+        "domain_id",
+        "version",
+        "pages",
+        "images_found",
+        "errors",
+        "links_discovered",
+        "flushed_pages",
+        "flushed_images_found",
+        "flushed_errors",
+        "flushed_links_discovered",
+        "frontier",
+    )
+
+    def __init__(self, domain: str) -> None:
+        self.domain = domain
+        self.domain_id: UUID | None = None
+        self.version = 0
+        self.pages = 0
+        self.images_found = 0
+        self.errors = 0
+        self.links_discovered = 0
+        self.flushed_pages = 0
+        self.flushed_images_found = 0
+        self.flushed_errors = 0
+        self.flushed_links_discovered = 0
+        self.frontier: deque[dict[str, Any]] = deque()
+
+    def __repr__(self) -> str:
+        return (
+            f"DomainState(domain={self.domain!r}, domain_id={self.domain_id!r}, "
+            f"pages={self.pages}, errors={self.errors}, frontier={len(self.frontier)})"
+        )
+
+    @property
+    def claimed(self) -> bool:
+        """Whether this worker currently holds a claim on the domain."""
+        return self.domain_id is not None
+
+    @property
+    def has_stats(self) -> bool:
+        """Whether any page or error was recorded for the domain this run."""
+        return self.pages > 0 or self.errors > 0
+
+    def unflushed_deltas(self) -> tuple[int, int, int, int]:
+        """Return counters accumulated since the last flush.
+
+        Returns:
+            Tuple of (pages, images_found, errors, links_discovered) deltas,
+            each clamped at zero.
+        """
+        return (
+            max(0, self.pages - self.flushed_pages),
+            max(0, self.images_found - self.flushed_images_found),
+            max(0, self.errors - self.flushed_errors),
+            max(0, self.links_discovered - self.flushed_links_discovered),
+        )
+
+    def mark_flushed(self) -> None:
+        """Record the current counters as persisted."""
+        self.flushed_pages = self.pages
+        self.flushed_images_found = self.images_found
+        self.flushed_errors = self.errors
+        self.flushed_links_discovered = self.links_discovered
+
+
+class DomainRegistry:
+    """Canonical domain -> DomainState map shared by the spider and heartbeat.
+
+    Lookups are lock-free. Inserts, claim changes and snapshots take the
+    registry lock because the claim heartbeat runs on a background thread.
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[str, DomainState] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, domain: object) -> bool:
+        return domain in self._states
+
+    def __iter__(self) -> Iterator[DomainState]:
+        return iter(self.snapshot())
+
+    def get(self, domain: str) -> DomainState | None:
+        """Return the state for a canonical domain, or None if untracked."""
+        return self._states.get(domain)
+
+    def get_or_create(self, domain: str) -> DomainState:
+        """Return the state for a canonical domain, creating it if needed."""
+        state = self._states.get(domain)
+        if state is None:
+            with self.lock:
+                state = self._states.setdefault(domain, DomainState(domain))
+        return state
+
+    def claim(self, domain: str, domain_id: UUID, version: int) -> DomainState:
+        """Attach a claim to a domain's state.
+
+        Args:
+            domain: Canonical domain name
+            domain_id: domains.id of the claimed row
+            version: Claim version returned by claim_domains
+
+        Returns:
+            The domain's state record.
+        """
+        state = self.get_or_create(domain)
+        with self.lock:
+            state.domain_id = domain_id
+            state.version = version
+        return state
+
+    def snapshot(self) -> list[DomainState]:
+        """Return a point-in-time list of all tracked domain states."""
+        with self.lock:
+            return list(self._states.values())
+
+    def claimed(self) -> list[DomainState]:
+        """Return a point-in-time list of states this worker holds claims on."""
+        with self.lock:
+            return [state for state in self._states.values() if state.domain_id is not None]
+
+    def has_claims(self) -> bool:
+        """Whether this worker holds any domain claims."""
+        return bool(self.claimed())
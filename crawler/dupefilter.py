@@ -55,11 +55,11 @@ class PersistentRFPDupeFilter(BaseDupeFilter):
         Returns:
             Configured dupefilter instance.
         """
-        import redis
+        from storage.redis_client import get_redis_client
 
         redis_url = settings.get("REDIS_URL", "redis://localhost:6379/0")
         key_prefix = settings.get("DUPEFILTER_KEY_PREFIX", "dupefilter")
-        client = redis.from_url(redis_url)  # type: ignore[no-untyped-call]
+        client = get_redis_client(redis_url)
         return cls(client, key_prefix)
 
     def _get_fingerprint(self, request: Any) -> str:
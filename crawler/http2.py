@@ -0,0 +1,129 @@
+"""HTTP/2 download handler for image requests.
+
+Image URLs concentrate on a few CDN hosts. Over HTTP/1.1 every concurrent
+image request to a host needs its own keep-alive connection (and TLS
+handshake); over HTTP/2 they share one connection per host as streams.
+
+ImageHttp2DownloadHandler is installed for the https scheme. It sends
+image-lane requests (see crawler.lanes) through Scrapy's H2 handler, at most
+HTTP2_MAX_CONCURRENT_STREAMS at a time per host, and everything else
+(pages, proxied requests) through the regular HTTP/1.1 handler.
+
+Hosts that do not speak h2 fail in different ways (ALPN mismatch, TLS alert,
+connection closed after the h2 preface). A host negotiating another
+protocol, or failing at connection level before it ever answered over h2,
+is remembered as HTTP/1.1-only for the rest of the process and the request
+is retried over HTTP/1.1.
+
+Requires the h2 package (see requirements.txt); without it
+the handler logs a warning and behaves like the HTTP/1.1 handler.
+
+Stats (under http2/): requests, fallback_hosts, fallback_requests.
+"""
+
+import logging
+from typing import Any
+
+from scrapy.core.downloader.handlers.base import BaseDownloadHandler
+from scrapy.core.downloader.handlers.http11 import HTTP11DownloadHandler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from scrapy.utils.defer import maybe_deferred_to_future
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import build_from_crawler
+from twisted.internet.defer import DeferredSemaphore
+from twisted.web.client import ResponseFailed
+
+from crawler.lanes import IMAGE_LANE, request_lane
+from env_config import get_enable_http2_images, get_http2_max_concurrent_streams
+
+logger = logging.getLogger(__name__)
+
+
+def _caused_by(exc: BaseException, error_types: tuple[type[BaseException], ...]) -> bool:
+    """Whether exc or anything in its cause chain (incl. ResponseFailed reasons) matches."""
+    seen: set[int] = set()
+    pending: list[Any] = [exc]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, error_types):
+            return True
+        pending.extend((current.__cause__, current.__context__))
+        # twisted.web ResponseFailed keeps the underlying Failures in .reasons
+        pending.extend(getattr(reason, "value", None) for reason in getattr(current, "reasons", []))
+    return False
+
+
+class ImageHttp2DownloadHandler(BaseDownloadHandler):
+    """https handler multiplexing image requests over one HTTP/2 connection per host."""
+
+    lazy = False
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the handler.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        super().__init__(crawler)
+        self._http11 = build_from_crawler(HTTP11DownloadHandler, crawler)
+        self._h2: Any = None
+        self._fallback_errors: tuple[type[BaseException], ...] = ()
+        if get_enable_http2_images():
+            try:
+                from scrapy.core._http2.protocol import InvalidNegotiatedProtocol
+                from scrapy.core.downloader.handlers.http2 import H2DownloadHandler
+
+                self._h2 = build_from_crawler(H2DownloadHandler, crawler)
+                self._fallback_errors = (InvalidNegotiatedProtocol,)
+            except (ImportError, NotConfigured) as e:
+                logger.warning(f"HTTP/2 for images disabled, using HTTP/1.1: {e}")
+        self.max_streams = get_http2_max_concurrent_streams()
+        self._streams: dict[str, DeferredSemaphore] = {}
+        self._http2_hosts: set[str] = set()
+        self._http11_hosts: set[str] = set()
+
+    async def download_request(self, request: Request) -> Response:
+        """Download over HTTP/2 for image requests to h2 hosts, else HTTP/1.1."""
+        parsed = urlparse_cached(request)
+        netloc = parsed.netloc
+        if (
+            self._h2 is None
+            or request_lane(request) != IMAGE_LANE
+            or parsed.scheme != "https"
+            or request.meta.get("proxy")
+            or netloc in self._http11_hosts
+        ):
+            return await self._http11.download_request(request)
+
+        streams = self._streams.get(netloc)
+        if streams is None:
+            streams = self._streams[netloc] = DeferredSemaphore(self.max_streams)
+        await maybe_deferred_to_future(streams.acquire())
+        try:
+            response: Response = await self._h2.download_request(request)
+            self._http2_hosts.add(netloc)
+            self.crawler.stats.inc_value("http2/requests")
+            return response
+        except Exception as e:
+            never_h2 = netloc not in self._http2_hosts and _caused_by(e, (ResponseFailed,))
+            if not (never_h2 or _caused_by(e, self._fallback_errors)):
+                raise
+            if netloc not in self._http11_hosts:
+                self._http11_hosts.add(netloc)
+                self.crawler.stats.inc_value("http2/fallback_hosts")
+                logger.debug(f"{netloc} does not negotiate HTTP/2, falling back to HTTP/1.1")
+        finally:
+            streams.release()
+
+        self.crawler.stats.inc_value("http2/fallback_requests")
+        return await self._http11.download_request(request)
+
+    async def close(self) -> None:
+        """Close pooled HTTP/1.1 and HTTP/2 connections."""
+        await self._http11.close()
+        if self._h2 is not None:
+            await self._h2.close()
@@ -0,0 +1,159 @@
+"""Separate page and image download lanes.
+
+Image requests (meta "lane" == IMAGE_LANE) get their own budget at two
+levels:
+
+- LaneScheduler (Phase C local scheduler) keeps images in a second
+  priority queue and hands out requests so that at most
+  IMAGE_CONCURRENT_REQUESTS images and SCRAPY_CONCURRENT_REQUESTS pages
+  are in the downloader at once, alternating when both lanes have room.
+  Neither lane can starve the other. CONCURRENT_REQUESTS is set to the
+  sum of both budgets.
+- ImageLaneMiddleware puts image requests into downloader slots keyed on
+  the image host ("img:cdn.example.net") with IMAGE_CONCURRENT_REQUESTS_PER_HOST
+  and IMAGE_DOWNLOAD_DELAY, so CDN fetches are not held back by the page
+  domain's politeness delay and do not hold back page requests.
+
+Per-lane stats are recorded under lanes/page/* and lanes/image/*.
+"""
+
+from typing import Any
+
+from scrapy import Spider
+from scrapy.core.scheduler import Scheduler
+from scrapy.http import Request, Response
+from scrapy.utils.httpobj import urlparse_cached
+
+from env_config import (
+    get_image_concurrent_requests,
+    get_image_concurrent_requests_per_host,
+    get_image_download_delay,
+    get_scrapy_concurrent_requests,
+)
+
+PAGE_LANE = "page"
+IMAGE_LANE = "image"
+
+# Prefix of image downloader slots, so an image host never shares a page slot
+IMAGE_SLOT_PREFIX = "img:"
+
+
+def request_lane(request: Request) -> str:
+    """Return the lane of a request (page unless tagged as image)."""
+    return IMAGE_LANE if request.meta.get("lane") == IMAGE_LANE else PAGE_LANE
+
+
+def image_slot_key(request: Request) -> str:
+    """Return the downloader slot key of an image request."""
+    return IMAGE_SLOT_PREFIX + (urlparse_cached(request).hostname or "")
+
+
+class LaneScheduler(Scheduler):
+    """Local scheduler with separate page and image queues and budgets.
+
+    Images are kept in memory only (no JOBDIR disk queue); they are cheap to
+    rediscover from their pages.
+    """
+
+    def open(self, spider: Spider) -> Any:
+        """Open the page queues and the image queue."""
+        result = super().open(spider)
+        self.image_mqs = self._mq()
+        self.page_budget = get_scrapy_concurrent_requests()
+        self.image_budget = get_image_concurrent_requests()
+        self._prefer_images = False
+        return result
+
+    def enqueue_request(self, request: Request) -> bool:
+        """Queue a request in its lane unless the dupefilter has seen it."""
+        if request_lane(request) != IMAGE_LANE:
+            return super().enqueue_request(request)
+        if not request.dont_filter and self.df.request_seen(request):
+            self.df.log(request, self.spider)
+            return False
+        # Key the slot now so downloader-aware queues bucket images by image host
+        request.meta.setdefault("download_slot", image_slot_key(request))
+        self.image_mqs.push(request)
+        assert self.stats is not None
+        self.stats.inc_value("scheduler/enqueued/image")
+        self.stats.inc_value("scheduler/enqueued")
+        return True
+
+    def next_request(self) -> Request | None:
+        """Return the next request from a lane with free budget.
+
+        When both lanes have queued requests and room, they alternate.
+        Returns None when the lanes with queued requests are at budget; the
+        engine asks again as downloads complete.
+        """
+        images_active, pages_active = self._active_counts()
+        image_ready = len(self.image_mqs) > 0 and images_active < self.image_budget
+        page_ready = super().__len__() > 0 and pages_active < self.page_budget
+
+        if image_ready and (self._prefer_images or not page_ready):
+            self._prefer_images = False
+            request: Request | None = self.image_mqs.pop()
+            if request is not None:
+                assert self.stats is not None
+                self.stats.inc_value("scheduler/dequeued/image")
+                self.stats.inc_value("scheduler/dequeued")
+                return request
+        if page_ready:
+            self._prefer_images = True
+            return super().next_request()
+        return None
+
+    def __len__(self) -> int:
+        """Return the number of queued requests in both lanes."""
+        return super().__len__() + len(self.image_mqs)
+
+    def _active_counts(self) -> tuple[int, int]:
+        """Return (image, page) requests currently in the downloader."""
+        assert self.crawler is not None
+        engine = self.crawler.engine
+        active = engine.downloader.active if engine is not None else ()
+        images = sum(1 for request in active if request_lane(request) == IMAGE_LANE)
+        return images, len(active) - images
+
+
+class ImageLaneMiddleware:
+    """Downloader middleware giving image hosts their own slots and lane stats."""
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the middleware.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.slot_settings = {
+            "concurrency": get_image_concurrent_requests_per_host(),
+            "delay": get_image_download_delay(),
+        }
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "ImageLaneMiddleware":
+        """Create the middleware."""
+        return cls(crawler)
+
+    def process_request(self, request: Request) -> None:
+        """Route image requests to per-host image slots and count requests per lane."""
+        lane = request_lane(request)
+        if lane == IMAGE_LANE:
+            key = request.meta.setdefault("download_slot", image_slot_key(request))
+            engine = getattr(self.crawler, "engine", None)
+            if engine is not None:
+                engine.downloader.per_slot_settings.setdefault(key, self.slot_settings)
+        self.stats.inc_value(f"lanes/{lane}/request_count")
+
+    def process_response(self, request: Request, response: Response) -> Response:
+        """Count responses and bytes per lane."""
+        lane = request_lane(request)
+        self.stats.inc_value(f"lanes/{lane}/response_count")
+        self.stats.inc_value(f"lanes/{lane}/response_bytes", len(response.body))
+        return response
+
+    def process_exception(self, request: Request, exception: Exception) -> None:
+        """Count download errors per lane."""
+        self.stats.inc_value(f"lanes/{request_lane(request)}/exception_count")
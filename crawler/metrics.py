@@ -0,0 +1,378 @@
+"""Process-wide Prometheus-style metrics.
+
+A small in-process registry of counters, gauges and histograms, rendered
+in the Prometheus text exposition format by crawler.metrics_server (the
+/metrics endpoint). It has no dependencies so that storage/ and
+processor/ can record into it without importing Scrapy.
+
+Recording is a dict update under a lock (histograms add a bisect), cheap
+enough to stay on whether or not the endpoint is enabled. Values that
+already live elsewhere (pipeline counters, frontier sizes, pool usage)
+are not recorded at all: a callback reads them when /metrics is scraped.
+
+Rates such as pages/sec and images/sec are left to the scraper, e.g.
+``rate(crawler_responses_total{lane="page"}[1m])``.
+"""
+
+import abc
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+# Seconds; covers CPU-bound image stages (ms) up to slow downloads
+DEFAULT_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelValues = tuple[str, ...]
+MetricCallback = Callable[[], dict[LabelValues, float]]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(abc.ABC):
+    """Base class: a named metric family with fixed label names.
+
+    Attributes:
+        name: Metric name (counters end in _total).
+        documentation: HELP text.
+        labelnames: Names of the labels every sample carries.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        """Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names; values are passed positionally when recording
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _check(self, labels: LabelValues) -> None:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+
+    @abc.abstractmethod
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:
+        """Yield (sample name, label names, label values, value)."""
+
+    def render(self) -> list[str]:
+        """Return the exposition lines of this metric."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for sample, names, values, value in self.samples():
+            lines.append(f"{sample}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class _ValueMetric(Metric):
+    """Counter/gauge storage: one float per label combination, or a callback."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._callback: MetricCallback | None = None
+
+    def set_callback(self, callback: MetricCallback | None) -> None:
+        """Read values from a callback at render time instead of stored values.
+
+        Args:
+            callback: Returns {label values: value}; None restores stored values.
+        """
+        self._callback = callback
+
+    def get(self, *labels: str) -> float:
+        """Return the current value for a label combination (0 if unset)."""
+        return self._collect().get(labels, 0.0)
+
+    def clear(self) -> None:
+        """Drop stored values."""
+        with self._lock:
+            self._values.clear()
+
+    def _collect(self) -> dict[LabelValues, float]:
+        callback = self._callback
+        if callback is not None:
+            return callback()
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:
+        for labels, value in sorted(self._collect().items()):
+            yield self.name, self.labelnames, labels, value
+
+
+class Counter(_ValueMetric):
+    """Monotonically increasing value (resets only when the process restarts)."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add to the counter for a label combination."""
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_ValueMetric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        """Set the gauge for a label combination."""
+        self._check(labels)
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed upper bounds.
+
+    Attributes:
+        buckets: Sorted bucket upper bounds (+Inf is implicit).
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        """Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Label names
+            buckets: Bucket upper bounds in ascending order
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation."""
+        self._check(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Return a context manager observing the wall time of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        """Return the number of observations for a label combination."""
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def clear(self) -> None:
+        """Drop all observations."""
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Iterator[tuple[str, LabelValues, tuple[str, ...], float]]:
+        with self._lock:
+            snapshot = {
+                labels: (list(counts), total[0]) for labels, (counts, total) in self._series.items()
+            }
+        bucket_names = (*self.labelnames, "le")
+        for labels, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    bucket_names,
+                    (*labels, _format_value(bound)),
+                    cumulative,
+                )
+            yield f"{self.name}_sum", self.labelnames, labels, total
+            yield f"{self.name}_count", self.labelnames, labels, cumulative
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: LabelValues) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; names must be unique."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        """Create and register a counter."""
+        metric = Counter(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        """Create and register a gauge."""
+        metric = Gauge(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        """Return a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format (0.0.4).
+
+        A metric whose callback fails is skipped, so one broken source does
+        not take down the whole scrape.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(str(e))}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Downloads (recorded by crawler.metrics_server from response signals)
+RESPONSES = REGISTRY.counter(
+    "crawler_responses_total", "Downloaded responses by lane and status class", ("lane", "status")
+)
+RESPONSE_BYTES = REGISTRY.counter(
+    "crawler_response_bytes_total", "Downloaded response body bytes by lane", ("lane",)
+)
+DOWNLOAD_ERRORS = REGISTRY.counter(
+    "crawler_download_errors_total", "Requests that failed without a response by lane", ("lane",)
+)
+DOWNLOAD_SECONDS = REGISTRY.histogram(
+    "crawler_download_seconds", "Download latency (request sent to response) by lane", ("lane",)
+)
+
+# Image pipeline (counters read from ImageProcessingPipeline at scrape time)
+IMAGES = REGISTRY.counter("crawler_images_total", "Image items by pipeline outcome", ("result",))
+IMAGE_BYTES = REGISTRY.counter("crawler_image_bytes_total", "Bytes of newly stored images")
+IMAGE_REJECTIONS = REGISTRY.counter(
+    "crawler_image_rejections_total", "Images rejected by validation, by reason", ("reason",)
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    "crawler_stage_seconds",
+    "Wall time of image processing stages (validate includes decoding)",
+    ("stage",),
+)
+IMAGE_SPAN_SECONDS = REGISTRY.histogram(
+    "crawler_image_span_seconds",
+    "Time between lifecycle marks of traced images (total = scheduled to last mark)",
+    ("span",),
+    # Scheduler waits can take minutes
+    (*DEFAULT_LATENCY_BUCKETS, 60.0, 120.0, 300.0, 600.0),
+)
+
+# Crawl state (callbacks installed by crawler.metrics_server)
+FRONTIER_SIZE = REGISTRY.gauge(
+    "crawler_frontier_size", "Requests waiting to be crawled by queue", ("queue",)
+)
+CLAIMED_DOMAINS = REGISTRY.gauge("crawler_claimed_domains", "Domains this worker holds claims on")
+IN_FLIGHT = REGISTRY.gauge(
+    "crawler_requests_in_flight", "Requests in the downloader by lane", ("lane",)
+)
+
+# Storage calls
+DB_CALL_SECONDS = REGISTRY.histogram(
+    "crawler_db_call_seconds",
+    "Time a pooled Postgres connection is held per get_connection() block",
+)
+REDIS_CALL_SECONDS = REGISTRY.histogram(
+    "crawler_redis_call_seconds", "Time a pooled Redis connection is held per command or pipeline"
+)
+POOL_CONNECTIONS_IN_USE = REGISTRY.gauge(
+    "crawler_pool_connections_in_use", "Checked-out pooled connections by backend", ("backend",)
+)
+DB_POOL_WAITS = REGISTRY.counter(
+    "crawler_db_pool_waits_total", "Postgres checkouts that waited for a free pooled connection"
+)
+
+PROCESS_CPU_SECONDS = REGISTRY.counter(
+    "process_cpu_seconds_total", "User and system CPU time of the process"
+)
+PROCESS_CPU_SECONDS.set_callback(lambda: {(): time.process_time()})
@@ -0,0 +1,167 @@
+"""HTTP endpoint serving crawler metrics in the Prometheus text format.
+
+MetricsServer is a Scrapy extension (enabled with ENABLE_METRICS) that
+listens on METRICS_BIND_ADDRESS, on the first free port of METRICS_PORT,
+from the crawler's own reactor; GET /metrics renders the process-wide
+registry in crawler/metrics.py. Scrapes run on the reactor thread between
+downloads, no extra thread or server process is involved.
+
+Besides serving, the extension feeds the registry from downloader signals
+(responses, bytes and download latency per lane, failed downloads) and
+installs callbacks that read the crawl state only when scraped: scheduler
+and deferred frontier sizes, claimed domains, requests in flight, and
+Postgres/Redis pool usage. The image pipeline, the image processing
+stages and the Postgres/Redis clients record their own metrics.
+"""
+
+import logging
+import weakref
+from typing import Any
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from scrapy.utils.reactor import listen_tcp
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+from crawler.lanes import IMAGE_LANE, PAGE_LANE, request_lane
+from crawler.metrics import (
+    CLAIMED_DOMAINS,
+    DB_POOL_WAITS,
+    DOWNLOAD_ERRORS,
+    DOWNLOAD_SECONDS,
+    FRONTIER_SIZE,
+    IN_FLIGHT,
+    POOL_CONNECTIONS_IN_USE,
+    REGISTRY,
+    RESPONSE_BYTES,
+    RESPONSES,
+    MetricsRegistry,
+)
+from env_config import get_enable_metrics, get_metrics_bind_address, get_metrics_port_range
+from storage.db import get_db_pool_stats
+from storage.redis_client import get_redis_pool_stats
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsResource(Resource):
+    """twisted.web resource rendering a registry on GET."""
+
+    isLeaf = True  # noqa: N815 (twisted.web naming)
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY) -> None:
+        """Initialize the resource.
+
+        Args:
+            registry: Registry to render
+        """
+        super().__init__()  # type: ignore[no-untyped-call]
+        self.registry = registry
+
+    def render_GET(self, request: Any) -> bytes:  # noqa: N802 (twisted.web naming)
+        """Return the exposition text."""
+        request.setHeader(b"Content-Type", CONTENT_TYPE)
+        return self.registry.render().encode("utf-8")
+
+
+class MetricsServer:
+    """Scrapy extension serving /metrics and recording downloader metrics."""
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the extension.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        if not get_enable_metrics():
+            raise NotConfigured
+        self.crawler = crawler
+        self.spider: Any = None
+        self.port: Any = None
+        self._answered: weakref.WeakSet[Request] = weakref.WeakSet()
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "MetricsServer":
+        """Create the extension and connect signals."""
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(
+            extension.request_left_downloader, signal=signals.request_left_downloader
+        )
+        return extension
+
+    def spider_opened(self, spider: Any) -> None:
+        """Install crawl state callbacks and start listening."""
+        self.spider = spider
+        FRONTIER_SIZE.set_callback(self._frontier_sizes)
+        CLAIMED_DOMAINS.set_callback(self._claimed_domains)
+        IN_FLIGHT.set_callback(self._in_flight)
+        POOL_CONNECTIONS_IN_USE.set_callback(_pool_connections_in_use)
+        DB_POOL_WAITS.set_callback(lambda: {(): get_db_pool_stats()["waits"]})
+        try:
+            site: Any = Site(MetricsResource())  # type: ignore[no-untyped-call]
+            self.port = listen_tcp(get_metrics_port_range(), get_metrics_bind_address(), site)
+        except Exception as e:
+            logger.warning(f"Metrics endpoint disabled, could not listen: {e}")
+            return
+        host = self.port.getHost()
+        logger.info(f"Serving metrics on http://{host.host}:{host.port}/metrics")
+
+    def spider_closed(self, spider: Any) -> None:
+        """Stop listening and detach callbacks holding the spider."""
+        if self.port is not None:
+            self.port.stopListening()
+            self.port = None
+        for gauge in (FRONTIER_SIZE, CLAIMED_DOMAINS, IN_FLIGHT):
+            gauge.set_callback(None)
+        self.spider = None
+
+    def response_downloaded(self, response: Response, request: Request, spider: Any) -> None:
+        """Count a response with its size and download latency."""
+        self._answered.add(request)
+        lane = request_lane(request)
+        RESPONSES.inc(lane, f"{response.status // 100}xx")
+        RESPONSE_BYTES.inc(lane, amount=len(response.body))
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            DOWNLOAD_SECONDS.observe(latency, lane)
+
+    def request_left_downloader(self, request: Request, spider: Any) -> None:
+        """Count a download that failed without a response."""
+        if request not in self._answered:
+            DOWNLOAD_ERRORS.inc(request_lane(request))
+
+    def _frontier_sizes(self) -> dict[tuple[str, ...], float]:
+        sizes: dict[tuple[str, ...], float] = {}
+        scheduler = getattr(self.crawler.engine, "scheduler", None)
+        if scheduler is not None:
+            sizes[("scheduler",)] = len(scheduler)
+        registry = getattr(self.spider, "_domain_registry", None)
+        if registry is not None:
+            sizes[("deferred",)] = sum(len(state.frontier) for state in registry.snapshot())
+        return sizes
+
+    def _claimed_domains(self) -> dict[tuple[str, ...], float]:
+        registry = getattr(self.spider, "_domain_registry", None)
+        return {(): len(registry.claimed())} if registry is not None else {}
+
+    def _in_flight(self) -> dict[tuple[str, ...], float]:
+        counts: dict[tuple[str, ...], float] = {(PAGE_LANE,): 0.0, (IMAGE_LANE,): 0.0}
+        engine = self.crawler.engine
+        if engine is not None:
+            for request in list(engine.downloader.active):
+                counts[(request_lane(request),)] += 1
+        return counts
+
+
+def _pool_connections_in_use() -> dict[tuple[str, ...], float]:
+    return {
+        ("postgres",): get_db_pool_stats()["in_use"],
+        ("redis",): get_redis_pool_stats()["in_use"],
+    }
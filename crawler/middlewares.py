@@ -0,0 +1,256 @@
+"""Downloader middlewares for InvisibleCrawler.
+
+SharedRobotsTxtMiddleware replaces Scrapy's RobotsTxtMiddleware with a
+two-tier robots.txt cache. Parsed rules are kept per process with an
+expiry; raw bodies are stored in Redis so that a domain claimed by another
+worker (Phase C hands domains over on every claim) does not trigger another
+robots.txt download. Missing (4xx) and unreachable robots.txt results are
+cached too, with a shorter TTL, and mean "allow all" as in Scrapy.
+
+prefetch_robots() lets the spider warm rules for freshly claimed domains
+in parallel; the robots.txt fetch also leaves a pooled keep-alive
+connection that the domain's first page request reuses.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from scrapy import signals
+from scrapy.downloadermiddlewares.robotstxt import RobotsTxtMiddleware
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Request, Response
+from scrapy.utils.defer import deferred_from_coro
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.misc import build_from_crawler
+
+from crawler.redis_keys import robots_key
+from env_config import (
+    get_enable_shared_robots_cache,
+    get_robots_cache_negative_ttl_seconds,
+    get_robots_cache_ttl_seconds,
+)
+from storage.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Lower bound for cached rules, also used for no-cache/no-store responses
+ROBOTS_CACHE_MIN_TTL_SECONDS = 60
+
+# Redis value prefixes: rules body follows "+", "-" marks missing/unreachable
+_POSITIVE = b"+"
+_NEGATIVE = b"-"
+
+_middleware: "SharedRobotsTxtMiddleware | None" = None
+
+
+def robots_cache_ttl(response: Response, default: int, cap: int) -> int:
+    """Return how long a robots.txt response may be cached.
+
+    Honors Cache-Control s-maxage/max-age (s-maxage first, as this is a
+    shared cache), clamped to [ROBOTS_CACHE_MIN_TTL_SECONDS, cap].
+
+    Args:
+        response: robots.txt response
+        default: TTL when no usable Cache-Control directive is present
+        cap: Maximum TTL
+
+    Returns:
+        TTL in seconds.
+    """
+    raw = response.headers.get(b"Cache-Control")
+    directives: dict[str, str] = {}
+    if raw:
+        for part in raw.decode("latin-1").lower().split(","):
+            name, _, value = part.strip().partition("=")
+            directives[name] = value.strip('" ')
+
+    if "no-store" in directives or "no-cache" in directives:
+        return ROBOTS_CACHE_MIN_TTL_SECONDS
+    for name in ("s-maxage", "max-age"):
+        try:
+            ttl = int(directives[name])
+        except (KeyError, ValueError):
+            continue
+        return max(ROBOTS_CACHE_MIN_TTL_SECONDS, min(ttl, cap))
+    return min(default, cap)
+
+
+class SharedRobotsTxtMiddleware(RobotsTxtMiddleware):
+    """RobotsTxtMiddleware with expiring local rules and a Redis body cache.
+
+    Stats (under robotstxt/cache/): local_hit, redis_hit, negative_hit,
+    miss, stored, redis_error, and hit_rate at spider close.
+    """
+
+    def __init__(
+        self,
+        crawler: Any,
+        redis_client: Any = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            crawler: Scrapy crawler
+            redis_client: Optional Redis client shared by all workers
+            clock: Monotonic time source (injectable for tests)
+        """
+        super().__init__(crawler)
+        self._redis = redis_client
+        self._clock = clock
+        self._expires: dict[str, float] = {}
+        self.ttl = get_robots_cache_ttl_seconds()
+        self.negative_ttl = get_robots_cache_negative_ttl_seconds()
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "SharedRobotsTxtMiddleware":
+        """Create the middleware, connecting to Redis when sharing is enabled."""
+        redis_client = None
+        if crawler.settings.getbool("ROBOTSTXT_OBEY") and get_enable_shared_robots_cache():
+            try:
+                redis_client = get_redis_client(
+                    crawler.settings.get("REDIS_URL", "redis://localhost:6379/0")
+                )
+            except Exception as e:
+                logger.warning(f"robots.txt cache running without Redis: {e}")
+        global _middleware
+        middleware = cls(crawler, redis_client)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        _middleware = middleware
+        return middleware
+
+    async def robot_parser(self, request: Request) -> Any:
+        """Return the parser for a request's host: local, then Redis, then fetch."""
+        netloc = urlparse_cached(request).netloc
+
+        if netloc in self._parsers:
+            expires = self._expires.get(netloc)
+            # No expiry yet means a fetch is in flight: wait for it
+            if expires is None or expires > self._clock():
+                self._stats.inc_value("robotstxt/cache/local_hit")
+                return await super().robot_parser(request)
+            del self._parsers[netloc]
+            del self._expires[netloc]
+
+        cached = self._redis_get(netloc)
+        if cached is not None:
+            value, ttl = cached
+            self._stats.inc_value("robotstxt/cache/redis_hit")
+            if value.startswith(_POSITIVE):
+                parser = build_from_crawler(self._parserimpl, self.crawler, value[1:])
+            else:
+                self._stats.inc_value("robotstxt/cache/negative_hit")
+                parser = None
+            self._parsers[netloc] = parser
+            self._expires[netloc] = self._clock() + ttl
+            return parser
+
+        self._stats.inc_value("robotstxt/cache/miss")
+        return await super().robot_parser(request)
+
+    def prefetch(self, urls: Iterable[str]) -> int:
+        """Start loading robots.txt rules for hosts without fresh local rules.
+
+        Args:
+            urls: URLs whose hosts to warm (e.g. claimed domains' root URLs)
+
+        Returns:
+            Number of hosts being loaded.
+        """
+        seen: set[str] = set()
+        for url in urls:
+            request = Request(url)
+            netloc = urlparse_cached(request).netloc
+            expires = self._expires.get(netloc)
+            if netloc in seen or (
+                netloc in self._parsers and (expires is None or expires > self._clock())
+            ):
+                continue
+            seen.add(netloc)
+            self._stats.inc_value("robotstxt/cache/prefetch")
+            deferred_from_coro(self.robot_parser(request)).addErrback(lambda _: None)
+        return len(seen)
+
+    async def _parse_robots(self, response: Response, netloc: str, request: Request) -> None:
+        if response.status >= 400:
+            # Missing or failing robots.txt: allow all, cached briefly
+            self._stats.inc_value("robotstxt/response_count")
+            self._stats.inc_value(f"robotstxt/response_status_count/{response.status}")
+            self._cache(netloc, _NEGATIVE, self.negative_ttl)
+            parser_dfd = self._parsers[netloc]
+            self._parsers[netloc] = None
+            parser_dfd.callback(None)  # type: ignore[union-attr]
+            return
+
+        self._cache(
+            netloc, _POSITIVE + response.body, robots_cache_ttl(response, self.ttl, self.ttl)
+        )
+        await super()._parse_robots(response, netloc, request)
+
+    def _robots_error(self, exc: Exception, netloc: str) -> None:
+        # IgnoreRequest is a local decision (e.g. this worker's filters): do not share it
+        self._cache(
+            netloc, None if isinstance(exc, IgnoreRequest) else _NEGATIVE, self.negative_ttl
+        )
+        super()._robots_error(exc, netloc)
+
+    def _cache(self, netloc: str, value: bytes | None, ttl: int) -> None:
+        """Set the local expiry of a host's rules and share the raw value."""
+        self._expires[netloc] = self._clock() + ttl
+        if value is None or self._redis is None:
+            return
+        try:
+            self._redis.set(robots_key(netloc), value, ex=ttl)
+            self._stats.inc_value("robotstxt/cache/stored")
+        except Exception as e:
+            self._stats.inc_value("robotstxt/cache/redis_error")
+            logger.debug(f"robots.txt cache Redis write failed for {netloc}: {e}")
+
+    def _redis_get(self, netloc: str) -> tuple[bytes, int] | None:
+        """Return (value, remaining TTL) from Redis, or None on miss/error."""
+        if self._redis is None:
+            return None
+        try:
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.get(robots_key(netloc))
+            pipe.ttl(robots_key(netloc))
+            value, ttl = pipe.execute()
+        except Exception as e:
+            self._stats.inc_value("robotstxt/cache/redis_error")
+            logger.debug(f"robots.txt cache Redis lookup failed for {netloc}: {e}")
+            return None
+        if not value:
+            return None
+        # TTL of -1 (no expiry) should not happen; fall back to the default
+        return bytes(value), ttl if ttl and ttl > 0 else self.ttl
+
+    def spider_closed(self, spider: Any) -> None:
+        """Record the overall cache hit rate in stats."""
+        global _middleware
+        if _middleware is self:
+            _middleware = None
+        hits = sum(
+            self._stats.get_value(f"robotstxt/cache/{key}", 0) for key in ("local_hit", "redis_hit")
+        )
+        lookups = hits + self._stats.get_value("robotstxt/cache/miss", 0)
+        if lookups:
+            self._stats.set_value("robotstxt/cache/hit_rate", round(hits / lookups, 4))
+
+
+def prefetch_robots(urls: Iterable[str]) -> int:
+    """Warm robots.txt rules for the hosts of urls (no-op without the middleware).
+
+    Must be called from the reactor thread while the engine is running.
+
+    Returns:
+        Number of hosts being loaded.
+    """
+    if _middleware is None:
+        return 0
+    try:
+        return _middleware.prefetch(urls)
+    except Exception as e:
+        logger.debug(f"robots.txt prefetch failed: {e}")
+        return 0
@@ -4,19 +4,30 @@ Pipelines process scraped items (images) and persist them to storage.
 """
 
 import logging
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from scrapy.exceptions import DropItem
 from scrapy.spiders import Spider
 
+from crawler.metrics import IMAGE_BYTES, IMAGE_REJECTIONS, IMAGES, STAGE_SECONDS
+from crawler.tracing import mark
 from env_config import (
+    get_asset_write_batch_size,
+    get_asset_write_flush_interval_seconds,
     get_discovery_refresh_after_days,
+    get_enable_immutable_assets,
+    get_enable_near_duplicate_index,
+    get_image_hash_cache_warm_domains,
+    get_image_hash_cache_warm_limit,
     get_image_min_height,
     get_image_min_width,
+    get_near_duplicate_index_path,
 )
 from processor.async_fetcher import ScrapyImageDownloader
 from processor.fetcher import ImageFetcher, ImageFetchResult
+from processor.fingerprint import perceptual_hash_to_bigint
 from processor.media_policy import (
     REJECTION_REASON_FILE_TOO_LARGE,
     REJECTION_REASON_FILE_TOO_SMALL,
@@ -27,10 +38,25 @@ from processor.media_policy import (
     REJECTION_REASON_MISSING_RESPONSE,
     REJECTION_REASON_UNSUPPORTED_CONTENT_TYPE,
 )
-from storage.db import get_cursor
+from processor.near_duplicate_index import NearDuplicateIndexSet
+from storage.asset_repository import (
+    AssetObservationWriter,
+    AssetRecord,
+    ObservationRecord,
+    asset_exists,
+    build_observation,
+    get_last_observation,
+)
+from storage.blob_store import BlobWriter, create_blob_writer
+from storage.db import execute_prepared, get_cursor
+from storage.hash_cache import ImageHashCache, get_image_hash_cache
+from storage.image_repository import touch_images
 
 logger = logging.getLogger(__name__)
 
+# 304 (unchanged) image URLs collected before one batched last_seen_at UPDATE
+UNCHANGED_FLUSH_BATCH_SIZE = 500
+
 
 class ImageProcessingPipeline:
     """Pipeline for processing discovered images.
@@ -43,6 +69,16 @@ class ImageProcessingPipeline:
         stats: Dictionary tracking pipeline statistics.
         downloader: ScrapyImageDownloader for processing responses.
         sync_fetcher: ImageFetcher for synchronous fallback.
+        blob_writer: Background writer for image bytes (None when BLOB_STORE_BACKEND=none).
+        near_duplicate_index: pHash/dHash index of new images, merged into the
+            on-disk snapshot at close (None unless ENABLE_NEAR_DUPLICATE_INDEX).
+        asset_writer: Batched image_assets/image_observations writer; replaces
+            the images/provenance write path (None unless ENABLE_IMMUTABLE_ASSETS).
+        hash_cache: Process-wide sha256 -> image_id cache used to skip the
+            hash lookup and perceptual hashing of stored content (None when
+            IMAGE_HASH_CACHE_SIZE=0).
+        unchanged_urls: Image URLs answered with 304, pending a batched
+            last_seen_at bump.
         discovery_refresh_after_days: Days before refreshing existing images.
     """
 
@@ -55,6 +91,8 @@ class ImageProcessingPipeline:
             "images_failed": 0,
             "images_deduplicated": 0,
             "total_bytes_downloaded": 0,
+            "images_unchanged": 0,
+            "bytes_saved_by_conditional_requests": 0,
         }
         # Rejection reason counters (structured metrics)
         self.rejection_stats: dict[str, int] = {
@@ -69,6 +107,11 @@ class ImageProcessingPipeline:
         }
         self.downloader: ScrapyImageDownloader | None = None
         self.sync_fetcher: ImageFetcher | None = None
+        self.blob_writer: BlobWriter | None = None
+        self.near_duplicate_index: NearDuplicateIndexSet | None = None
+        self.asset_writer: AssetObservationWriter | None = None
+        self.hash_cache: ImageHashCache | None = None
+        self.unchanged_urls: list[str] = []
         self.discovery_refresh_after_days = get_discovery_refresh_after_days()
         self.image_min_width = get_image_min_width()
         self.image_min_height = get_image_min_height()
@@ -99,6 +142,8 @@ class ImageProcessingPipeline:
             "images_failed": 0,
             "images_deduplicated": 0,
             "total_bytes_downloaded": 0,
+            "images_unchanged": 0,
+            "bytes_saved_by_conditional_requests": 0,
         }
         # Reset rejection counters
         self.rejection_stats = {
@@ -121,6 +166,29 @@ class ImageProcessingPipeline:
             min_width=self.image_min_width,
             min_height=self.image_min_height,
         )
+        # Optional content-addressable storage of image bytes
+        self.blob_writer = create_blob_writer()
+        # Optional near-duplicate index; only this run's inserts are held in memory
+        if get_enable_near_duplicate_index():
+            self.near_duplicate_index = NearDuplicateIndexSet(get_near_duplicate_index_path())
+        # Immutable assets mode: append-only batched writes instead of images/provenance
+        if get_enable_immutable_assets():
+            self.asset_writer = AssetObservationWriter(
+                batch_size=get_asset_write_batch_size(),
+                flush_interval=get_asset_write_flush_interval_seconds(),
+            )
+        # Known-content cache for the images write path (shared across spiders in the process)
+        self.hash_cache = get_image_hash_cache() if self.asset_writer is None else None
+        warm_limit = get_image_hash_cache_warm_limit()
+        if self.hash_cache is not None and warm_limit > 0:
+            loaded = self.hash_cache.warm(warm_limit, get_image_hash_cache_warm_domains())
+            logger.info(f"Warmed image hash cache with {loaded} entries")
+        # /metrics reads the counters above when scraped
+        IMAGES.set_callback(self._image_counts)
+        IMAGE_BYTES.set_callback(lambda: {(): self.stats["total_bytes_downloaded"]})
+        IMAGE_REJECTIONS.set_callback(
+            lambda: {(reason,): count for reason, count in self.rejection_stats.items()}
+        )
 
     def close_spider(self, spider: Spider) -> None:
         """Called when spider closes.
@@ -131,6 +199,37 @@ class ImageProcessingPipeline:
         if self.sync_fetcher:
             self.sync_fetcher.close()
 
+        # Write buffered rows before the pool is closed
+        self._flush_unchanged()
+
+        if self.asset_writer is not None:
+            # A failed batch stays buffered; retry until written or dropped
+            while self.asset_writer.pending:
+                try:
+                    self._record_asset_batch(self.asset_writer.flush())
+                except Exception as e:
+                    logger.error(f"Failed to write final asset batch: {e}")
+            self.stats.update(self.asset_writer.stats)
+
+        if self.downloader is not None:
+            for key, value in self.downloader.get_stage_stats().items():
+                self.stats[f"stage_{key}"] = value
+
+        if self.hash_cache is not None:
+            for key, value in self.hash_cache.stats.items():
+                self.stats[f"hash_cache_{key}"] = value
+
+        # Drain pending blob writes before reporting stats
+        if self.blob_writer is not None:
+            self.blob_writer.close()
+            self.stats.update(self.blob_writer.stats)
+
+        if self.near_duplicate_index is not None:
+            try:
+                self.near_duplicate_index.save()
+            except Exception as e:
+                logger.warning(f"Failed to save near-duplicate index: {e}")
+
         # Close database connection pool to release resources
         from storage.db import close_all_connections
 
@@ -166,6 +265,8 @@ class ImageProcessingPipeline:
             return item
 
         self.stats["images_received"] += 1
+        trace = item.get("trace")
+        mark(trace, "pipeline_enter")
 
         url = item.get("url", "")
         source_page = item.get("source_page", "")
@@ -179,8 +280,27 @@ class ImageProcessingPipeline:
             logger.error(f"Image item missing response: {url}")
             raise DropItem("Missing response object")
 
+        # Conditional request answered "unchanged": only last_seen_at moves (batched)
+        if response.status == 304:
+            self._record_unchanged(url, item.get("content_length"))
+            item["store_status"] = "unchanged"
+            return item
+
         # Check if we should skip this image (discovery mode only)
-        if crawl_type == "discovery":
+        if crawl_type == "discovery" and self.asset_writer is not None:
+            last_observation = get_last_observation(url)
+            if last_observation:
+                sha256_hash, observed_at = last_observation
+                if not self._should_refresh(observed_at):
+                    self._write_observation(
+                        build_observation(
+                            url, sha256_hash, source_page, source_domain, item.get("crawl_run_id")
+                        )
+                    )
+                    self.stats["images_skipped"] += 1
+                    logger.debug(f"Skipped image (already observed): {url}")
+                    return item
+        elif crawl_type == "discovery":
             existing = self._get_existing_image_by_url(url)
             if existing:
                 image_id, last_seen_at = existing
@@ -194,7 +314,22 @@ class ImageProcessingPipeline:
         if self.downloader is None:
             raise RuntimeError("Downloader not initialized")
 
-        fetch_result = self.downloader.process_response(url, response)
+        # Dedup lookup stage: content already stored needs no perceptual hashes
+        known_image_id: str | None = None
+        hash_checked = False
+        asset_known = False
+
+        def is_known_content(sha256_hash: str) -> bool:
+            nonlocal known_image_id, hash_checked, asset_known
+            if self.asset_writer is not None:
+                asset_known = self._is_known_asset(sha256_hash)
+                return asset_known
+            hash_checked, known_image_id = self._lookup_image_by_hash(sha256_hash)
+            return known_image_id is not None
+
+        fetch_result = self.downloader.process_response(
+            url, response, known_content=is_known_content, trace=trace
+        )
 
         if not fetch_result.success:
             self.stats["images_failed"] += 1
@@ -204,21 +339,52 @@ class ImageProcessingPipeline:
             raise DropItem(f"Image validation failed: {fetch_result.error_message}")
 
         # Store image metadata in database
+        write_started = time.perf_counter()
         try:
-            result = self._store_image_metadata(
-                url=url,
-                source_page=source_page,
-                source_domain=source_domain,
-                fetch_result=fetch_result,
-                crawl_run_id=item.get("crawl_run_id"),
-                crawl_type=crawl_type,
-            )
-
-            if result["status"] == "downloaded":
-                self.stats["images_downloaded"] += 1
-                self.stats["total_bytes_downloaded"] += fetch_result.file_size
-            elif result["status"] == "deduplicated":
-                self.stats["images_deduplicated"] += 1
+            if self.asset_writer is not None:
+                # New assets are counted as downloaded/deduplicated when the batch is written
+                if asset_known:
+                    self.stats["images_deduplicated"] += 1
+                self._write_observation(
+                    build_observation(
+                        url,
+                        fetch_result.sha256_hash or "",
+                        source_page,
+                        source_domain,
+                        item.get("crawl_run_id"),
+                    ),
+                    None if asset_known else self._build_asset(fetch_result),
+                )
+            else:
+                result = self._store_image_metadata(
+                    url=url,
+                    source_page=source_page,
+                    source_domain=source_domain,
+                    fetch_result=fetch_result,
+                    crawl_run_id=item.get("crawl_run_id"),
+                    crawl_type=crawl_type,
+                    known_image_id=known_image_id,
+                    hash_checked=hash_checked,
+                )
+                item["store_status"] = result["status"]
+
+                if result["status"] == "downloaded":
+                    self.stats["images_downloaded"] += 1
+                    self.stats["total_bytes_downloaded"] += fetch_result.file_size
+                    if self.near_duplicate_index is not None:
+                        self.near_duplicate_index.add(
+                            result["image_id"], fetch_result.phash_hash, fetch_result.dhash_hash
+                        )
+                elif result["status"] == "deduplicated":
+                    self.stats["images_deduplicated"] += 1
+            STAGE_SECONDS.observe(time.perf_counter() - write_started, "db_write")
+            mark(trace, "stored")
+
+            # Keep the bytes for reprocessing (non-blocking; existing hashes are skipped)
+            if self.blob_writer is not None and fetch_result.content and fetch_result.sha256_hash:
+                self.blob_writer.submit(
+                    fetch_result.sha256_hash, fetch_result.content, fetch_result.content_type
+                )
 
         except Exception as e:
             self.stats["images_failed"] += 1
@@ -235,6 +401,8 @@ class ImageProcessingPipeline:
         fetch_result: ImageFetchResult,
         crawl_run_id: Any = None,
         crawl_type: str = "discovery",
+        known_image_id: str | None = None,
+        hash_checked: bool = False,
     ) -> dict[str, Any]:
         """Store image metadata in the database.
 
@@ -245,6 +413,10 @@ class ImageProcessingPipeline:
             fetch_result: ImageFetchResult with image data.
             crawl_run_id: Optional crawl run ID for stats tracking.
             crawl_type: Type of crawl (discovery or refresh).
+            known_image_id: Image already storing this content, from the
+                dedup lookup stage; skips the lookup by hash.
+            hash_checked: The dedup lookup stage already found no image with
+                this content, so the lookup by hash is skipped.
 
         Returns:
             Dictionary with storage result.
@@ -252,8 +424,8 @@ class ImageProcessingPipeline:
         try:
             with get_cursor() as cursor:
                 # First check by URL to handle URL/hash conflicts properly
-                cursor.execute(
-                    "SELECT id, sha256_hash FROM images WHERE url = %s", (url,)
+                execute_prepared(
+                    cursor, "SELECT id, sha256_hash FROM images WHERE url = %s", (url,)
                 )
                 url_existing = cursor.fetchone()
 
@@ -261,16 +433,26 @@ class ImageProcessingPipeline:
                     # URL exists - check if hash changed (refresh scenario)
                     existing_id, existing_hash = url_existing
                     if existing_hash == fetch_result.sha256_hash:
-                        # Same URL, same hash - just update last_seen
-                        cursor.execute(
-                            "UPDATE images SET last_seen_at = CURRENT_TIMESTAMP WHERE id = %s",
-                            (existing_id,),
+                        # Same URL, same hash - update last_seen and the HTTP validators
+                        execute_prepared(
+                            cursor,
+                            """
+                            UPDATE images
+                            SET last_seen_at = CURRENT_TIMESTAMP,
+                                download_success = TRUE,
+                                etag = %s,
+                                last_modified = %s
+                            WHERE id = %s
+                            """,
+                            (fetch_result.etag, fetch_result.last_modified, existing_id),
                         )
                         image_id = existing_id
                         status = "deduplicated"
                     else:
                         # Same URL, different hash - update metadata (content changed)
-                        cursor.execute(
+                        self._ensure_perceptual_hashes(fetch_result)
+                        execute_prepared(
+                            cursor,
                             """
                             UPDATE images
                             SET sha256_hash = %s,
@@ -281,6 +463,11 @@ class ImageProcessingPipeline:
                                 file_size_bytes = %s,
                                 phash_hash = %s,
                                 dhash_hash = %s,
+                                phash_int = %s,
+                                dhash_int = %s,
+                                etag = %s,
+                                last_modified = %s,
+                                download_success = TRUE,
                                 last_seen_at = CURRENT_TIMESTAMP
                             WHERE id = %s
                             """,
@@ -293,6 +480,10 @@ class ImageProcessingPipeline:
                                 fetch_result.file_size,
                                 fetch_result.phash_hash,
                                 fetch_result.dhash_hash,
+                                perceptual_hash_to_bigint(fetch_result.phash_hash),
+                                perceptual_hash_to_bigint(fetch_result.dhash_hash),
+                                fetch_result.etag,
+                                fetch_result.last_modified,
                                 existing_id,
                             ),
                         )
@@ -301,30 +492,51 @@ class ImageProcessingPipeline:
                         logger.info(f"Updated image with changed hash: {url} -> {image_id}")
                 else:
                     # Check if image exists by hash (different URL, same content)
-                    cursor.execute(
-                        "SELECT id FROM images WHERE sha256_hash = %s", (fetch_result.sha256_hash,)
-                    )
-                    hash_existing = cursor.fetchone()
+                    hash_existing = None
+                    if known_image_id is not None:
+                        # Cache hit: the last_seen bump doubles as the existence check
+                        execute_prepared(
+                            cursor,
+                            "UPDATE images SET last_seen_at = CURRENT_TIMESTAMP WHERE id = %s",
+                            (known_image_id,),
+                        )
+                        if cursor.rowcount:
+                            hash_existing = (known_image_id,)
+                        elif self.hash_cache is not None and fetch_result.sha256_hash:
+                            self.hash_cache.discard(fetch_result.sha256_hash)
+
+                    if hash_existing is None and (known_image_id is not None or not hash_checked):
+                        execute_prepared(
+                            cursor,
+                            "SELECT id FROM images WHERE sha256_hash = %s",
+                            (fetch_result.sha256_hash,),
+                        )
+                        hash_existing = cursor.fetchone()
+                        if hash_existing:
+                            execute_prepared(
+                                cursor,
+                                "UPDATE images SET last_seen_at = CURRENT_TIMESTAMP WHERE id = %s",
+                                (hash_existing[0],),
+                            )
 
                     if hash_existing:
                         # Different URL, same hash - just link provenance
                         image_id = hash_existing[0]
-                        cursor.execute(
-                            "UPDATE images SET last_seen_at = CURRENT_TIMESTAMP WHERE id = %s",
-                            (image_id,),
-                        )
                         status = "deduplicated"
                         logger.debug(f"Image exists with different URL (hash match): {url} -> {image_id}")
                     else:
                         # Completely new image
-                        cursor.execute(
+                        self._ensure_perceptual_hashes(fetch_result)
+                        execute_prepared(
+                            cursor,
                             """
                             INSERT INTO images (
                                 url, sha256_hash, width, height, format,
                                 content_type, file_size_bytes, download_success,
-                                phash_hash, dhash_hash
+                                etag, last_modified,
+                                phash_hash, dhash_hash, phash_int, dhash_int
                             )
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                             RETURNING id
                             """,
                             (
@@ -336,29 +548,39 @@ class ImageProcessingPipeline:
                                 fetch_result.content_type,
                                 fetch_result.file_size,
                                 True,
+                                fetch_result.etag,
+                                fetch_result.last_modified,
                                 fetch_result.phash_hash,
                                 fetch_result.dhash_hash,
+                                perceptual_hash_to_bigint(fetch_result.phash_hash),
+                                perceptual_hash_to_bigint(fetch_result.dhash_hash),
                             ),
                         )
                         image_id = cursor.fetchone()[0]
                         status = "downloaded"
                         logger.debug(f"Inserted new image: {url} -> {image_id}")
 
-                # Add provenance record within same transaction
-                cursor.execute(
-                    """
-                    INSERT INTO provenance (image_id, source_page_url, source_domain, discovery_type)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (image_id, source_page_url) DO UPDATE
-                    SET discovered_at = CURRENT_TIMESTAMP,
-                        discovery_type = EXCLUDED.discovery_type
-                    """,
-                    (image_id, source_page, source_domain, crawl_type),
-                )
+                # Add provenance record within same transaction (refresh spider
+                # items re-fetch the image URL directly and carry no page)
+                if source_page:
+                    execute_prepared(
+                        cursor,
+                        """
+                        INSERT INTO provenance (
+                            image_id, source_page_url, source_domain, discovery_type
+                        )
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (image_id, source_page_url) DO UPDATE
+                        SET discovered_at = CURRENT_TIMESTAMP,
+                            discovery_type = EXCLUDED.discovery_type
+                        """,
+                        (image_id, source_page, source_domain, crawl_type),
+                    )
 
                 # Increment crawl_log.images_downloaded for this page (if crawl_run_id provided)
-                if crawl_run_id and status == "downloaded":
-                    cursor.execute(
+                if crawl_run_id and source_page and status == "downloaded":
+                    execute_prepared(
+                        cursor,
                         """
                         UPDATE crawl_log
                         SET images_downloaded = images_downloaded + 1
@@ -372,6 +594,13 @@ class ImageProcessingPipeline:
                             f"No crawl_log entry found for page {source_page} (run {crawl_run_id})"
                         )
 
+                if (
+                    self.hash_cache is not None
+                    and fetch_result.sha256_hash
+                    and str(image_id) != known_image_id
+                ):
+                    self.hash_cache.put(fetch_result.sha256_hash, image_id)
+
                 return {
                     "status": status,
                     "image_id": str(image_id),
@@ -382,11 +611,110 @@ class ImageProcessingPipeline:
             logger.error(f"Database error storing image {url}: {e}")
             raise
 
+    def _image_counts(self) -> dict[tuple[str, ...], float]:
+        """Return images_* counters keyed by outcome, for crawler_images_total."""
+        return {
+            (key.removeprefix("images_"),): value
+            for key, value in self.stats.items()
+            if key.startswith("images_")
+        }
+
+    def _record_unchanged(self, url: str, stored_size: int | None) -> None:
+        """Count a 304 response and queue its last_seen_at bump."""
+        self.stats["images_unchanged"] += 1
+        self.stats["bytes_saved_by_conditional_requests"] += stored_size or 0
+        self.unchanged_urls.append(url)
+        if len(self.unchanged_urls) >= UNCHANGED_FLUSH_BATCH_SIZE:
+            self._flush_unchanged()
+
+    def _flush_unchanged(self) -> None:
+        """Bump last_seen_at for all queued 304 URLs in one statement."""
+        if not self.unchanged_urls:
+            return
+        urls, self.unchanged_urls = self.unchanged_urls, []
+        try:
+            touch_images(urls)
+        except Exception as e:
+            logger.error(f"Failed to bump last_seen_at for {len(urls)} unchanged images: {e}")
+
+    def _lookup_image_by_hash(self, sha256_hash: str) -> tuple[bool, str | None]:
+        """Find the image already storing this content (hash cache, then images).
+
+        Returns:
+            Tuple of (lookup completed, image ID or None). A failed query
+            returns (False, None) so the write path repeats the lookup.
+        """
+        if self.hash_cache is not None:
+            image_id = self.hash_cache.get(sha256_hash)
+            if image_id is not None:
+                return True, image_id
+        try:
+            with get_cursor() as cursor:
+                execute_prepared(
+                    cursor, "SELECT id FROM images WHERE sha256_hash = %s LIMIT 1", (sha256_hash,)
+                )
+                row = cursor.fetchone()
+        except Exception as e:
+            logger.warning(f"Failed to look up image by hash {sha256_hash}: {e}")
+            return False, None
+        if row is None:
+            return True, None
+        if self.hash_cache is not None:
+            self.hash_cache.put(sha256_hash, row[0])
+        return True, str(row[0])
+
+    def _is_known_asset(self, sha256_hash: str) -> bool:
+        """Return whether an image_assets row exists (or is buffered) for this content."""
+        if self.asset_writer is not None and self.asset_writer.has_asset(sha256_hash):
+            return True
+        return asset_exists(sha256_hash)
+
+    def _ensure_perceptual_hashes(self, fetch_result: ImageFetchResult) -> None:
+        """Compute pHash/dHash skipped for content the hash cache said was stored."""
+        if fetch_result.phash_hash is None and fetch_result.dhash_hash is None:
+            if self.downloader is None:
+                self.downloader = ScrapyImageDownloader()
+            self.downloader.compute_perceptual_hashes(fetch_result)
+
+    def _build_asset(self, fetch_result: ImageFetchResult) -> AssetRecord:
+        """Build the immutable asset row for a validated fetch."""
+        return AssetRecord(
+            sha256_hash=fetch_result.sha256_hash or "",
+            file_size=fetch_result.file_size,
+            width=fetch_result.width,
+            height=fetch_result.height,
+            mime_type=fetch_result.content_type,
+            phash=fetch_result.phash_hash,
+            dhash=fetch_result.dhash_hash,
+            phash_int=perceptual_hash_to_bigint(fetch_result.phash_hash),
+            dhash_int=perceptual_hash_to_bigint(fetch_result.dhash_hash),
+        )
+
+    def _write_observation(
+        self, observation: ObservationRecord, asset: AssetRecord | None = None
+    ) -> None:
+        """Buffer an observation; a failed batch write is logged, not raised."""
+        if self.asset_writer is None:
+            return
+        try:
+            self._record_asset_batch(self.asset_writer.add(observation, asset))
+        except Exception as e:
+            logger.error(f"Failed to write asset/observation batch: {e}")
+
+    def _record_asset_batch(self, result: dict[str, int] | None) -> None:
+        """Fold a written asset batch into the pipeline's image counters."""
+        if not result:
+            return
+        self.stats["images_downloaded"] += result["assets_inserted"]
+        self.stats["images_deduplicated"] += result["assets_existing"]
+        self.stats["total_bytes_downloaded"] += result["bytes_inserted"]
+
     def _get_existing_image_by_url(self, url: str) -> tuple[Any, Any] | None:
         """Return existing image id and last_seen_at for a URL if present."""
         try:
             with get_cursor() as cursor:
-                cursor.execute(
+                execute_prepared(
+                    cursor,
                     "SELECT id, last_seen_at FROM images WHERE url = %s",
                     (url,),
                 )
@@ -402,7 +730,7 @@ class ImageProcessingPipeline:
         try:
             with get_cursor() as cursor:
                 # First verify the image still exists (defensive check)
-                cursor.execute("SELECT 1 FROM images WHERE id = %s", (image_id,))
+                execute_prepared(cursor, "SELECT 1 FROM images WHERE id = %s", (image_id,))
                 exists = cursor.fetchone()
                 if not exists:
                     logger.warning(
@@ -410,7 +738,8 @@ class ImageProcessingPipeline:
                     )
                     return
 
-                cursor.execute(
+                execute_prepared(
+                    cursor,
                     """
                     INSERT INTO provenance (image_id, source_page_url, source_domain, discovery_type)
                     VALUES (%s, %s, %s, %s)
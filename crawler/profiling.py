@@ -0,0 +1,331 @@
+"""On-demand CPU and memory profiling of a running crawler worker.
+
+With ENABLE_PROFILING, the WorkerProfiler extension accepts two kinds of
+request while the spider runs:
+
+- cpu: a background thread samples the stacks of all other threads every
+  PROFILE_SAMPLE_INTERVAL_MS (sys._current_frames, no tracing hooks, so
+  the crawl runs at full speed) and writes collapsed stacks, one
+  "thread;frame;frame count" line per distinct stack. Feed the file to
+  flamegraph.pl or open it in speedscope for a flame graph.
+- memory: tracemalloc snapshots at the start and end of the window; the
+  report lists the allocation sites that grew, the growth attributed to
+  the per-domain state (crawler/domain_registry.py, the spider) and the
+  number of tracked domains and deferred frontier URLs.
+
+Requests come from SIGUSR1 (cpu profile of PROFILE_DURATION_SECONDS on
+the local host: ``kill -USR1 <pid>``) or from ``python -m crawler.cli
+profile-worker <worker_id>``, which leaves the request in Redis for the
+worker to pick up (polled every PROFILE_POLL_INTERVAL_SECONDS). Only one
+profile runs at a time.
+
+Files land in PROFILE_OUTPUT_DIR named
+``<mode>-<worker_id>-<crawl_run_id>-<UTC timestamp>.(collapsed|txt)``.
+"""
+
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import UTC, datetime
+from types import FrameType
+from typing import Any
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+from crawler.redis_keys import profile_request_key
+from env_config import (
+    get_enable_profiling,
+    get_profile_duration_seconds,
+    get_profile_output_dir,
+    get_profile_sample_interval_ms,
+)
+from storage.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cpu", "memory")
+
+# How often workers check Redis for profiling requests
+PROFILE_POLL_INTERVAL_SECONDS = 5.0
+
+# Longest profile a request may ask for
+MAX_PROFILE_SECONDS = 600
+
+# Frames kept per tracemalloc traceback
+TRACEMALLOC_FRAMES = 10
+
+# Allocation sites listed in memory reports
+MEMORY_REPORT_TOP = 30
+
+# Files whose allocations hold the per-domain state and frontiers
+DOMAIN_STATE_FILES = ("*/crawler/domain_registry.py", "*/crawler/spiders/discovery_spider.py")
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame: FrameType | None, root: str) -> str:
+    """Return a stack as one collapsed-stack key, outermost frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(root)
+    return ";".join(reversed(labels)).replace(" ", "_")
+
+
+class StackSampler:
+    """Collects collapsed stacks of all other threads at a fixed interval.
+
+    Attributes:
+        interval: Seconds between samples.
+        counts: Samples per collapsed stack.
+        samples: Sampling rounds taken.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Initialize the sampler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.counts: Counter[str] = Counter()
+        self.samples = 0
+
+    def sample(self) -> None:
+        """Record the current stack of every thread except the caller."""
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            self.counts[collapse_stack(frame, names.get(ident, f"thread-{ident}"))] += 1
+        self.samples += 1
+
+    def run(self, seconds: float, stop: threading.Event | None = None) -> None:
+        """Sample until the time is up (or stop is set)."""
+        deadline = time.monotonic() + seconds
+        stop = stop or threading.Event()
+        while time.monotonic() < deadline and not stop.is_set():
+            self.sample()
+            stop.wait(self.interval)
+
+    def write(self, path: str) -> None:
+        """Write the collapsed stacks (flamegraph.pl / speedscope input)."""
+        with open(path, "w", encoding="utf-8") as handle:
+            for stack, count in self.counts.most_common():
+                handle.write(f"{stack} {count}\n")
+
+
+def memory_report(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, header: list[str]
+) -> str:
+    """Return a text report of allocation growth between two snapshots."""
+    lines = list(header)
+    current, peak = tracemalloc.get_traced_memory()
+    lines.append(f"traced memory: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB")
+
+    growth = after.compare_to(before, "lineno")
+    lines.append("")
+    lines.append(f"Top {MEMORY_REPORT_TOP} allocation sites by growth:")
+    lines.extend(f"  {stat}" for stat in growth[:MEMORY_REPORT_TOP])
+
+    domain_filters = [tracemalloc.Filter(True, pattern) for pattern in DOMAIN_STATE_FILES]
+    domain_growth = after.filter_traces(domain_filters).compare_to(
+        before.filter_traces(domain_filters), "traceback"
+    )
+    total = sum(stat.size_diff for stat in domain_growth)
+    lines.append("")
+    lines.append(f"Domain state and frontier growth: {total / 1e6:+.2f} MB")
+    for stat in domain_growth[:10]:
+        lines.append(f"  {stat.size_diff / 1e3:+.1f} kB in {stat.count_diff:+d} blocks, from:")
+        lines.extend(f"    {line}" for line in stat.traceback.format(limit=3))
+    return "\n".join(lines) + "\n"
+
+
+class WorkerProfiler:
+    """Scrapy extension running CPU/memory profiles on request."""
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the extension.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        if not get_enable_profiling():
+            raise NotConfigured
+        self.crawler = crawler
+        self.spider: Any = None
+        self.output_dir = get_profile_output_dir()
+        self.default_seconds = get_profile_duration_seconds()
+        self.interval = get_profile_sample_interval_ms() / 1000.0
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._poll: task.LoopingCall | None = None
+        self._previous_handler: Any = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "WorkerProfiler":
+        """Create the extension and connect signals."""
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    @property
+    def worker_id(self) -> str:
+        """Worker id of the spider (hostname-pid), as used for domain claims."""
+        return getattr(self.spider, "worker_id", None) or f"unknown-{os.getpid()}"
+
+    def spider_opened(self, spider: Any) -> None:
+        """Install the SIGUSR1 handler and start polling for CLI requests."""
+        self.spider = spider
+        try:
+            self._previous_handler = signal.signal(signal.SIGUSR1, self._on_signal)
+        except (AttributeError, ValueError) as e:
+            # No SIGUSR1 on Windows; handlers can only be set from the main thread
+            logger.debug(f"Profiling signal handler not installed: {e}")
+        self._poll = task.LoopingCall(self.poll_requests)
+        self._poll.start(PROFILE_POLL_INTERVAL_SECONDS, now=False)
+        logger.info(f"Profiling enabled for worker {self.worker_id} (SIGUSR1 or profile-worker)")
+
+    def spider_closed(self, spider: Any) -> None:
+        """Stop polling, restore the signal handler and end a running profile."""
+        if self._poll is not None and self._poll.running:
+            self._poll.stop()
+        if self._previous_handler is not None:
+            try:
+                signal.signal(signal.SIGUSR1, self._previous_handler)
+            except (AttributeError, ValueError):
+                pass
+            self._previous_handler = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+
+    def poll_requests(self) -> None:
+        """Start a profile requested through Redis (crawler.cli profile-worker)."""
+        try:
+            raw = get_redis_client().getdel(profile_request_key(self.worker_id))
+        except Exception as e:
+            logger.debug(f"Failed to check for profiling requests: {e}")
+            return
+        if not raw:
+            return
+        try:
+            request = json.loads(raw)
+            self.start(str(request.get("mode", "cpu")), request.get("seconds"))
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring invalid profiling request {raw!r}: {e}")
+
+    def start(self, mode: str, seconds: float | None = None) -> bool:
+        """Start a profile in the background.
+
+        Args:
+            mode: "cpu" (stack sampling) or "memory" (tracemalloc)
+            seconds: Profile length (default PROFILE_DURATION_SECONDS)
+
+        Returns:
+            False when a profile is already running.
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}")
+        if self._thread is not None and self._thread.is_alive():
+            logger.warning("Profile already running, ignoring request")
+            return False
+        seconds = min(float(seconds or self.default_seconds), MAX_PROFILE_SECONDS)
+        self._stop.clear()
+        target = self._run_cpu if mode == "cpu" else self._run_memory
+        self._thread = threading.Thread(
+            target=target, args=(seconds,), name=f"profiler-{mode}", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Started {mode} profile for {seconds:.0f}s")
+        return True
+
+    def output_path(self, mode: str, extension: str) -> str:
+        """Return the file a profile is written to, tagged with worker and run ids."""
+        run_id = getattr(self.spider, "crawl_run_id", None) or "none"
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        name = f"{mode}-{self.worker_id}-{run_id}-{stamp}.{extension}"
+        return os.path.join(self.output_dir, name)
+
+    def _on_signal(self, signum: int, frame: Any) -> None:
+        self.start("cpu")
+
+    def _run_cpu(self, seconds: float) -> None:
+        try:
+            sampler = StackSampler(self.interval)
+            sampler.run(seconds, self._stop)
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = self.output_path("cpu", "collapsed")
+            sampler.write(path)
+            self.crawler.stats.inc_value("profiling/cpu_profiles")
+            logger.info(f"Wrote CPU profile ({sampler.samples} samples) to {path}")
+        except Exception as e:
+            logger.error(f"CPU profile failed: {e}")
+
+    def _run_memory(self, seconds: float) -> None:
+        started_tracing = not tracemalloc.is_tracing()
+        try:
+            if started_tracing:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            before = tracemalloc.take_snapshot()
+            self._stop.wait(seconds)
+            after = tracemalloc.take_snapshot()
+            report = memory_report(before, after, self._memory_header(seconds))
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = self.output_path("memory", "txt")
+            with open(path, "w", encoding="utf-8") as handle:
+                handle.write(report)
+            self.crawler.stats.inc_value("profiling/memory_profiles")
+            logger.info(f"Wrote memory profile to {path}")
+        except Exception as e:
+            logger.error(f"Memory profile failed: {e}")
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def _memory_header(self, seconds: float) -> list[str]:
+        lines = [
+            f"worker_id: {self.worker_id}",
+            f"crawl_run_id: {getattr(self.spider, 'crawl_run_id', None)}",
+            f"window: {seconds:.0f}s",
+        ]
+        registry = getattr(self.spider, "_domain_registry", None)
+        if registry is not None:
+            states = registry.snapshot()
+            lines.append(
+                f"domains tracked: {len(states)} "
+                f"(claimed {sum(1 for state in states if state.claimed)}), "
+                f"deferred frontier URLs: {sum(len(state.frontier) for state in states)}"
+            )
+        return lines
+
+
+def request_profile(worker_id: str, mode: str, seconds: int, redis_url: str | None = None) -> None:
+    """Leave a profiling request in Redis for a worker (picked up within seconds).
+
+    Args:
+        worker_id: Target worker (hostname-pid, see domains.claimed_by)
+        mode: "cpu" or "memory"
+        seconds: Profile length
+        redis_url: Redis URL (defaults to REDIS_URL)
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode {mode!r}")
+    payload = json.dumps({"mode": mode, "seconds": seconds})
+    # Expire unclaimed requests so a later worker with a reused id does not run it
+    get_redis_client(redis_url).set(profile_request_key(worker_id), payload, ex=60)
@@ -43,3 +43,18 @@ def seen_domains_key(spider_name: str = "discovery") -> str:
 def domains_key(spider_name: str = "discovery") -> str:
     """Return key containing tracked active domains."""
     return _with_namespace(f"{spider_name}:domains")
+
+
+def robots_key(netloc: str) -> str:
+    """Return key caching the robots.txt body of a host."""
+    return _with_namespace(f"robots:{netloc}")
+
+
+def dns_key(hostname: str) -> str:
+    """Return key caching the resolved address of a hostname."""
+    return _with_namespace(f"dns:{hostname}")
+
+
+def profile_request_key(worker_id: str) -> str:
+    """Return key holding a pending profiling request for a worker."""
+    return _with_namespace(f"profile:{worker_id}")
@@ -67,17 +67,11 @@ else:
 
 from crawler.redis_keys import domains_key
 from env_config import get_redis_url
+from storage.redis_client import get_redis_client
 
 logger = logging.getLogger(__name__)
 
 
-def _redis_from_url(redis_url: str, socket_timeout: int = 2) -> Any:
-    import redis
-
-    redis_module = cast(Any, redis)
-    return redis_module.from_url(redis_url, socket_connect_timeout=socket_timeout)
-
-
 class InvisibleRedisScheduler(RedisSchedulerBase):
     """Redis-based scheduler with per-domain queue support.
 
@@ -174,10 +168,8 @@ class InvisibleRedisScheduler(RedisSchedulerBase):
         kwargs["queue_key"] = settings.get("SCHEDULER_QUEUE_KEY", "%(spider)s:requests")
         kwargs["dupefilter_key"] = settings.get("DUPEFILTER_KEY", "%(spider)s:dupefilter")
 
-        # Get Redis connection
-        from scrapy_redis import connection
-
-        server = connection.from_settings(settings)
+        # Shared process-wide Redis client (see storage.redis_client)
+        server = get_redis_client(settings.get("REDIS_URL"))
 
         return cls(server=server, **kwargs)
 
@@ -409,7 +401,7 @@ def check_redis_available(url: str | None = None) -> bool:
 
     url = url or get_redis_url()
     try:
-        client = _redis_from_url(url, socket_timeout=2)
+        client = get_redis_client(url)
         client.ping()
         return True
     except redis.ConnectionError:
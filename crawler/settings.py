@@ -9,9 +9,13 @@ from pathlib import Path
 from crawler.redis_keys import dupefilter_key_pattern, requests_key_pattern
 from env_config import (
     get_crawler_user_agent,
+    get_enable_adaptive_concurrency,
     get_enable_claim_protocol,
+    get_enable_http2_images,
+    get_enable_image_lane,
     get_enable_persistent_dupefilter,
     get_enable_smart_scheduling,
+    get_image_concurrent_requests,
     get_log_level,
     get_redis_url,
     get_scrapy_autothrottle_enabled,
@@ -49,6 +53,9 @@ CONCURRENT_REQUESTS = get_scrapy_concurrent_requests()
 CONCURRENT_REQUESTS_PER_DOMAIN = get_scrapy_concurrent_requests_per_domain()
 # CONCURRENT_REQUESTS_PER_IP = 1  # Deprecated, removed to avoid conflicts
 
+# DNS: large expiring cache with NXDOMAIN caching, optionally shared via Redis
+TWISTED_DNS_RESOLVER = "crawler.dns.SharedCachingResolver"
+
 # Disable cookies (enabled by default)
 COOKIES_ENABLED = False
 
@@ -70,17 +77,36 @@ SPIDER_MIDDLEWARES: dict[str, int] = {
 }
 
 # Enable or disable downloader middlewares
-DOWNLOADER_MIDDLEWARES: dict[str, int] = {
-    # "crawler.middlewares.CrawlerDownloaderMiddleware": 543,
+DOWNLOADER_MIDDLEWARES: dict[str, int | None] = {
+    # robots.txt rules cached per process and shared across workers via Redis
+    "scrapy.downloadermiddlewares.robotstxt.RobotsTxtMiddleware": None,
+    "crawler.middlewares.SharedRobotsTxtMiddleware": 100,
+    # Image requests go to per-image-host slots (see crawler.lanes)
+    "crawler.lanes.ImageLaneMiddleware": 110 if get_enable_image_lane() else None,
+}
+
+# Extensions: per-domain AIMD concurrency (replaces AutoThrottle when enabled),
+# Prometheus /metrics endpoint (ENABLE_METRICS), image lifecycle tracing (ENABLE_IMAGE_TRACING)
+EXTENSIONS: dict[str, int] = {
+    "crawler.throttle.AdaptiveConcurrency": 500,
+    "crawler.metrics_server.MetricsServer": 510,
+    "crawler.tracing.ImageTracing": 520,
+    "crawler.profiling.WorkerProfiler": 530,
 }
 
+# Image requests over HTTP/2 (falls back to HTTP/1.1 per host; pages stay on HTTP/1.1)
+DOWNLOAD_HANDLERS: dict[str, str] = (
+    {"https": "crawler.http2.ImageHttp2DownloadHandler"} if get_enable_http2_images() else {}
+)
+
 # Configure item pipelines
 ITEM_PIPELINES: dict[str, int] = {
     "crawler.pipelines.ImageProcessingPipeline": 300,
 }
 
 # Enable and configure AutoThrottle extension (disabled by default)
-AUTOTHROTTLE_ENABLED = get_scrapy_autothrottle_enabled()
+# Adaptive concurrency owns slot delays when enabled, so AutoThrottle is turned off
+AUTOTHROTTLE_ENABLED = get_scrapy_autothrottle_enabled() and not get_enable_adaptive_concurrency()
 AUTOTHROTTLE_START_DELAY = get_scrapy_autothrottle_start_delay()
 AUTOTHROTTLE_MAX_DELAY = get_scrapy_autothrottle_max_delay()
 AUTOTHROTTLE_TARGET_CONCURRENCY = get_scrapy_autothrottle_target_concurrency()
@@ -135,6 +161,11 @@ SCHEDULER = (
     else "scrapy_redis.scheduler.Scheduler"  # Redis scheduler (Phases A/B)
 )
 
+# Phase C: separate page/image budgets; the downloader holds both at once
+if _is_phase_c and get_enable_image_lane():
+    SCHEDULER = "crawler.lanes.LaneScheduler"
+    CONCURRENT_REQUESTS += get_image_concurrent_requests()
+
 # DupeFilter for URL deduplication
 # Note: Phase C uses local dupefilter by default; Phase A/B uses Redis dupefilter
 # When ENABLE_PERSISTENT_DUPEFILTER=true, uses Redis-backed dupefilter for Phase C
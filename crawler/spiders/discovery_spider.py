@@ -4,59 +4,65 @@ This spider crawls domains from a seed file, extracting image URLs
 from HTML pages and following same-domain links.
 """
 
+import itertools
 import os
 import socket
 import threading
 import time
-from collections import deque
+from collections.abc import AsyncIterator, Generator, Iterator
 from pathlib import Path
-from typing import Any, cast
+from typing import Any
 from urllib.parse import urljoin, urlparse
 from uuid import UUID
 
 from scrapy import Spider, signals
 from scrapy.http import Request, Response, TextResponse
 
+from crawler.dns import get_dns_cache_stats, is_nxdomain, prefetch_hostnames
+from crawler.domain_registry import DomainRegistry, DomainState
+from crawler.lanes import IMAGE_LANE
+from crawler.middlewares import prefetch_robots
 from crawler.redis_keys import start_urls_key
+from crawler.throttle import learned_domain_limits, seed_domain_limits
 from env_config import (
+    get_conditional_image_requests,
     get_crawler_max_pages,
     get_default_max_pages_per_run,
     get_domain_canonicalization_strip_subdomains,
     get_domain_stats_flush_interval,
     get_enable_claim_protocol,
+    get_enable_claim_warmup,
+    get_enable_claim_warmup_head,
     get_enable_continuous_mode,
     get_enable_domain_tracking,
+    get_enable_immutable_assets,
     get_enable_per_domain_budget,
     get_enable_smart_scheduling,
-    get_redis_url,
+    get_seed_batch_size,
 )
-from processor.domain_canonicalization import canonicalize_domain
+from processor.domain_canonicalization import canonicalize_domain, get_public_suffix_list
 from processor.media_policy import ALLOWED_EXTENSIONS
-from storage.db import get_cursor
+from storage.db import execute_prepared, get_cursor, get_db_pool_stats
 from storage.domain_repository import (
     claim_domains,
     clear_frontier_checkpoint,
     get_domain,
+    get_frontier_checkpoint_ids,
     increment_crawl_run_stats,
     increment_domain_stats_claimed,
     release_claim,
     renew_claim,
     update_domain_stats,
     update_frontier_checkpoint,
-    upsert_domain,
+    upsert_domains,
 )
 from storage.frontier_checkpoint import (
     delete_checkpoint,
-    load_checkpoint,
+    iter_checkpoint,
     save_checkpoint,
 )
-
-
-def _redis_from_url(redis_url: str, socket_timeout: int = 2) -> Any:
-    import redis
-
-    redis_module = cast(Any, redis)
-    return redis_module.from_url(redis_url, socket_connect_timeout=socket_timeout)
+from storage.image_repository import get_image_validators
+from storage.redis_client import get_redis_client, get_redis_pool_stats
 
 
 class DiscoverySpider(Spider):
@@ -73,8 +79,7 @@ class DiscoverySpider(Spider):
     """
 
     crawl_run_id: UUID | None
-    _claimed_domains: dict[UUID, dict[str, Any]]
-    _claimed_domains_lock: threading.Lock
+    _domain_registry: DomainRegistry
     _heartbeat_thread: threading.Thread | None
     _stop_heartbeat: threading.Event
 
@@ -139,27 +144,25 @@ class DiscoverySpider(Spider):
         while not self._stop_heartbeat.is_set():
             time.sleep(600)  # 10 minutes
 
-            with self._claimed_domains_lock:
-                if not self._claimed_domains:
+            for state in self._domain_registry.claimed():
+                domain_id = state.domain_id
+                if domain_id is None:
                     continue
-                domains_snapshot = list(self._claimed_domains.items())
-
-            for domain_id, info in domains_snapshot:
                 try:
                     success = renew_claim(domain_id, self.worker_id)
-                    with self._claimed_domains_lock:
-                        if domain_id not in self._claimed_domains:
+                    with self._domain_registry.lock:
+                        if state.domain_id != domain_id:
                             continue  # Claim was released while renewing
                         if success:
-                            self.logger.debug(f"Renewed claim for {info['domain']}")
-                            self._claimed_domains[domain_id]["version"] += 1
+                            self.logger.debug(f"Renewed claim for {state.domain}")
+                            state.version += 1
                         else:
                             self.logger.warning(
-                                f"Failed to renew claim for {info['domain']} (expired?)"
+                                f"Failed to renew claim for {state.domain} (expired?)"
                             )
-                            del self._claimed_domains[domain_id]
+                            state.domain_id = None
                 except Exception as e:
-                    self.logger.error(f"Heartbeat error for {info['domain']}: {e}")
+                    self.logger.error(f"Heartbeat error for {state.domain}: {e}")
 
     def __init__(self, seeds: str | None = None, **kwargs: Any) -> None:
         """Initialize the spider with seed domains.
@@ -180,7 +183,6 @@ class DiscoverySpider(Spider):
         self.pages_crawled: int = 0
         self.images_downloaded: int = 0  # Track successful downloads for crawl_runs
         self.crawl_run_id = None  # Set in spider_opened
-        self._domains: list[str] = []
         self._allowlist = self._load_domain_list(self.allowlist_file)
         self._blocklist = self._load_domain_list(self.blocklist_file)
         self._blocked_domains_runtime: set[str] = set()
@@ -188,29 +190,40 @@ class DiscoverySpider(Spider):
         # Domain tracking (Phase A)
         self.enable_domain_tracking = get_enable_domain_tracking()
         self.strip_subdomains = get_domain_canonicalization_strip_subdomains()
-        self._domain_stats: dict[str, dict[str, int]] = {}  # Track per-domain stats
+        if self.strip_subdomains:
+            # Load the PSL trie up front rather than on the first parsed page
+            get_public_suffix_list()
         self._blocked_domains_canonical: set[str] = set()  # Canonicalized blocked domains
+        self._unreachable_domains_canonical: set[str] = set()  # Canonicalized NXDOMAIN domains
         # Per-domain budget tracking (Phase B)
         self.enable_per_domain_budget = get_enable_per_domain_budget()
         self.max_pages_per_run = get_default_max_pages_per_run()
-        self._domain_pages_crawled: dict[str, int] = {}  # Pages crawled per domain this run
-        # True queue semantics: tracks URLs TO BE CRAWLED (not all discovered)
-        # Uses deque for O(1) pop from left
-        self._domain_frontier_queue: dict[str, deque[dict[str, Any]]] = {}
+        self.seed_batch_size = get_seed_batch_size()
+        # Per-domain state (claim, stats, flushed deltas, frontier) keyed by
+        # canonical domain; see crawler.domain_registry
+        self._domain_registry = DomainRegistry()
         self._frontier_max_size = 1000  # Cap to prevent memory growth
         # Smart scheduling and claim protocol (Phase C)
         self.enable_smart_scheduling = get_enable_smart_scheduling()
         self.enable_claim_protocol = get_enable_claim_protocol()
         self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
-        self._claimed_domains = {}  # domain_id -> claim info
-        self._claimed_domains_lock = threading.Lock()
         self._heartbeat_thread = None
         self._stop_heartbeat = threading.Event()
         # Mid-crawl state flushing (Phase C resilience)
         self.flush_interval = get_domain_stats_flush_interval()
-        self._domain_flushed_stats: dict[str, dict[str, int]] = {}  # Track flushed deltas
         # Continuous mode: keep worker alive when no domains available
         self.enable_continuous_mode = get_enable_continuous_mode()
+        # Claim-time warmup: robots.txt (and optionally a HEAD) before the first GET
+        self.enable_claim_warmup = get_enable_claim_warmup()
+        self.enable_claim_warmup_head = get_enable_claim_warmup_head()
+        self.warmup_redirects: int = 0
+        # Conditional GET for stored images (validators live on the images table)
+        conditional_mode = get_conditional_image_requests()
+        self.use_conditional_image_requests = not get_enable_immutable_assets() and (
+            conditional_mode == "all"
+            or (conditional_mode == "refresh" and self.crawl_type == "refresh")
+        )
+        self.conditional_image_requests: int = 0
 
         # Phase C validation: Claim protocol requires smart scheduling
         if self.enable_claim_protocol and not self.enable_smart_scheduling:
@@ -231,6 +244,24 @@ class DiscoverySpider(Spider):
                 f"Phase C enabled: smart scheduling + claim protocol (worker: {self.worker_id})"
             )
 
+    def _domain_key(self, domain: str) -> str:
+        """Return the registry key (canonical domain) for a domain or URL.
+
+        Args:
+            domain: Raw netloc, domain or URL
+
+        Returns:
+            Canonical domain, or the input unchanged if it cannot be canonicalized
+        """
+        try:
+            return canonicalize_domain(domain, self.strip_subdomains)
+        except ValueError:
+            return domain
+
+    def _domain_state(self, domain: str) -> DomainState:
+        """Return the registry record for a domain, creating it if needed."""
+        return self._domain_registry.get_or_create(self._domain_key(domain))
+
     def enqueue_url(self, domain: str, url: str, depth: int) -> bool:
         """Add URL to domain's frontier queue with FIFO semantics.
 
@@ -242,10 +273,7 @@ class DiscoverySpider(Spider):
         Returns:
             True if URL was enqueued, False if queue is at capacity
         """
-        if domain not in self._domain_frontier_queue:
-            self._domain_frontier_queue[domain] = deque()
-
-        queue = self._domain_frontier_queue[domain]
+        queue = self._domain_state(domain).frontier
         if len(queue) >= self._frontier_max_size:
             self.logger.debug(f"Frontier queue full for {domain}, dropping URL: {url}")
             return False
@@ -262,14 +290,11 @@ class DiscoverySpider(Spider):
         Returns:
             Dict with url and depth, or None if queue is empty
         """
-        if domain not in self._domain_frontier_queue:
-            return None
-
-        queue = self._domain_frontier_queue[domain]
-        if not queue:
+        state = self._domain_registry.get(self._domain_key(domain))
+        if state is None or not state.frontier:
             return None
 
-        return queue.popleft()
+        return state.frontier.popleft()
 
     def get_frontier_size(self, domain: str) -> int:
         """Get current queue size for a domain.
@@ -280,9 +305,8 @@ class DiscoverySpider(Spider):
         Returns:
             Number of URLs pending in queue
         """
-        if domain not in self._domain_frontier_queue:
-            return 0
-        return len(self._domain_frontier_queue[domain])
+        state = self._domain_registry.get(self._domain_key(domain))
+        return len(state.frontier) if state is not None else 0
 
     def _compute_domain_status(self, domain: str) -> str:
         """Compute domain status based on true queue state.
@@ -339,6 +363,7 @@ class DiscoverySpider(Spider):
                 return
 
             self.logger.info(f"Refill claimed {len(claimed)} domains")
+            self._warm_up_claims(claimed)
 
             for domain_row in claimed:
                 domain_id = domain_row["id"]
@@ -346,29 +371,18 @@ class DiscoverySpider(Spider):
                 version = domain_row["version"]
                 checkpoint_id = domain_row.get("frontier_checkpoint_id")
 
-                with self._claimed_domains_lock:
-                    self._claimed_domains[domain_id] = {
-                        "domain": domain,
-                        "version": version,
-                    }
+                self._register_claim(domain, domain_id, version)
 
                 if checkpoint_id:
                     self.logger.info(f"Resuming {domain} from checkpoint: {checkpoint_id}")
                     try:
-                        redis_client = _redis_from_url(get_redis_url(), socket_timeout=2)
-                        checkpoint_urls = load_checkpoint(checkpoint_id, redis_client)
-                        if checkpoint_urls:
-                            for entry in checkpoint_urls:
-                                yield Request(
-                                    url=entry["url"],
-                                    callback=self.parse,
-                                    errback=self.handle_error,
-                                    meta={
-                                        "depth": entry["depth"],
-                                        "domain": domain,
-                                        "domain_id": domain_id,
-                                    },
-                                )
+                        redis_client = get_redis_client()
+                        resumed = yield from self._yield_checkpoint_requests(
+                            checkpoint_id,
+                            redis_client,
+                            {"domain": domain, "domain_id": domain_id},
+                        )
+                        if resumed:
                             delete_checkpoint(checkpoint_id, redis_client)
                             clear_frontier_checkpoint(domain)
                             continue
@@ -377,23 +391,27 @@ class DiscoverySpider(Spider):
                     except Exception as e:
                         self.logger.warning(f"Failed to load checkpoint for {domain}: {e}")
 
-                yield Request(
-                    url=f"https://{domain}",
-                    callback=self.parse,
-                    errback=self.handle_error,
-                    meta={"depth": 0, "domain": domain, "domain_id": domain_id},
-                )
+                yield self._root_request(domain, domain_id)
 
         except Exception as e:
             self.logger.error(f"Refill claims failed: {e}")
 
+    async def start(self) -> AsyncIterator[Any]:
+        """Yield start_requests() (Scrapy 2.13+ entry point; older versions call it directly)."""
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self) -> Any:
         """Generate initial requests from seed domains.
 
         Supports three modes:
         - Phase C (Smart Scheduling): Query domains table with claim protocol
-        - Phase 2 (Redis): Consume seeds from Redis start_urls sorted set
-        - Phase 1 (File): Read seeds from local seed file
+        - Phase 2 (Redis): Page through the Redis start_urls sorted set
+        - Phase 1 (File): Stream seeds from local seed file
+
+        Seeds are processed in batches of ``seed_batch_size`` and requests
+        are yielded lazily, so crawling starts after the first batch instead
+        of after the whole seed list has been read.
 
         Yields:
             Request objects for each seed domain.
@@ -401,11 +419,12 @@ class DiscoverySpider(Spider):
         # Phase C: Smart scheduling with claim protocol
         if self.enable_smart_scheduling and self.enable_claim_protocol:
             self.logger.info("Phase C: Using smart scheduling with claim protocol")
+            smart_count = 0
             try:
-                smart_requests = list(self._start_requests_smart_scheduling())
-                if smart_requests:
-                    yield from smart_requests
-                else:
+                for request in self._start_requests_smart_scheduling():
+                    smart_count += 1
+                    yield request
+                if not smart_count:
                     self.logger.warning(
                         "Smart scheduling returned no domains. "
                         "All domains may be claimed by other workers or exhausted."
@@ -419,36 +438,15 @@ class DiscoverySpider(Spider):
             return
 
         # Try Redis start_urls first (Phase 2 mode)
-        redis_seeds = list(self._get_redis_start_urls())
-        if redis_seeds:
-            self.logger.info(f"Using Redis start_urls: {len(redis_seeds)} seeds")
-            for url in redis_seeds:
-                domain_netloc = urlparse(url).netloc
-                if self._allowlist and domain_netloc not in self._allowlist:
-                    self.logger.info(f"Skipping seed (not in allowlist): {url}")
-                    continue
-                if domain_netloc in self._blocklist:
-                    self.logger.info(f"Skipping seed (blocked): {url}")
-                    continue
-
-                self._domains.append(url)
-                self.logger.info(f"Adding seed domain: {url}")
-
-                # Domain tracking: upsert domain before yielding
-                if self.enable_domain_tracking:
-                    try:
-                        canonical_domain = canonicalize_domain(url, self.strip_subdomains)
-                        upsert_domain(
-                            domain=canonical_domain,
-                            source="redis",
-                            seed_rank=None,
-                        )
-                        self.logger.debug(f"Upserted domain: {canonical_domain} (source: redis)")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to upsert domain for {url}: {e}")
-
-                # Yield requests (with checkpoint resume if enabled)
-                yield from self._yield_start_requests(url, domain_netloc)
+        redis_batches = self._iter_redis_start_url_batches()
+        first_batch = next(redis_batches, None)
+        if first_batch:
+            self.logger.info(f"Using Redis start_urls (batches of {self.seed_batch_size} seeds)")
+            seeds_total = 0
+            for redis_batch in itertools.chain([first_batch], redis_batches):
+                seeds_total += len(redis_batch)
+                yield from self._yield_seed_batch(redis_batch, source="redis")
+            self.logger.info(f"Finished scheduling {seeds_total} Redis seeds")
             return
 
         # Fall back to file-based seeds (Phase 1 mode)
@@ -467,6 +465,7 @@ class DiscoverySpider(Spider):
 
         # Read and parse seed domains
         with open(seeds_path, encoding="utf-8") as f:
+            batch: list[str] = []
             for line in f:
                 line = line.strip()
                 # Skip comments and empty lines
@@ -478,54 +477,93 @@ class DiscoverySpider(Spider):
                 if not domain.startswith(("http://", "https://")):
                     domain = f"https://{domain}"
 
-                domain_netloc = urlparse(domain).netloc
-                if self._allowlist and domain_netloc not in self._allowlist:
-                    self.logger.info(f"Skipping seed (not in allowlist): {domain}")
-                    continue
-                if domain_netloc in self._blocklist:
-                    self.logger.info(f"Skipping seed (blocked): {domain}")
-                    continue
+                batch.append(domain)
+                if len(batch) >= self.seed_batch_size:
+                    yield from self._yield_seed_batch(batch, source=self.seeds_file or "file")
+                    batch = []
 
-                self._domains.append(domain)
-                self.logger.info(f"Adding seed domain: {domain}")
+            if batch:
+                yield from self._yield_seed_batch(batch, source=self.seeds_file or "file")
 
-                # Domain tracking: upsert domain before yielding
-                if self.enable_domain_tracking:
-                    try:
-                        canonical_domain = canonicalize_domain(domain, self.strip_subdomains)
-                        upsert_domain(
-                            domain=canonical_domain,
-                            source=self.seeds_file or "file",
-                            seed_rank=None,
-                        )
-                        self.logger.debug(f"Upserted domain: {canonical_domain} (source: file)")
-                    except Exception as e:
-                        self.logger.warning(f"Failed to upsert domain for {domain}: {e}")
+    def _yield_seed_batch(self, urls: list[str], source: str) -> Any:
+        """Filter, track and yield start requests for one batch of seeds.
 
-                # Yield requests (with checkpoint resume if enabled)
-                yield from self._yield_start_requests(domain, urlparse(domain).netloc)
+        Domain upserts and checkpoint lookups are issued once for the whole
+        batch rather than once per seed.
 
-    def _get_redis_start_urls(self) -> list[str]:
-        """Fetch start URLs from Redis sorted set.
+        Args:
+            urls: Seed URLs (with scheme)
+            source: Domain source recorded on upsert ("redis" or seed file path)
 
-        Returns:
-            List of URLs from Redis, or empty list if Redis unavailable.
+        Yields:
+            Request objects for the batch (from checkpoint or fresh start).
         """
-        redis_url = get_redis_url()
+        accepted: list[tuple[str, str]] = []
+        for url in urls:
+            domain_netloc = urlparse(url).netloc
+            if self._allowlist and domain_netloc not in self._allowlist:
+                self.logger.info(f"Skipping seed (not in allowlist): {url}")
+                continue
+            if domain_netloc in self._blocklist:
+                self.logger.info(f"Skipping seed (blocked): {url}")
+                continue
+            self.logger.debug(f"Adding seed domain: {url}")
+            accepted.append((url, domain_netloc))
+
+        if not accepted:
+            return
 
-        try:
-            client = _redis_from_url(redis_url, socket_timeout=2)
+        checkpoint_ids: dict[str, str] | None = None
+        if self.enable_domain_tracking:
+            canonical_domains: list[str] = []
+            for url, _ in accepted:
+                try:
+                    canonical_domains.append(canonicalize_domain(url, self.strip_subdomains))
+                except Exception as e:
+                    self.logger.warning(f"Failed to canonicalize seed {url}: {e}")
+
+            # Domain tracking: upsert the batch before yielding
+            inserted = upsert_domains(canonical_domains, source=source)
+            self.logger.debug(
+                f"Upserted seed batch: {len(canonical_domains)} domains "
+                f"({inserted} new, source: {source})"
+            )
+
+            if self.enable_per_domain_budget:
+                checkpoint_ids = get_frontier_checkpoint_ids(canonical_domains)
+
+        self.logger.info(f"Scheduling seed batch of {len(accepted)} domains")
+        for url, domain_netloc in accepted:
+            # Yield requests (with checkpoint resume if enabled)
+            yield from self._yield_start_requests(url, domain_netloc, checkpoint_ids)
+
+    def _iter_redis_start_url_batches(self) -> Iterator[list[str]]:
+        """Page through start URLs in the Redis sorted set.
 
-            # Get URLs from sorted set (ordered by priority)
-            queue_key = start_urls_key(self.name)
-            # zrange returns members in order of score (priority)
-            urls = client.zrange(queue_key, 0, -1)
+        Reads ``seed_batch_size`` members per ZRANGE call, in score
+        (priority) order, so the seed set is never loaded at once.
 
-            # Decode bytes to strings
-            return [url.decode("utf-8") if isinstance(url, bytes) else url for url in urls]
+        Yields:
+            Lists of URLs; nothing if Redis is unavailable or the set is empty.
+        """
+        queue_key = start_urls_key(self.name)
+        page_size = self.seed_batch_size
+
+        try:
+            client = get_redis_client()
+            start = 0
+            while True:
+                # zrange returns members in order of score (priority)
+                urls = client.zrange(queue_key, start, start + page_size - 1)
+                if not urls:
+                    return
+                # Decode bytes to strings
+                yield [url.decode("utf-8") if isinstance(url, bytes) else url for url in urls]
+                if len(urls) < page_size:
+                    return
+                start += len(urls)
         except Exception as e:
             self.logger.debug(f"Could not fetch Redis start_urls: {e}")
-            return []
 
     def _start_requests_smart_scheduling(self) -> Any:
         """Phase C: Generate requests using smart scheduling from domains table.
@@ -545,6 +583,7 @@ class DiscoverySpider(Spider):
                 return
 
             self.logger.info(f"Claimed {len(claimed)} domains for crawling")
+            self._warm_up_claims(claimed)
 
             for domain_row in claimed:
                 domain_id = domain_row["id"]
@@ -553,35 +592,22 @@ class DiscoverySpider(Spider):
                 checkpoint_id = domain_row.get("frontier_checkpoint_id")
 
                 # Track claimed domain for heartbeat and release
-                with self._claimed_domains_lock:
-                    self._claimed_domains[domain_id] = {
-                        "domain": domain,
-                        "version": version,
-                    }
+                self._register_claim(domain, domain_id, version)
 
                 # Resume from checkpoint if exists
                 if checkpoint_id:
                     self.logger.info(f"Resuming {domain} from checkpoint: {checkpoint_id}")
                     try:
-                        redis_client = _redis_from_url(get_redis_url(), socket_timeout=2)
+                        redis_client = get_redis_client()
 
-                        checkpoint_urls = load_checkpoint(checkpoint_id, redis_client)
+                        resumed = yield from self._yield_checkpoint_requests(
+                            checkpoint_id,
+                            redis_client,
+                            {"domain": domain, "domain_id": domain_id},
+                        )
 
-                        if checkpoint_urls:
-                            self.logger.info(
-                                f"Loaded {len(checkpoint_urls)} URLs from checkpoint for {domain}"
-                            )
-                            for entry in checkpoint_urls:
-                                yield Request(
-                                    url=entry["url"],
-                                    callback=self.parse,
-                                    errback=self.handle_error,
-                                    meta={
-                                        "depth": entry["depth"],
-                                        "domain": domain,
-                                        "domain_id": domain_id,
-                                    },
-                                )
+                        if resumed:
+                            self.logger.info(f"Loaded {resumed} URLs from checkpoint for {domain}")
                             # Clear checkpoint after successful load
                             delete_checkpoint(checkpoint_id, redis_client)
                             clear_frontier_checkpoint(domain)
@@ -596,17 +622,105 @@ class DiscoverySpider(Spider):
 
                 # Fresh start: yield root URL
                 self.logger.info(f"Starting fresh crawl for {domain}")
-                yield Request(
-                    url=f"https://{domain}",
-                    callback=self.parse,
-                    errback=self.handle_error,
-                    meta={"depth": 0, "domain": domain, "domain_id": domain_id},
-                )
+                yield self._root_request(domain, domain_id)
 
         except Exception as e:
             self.logger.error(f"Smart scheduling failed: {e}")
 
-    def _yield_start_requests(self, url: str, domain_netloc: str) -> Any:
+    def _warm_up_claims(self, claimed: list[dict[str, Any]]) -> None:
+        """Start DNS and robots.txt loading for a batch of claimed domains.
+
+        Runs in parallel for the whole batch, so a domain's first page
+        request finds its address cached, its rules loaded and a pooled
+        connection from the robots.txt fetch. Crawl rates learned on the
+        previous claim seed adaptive concurrency.
+
+        Args:
+            claimed: Rows returned by claim_domains
+        """
+        domains = [row["domain"] for row in claimed]
+        for row in claimed:
+            seed_domain_limits(
+                row["domain"], row.get("crawl_concurrency"), row.get("crawl_delay_ms")
+            )
+        prefetch_hostnames(domains)
+        if self.enable_claim_warmup:
+            prefetch_robots(f"https://{domain}/" for domain in domains)
+
+    def _root_request(self, domain: str, domain_id: UUID) -> Request:
+        """Build the first request for a freshly claimed domain.
+
+        With ENABLE_CLAIM_WARMUP_HEAD a HEAD probe goes first; its callback
+        issues the GET against the final URL after redirects
+        (example.com -> www.example.com).
+
+        Args:
+            domain: Claimed domain name
+            domain_id: domains.id of the claimed row
+
+        Returns:
+            Request for the domain root.
+        """
+        meta = {"depth": 0, "domain": domain, "domain_id": domain_id}
+        if self.enable_claim_warmup_head:
+            return Request(
+                url=f"https://{domain}",
+                method="HEAD",
+                callback=self._parse_warmup,
+                errback=self._warmup_failed,
+                meta=meta,
+                dont_filter=True,
+            )
+        return Request(
+            url=f"https://{domain}",
+            callback=self.parse,
+            errback=self.handle_error,
+            meta=meta,
+        )
+
+    def _warmup_root_get(self, url: str, meta: dict[str, Any]) -> Request:
+        return Request(
+            url=url,
+            callback=self.parse,
+            errback=self.handle_error,
+            meta={key: meta[key] for key in ("depth", "domain", "domain_id")},
+        )
+
+    def _parse_warmup(self, response: Response) -> Any:
+        """Issue the root GET at the URL the HEAD probe ended on."""
+        if response.meta.get("redirect_urls"):
+            self.warmup_redirects += 1
+        yield self._warmup_root_get(response.url, response.meta)
+
+    def _warmup_failed(self, failure: Any) -> Any:
+        """Fall back to a plain root GET (e.g. HEAD not allowed); errors surface there."""
+        request = failure.request
+        yield self._warmup_root_get(request.url, request.meta)
+
+    def _register_claim(self, domain: str, domain_id: UUID, version: int) -> None:
+        """Record a claimed domain in the registry for heartbeat, flush and release.
+
+        Args:
+            domain: Domain name from the claimed row
+            domain_id: domains.id of the claimed row
+            version: Claim version returned by claim_domains
+        """
+        key = self._domain_key(domain)
+        existing = self._domain_registry.get(key)
+        if existing is not None and existing.claimed and existing.domain_id != domain_id:
+            self.logger.warning(
+                f"Claimed {domain} ({domain_id}) canonicalizes to {key}, already claimed as "
+                f"{existing.domain_id}; keeping the existing claim"
+            )
+            return
+        self._domain_registry.claim(key, domain_id, version)
+
+    def _yield_start_requests(
+        self,
+        url: str,
+        domain_netloc: str,
+        checkpoint_ids: dict[str, str] | None = None,
+    ) -> Any:
         """Yield start requests for a domain, with optional checkpoint resume.
 
         When per-domain budgets are enabled and a checkpoint exists for the domain,
@@ -615,6 +729,8 @@ class DiscoverySpider(Spider):
         Args:
             url: Root URL of the domain
             domain_netloc: Domain netloc for meta
+            checkpoint_ids: Pre-fetched canonical domain -> checkpoint ID map for
+                the current seed batch. When None, the domain row is looked up.
 
         Yields:
             Request objects for the domain (from checkpoint or fresh start)
@@ -623,35 +739,28 @@ class DiscoverySpider(Spider):
         if self.enable_per_domain_budget and self.enable_domain_tracking:
             try:
                 canonical_domain = canonicalize_domain(url, self.strip_subdomains)
-                domain_row = get_domain(canonical_domain)
+                if checkpoint_ids is not None:
+                    checkpoint_id = checkpoint_ids.get(canonical_domain)
+                else:
+                    domain_row = get_domain(canonical_domain)
+                    checkpoint_id = domain_row.get("frontier_checkpoint_id") if domain_row else None
 
-                if domain_row and domain_row.get("frontier_checkpoint_id"):
-                    checkpoint_id = domain_row["frontier_checkpoint_id"]
+                if checkpoint_id:
                     self.logger.info(f"Found checkpoint for {canonical_domain}: {checkpoint_id}")
 
                     # Load checkpoint from Redis
                     try:
-                        redis_client = _redis_from_url(get_redis_url(), socket_timeout=2)
+                        redis_client = get_redis_client()
 
-                        checkpoint_urls = load_checkpoint(checkpoint_id, redis_client)
+                        resumed = yield from self._yield_checkpoint_requests(
+                            checkpoint_id, redis_client, {"domain": domain_netloc}
+                        )
 
-                        if checkpoint_urls:
+                        if resumed:
                             self.logger.info(
-                                f"Resuming {canonical_domain} from checkpoint: "
-                                f"{len(checkpoint_urls)} URLs"
+                                f"Resumed {canonical_domain} from checkpoint: {resumed} URLs"
                             )
 
-                            for entry in checkpoint_urls:
-                                yield Request(
-                                    url=entry["url"],
-                                    callback=self.parse,
-                                    errback=self.handle_error,
-                                    meta={
-                                        "depth": entry["depth"],
-                                        "domain": domain_netloc,
-                                    },
-                                )
-
                             # Clear checkpoint after successful load
                             # NOTE: This deletes the checkpoint immediately, which means
                             # if the spider crashes before processing all resumed URLs,
@@ -689,6 +798,33 @@ class DiscoverySpider(Spider):
             meta={"depth": 0, "domain": domain_netloc},
         )
 
+    def _yield_checkpoint_requests(
+        self, checkpoint_id: str, redis_client: Any, meta: dict[str, Any]
+    ) -> Generator[Request, None, int]:
+        """Stream requests for a frontier checkpoint without materializing it.
+
+        Args:
+            checkpoint_id: Checkpoint ID in format "{domain}:{run_id}"
+            redis_client: Redis client instance
+            meta: Extra request meta (domain, domain_id) merged with depth
+
+        Yields:
+            Request objects in depth order.
+
+        Returns:
+            Number of requests yielded (0 if the checkpoint was empty or missing).
+        """
+        count = 0
+        for entry in iter_checkpoint(checkpoint_id, redis_client):
+            count += 1
+            yield Request(
+                url=entry["url"],
+                callback=self.parse,
+                errback=self.handle_error,
+                meta={"depth": entry["depth"], **meta},
+            )
+        return count
+
     def parse(self, response: Response) -> Any:
         """Parse HTML page and extract images and links.
 
@@ -744,26 +880,18 @@ class DiscoverySpider(Spider):
         image_urls = self._extract_image_urls(response, current_domain)
         self.images_found += len(image_urls)
 
-        # Domain tracking: update per-domain stats
-        _tracking_canonical = None
-        if self.enable_domain_tracking:
-            try:
-                _tracking_canonical = canonicalize_domain(current_domain, self.strip_subdomains)
-                if _tracking_canonical not in self._domain_stats:
-                    self._domain_stats[_tracking_canonical] = {
-                        "pages": 0,
-                        "images_found": 0,
-                        "errors": 0,
-                        "links_discovered": 0,
-                    }
-                self._domain_stats[_tracking_canonical]["pages"] += 1
-                self._domain_stats[_tracking_canonical]["images_found"] += len(image_urls)
+        # Per-domain stats and budget counter (one registry record per canonical domain)
+        domain_state = self._domain_state(current_domain)
+        pages_crawled_before = domain_state.pages
+        domain_state.pages += 1
+        domain_state.images_found += len(image_urls)
 
-                # Mid-crawl flush if enabled and threshold reached
-                if self.flush_interval > 0 and self.enable_domain_tracking:
-                    self._maybe_flush_domain_stats(_tracking_canonical)
+        # Mid-crawl flush if enabled and threshold reached
+        if self.enable_domain_tracking and self.flush_interval > 0:
+            try:
+                self._maybe_flush_domain_stats(domain_state.domain)
             except Exception as e:
-                self.logger.debug(f"Failed to update domain stats for {current_domain}: {e}")
+                self.logger.debug(f"Failed to flush domain stats for {current_domain}: {e}")
 
         self.logger.info(f"Found {len(image_urls)} images on {response.url}")
 
@@ -777,17 +905,22 @@ class DiscoverySpider(Spider):
         )
 
         # Yield image download requests with callback
+        validators = self._get_image_validators(image_urls)
         for img_url in image_urls:
+            meta = {
+                "source_page": response.url,
+                "source_domain": current_domain,
+                "crawl_type": self.crawl_type,  # Propagate actual crawl type
+                "crawl_run_id": self.crawl_run_id,  # Pass run ID for stats tracking
+                "lane": IMAGE_LANE,
+            }
+            headers = self._conditional_headers(validators.get(img_url), meta)
             yield Request(
                 url=img_url,
                 callback=self.parse_image,
                 errback=self.handle_image_error,
-                meta={
-                    "source_page": response.url,
-                    "source_domain": current_domain,
-                    "crawl_type": self.crawl_type,  # Propagate actual crawl type
-                    "crawl_run_id": self.crawl_run_id,  # Pass run ID for stats tracking
-                },
+                headers=headers,
+                meta=meta,
                 priority=response.meta.get("depth", 0) + 1,  # Lower priority than page crawling
                 dont_filter=False,
             )
@@ -796,12 +929,10 @@ class DiscoverySpider(Spider):
         extracted_links = self._extract_links(response, current_domain)
 
         # Track discovered links for pages_discovered metric
-        if _tracking_canonical and _tracking_canonical in self._domain_stats:
-            self._domain_stats[_tracking_canonical]["links_discovered"] += len(extracted_links)
+        domain_state.links_discovered += len(extracted_links)
 
-        # Check budget BEFORE incrementing counter (so current page is allowed)
+        # Check budget against pages crawled BEFORE this one (so current page is allowed)
         if self.enable_per_domain_budget:
-            pages_crawled_before = self._domain_pages_crawled.get(current_domain, 0)
             # 0 means unlimited budget
             if self.max_pages_per_run > 0 and pages_crawled_before >= self.max_pages_per_run:
                 self.logger.info(
@@ -817,12 +948,6 @@ class DiscoverySpider(Spider):
         else:
             should_yield_links = True
 
-        # Now increment the counter for this page
-        if self.enable_per_domain_budget:
-            self._domain_pages_crawled[current_domain] = (
-                self._domain_pages_crawled.get(current_domain, 0) + 1
-            )
-
         # Enqueue links to frontier queue if budget is exhausted
         # These URLs will be saved to checkpoint if crawl ends
         if not should_yield_links and extracted_links:
@@ -844,6 +969,43 @@ class DiscoverySpider(Spider):
                     },
                 )
 
+    def _get_image_validators(
+        self, image_urls: list[str]
+    ) -> dict[str, tuple[str | None, str | None, int | None]]:
+        """Look up stored ETag/Last-Modified for a page's images (one query per page)."""
+        if not self.use_conditional_image_requests or not image_urls:
+            return {}
+        try:
+            return get_image_validators(image_urls)
+        except Exception as e:
+            self.logger.debug(f"Failed to load image validators: {e}")
+            return {}
+
+    def _conditional_headers(
+        self,
+        validators: tuple[str | None, str | None, int | None] | None,
+        meta: dict[str, Any],
+    ) -> dict[str, str] | None:
+        """Build If-None-Match/If-Modified-Since headers for a stored image.
+
+        Also lets the 304 through to parse_image and records the stored
+        size in meta so the pipeline can count the bytes saved.
+        """
+        if validators is None:
+            return None
+        etag, last_modified, stored_size = validators
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        if not headers:
+            return None
+        meta["handle_httpstatus_list"] = [304]
+        meta["content_length"] = stored_size
+        self.conditional_image_requests += 1
+        return headers
+
     def _extract_image_urls(self, response: Response, domain: str) -> list[str]:
         """Extract image URLs from HTML response.
 
@@ -1049,7 +1211,9 @@ class DiscoverySpider(Spider):
             "source_domain": source_domain,
             "crawl_type": crawl_type,
             "crawl_run_id": crawl_run_id,  # Pass for pipeline stats
+            "content_length": meta.get("content_length"),  # Stored size, for 304s
             "response": response,  # Attach response for pipeline processing
+            "trace": meta.get("trace"),  # Lifecycle timestamps (ENABLE_IMAGE_TRACING)
         }
 
     def handle_image_error(self, failure: Any) -> None:
@@ -1095,18 +1259,10 @@ class DiscoverySpider(Spider):
 
         # Track errors in domain stats for persistent storage (all errors, not just blocking)
         if self.enable_domain_tracking and domain != "unknown":
-            try:
-                err_canonical = canonicalize_domain(domain, self.strip_subdomains)
-                if err_canonical not in self._domain_stats:
-                    self._domain_stats[err_canonical] = {
-                        "pages": 0,
-                        "images_found": 0,
-                        "errors": 0,
-                        "links_discovered": 0,
-                    }
-                self._domain_stats[err_canonical]["errors"] += 1
-            except Exception:
-                pass
+            self._domain_state(domain).errors += 1
+            # Host does not exist (cached NXDOMAIN): record the domain as unreachable
+            if is_nxdomain(urlparse(failure.request.url).hostname or domain):
+                self._unreachable_domains_canonical.add(self._domain_key(domain))
 
         # Best-effort crawl log for failures
         self._log_crawl_entry(
@@ -1130,13 +1286,19 @@ class DiscoverySpider(Spider):
             self._heartbeat_thread.join(timeout=5)
             self.logger.debug("Stopped claim renewal heartbeat")
 
+        if self.conditional_image_requests:
+            self.logger.info(
+                f"Sent {self.conditional_image_requests} conditional image requests "
+                "(If-None-Match/If-Modified-Since)"
+            )
+
         # Compute images_stored per domain from crawl_log for accurate tracking
         domain_images_stored = self._compute_domain_images_stored()
 
         # Phase C: Release all domain claims with stats update
         # Track which domains were released to avoid double-counting in generic loop
         released_domains: set[str] = set()
-        if self.enable_claim_protocol and self._claimed_domains:
+        if self.enable_claim_protocol and self._domain_registry.has_claims():
             released_domains = self._release_all_claims(domain_images_stored)
 
         # Update crawl run if one was created
@@ -1189,25 +1351,24 @@ class DiscoverySpider(Spider):
         # Only save if domain hit its budget limit
         if self.enable_per_domain_budget and self.enable_domain_tracking:
             try:
-                redis_client = _redis_from_url(get_redis_url(), socket_timeout=2)
+                redis_client = get_redis_client()
                 run_id_str = str(self.crawl_run_id) if self.crawl_run_id else "unknown"
 
-                for domain, queue in self._domain_frontier_queue.items():
-                    queue_size = len(queue)
+                for state in self._domain_registry:
+                    domain = state.domain
+                    queue_size = len(state.frontier)
                     if queue_size == 0:
                         continue
 
                     # Only save checkpoint if domain hit its budget
-                    pages_crawled = self._domain_pages_crawled.get(domain, 0)
-                    if self.max_pages_per_run > 0 and pages_crawled >= self.max_pages_per_run:
+                    if self.max_pages_per_run > 0 and state.pages >= self.max_pages_per_run:
                         try:
-                            canonical_domain = canonicalize_domain(domain, self.strip_subdomains)
                             # Convert deque to list for checkpoint
-                            pending_urls = list(queue)
+                            pending_urls = list(state.frontier)
                             checkpoint_id = save_checkpoint(
-                                canonical_domain, run_id_str, pending_urls, redis_client
+                                domain, run_id_str, pending_urls, redis_client
                             )
-                            update_frontier_checkpoint(canonical_domain, checkpoint_id, queue_size)
+                            update_frontier_checkpoint(domain, checkpoint_id, queue_size)
                             self.logger.info(
                                 f"Saved frontier checkpoint for {domain}: "
                                 f"{queue_size} URLs (checkpoint: {checkpoint_id})"
@@ -1219,39 +1380,27 @@ class DiscoverySpider(Spider):
                 self.logger.warning(f"Could not save frontier checkpoints: {e}")
 
         # Domain tracking: update domain stats for all crawled domains
-        if self.enable_domain_tracking and self._domain_stats:
+        tracked_states = [s for s in self._domain_registry if s.has_stats]
+        if self.enable_domain_tracking and tracked_states:
             try:
                 # Filter out domains already updated via claim release to prevent double-counting
-                domains_to_update = {
-                    d: s for d, s in self._domain_stats.items() if d not in released_domains
-                }
+                states_to_update = [s for s in tracked_states if s.domain not in released_domains]
                 self.logger.info(
-                    f"Updating domain stats for {len(domains_to_update)} domains "
+                    f"Updating domain stats for {len(states_to_update)} domains "
                     f"({len(released_domains)} already updated via claim release)..."
                 )
-                for domain, stats in domains_to_update.items():
-                    # Get flushed stats to compute remainders
-                    flushed = self._domain_flushed_stats.get(
-                        domain, {"pages": 0, "images_found": 0, "errors": 0, "links_discovered": 0}
-                    )
-
+                for state in states_to_update:
+                    domain = state.domain
                     # Compute remainder deltas (avoid double-counting after mid-crawl flush)
-                    pages_delta = max(0, stats.get("pages", 0) - flushed.get("pages", 0))
-                    images_delta = max(
-                        0, stats.get("images_found", 0) - flushed.get("images_found", 0)
-                    )
-                    errors_delta = max(0, stats.get("errors", 0) - flushed.get("errors", 0))
-                    links_delta = max(
-                        0, stats.get("links_discovered", 0) - flushed.get("links_discovered", 0)
-                    )
+                    pages_delta, images_delta, errors_delta, links_delta = state.unflushed_deltas()
 
                     # Determine status based on crawl outcome using canonicalized blocked set
                     if domain in self._blocked_domains_canonical:
                         status = "blocked"
-                    elif stats["pages"] == 0 and stats.get("errors", 0) > 0:
+                    elif state.pages == 0 and state.errors > 0:
                         # Never successfully crawled, only errors (DNS, timeout, etc.)
                         status = "unreachable"
-                    elif stats["pages"] == 0:
+                    elif state.pages == 0:
                         # Never reached at all — keep as pending
                         status = "pending"
                     else:
@@ -1270,12 +1419,24 @@ class DiscoverySpider(Spider):
                     )
                     self.logger.debug(
                         f"Updated domain stats: {domain} "
-                        f"(pages: {stats['pages']}, images_stored: {domain_images_stored.get(domain, 0)})"
+                        f"(pages: {state.pages}, images_stored: {domain_images_stored.get(domain, 0)})"
                     )
-                self.logger.info(f"Domain stats updated for {len(self._domain_stats)} domains")
+                self.logger.info(f"Domain stats updated for {len(tracked_states)} domains")
             except Exception as e:
                 self.logger.warning(f"Failed to update domain stats: {e}")
 
+        # Process-wide resolver counters, recorded with this crawl's stats
+        crawler = getattr(self, "crawler", None)
+        if crawler is not None and crawler.stats is not None:
+            for key, value in get_dns_cache_stats().items():
+                crawler.stats.set_value(f"dnscache/{key}", value)
+            for key, value in get_redis_pool_stats().items():
+                crawler.stats.set_value(f"redis/{key}", value)
+            for key, db_value in get_db_pool_stats().items():
+                crawler.stats.set_value(f"db/{key}", db_value)
+            if self.enable_claim_warmup_head:
+                crawler.stats.set_value("warmup/head_redirects", self.warmup_redirects)
+
         self.logger.info("=" * 50)
         self.logger.info(f"Spider closed: {reason}")
         self.logger.info(f"Pages crawled: {self.pages_crawled}")
@@ -1332,65 +1493,45 @@ class DiscoverySpider(Spider):
         # Track successfully released domains to prevent double-counting
         released_domains: set[str] = set()
 
-        with self._claimed_domains_lock:
-            claimed_snapshot = list(self._claimed_domains.items())
+        claimed_snapshot = self._domain_registry.claimed()
 
         self.logger.info(f"Releasing {len(claimed_snapshot)} domain claims...")
 
-        for domain_id, info in claimed_snapshot:
-            domain = info["domain"]
-            version = info["version"]
-
-            # Get stats for this domain
-            canonical_domain = canonicalize_domain(domain, self.strip_subdomains)
-            stats = self._domain_stats.get(
-                canonical_domain,
-                {"pages": 0, "images_found": 0, "errors": 0, "links_discovered": 0},
-            )
-            flushed = self._domain_flushed_stats.get(
-                canonical_domain,
-                {"pages": 0, "images_found": 0, "images_stored": 0, "errors": 0},
-            )
+        for state in claimed_snapshot:
+            domain_id = state.domain_id
+            if domain_id is None:
+                continue  # Claim lost via heartbeat since the snapshot
+            domain = state.domain
+            version = state.version
 
             # Compute deltas since last flush (avoid double-counting)
-            pages_crawled = max(0, stats.get("pages", 0) - flushed.get("pages", 0))
-            images_found = max(0, stats.get("images_found", 0) - flushed.get("images_found", 0))
-            images_stored = domain_images_stored.get(canonical_domain, 0)
-            errors = max(0, stats.get("errors", 0) - flushed.get("errors", 0))
-            links_discovered = max(
-                0, stats.get("links_discovered", 0) - flushed.get("links_discovered", 0)
-            )
+            pages_crawled, images_found, errors, links_discovered = state.unflushed_deltas()
+            images_stored = domain_images_stored.get(domain, 0)
 
             # Determine final status — use true queue state
-            if canonical_domain in self._blocked_domains_canonical:
+            queue = state.frontier
+            if domain in self._blocked_domains_canonical:
                 status = "blocked"
+            elif state.pages == 0 and domain in self._unreachable_domains_canonical:
+                status = "unreachable"
             else:
-                queue_size = self.get_frontier_size(canonical_domain)
-                if queue_size == 0:
-                    queue_size = self.get_frontier_size(domain)
-                status = "active" if queue_size > 0 else "exhausted"
+                status = "active" if queue else "exhausted"
 
             # Save checkpoint if domain still active with pending URLs
             checkpoint_id = None
             frontier_size = 0
             if status == "active":
-                queue = self._domain_frontier_queue.get(
-                    canonical_domain
-                ) or self._domain_frontier_queue.get(domain)
-                if queue and len(queue) > 0:
-                    try:
-                        redis_client = _redis_from_url(get_redis_url(), socket_timeout=2)
-                        run_id_str = str(self.crawl_run_id) if self.crawl_run_id else "unknown"
-                        pending = list(queue)
-                        checkpoint_id = save_checkpoint(
-                            canonical_domain, run_id_str, pending, redis_client
-                        )
-                        frontier_size = len(queue)
-                        self.logger.info(
-                            f"Saved checkpoint for {domain}: {checkpoint_id} ({frontier_size} URLs)"
-                        )
-                    except Exception as e:
-                        self.logger.warning(f"Failed to save checkpoint for {domain}: {e}")
+                try:
+                    redis_client = get_redis_client()
+                    run_id_str = str(self.crawl_run_id) if self.crawl_run_id else "unknown"
+                    pending = list(queue)
+                    checkpoint_id = save_checkpoint(domain, run_id_str, pending, redis_client)
+                    frontier_size = len(queue)
+                    self.logger.info(
+                        f"Saved checkpoint for {domain}: {checkpoint_id} ({frontier_size} URLs)"
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Failed to save checkpoint for {domain}: {e}")
 
             # Release claim with retries
             released = False
@@ -1412,6 +1553,7 @@ class DiscoverySpider(Spider):
                     if checkpoint_id:
                         updates["frontier_checkpoint_id"] = checkpoint_id
                         updates["frontier_size"] = frontier_size
+                    updates.update(learned_domain_limits(domain))
 
                     success = release_claim(
                         domain_id=domain_id,
@@ -1422,7 +1564,7 @@ class DiscoverySpider(Spider):
 
                     if success:
                         released = True
-                        released_domains.add(canonical_domain)
+                        released_domains.add(domain)
                         self.logger.debug(f"Released claim for {domain} (status: {status})")
                         break
                     else:
@@ -1431,9 +1573,9 @@ class DiscoverySpider(Spider):
                             f"Version conflict releasing {domain}, retry {attempt + 1}"
                         )
                         version += 1
-                        with self._claimed_domains_lock:
-                            if domain_id in self._claimed_domains:
-                                self._claimed_domains[domain_id]["version"] = version
+                        with self._domain_registry.lock:
+                            if state.domain_id == domain_id:
+                                state.version = version
                 except Exception as e:
                     self.logger.error(
                         f"Failed to release claim for {domain} (attempt {attempt + 1}): {e}"
@@ -1453,36 +1595,20 @@ class DiscoverySpider(Spider):
         Args:
             canonical_domain: Canonical domain name.
         """
-        stats = self._domain_stats.get(canonical_domain, {})
-        flushed = self._domain_flushed_stats.get(
-            canonical_domain, {"pages": 0, "images_found": 0, "images_stored": 0, "errors": 0}
-        )
+        state = self._domain_registry.get(canonical_domain)
+        if state is None:
+            return
 
-        unflushed_pages = stats.get("pages", 0) - flushed["pages"]
+        # Compute deltas since last flush
+        pages_delta, images_delta, errors_delta, links_delta = state.unflushed_deltas()
 
-        if unflushed_pages < self.flush_interval:
+        if pages_delta < self.flush_interval:
             return  # Below threshold
 
-        # Compute deltas since last flush
-        pages_delta = stats.get("pages", 0) - flushed["pages"]
-        images_delta = stats.get("images_found", 0) - flushed["images_found"]
-        errors_delta = stats.get("errors", 0) - flushed.get("errors", 0)
-        links_delta = stats.get("links_discovered", 0) - flushed.get("links_discovered", 0)
-
         try:
             # Phase C: Use claim-safe incremental update
             if self.enable_claim_protocol:
-                # Find domain_id from claimed domains
-                domain_id: UUID | None = None
-                with self._claimed_domains_lock:
-                    for did, info in self._claimed_domains.items():
-                        if (
-                            canonicalize_domain(info["domain"], self.strip_subdomains)
-                            == canonical_domain
-                        ):
-                            domain_id = did
-                            break
-
+                domain_id = state.domain_id
                 if domain_id is not None:
                     success = increment_domain_stats_claimed(
                         domain_id=domain_id,
@@ -1512,13 +1638,7 @@ class DiscoverySpider(Spider):
                 )
 
             # Update flushed counters (tracking cumulative flush progress)
-            self._domain_flushed_stats[canonical_domain] = {
-                "pages": stats.get("pages", 0),
-                "images_found": stats.get("images_found", 0),
-                "images_stored": 0,  # Not tracked during parse
-                "errors": stats.get("errors", 0),
-                "links_discovered": stats.get("links_discovered", 0),
-            }
+            state.mark_flushed()
 
             # Increment run counters incrementally
             if self.crawl_run_id:
@@ -1550,7 +1670,8 @@ class DiscoverySpider(Spider):
 
         try:
             with get_cursor() as cursor:
-                cursor.execute(
+                execute_prepared(
+                    cursor,
                     """
                     INSERT INTO crawl_log (page_url, domain, status, images_found, error_message, crawl_type, crawl_run_id)
                     VALUES (%s, %s, %s, %s, %s, %s, %s)
@@ -0,0 +1,265 @@
+"""Refresh spider for InvisibleCrawler.
+
+Re-fetches stored images whose images.last_seen_at is older than
+REFRESH_STALE_AFTER_DAYS, straight from the images table: no page HTML is
+downloaded or parsed. Requests carry the stored ETag/Last-Modified, so an
+unchanged image costs a 304.
+
+Stale images are paged stalest first and interleaved round-robin by host,
+so Scrapy's per-domain slots (CONCURRENT_REQUESTS_PER_DOMAIN,
+DOWNLOAD_DELAY, AutoThrottle) keep each site polite while requests for
+other hosts fill the global concurrency.
+
+Usage:
+    scrapy crawl refresh -a stale_days=14 -a max_images=50000
+    scrapy crawl refresh -a shard=0 -a shards=4   # split across 4 workers
+"""
+
+from collections import Counter, OrderedDict, deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from urllib.parse import urlparse
+from uuid import UUID
+
+from scrapy import Spider, signals
+from scrapy.http import Request, Response
+
+from crawler.lanes import IMAGE_LANE
+from env_config import get_refresh_batch_size, get_refresh_stale_after_days
+from storage.db import get_cursor
+from storage.image_repository import StaleImage, iter_stale_images, mark_images_gone
+
+# HTTP statuses meaning the image URL no longer serves an image
+GONE_STATUSES = (404, 410)
+
+# Gone image IDs collected before one batched UPDATE
+GONE_FLUSH_BATCH_SIZE = 500
+
+
+def interleave_by_host(images: Iterable[StaleImage]) -> Iterator[StaleImage]:
+    """Round-robin images across hosts, keeping staleness order per host.
+
+    Hosts are visited in order of their stalest image.
+    """
+    queues: OrderedDict[str, deque[StaleImage]] = OrderedDict()
+    for image in images:
+        host = urlparse(image.url).netloc.lower()
+        queues.setdefault(host, deque()).append(image)
+    while queues:
+        for host in list(queues):
+            queue = queues[host]
+            yield queue.popleft()
+            if not queue:
+                del queues[host]
+
+
+class RefreshSpider(Spider):
+    """Spider re-fetching stale stored images.
+
+    Attributes:
+        name: Spider identifier for Scrapy.
+        stale_days: Minimum age of last_seen_at for an image to be refreshed.
+        max_images: Maximum images requested this run (0 = unlimited).
+        shard: This worker's shard of the images table.
+        shards: Number of workers splitting the refresh.
+        refresh_stats: Per-run outcome counters (requested, refreshed,
+            unchanged, changed, gone, failed).
+    """
+
+    crawl_run_id: UUID | None
+
+    name = "refresh"
+
+    # The images table is the frontier: keep the queue local and unfiltered
+    custom_settings = {
+        "SCHEDULER": "scrapy.core.scheduler.Scheduler",
+        "DUPEFILTER_CLASS": "scrapy.dupefilters.RFPDupeFilter",
+    }
+
+    @classmethod
+    def from_crawler(cls, crawler: Any, *args: Any, **kwargs: Any) -> "RefreshSpider":
+        """Create spider instance from crawler and connect outcome signals."""
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        crawler.signals.connect(spider.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(spider.item_dropped, signal=signals.item_dropped)
+        return spider
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the spider.
+
+        Args:
+            **kwargs: Spider args (stale_days, max_images, batch_size, shard, shards).
+        """
+        super().__init__(**kwargs)
+        self.stale_days = _get_int(kwargs.get("stale_days"), get_refresh_stale_after_days())
+        self.max_images = _get_int(kwargs.get("max_images"), 0)
+        self.batch_size = max(1, _get_int(kwargs.get("batch_size"), get_refresh_batch_size()))
+        self.shards = max(1, _get_int(kwargs.get("shards"), 1))
+        self.shard = _get_int(kwargs.get("shard"), 0) % self.shards
+        self.crawl_type = "refresh"
+        self.crawl_run_id = None
+        self.refresh_stats: Counter[str] = Counter(
+            {key: 0 for key in ("requested", "refreshed", "unchanged", "changed", "gone", "failed")}
+        )
+        self._gone_ids: list[str] = []
+
+    def spider_opened(self, spider: Spider) -> None:
+        """Create the crawl run record."""
+        try:
+            with get_cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO crawl_runs (mode, status, seed_source)
+                    VALUES (%s, %s, %s)
+                    RETURNING id
+                    """,
+                    (self.crawl_type, "running", "images.last_seen_at"),
+                )
+                self.crawl_run_id = cursor.fetchone()[0]
+                self.logger.info(f"Created crawl run: {self.crawl_run_id} (mode: refresh)")
+        except Exception as e:
+            self.logger.warning(f"Failed to create crawl run: {e}")
+            self.crawl_run_id = None
+
+    async def start(self) -> AsyncIterator[Any]:
+        """Yield start_requests() (Scrapy 2.13+ entry point; older versions call it directly)."""
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self) -> Any:
+        """Yield conditional image requests for stale images, stalest first."""
+        seen_before = datetime.now(UTC) - timedelta(days=self.stale_days)
+        self.logger.info(
+            f"Refreshing images last seen before {seen_before:%Y-%m-%d %H:%M} "
+            f"(shard {self.shard + 1}/{self.shards})"
+        )
+        for batch in iter_stale_images(seen_before, self.batch_size, self.shard, self.shards):
+            for image in interleave_by_host(batch):
+                if self.max_images and self.refresh_stats["requested"] >= self.max_images:
+                    return
+                self.refresh_stats["requested"] += 1
+                yield self._build_request(image)
+
+    def _build_request(self, image: StaleImage) -> Request:
+        headers = {}
+        if image.etag:
+            headers["If-None-Match"] = image.etag
+        if image.last_modified:
+            headers["If-Modified-Since"] = image.last_modified
+        return Request(
+            url=image.url,
+            callback=self.parse_image,
+            errback=self.handle_image_error,
+            headers=headers or None,
+            meta={
+                "image_id": image.id,
+                "image_url": image.url,
+                "content_length": image.file_size,
+                "handle_httpstatus_list": [304, *GONE_STATUSES],
+                "lane": IMAGE_LANE,
+            },
+            dont_filter=True,
+        )
+
+    def parse_image(self, response: Response) -> Any:
+        """Hand the re-fetched image (or 304) to the pipeline; record gone URLs."""
+        if response.status in GONE_STATUSES:
+            self.refresh_stats["gone"] += 1
+            self._gone_ids.append(response.meta["image_id"])
+            if len(self._gone_ids) >= GONE_FLUSH_BATCH_SIZE:
+                self._flush_gone()
+            return
+
+        # Report the stored URL, not a redirect target: the pipeline bumps
+        # last_seen_at by URL, and the stale row must move or it is re-fetched
+        url = response.meta.get("image_url", response.url)
+        yield {
+            "type": "image",
+            "url": url,
+            "source_page": None,
+            "source_domain": urlparse(url).netloc,
+            "crawl_type": self.crawl_type,
+            "crawl_run_id": self.crawl_run_id,
+            "content_length": response.meta.get("content_length"),
+            "response": response,
+            "trace": response.meta.get("trace"),
+        }
+
+    def handle_image_error(self, failure: Any) -> None:
+        """Count failed refresh downloads (left stale for the next run)."""
+        self.refresh_stats["failed"] += 1
+        url = failure.request.url if hasattr(failure, "request") else "unknown"
+        self.logger.debug(f"Failed to refresh image {url}: {failure.getErrorMessage()}")
+
+    def item_scraped(self, item: Any, response: Response, spider: Spider) -> None:
+        """Classify pipeline outcomes: same content is unchanged, new hash is changed."""
+        if spider is not self:
+            return
+        status = item.get("store_status")
+        if status in ("unchanged", "deduplicated"):
+            self.refresh_stats["unchanged"] += 1
+        elif status == "downloaded":
+            self.refresh_stats["changed"] += 1
+        else:
+            return
+        self.refresh_stats["refreshed"] += 1
+
+    def item_dropped(
+        self, item: Any, response: Response, exception: Exception, spider: Spider
+    ) -> None:
+        """Count items the pipeline rejected (invalid payload, storage error)."""
+        if spider is self:
+            self.refresh_stats["failed"] += 1
+
+    def _flush_gone(self) -> None:
+        if not self._gone_ids:
+            return
+        image_ids, self._gone_ids = self._gone_ids, []
+        try:
+            mark_images_gone(image_ids)
+        except Exception as e:
+            self.logger.warning(f"Failed to mark {len(image_ids)} images as gone: {e}")
+
+    def closed(self, reason: str) -> None:
+        """Flush gone images, record the run and report outcome counts."""
+        self._flush_gone()
+
+        if self.crawl_run_id:
+            try:
+                with get_cursor() as cursor:
+                    cursor.execute(
+                        """
+                        UPDATE crawl_runs
+                        SET completed_at = CURRENT_TIMESTAMP,
+                            status = %s,
+                            images_found = %s,
+                            images_downloaded = %s
+                        WHERE id = %s
+                        """,
+                        (
+                            "completed" if reason == "finished" else "failed",
+                            self.refresh_stats["requested"],
+                            self.refresh_stats["changed"],
+                            self.crawl_run_id,
+                        ),
+                    )
+            except Exception as e:
+                self.logger.warning(f"Failed to update crawl run: {e}")
+
+        self.logger.info("=" * 50)
+        self.logger.info(f"Refresh run finished ({reason}):")
+        for key, value in self.refresh_stats.items():
+            self.logger.info(f"  {key}: {value}")
+        self.logger.info("=" * 50)
+
+
+def _get_int(raw: Any, default: int) -> int:
+    """Parse int values from spider args."""
+    if raw is None:
+        return default
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,310 @@
+"""Adaptive per-domain concurrency (AIMD) for the Scrapy downloader.
+
+AdaptiveConcurrency replaces AutoThrottle's single target concurrency with
+a controller per downloader slot (one slot per host):
+
+- Additive increase: after a full window of fast successes (as many
+  responses as the current concurrency, each under the target latency)
+  the slot first sheds delay, 25% per window down to the minimum, then
+  gains one concurrent request, up to the maximum.
+- Multiplicative decrease: a 429/503, another 5xx or a failed download
+  (timeout, connection error) halves concurrency and doubles the delay
+  (at least ADAPTIVE_BACKOFF_DELAY_SECONDS, at least Retry-After).
+- Slow responses (over the target latency) hold the current rate.
+
+Scrapy sends at most one request per delay interval, so a domain only
+uses concurrency above one once its delay has reached zero.
+
+Learned limits are keyed back to the claimed domain (request meta
+"domain") so the discovery spider can persist them on claim release
+(domains.crawl_concurrency / crawl_delay_ms) and seed them on the next
+claim.
+"""
+
+import logging
+import weakref
+from dataclasses import dataclass
+from typing import Any
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+
+from env_config import (
+    get_adaptive_max_concurrency_per_domain,
+    get_adaptive_min_delay_seconds,
+    get_adaptive_target_latency_seconds,
+    get_enable_adaptive_concurrency,
+    get_scrapy_autothrottle_max_delay,
+)
+
+logger = logging.getLogger(__name__)
+
+# Statuses signalling the server wants us to slow down
+CONGESTION_STATUSES = frozenset({429, 503})
+
+# Minimum delay after a backoff, so a halved concurrency of 1 still slows down
+ADAPTIVE_BACKOFF_DELAY_SECONDS = 1.0
+
+# Responses observed before a slot's limits are worth persisting
+MIN_OBSERVATIONS_TO_PERSIST = 10
+
+_controller: "AdaptiveConcurrency | None" = None
+
+
+@dataclass
+class DomainRate:
+    """Current limits and counters of one downloader slot."""
+
+    concurrency: int
+    delay: float
+    window_successes: int = 0
+    observations: int = 0
+    backoffs: int = 0
+
+
+class AimdController:
+    """Per-key AIMD state machine (no Scrapy dependencies).
+
+    Attributes:
+        start_concurrency: Concurrency of keys without a seed.
+        start_delay: Delay of keys without a seed.
+        max_concurrency: Upper bound on concurrency.
+        min_delay: Lower bound on delay.
+        max_delay: Upper bound on delay.
+        target_latency: Responses slower than this do not increase the rate.
+    """
+
+    def __init__(
+        self,
+        start_concurrency: int,
+        start_delay: float,
+        max_concurrency: int,
+        min_delay: float,
+        max_delay: float,
+        target_latency: float,
+    ) -> None:
+        """Initialize the controller.
+
+        Args:
+            start_concurrency: Concurrency of keys without a seed
+            start_delay: Delay of keys without a seed
+            max_concurrency: Upper bound on concurrency
+            min_delay: Lower bound on delay
+            max_delay: Upper bound on delay
+            target_latency: Latency in seconds below which a response is "fast"
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_delay = max(0.0, min_delay)
+        self.max_delay = max(self.min_delay, max_delay)
+        self.start_concurrency = self._clamp_concurrency(start_concurrency)
+        self.start_delay = self._clamp_delay(start_delay)
+        self.target_latency = target_latency
+        self.rates: dict[str, DomainRate] = {}
+
+    def get(self, key: str, seed: tuple[int, float] | None = None) -> DomainRate:
+        """Return the state for a key, creating it from a seed or the defaults."""
+        rate = self.rates.get(key)
+        if rate is None:
+            concurrency, delay = seed or (self.start_concurrency, self.start_delay)
+            rate = DomainRate(self._clamp_concurrency(concurrency), self._clamp_delay(delay))
+            self.rates[key] = rate
+        return rate
+
+    def on_response(self, key: str, latency: float | None) -> DomainRate:
+        """Record a successful response; increase the rate after a fast window."""
+        rate = self.get(key)
+        rate.observations += 1
+        if latency is not None and latency > self.target_latency:
+            return rate
+        rate.window_successes += 1
+        if rate.window_successes >= rate.concurrency:
+            rate.window_successes = 0
+            if rate.delay > self.min_delay:
+                rate.delay = self._clamp_delay(rate.delay * 0.75 if rate.delay > 0.05 else 0.0)
+            else:
+                rate.concurrency = self._clamp_concurrency(rate.concurrency + 1)
+        return rate
+
+    def on_backoff(self, key: str, retry_after: float | None = None) -> DomainRate:
+        """Record congestion or a failure: halve concurrency, double the delay."""
+        rate = self.get(key)
+        rate.observations += 1
+        rate.backoffs += 1
+        rate.window_successes = 0
+        rate.concurrency = self._clamp_concurrency(rate.concurrency // 2)
+        delay = max(rate.delay * 2, ADAPTIVE_BACKOFF_DELAY_SECONDS, retry_after or 0.0)
+        rate.delay = self._clamp_delay(delay)
+        return rate
+
+    def _clamp_concurrency(self, value: int) -> int:
+        return max(1, min(int(value), self.max_concurrency))
+
+    def _clamp_delay(self, value: float) -> float:
+        return max(self.min_delay, min(float(value), self.max_delay))
+
+
+def _retry_after_seconds(response: Response) -> float | None:
+    """Parse a delta-seconds Retry-After header (HTTP dates are ignored)."""
+    raw = response.headers.get(b"Retry-After")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw.decode("latin-1").strip()))
+    except ValueError:
+        return None
+
+
+class AdaptiveConcurrency:
+    """Scrapy extension applying AimdController limits to downloader slots.
+
+    Stats (under adaptive/): backoffs, increases, slots.
+    """
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the extension.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        if not get_enable_adaptive_concurrency():
+            raise NotConfigured
+        settings = crawler.settings
+        self.crawler = crawler
+        self.controller = AimdController(
+            start_concurrency=settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN"),
+            start_delay=settings.getfloat("DOWNLOAD_DELAY"),
+            max_concurrency=get_adaptive_max_concurrency_per_domain(),
+            min_delay=get_adaptive_min_delay_seconds(),
+            max_delay=get_scrapy_autothrottle_max_delay(),
+            target_latency=get_adaptive_target_latency_seconds(),
+        )
+        self._seeds: dict[str, tuple[int, float]] = {}
+        self._slot_domains: dict[str, str] = {}
+        self._answered: weakref.WeakSet[Request] = weakref.WeakSet()
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "AdaptiveConcurrency":
+        """Create the extension and connect downloader signals."""
+        global _controller
+        extension = cls(crawler)
+        crawler.signals.connect(
+            extension.request_reached_downloader, signal=signals.request_reached_downloader
+        )
+        crawler.signals.connect(extension.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(
+            extension.request_left_downloader, signal=signals.request_left_downloader
+        )
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        _controller = extension
+        return extension
+
+    def seed(self, domain: str, concurrency: int | None, delay: float | None) -> None:
+        """Start a domain's slots at previously learned limits."""
+        if concurrency is None and delay is None:
+            return
+        self._seeds[domain] = (
+            concurrency or self.controller.start_concurrency,
+            self.controller.start_delay if delay is None else delay,
+        )
+
+    def learned_limits(self, domain: str) -> tuple[int, float] | None:
+        """Return (concurrency, delay) learned for a domain, if observed enough.
+
+        When several hosts of a domain were crawled (example.com and
+        www.example.com), the most observed slot wins.
+        """
+        rates = [
+            self.controller.rates[key]
+            for key, slot_domain in self._slot_domains.items()
+            if slot_domain == domain and key in self.controller.rates
+        ]
+        rates = [rate for rate in rates if rate.observations >= MIN_OBSERVATIONS_TO_PERSIST]
+        if not rates:
+            return None
+        rate = max(rates, key=lambda r: r.observations)
+        return rate.concurrency, rate.delay
+
+    def request_reached_downloader(self, request: Request, spider: Any) -> None:
+        """Apply a slot's current limits when a request enters it."""
+        key = request.meta.get("download_slot")
+        if key is None:
+            return
+        if key not in self.controller.rates:
+            domain = request.meta.get("domain") or key
+            self._slot_domains[key] = domain
+            # Unseeded slots start from their configured limits (e.g. image lane slots)
+            seed = self._seeds.get(domain)
+            slot = self._slot(key)
+            if seed is None and slot is not None:
+                seed = (slot.concurrency, slot.delay)
+            rate = self.controller.get(key, seed)
+            self.crawler.stats.inc_value("adaptive/slots")
+            self._apply(key, rate)
+
+    def response_downloaded(self, response: Response, request: Request, spider: Any) -> None:
+        """Update a slot from a downloaded response."""
+        key = request.meta.get("download_slot")
+        if key is None:
+            return
+        self._answered.add(request)
+        if response.status >= 500 or response.status in CONGESTION_STATUSES:
+            retry_after = (
+                _retry_after_seconds(response) if response.status in CONGESTION_STATUSES else None
+            )
+            rate = self._backoff(key, f"HTTP {response.status}", retry_after)
+        else:
+            before = self.controller.get(key)
+            previous = (before.concurrency, before.delay)
+            rate = self.controller.on_response(key, request.meta.get("download_latency"))
+            if (rate.concurrency, rate.delay) != previous:
+                self.crawler.stats.inc_value("adaptive/increases")
+        self._apply(key, rate)
+
+    def request_left_downloader(self, request: Request, spider: Any) -> None:
+        """Back off a slot whose download failed without a response."""
+        key = request.meta.get("download_slot")
+        if key is None or request in self._answered:
+            return
+        self._apply(key, self._backoff(key, "download failed"))
+
+    def spider_closed(self, spider: Any) -> None:
+        """Drop the module reference used by the spider."""
+        global _controller
+        if _controller is self:
+            _controller = None
+
+    def _backoff(self, key: str, reason: str, retry_after: float | None = None) -> DomainRate:
+        rate = self.controller.on_backoff(key, retry_after)
+        self.crawler.stats.inc_value("adaptive/backoffs")
+        logger.debug(
+            f"Backing off {key} ({reason}): concurrency={rate.concurrency} delay={rate.delay:.2f}s"
+        )
+        return rate
+
+    def _slot(self, key: str) -> Any:
+        engine = getattr(self.crawler, "engine", None)
+        return engine.downloader.slots.get(key) if engine is not None else None
+
+    def _apply(self, key: str, rate: DomainRate) -> None:
+        slot = self._slot(key)
+        if slot is not None:
+            slot.concurrency = rate.concurrency
+            slot.delay = rate.delay
+
+
+def seed_domain_limits(domain: str, concurrency: int | None, delay_ms: int | None) -> None:
+    """Seed learned limits for a claimed domain (no-op when the extension is off)."""
+    if _controller is not None:
+        _controller.seed(domain, concurrency, None if delay_ms is None else delay_ms / 1000.0)
+
+
+def learned_domain_limits(domain: str) -> dict[str, int]:
+    """Return domains-table updates for a domain's learned limits (empty if none)."""
+    if _controller is None:
+        return {}
+    limits = _controller.learned_limits(domain)
+    if limits is None:
+        return {}
+    concurrency, delay = limits
+    return {"crawl_concurrency": concurrency, "crawl_delay_ms": int(round(delay * 1000))}
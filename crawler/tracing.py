@@ -0,0 +1,282 @@
+"""Lifecycle tracing of image requests.
+
+With ENABLE_IMAGE_TRACING, every image request carries a dict of
+timestamps (time.time()) in request meta "trace", copied into the item's
+"trace" field by the spiders:
+
+- scheduled: the spider's request reached the scheduler
+- download_start: the request entered the downloader (slot queue included)
+- download_end: the response was downloaded
+- pipeline_enter: ImageProcessingPipeline picked up the item
+- validated: status, content type, size and dimensions checked (decode)
+- hashed: SHA-256, dedup lookup and perceptual hashes done
+- stored: the images/asset write returned
+
+When the item is scraped or dropped, the time between consecutive marks
+(queue, download, callback, validate, hash, db_write) and the total are
+observed in the crawler_image_span_seconds histogram. Items that stop
+early (304, rejected, skipped) only have the spans they reached.
+
+IMAGE_TRACE_LOG_PATH additionally writes a random IMAGE_TRACE_SAMPLE_RATE
+share of traces, plus every trace slower than IMAGE_TRACE_SLOW_SECONDS, as
+Chrome trace events (JSON array format, one file per process; load it in
+chrome://tracing or ui.perfetto.dev). Each source domain is its own track,
+so slow domains stand out. The domains with the slowest images are also
+logged when the spider closes.
+
+Stats (under tracing/): images, logged.
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from typing import IO, Any
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+
+from crawler.lanes import IMAGE_LANE, request_lane
+from crawler.metrics import IMAGE_SPAN_SECONDS
+from env_config import (
+    get_enable_image_tracing,
+    get_image_trace_log_path,
+    get_image_trace_sample_rate,
+    get_image_trace_slow_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+TRACE_META_KEY = "trace"
+
+# Marks in lifecycle order, and the spans between them
+MARKS = (
+    "scheduled",
+    "download_start",
+    "download_end",
+    "pipeline_enter",
+    "validated",
+    "hashed",
+    "stored",
+)
+SPANS = (
+    ("queue", "scheduled", "download_start"),
+    ("download", "download_start", "download_end"),
+    ("callback", "download_end", "pipeline_enter"),
+    ("validate", "pipeline_enter", "validated"),
+    ("hash", "validated", "hashed"),
+    ("db_write", "hashed", "stored"),
+)
+
+# Domains listed in the close-time summary
+SLOWEST_DOMAINS_LOGGED = 10
+
+
+def mark(trace: dict[str, float] | None, name: str) -> None:
+    """Stamp a lifecycle mark on a trace (no-op for untraced items)."""
+    if trace is not None:
+        trace[name] = time.time()
+
+
+def trace_spans(trace: dict[str, float]) -> list[tuple[str, float, float]]:
+    """Return (span, start, end) for each span whose marks were both stamped.
+
+    A span missing its start mark (e.g. a 304 skips validation) is measured
+    from the latest earlier mark, so the spans still add up to the total.
+    """
+    spans = []
+    for name, start_mark, end_mark in SPANS:
+        end = trace.get(end_mark)
+        if end is None:
+            continue
+        earlier = [
+            trace[m] for m in MARKS[: MARKS.index(start_mark) + 1] if trace.get(m) is not None
+        ]
+        if earlier:
+            spans.append((name, earlier[-1], end))
+    return spans
+
+
+class TraceLog:
+    """Append-only Chrome trace file (JSON array format, closing bracket optional).
+
+    Attributes:
+        path: File written to.
+        written: Traces written so far.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open the trace file.
+
+        Args:
+            path: File path; "{pid}" is replaced by the process id
+        """
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.written = 0
+        self._pid = os.getpid()
+        self._tids: dict[str, int] = {}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file: IO[str] | None = open(self.path, "w", encoding="utf-8")
+        self._file.write("[\n")
+
+    def write(self, trace: dict[str, float], url: str, domain: str, outcome: str) -> None:
+        """Write one image's spans as complete ("X") events on its domain's track."""
+        spans = trace_spans(trace)
+        if self._file is None or not spans:
+            return
+        events: list[dict[str, Any]] = []
+        tid = self._tids.get(domain)
+        if tid is None:
+            tid = self._tids[domain] = len(self._tids) + 1
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": domain},
+                }
+            )
+        start, end = spans[0][1], spans[-1][2]
+        events.append(
+            self._event("image", start, end, tid, {"url": url, "outcome": outcome}, outcome)
+        )
+        events.extend(self._event(name, s, e, tid, None, outcome) for name, s, e in spans)
+        for event in events:
+            self._file.write(json.dumps(event, separators=(",", ":")) + ",\n")
+        self.written += 1
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _event(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        tid: int,
+        args: dict[str, Any] | None,
+        outcome: str,
+    ) -> dict[str, Any]:
+        event: dict[str, Any] = {
+            "name": name,
+            "cat": outcome,
+            "ph": "X",
+            "ts": int(start * 1_000_000),
+            "dur": max(0, int((end - start) * 1_000_000)),
+            "pid": self._pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        return event
+
+
+class ImageTracing:
+    """Scrapy extension stamping image requests and aggregating finished traces."""
+
+    def __init__(self, crawler: Any) -> None:
+        """Initialize the extension.
+
+        Args:
+            crawler: Scrapy crawler
+        """
+        if not get_enable_image_tracing():
+            raise NotConfigured
+        self.crawler = crawler
+        self.sample_rate = get_image_trace_sample_rate()
+        self.slow_seconds = get_image_trace_slow_seconds()
+        self.trace_log: TraceLog | None = None
+        # domain -> [traced images, slowest total seconds]
+        self.domain_totals: dict[str, list[float]] = {}
+
+    @classmethod
+    def from_crawler(cls, crawler: Any) -> "ImageTracing":
+        """Create the extension and connect signals."""
+        extension = cls(crawler)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(extension.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(
+            extension.request_reached_downloader, signal=signals.request_reached_downloader
+        )
+        crawler.signals.connect(extension.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.item_dropped, signal=signals.item_dropped)
+        return extension
+
+    def spider_opened(self, spider: Any) -> None:
+        """Open the trace log when configured."""
+        path = get_image_trace_log_path()
+        if path:
+            try:
+                self.trace_log = TraceLog(path)
+                logger.info(f"Writing sampled image traces to {self.trace_log.path}")
+            except OSError as e:
+                logger.warning(f"Image trace log disabled, cannot open {path}: {e}")
+
+    def spider_closed(self, spider: Any) -> None:
+        """Close the trace log and log the domains with the slowest images."""
+        if self.trace_log is not None:
+            self.trace_log.close()
+        slowest = sorted(self.domain_totals.items(), key=lambda item: item[1][1], reverse=True)
+        if slowest:
+            logger.info("Slowest image lifecycles by domain (max seconds, traced images):")
+            for domain, (count, worst) in slowest[:SLOWEST_DOMAINS_LOGGED]:
+                logger.info(f"  {domain}: {worst:.2f}s ({int(count)})")
+
+    def request_scheduled(self, request: Request, spider: Any) -> None:
+        """Start a trace for an image request."""
+        if request_lane(request) == IMAGE_LANE and TRACE_META_KEY not in request.meta:
+            request.meta[TRACE_META_KEY] = {"scheduled": time.time()}
+
+    def request_reached_downloader(self, request: Request, spider: Any) -> None:
+        """Stamp download_start."""
+        mark(request.meta.get(TRACE_META_KEY), "download_start")
+
+    def response_downloaded(self, response: Response, request: Request, spider: Any) -> None:
+        """Stamp download_end."""
+        mark(request.meta.get(TRACE_META_KEY), "download_end")
+
+    def item_scraped(self, item: Any, response: Any, spider: Any) -> None:
+        """Finish the trace of a processed image."""
+        self.finish(item, item.get("store_status") or "stored")
+
+    def item_dropped(self, item: Any, response: Any, exception: Any, spider: Any) -> None:
+        """Finish the trace of a dropped image."""
+        self.finish(item, "dropped")
+
+    def finish(self, item: Any, outcome: str) -> None:
+        """Observe a finished trace's spans and write it to the log if sampled."""
+        if not isinstance(item, dict):
+            return
+        trace = item.get(TRACE_META_KEY)
+        if not trace:
+            return
+        spans = trace_spans(trace)
+        if not spans:
+            return
+        for name, start, end in spans:
+            IMAGE_SPAN_SECONDS.observe(end - start, name)
+        total = spans[-1][2] - spans[0][1]
+        IMAGE_SPAN_SECONDS.observe(total, "total")
+        self.crawler.stats.inc_value("tracing/images")
+
+        domain = item.get("source_domain") or ""
+        totals = self.domain_totals.setdefault(domain, [0, 0.0])
+        totals[0] += 1
+        totals[1] = max(totals[1], total)
+
+        if self.trace_log is None:
+            return
+        slow = self.slow_seconds > 0 and total >= self.slow_seconds
+        if slow or random.random() < self.sample_rate:
+            self.trace_log.write(trace, item.get("url", ""), domain, outcome)
+            self.crawler.stats.inc_value("tracing/logged")
@@ -58,6 +58,7 @@ DEFAULT_DOMAIN_CANONICALIZATION_STRIP_SUBDOMAINS = False
 # Per-domain budget feature flags (Phase B)
 DEFAULT_ENABLE_PER_DOMAIN_BUDGET = True
 DEFAULT_MAX_PAGES_PER_RUN = 100
+DEFAULT_SEED_BATCH_SIZE = 500  # Seeds paged per start_requests batch
 
 # Smart scheduling feature flags (Phase C)
 DEFAULT_ENABLE_SMART_SCHEDULING = False
@@ -66,6 +67,103 @@ DEFAULT_DOMAIN_STATS_FLUSH_INTERVAL_PAGES = 100  # 0 = disabled
 DEFAULT_ENABLE_CONTINUOUS_MODE = False  # Keep worker alive when no domains available
 DEFAULT_ENABLE_PERSISTENT_DUPEFILTER = False  # Persist URL fingerprints to Redis
 DEFAULT_ENABLE_IMMUTABLE_ASSETS = False  # Use image_assets table instead of provenance
+DEFAULT_ASSET_WRITE_BATCH_SIZE = 500  # Observations per batched write (immutable assets)
+DEFAULT_ASSET_WRITE_FLUSH_INTERVAL_SECONDS = 5.0  # Max age of a buffered observation
+
+# Content-addressable blob storage for image bytes
+DEFAULT_BLOB_STORE_BACKEND = "none"  # Image bytes are discarded after hashing
+DEFAULT_BLOB_STORE_PATH = "data/blobs"
+DEFAULT_BLOB_STORE_BATCH_SIZE = 32
+DEFAULT_BLOB_STORE_QUEUE_SIZE = 1000  # Pending writes before new blobs are dropped
+DEFAULT_OBJECT_STORE_BUCKET = "invisible-images"
+DEFAULT_OBJECT_STORE_REGION = "us-east-1"
+ALLOWED_BLOB_STORE_BACKENDS = {"none", "local", "s3"}
+
+# Near-duplicate (Hamming distance) index over perceptual hashes
+DEFAULT_ENABLE_NEAR_DUPLICATE_INDEX = False
+DEFAULT_NEAR_DUPLICATE_INDEX_PATH = "data/near_duplicate_index"
+DEFAULT_NEAR_DUPLICATE_MAX_DISTANCE = 8  # Bits out of 64
+
+# Process-wide sha256 -> image_id cache in front of images.sha256_hash lookups
+DEFAULT_IMAGE_HASH_CACHE_SIZE = 100000  # Entries; 0 = disabled
+DEFAULT_IMAGE_HASH_CACHE_WARM_LIMIT = 0  # Rows loaded at spider open; 0 = no warmup
+DEFAULT_ENABLE_IMAGE_HASH_CACHE_REDIS = False  # Share entries across workers via Redis
+DEFAULT_IMAGE_HASH_CACHE_REDIS_TTL_SECONDS = 7 * 24 * 3600
+
+# Conditional GET (If-None-Match / If-Modified-Since) for already stored image URLs
+DEFAULT_CONDITIONAL_IMAGE_REQUESTS = "refresh"  # off | refresh | all
+ALLOWED_CONDITIONAL_IMAGE_REQUESTS = {"off", "refresh", "all"}
+
+# Refresh spider: re-fetch stored images by images.last_seen_at
+DEFAULT_REFRESH_STALE_AFTER_DAYS = 30
+DEFAULT_REFRESH_BATCH_SIZE = 1000  # Stale images selected per keyset page
+
+# robots.txt cache shared by workers through Redis (raw bodies, parsed per process)
+DEFAULT_ENABLE_SHARED_ROBOTS_CACHE = True
+DEFAULT_ROBOTS_CACHE_TTL_SECONDS = 24 * 3600  # Used without Cache-Control; also the cap
+DEFAULT_ROBOTS_CACHE_NEGATIVE_TTL_SECONDS = 3600  # Missing (4xx) or unreachable robots.txt
+
+# DNS resolver cache (in-process LRU, optionally shared through Redis)
+DEFAULT_DNS_CACHE_SIZE = 100000  # Hostnames held in process
+DEFAULT_DNS_CACHE_TTL_SECONDS = 300  # getaddrinfo does not expose record TTLs
+DEFAULT_DNS_CACHE_NEGATIVE_TTL_SECONDS = 3600  # NXDOMAIN
+DEFAULT_ENABLE_SHARED_DNS_CACHE = False
+DEFAULT_ENABLE_DNS_PREFETCH = True  # Resolve newly claimed domains ahead of their requests
+
+# Claim-time warmup (Phase C): fetch robots.txt for claimed domains up front,
+# optionally HEAD the root URL to follow redirects before the first GET
+DEFAULT_ENABLE_CLAIM_WARMUP = True
+DEFAULT_ENABLE_CLAIM_WARMUP_HEAD = False
+
+# Adaptive per-domain concurrency (AIMD on downloader slots, replaces AutoThrottle).
+# Start values are CONCURRENT_REQUESTS_PER_DOMAIN / DOWNLOAD_DELAY, or the limits
+# learned on the domain's previous claim; the delay cap is SCRAPY_AUTOTHROTTLE_MAX_DELAY.
+DEFAULT_ENABLE_ADAPTIVE_CONCURRENCY = False
+DEFAULT_ADAPTIVE_MAX_CONCURRENCY_PER_DOMAIN = 8
+DEFAULT_ADAPTIVE_MIN_DELAY_SECONDS = 0.0
+DEFAULT_ADAPTIVE_TARGET_LATENCY_SECONDS = 1.0  # Slower responses hold the rate
+
+# Image download lane: own scheduler budget (Phase C) and per-image-host slots
+DEFAULT_ENABLE_IMAGE_LANE = True
+DEFAULT_IMAGE_CONCURRENT_REQUESTS = 16  # Added to SCRAPY_CONCURRENT_REQUESTS (page budget)
+DEFAULT_IMAGE_CONCURRENT_REQUESTS_PER_HOST = 4
+DEFAULT_IMAGE_DOWNLOAD_DELAY = 0.0  # Image hosts are mostly CDNs
+
+# HTTP/2 for image requests (one multiplexed connection per image host; needs h2)
+DEFAULT_ENABLE_HTTP2_IMAGES = False
+DEFAULT_HTTP2_MAX_CONCURRENT_STREAMS = 100  # Per connection; servers may advertise fewer
+
+# Process-wide Redis connection pools (storage.redis_client)
+DEFAULT_REDIS_MAX_CONNECTIONS = 32  # Per pool; callers wait for a free connection beyond this
+DEFAULT_REDIS_SOCKET_TIMEOUT = 5.0
+DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT = 2.0
+DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS = 30  # PING idle connections before reuse
+
+# Postgres connection pool (storage.db)
+DEFAULT_DB_POOL_MIN_CONNECTIONS = 1
+DEFAULT_DB_POOL_MAX_CONNECTIONS = 0  # 0 = size from concurrency and worker count
+DEFAULT_DB_POOL_TIMEOUT_SECONDS = 30.0  # Wait for a free connection before failing
+DEFAULT_DB_WORKER_PROCESSES = 1  # Crawler processes sharing the database
+DEFAULT_DB_SERVER_CONNECTION_BUDGET = 90  # Connections all workers may hold together
+DEFAULT_DB_PREPARED_STATEMENT_CACHE_SIZE = 100  # Per connection; 0 = plain SQL only
+DEFAULT_DB_PGBOUNCER_TRANSACTION_MODE = False
+
+# Prometheus-style /metrics endpoint (crawler.metrics_server)
+DEFAULT_ENABLE_METRICS = False
+DEFAULT_METRICS_PORT = "9410-9419"  # First free port is used, so workers can share a host
+DEFAULT_METRICS_BIND_ADDRESS = "127.0.0.1"
+
+# Image lifecycle tracing (crawler.tracing)
+DEFAULT_ENABLE_IMAGE_TRACING = False
+DEFAULT_IMAGE_TRACE_LOG_PATH = ""  # Chrome trace JSON; empty = histograms only
+DEFAULT_IMAGE_TRACE_SAMPLE_RATE = 0.01
+DEFAULT_IMAGE_TRACE_SLOW_SECONDS = 10.0  # Always log images slower than this (0 = off)
+
+# On-demand profiling of live workers (crawler.profiling)
+DEFAULT_ENABLE_PROFILING = False
+DEFAULT_PROFILE_OUTPUT_DIR = "profiles"
+DEFAULT_PROFILE_DURATION_SECONDS = 30
+DEFAULT_PROFILE_SAMPLE_INTERVAL_MS = 10
 
 ALLOWED_CRAWL_PROFILES = {"conservative", "broad"}
 
@@ -317,6 +415,18 @@ def get_default_max_pages_per_run() -> int:
     return get_int_env("MAX_PAGES_PER_RUN", DEFAULT_MAX_PAGES_PER_RUN)
 
 
+def get_seed_batch_size() -> int:
+    """Return number of seeds processed per start_requests batch (Phase A/B).
+
+    Seeds are paged from Redis (or read from the seed file) in batches of
+    this size; domain upserts and checkpoint lookups are issued once per
+    batch and requests are yielded lazily.
+
+    Default: 500
+    """
+    return max(1, get_int_env("SEED_BATCH_SIZE", DEFAULT_SEED_BATCH_SIZE))
+
+
 def get_enable_smart_scheduling() -> bool:
     """Return whether smart scheduling is enabled (Phase C).
 
@@ -396,3 +506,461 @@ def get_enable_immutable_assets() -> bool:
     Default: False (use existing provenance table)
     """
     return get_bool_env("ENABLE_IMMUTABLE_ASSETS", DEFAULT_ENABLE_IMMUTABLE_ASSETS)
+
+
+def get_asset_write_batch_size() -> int:
+    """Return observations buffered per batched image_assets/observations write."""
+    return max(1, get_int_env("ASSET_WRITE_BATCH_SIZE", DEFAULT_ASSET_WRITE_BATCH_SIZE))
+
+
+def get_asset_write_flush_interval_seconds() -> float:
+    """Return the maximum age in seconds of a buffered observation before it is written."""
+    return max(
+        0.0,
+        get_float_env(
+            "ASSET_WRITE_FLUSH_INTERVAL_SECONDS", DEFAULT_ASSET_WRITE_FLUSH_INTERVAL_SECONDS
+        ),
+    )
+
+
+def get_blob_store_backend() -> str:
+    """Return the blob store backend for downloaded image bytes.
+
+    - none: bytes are discarded after hashing (previous behavior)
+    - local: sharded filesystem tree under BLOB_STORE_PATH
+    - s3: S3-compatible bucket (MinIO in dev) configured via OBJECT_STORE_*
+
+    Default: none
+    """
+    return get_choice_env(
+        "BLOB_STORE_BACKEND", DEFAULT_BLOB_STORE_BACKEND, ALLOWED_BLOB_STORE_BACKENDS
+    )
+
+
+def get_blob_store_path() -> str:
+    """Return root directory for the local blob store backend."""
+    return os.getenv("BLOB_STORE_PATH", DEFAULT_BLOB_STORE_PATH)
+
+
+def get_blob_store_batch_size() -> int:
+    """Return maximum number of blobs written per background batch."""
+    return max(1, get_int_env("BLOB_STORE_BATCH_SIZE", DEFAULT_BLOB_STORE_BATCH_SIZE))
+
+
+def get_blob_store_queue_size() -> int:
+    """Return maximum number of blobs waiting to be written.
+
+    When the queue is full, new blobs are dropped (and counted) rather than
+    blocking the crawler.
+    """
+    return max(1, get_int_env("BLOB_STORE_QUEUE_SIZE", DEFAULT_BLOB_STORE_QUEUE_SIZE))
+
+
+def get_object_store_endpoint() -> str | None:
+    """Return S3-compatible endpoint URL (None uses the AWS default endpoint)."""
+    return os.getenv("OBJECT_STORE_ENDPOINT") or None
+
+
+def get_object_store_bucket() -> str:
+    """Return object store bucket name."""
+    return os.getenv("OBJECT_STORE_BUCKET") or DEFAULT_OBJECT_STORE_BUCKET
+
+
+def get_object_store_access_key() -> str | None:
+    """Return object store access key (None falls back to the boto3 credential chain)."""
+    return os.getenv("OBJECT_STORE_ACCESS_KEY") or None
+
+
+def get_object_store_secret_key() -> str | None:
+    """Return object store secret key (None falls back to the boto3 credential chain)."""
+    return os.getenv("OBJECT_STORE_SECRET_KEY") or None
+
+
+def get_object_store_region() -> str:
+    """Return object store region."""
+    return os.getenv("OBJECT_STORE_REGION") or DEFAULT_OBJECT_STORE_REGION
+
+
+def get_object_store_secure() -> bool:
+    """Return whether to use HTTPS for an object store endpoint given without a scheme."""
+    return get_bool_env("OBJECT_STORE_SECURE", False)
+
+
+def get_enable_near_duplicate_index() -> bool:
+    """Return whether the pipeline maintains the near-duplicate index.
+
+    When enabled, new images' pHash/dHash values are added to an in-memory
+    Hamming index that is merged into the on-disk snapshot at spider close.
+
+    Default: False
+    """
+    return get_bool_env("ENABLE_NEAR_DUPLICATE_INDEX", DEFAULT_ENABLE_NEAR_DUPLICATE_INDEX)
+
+
+def get_near_duplicate_index_path() -> str:
+    """Return directory holding the near-duplicate index snapshots."""
+    return os.getenv("NEAR_DUPLICATE_INDEX_PATH", DEFAULT_NEAR_DUPLICATE_INDEX_PATH)
+
+
+def get_near_duplicate_max_distance() -> int:
+    """Return default Hamming distance (bits) for near-duplicate queries."""
+    value = get_int_env("NEAR_DUPLICATE_MAX_DISTANCE", DEFAULT_NEAR_DUPLICATE_MAX_DISTANCE)
+    return min(64, max(0, value))
+
+
+def get_image_hash_cache_size() -> int:
+    """Return max entries in the in-process sha256 -> image_id cache (0 disables it)."""
+    return max(0, get_int_env("IMAGE_HASH_CACHE_SIZE", DEFAULT_IMAGE_HASH_CACHE_SIZE))
+
+
+def get_image_hash_cache_warm_limit() -> int:
+    """Return how many known hashes are loaded into the cache at spider open."""
+    return max(0, get_int_env("IMAGE_HASH_CACHE_WARM_LIMIT", DEFAULT_IMAGE_HASH_CACHE_WARM_LIMIT))
+
+
+def get_image_hash_cache_warm_domains() -> list[str]:
+    """Return source domains whose images are preferred when warming the cache.
+
+    Comma-separated IMAGE_HASH_CACHE_WARM_DOMAINS; empty means the most
+    recently discovered images regardless of domain.
+    """
+    value = os.getenv("IMAGE_HASH_CACHE_WARM_DOMAINS", "")
+    return [domain.strip().lower() for domain in value.split(",") if domain.strip()]
+
+
+def get_enable_image_hash_cache_redis() -> bool:
+    """Return whether cache entries are shared across workers through Redis.
+
+    Default: False (cache is local to each process)
+    """
+    return get_bool_env("ENABLE_IMAGE_HASH_CACHE_REDIS", DEFAULT_ENABLE_IMAGE_HASH_CACHE_REDIS)
+
+
+def get_image_hash_cache_redis_ttl_seconds() -> int:
+    """Return TTL of shared cache entries in Redis."""
+    return max(
+        1,
+        get_int_env(
+            "IMAGE_HASH_CACHE_REDIS_TTL_SECONDS", DEFAULT_IMAGE_HASH_CACHE_REDIS_TTL_SECONDS
+        ),
+    )
+
+
+def get_conditional_image_requests() -> str:
+    """Return when image requests carry HTTP validators of the stored copy.
+
+    - off: always download full bodies
+    - refresh: only in refresh crawls (crawl_type="refresh")
+    - all: also in discovery crawls (stale images under DISCOVERY_REFRESH_AFTER_DAYS)
+
+    A 304 response only bumps images.last_seen_at.
+    """
+    return get_choice_env(
+        "CONDITIONAL_IMAGE_REQUESTS",
+        DEFAULT_CONDITIONAL_IMAGE_REQUESTS,
+        ALLOWED_CONDITIONAL_IMAGE_REQUESTS,
+    )
+
+
+def get_refresh_stale_after_days() -> int:
+    """Return how old last_seen_at must be before the refresh spider re-fetches an image."""
+    return max(0, get_int_env("REFRESH_STALE_AFTER_DAYS", DEFAULT_REFRESH_STALE_AFTER_DAYS))
+
+
+def get_refresh_batch_size() -> int:
+    """Return stale images selected per keyset page by the refresh spider."""
+    return max(1, get_int_env("REFRESH_BATCH_SIZE", DEFAULT_REFRESH_BATCH_SIZE))
+
+
+def get_enable_shared_robots_cache() -> bool:
+    """Return whether robots.txt bodies are cached in Redis for all workers.
+
+    Default: True (falls back to per-process caching when Redis is unreachable)
+    """
+    return get_bool_env("ENABLE_SHARED_ROBOTS_CACHE", DEFAULT_ENABLE_SHARED_ROBOTS_CACHE)
+
+
+def get_robots_cache_ttl_seconds() -> int:
+    """Return TTL of cached robots.txt rules (Cache-Control max-age is capped at this)."""
+    return max(1, get_int_env("ROBOTS_CACHE_TTL_SECONDS", DEFAULT_ROBOTS_CACHE_TTL_SECONDS))
+
+
+def get_robots_cache_negative_ttl_seconds() -> int:
+    """Return TTL of cached missing/erroring robots.txt results."""
+    return max(
+        1,
+        get_int_env("ROBOTS_CACHE_NEGATIVE_TTL_SECONDS", DEFAULT_ROBOTS_CACHE_NEGATIVE_TTL_SECONDS),
+    )
+
+
+def get_dns_cache_size() -> int:
+    """Return the number of hostnames kept by the in-process DNS cache."""
+    return max(1, get_int_env("DNS_CACHE_SIZE", DEFAULT_DNS_CACHE_SIZE))
+
+
+def get_dns_cache_ttl_seconds() -> int:
+    """Return how long resolved addresses are cached."""
+    return max(1, get_int_env("DNS_CACHE_TTL_SECONDS", DEFAULT_DNS_CACHE_TTL_SECONDS))
+
+
+def get_dns_cache_negative_ttl_seconds() -> int:
+    """Return how long NXDOMAIN answers are cached."""
+    return max(
+        1,
+        get_int_env("DNS_CACHE_NEGATIVE_TTL_SECONDS", DEFAULT_DNS_CACHE_NEGATIVE_TTL_SECONDS),
+    )
+
+
+def get_enable_shared_dns_cache() -> bool:
+    """Return whether DNS answers are shared across crawler processes via Redis.
+
+    Default: False (cache is local to each process)
+    """
+    return get_bool_env("ENABLE_SHARED_DNS_CACHE", DEFAULT_ENABLE_SHARED_DNS_CACHE)
+
+
+def get_enable_dns_prefetch() -> bool:
+    """Return whether hostnames of claimed domains are resolved ahead of requests."""
+    return get_bool_env("ENABLE_DNS_PREFETCH", DEFAULT_ENABLE_DNS_PREFETCH)
+
+
+def get_enable_claim_warmup() -> bool:
+    """Return whether robots.txt of newly claimed domains is fetched right after claiming."""
+    return get_bool_env("ENABLE_CLAIM_WARMUP", DEFAULT_ENABLE_CLAIM_WARMUP)
+
+
+def get_enable_claim_warmup_head() -> bool:
+    """Return whether a claimed domain's root URL is probed with HEAD before the first GET.
+
+    Default: False (the first GET follows redirects itself)
+    """
+    return get_bool_env("ENABLE_CLAIM_WARMUP_HEAD", DEFAULT_ENABLE_CLAIM_WARMUP_HEAD)
+
+
+def get_enable_adaptive_concurrency() -> bool:
+    """Return whether per-domain concurrency and delay adapt to server feedback (AIMD).
+
+    Default: False (static settings plus AutoThrottle)
+    """
+    return get_bool_env("ENABLE_ADAPTIVE_CONCURRENCY", DEFAULT_ENABLE_ADAPTIVE_CONCURRENCY)
+
+
+def get_adaptive_max_concurrency_per_domain() -> int:
+    """Return the upper bound on concurrent requests per domain under adaptive concurrency."""
+    return max(
+        1,
+        get_int_env(
+            "ADAPTIVE_MAX_CONCURRENCY_PER_DOMAIN", DEFAULT_ADAPTIVE_MAX_CONCURRENCY_PER_DOMAIN
+        ),
+    )
+
+
+def get_adaptive_min_delay_seconds() -> float:
+    """Return the lower bound on per-domain download delay under adaptive concurrency."""
+    return max(0.0, get_float_env("ADAPTIVE_MIN_DELAY_SECONDS", DEFAULT_ADAPTIVE_MIN_DELAY_SECONDS))
+
+
+def get_adaptive_target_latency_seconds() -> float:
+    """Return the response latency above which adaptive concurrency stops increasing."""
+    return get_float_env("ADAPTIVE_TARGET_LATENCY_SECONDS", DEFAULT_ADAPTIVE_TARGET_LATENCY_SECONDS)
+
+
+def get_enable_image_lane() -> bool:
+    """Return whether image requests use their own scheduler budget and downloader slots."""
+    return get_bool_env("ENABLE_IMAGE_LANE", DEFAULT_ENABLE_IMAGE_LANE)
+
+
+def get_image_concurrent_requests() -> int:
+    """Return the number of image requests allowed in the downloader at once."""
+    return max(1, get_int_env("IMAGE_CONCURRENT_REQUESTS", DEFAULT_IMAGE_CONCURRENT_REQUESTS))
+
+
+def get_image_concurrent_requests_per_host() -> int:
+    """Return concurrent image requests per image host (downloader slot)."""
+    return max(
+        1,
+        get_int_env(
+            "IMAGE_CONCURRENT_REQUESTS_PER_HOST", DEFAULT_IMAGE_CONCURRENT_REQUESTS_PER_HOST
+        ),
+    )
+
+
+def get_image_download_delay() -> float:
+    """Return the delay in seconds between image requests to the same host."""
+    return max(0.0, get_float_env("IMAGE_DOWNLOAD_DELAY", DEFAULT_IMAGE_DOWNLOAD_DELAY))
+
+
+def get_enable_http2_images() -> bool:
+    """Return whether image requests are downloaded over HTTP/2 where hosts support it.
+
+    Default: False (HTTP/1.1 keep-alive for everything)
+    """
+    return get_bool_env("ENABLE_HTTP2_IMAGES", DEFAULT_ENABLE_HTTP2_IMAGES)
+
+
+def get_http2_max_concurrent_streams() -> int:
+    """Return the maximum in-flight HTTP/2 image requests per host connection."""
+    return max(1, get_int_env("HTTP2_MAX_CONCURRENT_STREAMS", DEFAULT_HTTP2_MAX_CONCURRENT_STREAMS))
+
+
+def get_redis_max_connections() -> int:
+    """Return the maximum connections per shared Redis connection pool."""
+    return max(1, get_int_env("REDIS_MAX_CONNECTIONS", DEFAULT_REDIS_MAX_CONNECTIONS))
+
+
+def get_redis_socket_timeout() -> float:
+    """Return the Redis read/write timeout in seconds."""
+    return max(0.1, get_float_env("REDIS_SOCKET_TIMEOUT", DEFAULT_REDIS_SOCKET_TIMEOUT))
+
+
+def get_redis_socket_connect_timeout() -> float:
+    """Return the Redis connect timeout in seconds."""
+    return max(
+        0.1,
+        get_float_env("REDIS_SOCKET_CONNECT_TIMEOUT", DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT),
+    )
+
+
+def get_redis_health_check_interval_seconds() -> int:
+    """Return how long a pooled Redis connection may sit idle before it is PINGed.
+
+    Default: 30 (0 disables health checks)
+    """
+    return max(
+        0,
+        get_int_env(
+            "REDIS_HEALTH_CHECK_INTERVAL_SECONDS", DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS
+        ),
+    )
+
+
+def get_db_pool_min_connections() -> int:
+    """Return the connections each Postgres pool opens up front."""
+    return max(1, get_int_env("DB_POOL_MIN_CONNECTIONS", DEFAULT_DB_POOL_MIN_CONNECTIONS))
+
+
+def get_db_pool_max_connections() -> int:
+    """Return the configured Postgres pool size.
+
+    Default: 0 (derived from SCRAPY_CONCURRENT_REQUESTS, DB_WORKER_PROCESSES
+    and DB_SERVER_CONNECTION_BUDGET, see storage.db.default_pool_size)
+    """
+    return max(0, get_int_env("DB_POOL_MAX_CONNECTIONS", DEFAULT_DB_POOL_MAX_CONNECTIONS))
+
+
+def get_db_pool_timeout_seconds() -> float:
+    """Return how long a caller waits for a free pooled Postgres connection."""
+    return max(0.1, get_float_env("DB_POOL_TIMEOUT_SECONDS", DEFAULT_DB_POOL_TIMEOUT_SECONDS))
+
+
+def get_db_worker_processes() -> int:
+    """Return the number of crawler processes sharing the database."""
+    return max(1, get_int_env("DB_WORKER_PROCESSES", DEFAULT_DB_WORKER_PROCESSES))
+
+
+def get_db_server_connection_budget() -> int:
+    """Return the Postgres connections all worker processes may hold together."""
+    return max(1, get_int_env("DB_SERVER_CONNECTION_BUDGET", DEFAULT_DB_SERVER_CONNECTION_BUDGET))
+
+
+def get_db_prepared_statement_cache_size() -> int:
+    """Return the server-side prepared statements kept per Postgres connection.
+
+    Default: 100 (0 sends plain SQL for every query)
+    """
+    return max(
+        0,
+        get_int_env("DB_PREPARED_STATEMENT_CACHE_SIZE", DEFAULT_DB_PREPARED_STATEMENT_CACHE_SIZE),
+    )
+
+
+def get_db_pgbouncer_transaction_mode() -> bool:
+    """Return whether DATABASE_URL points at PgBouncer in transaction pooling mode.
+
+    Session state does not survive between transactions there, so SQL-level
+    prepared statements are disabled.
+
+    Default: False
+    """
+    return get_bool_env("DB_PGBOUNCER_TRANSACTION_MODE", DEFAULT_DB_PGBOUNCER_TRANSACTION_MODE)
+
+
+def get_enable_metrics() -> bool:
+    """Return whether crawler workers serve Prometheus metrics over HTTP.
+
+    Default: False
+    """
+    return get_bool_env("ENABLE_METRICS", DEFAULT_ENABLE_METRICS)
+
+
+def get_metrics_port_range() -> list[int]:
+    """Return the port (or first and last port) the /metrics endpoint may bind.
+
+    Accepts "9410" or "9410-9419"; invalid values fall back to the default.
+    """
+    raw = os.getenv("METRICS_PORT", DEFAULT_METRICS_PORT)
+    try:
+        ports = [int(part) for part in raw.split("-", 1)]
+    except ValueError:
+        ports = []
+    if not ports or ports[0] < 0 or ports[-1] < ports[0]:
+        return [int(part) for part in DEFAULT_METRICS_PORT.split("-", 1)]
+    return ports
+
+
+def get_metrics_bind_address() -> str:
+    """Return the interface the /metrics endpoint listens on."""
+    return os.getenv("METRICS_BIND_ADDRESS") or DEFAULT_METRICS_BIND_ADDRESS
+
+
+def get_enable_image_tracing() -> bool:
+    """Return whether image requests are stamped with lifecycle timestamps.
+
+    Default: False
+    """
+    return get_bool_env("ENABLE_IMAGE_TRACING", DEFAULT_ENABLE_IMAGE_TRACING)
+
+
+def get_image_trace_log_path() -> str | None:
+    """Return the Chrome trace file for sampled image traces ("{pid}" is expanded).
+
+    Default: None (traces only feed histograms)
+    """
+    return os.getenv("IMAGE_TRACE_LOG_PATH", DEFAULT_IMAGE_TRACE_LOG_PATH).strip() or None
+
+
+def get_image_trace_sample_rate() -> float:
+    """Return the fraction of image traces written to the trace log."""
+    rate = get_float_env("IMAGE_TRACE_SAMPLE_RATE", DEFAULT_IMAGE_TRACE_SAMPLE_RATE)
+    return min(1.0, max(0.0, rate))
+
+
+def get_image_trace_slow_seconds() -> float:
+    """Return the end-to-end time above which an image trace is always logged.
+
+    Default: 10.0 (0 logs only the random sample)
+    """
+    return max(0.0, get_float_env("IMAGE_TRACE_SLOW_SECONDS", DEFAULT_IMAGE_TRACE_SLOW_SECONDS))
+
+
+def get_enable_profiling() -> bool:
+    """Return whether workers accept profiling requests (SIGUSR1, crawler.cli profile-worker).
+
+    Default: False
+    """
+    return get_bool_env("ENABLE_PROFILING", DEFAULT_ENABLE_PROFILING)
+
+
+def get_profile_output_dir() -> str:
+    """Return the directory profiles are written to."""
+    return os.getenv("PROFILE_OUTPUT_DIR") or DEFAULT_PROFILE_OUTPUT_DIR
+
+
+def get_profile_duration_seconds() -> int:
+    """Return how long a profile runs when the request does not say."""
+    return max(1, get_int_env("PROFILE_DURATION_SECONDS", DEFAULT_PROFILE_DURATION_SECONDS))
+
+
+def get_profile_sample_interval_ms() -> int:
+    """Return the stack sampling interval in milliseconds."""
+    return max(1, get_int_env("PROFILE_SAMPLE_INTERVAL_MS", DEFAULT_PROFILE_SAMPLE_INTERVAL_MS))
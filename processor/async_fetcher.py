@@ -6,7 +6,8 @@ to avoid blocking Scrapy's reactor during image fetches.
 
 import hashlib
 import logging
-from collections.abc import Generator
+import time
+from collections.abc import Callable, Generator
 from io import BytesIO
 from typing import Any, cast
 
@@ -16,6 +17,7 @@ from twisted.internet import defer
 from twisted.web.client import Agent, readBody
 from twisted.web.http_headers import Headers
 
+from crawler.metrics import STAGE_SECONDS
 from processor.fetcher import ImageFetchResult
 from processor.fingerprint import ImageFingerprinter
 from processor.media_policy import (
@@ -31,6 +33,14 @@ from processor.media_policy import (
 logger = logging.getLogger(__name__)
 
 
+def _header_text(response: Response, name: str) -> str | None:
+    """Return a response header as text, or None if absent or empty."""
+    value = response.headers.get(name)
+    if not value:
+        return None
+    return value.decode("latin-1").strip() or None
+
+
 class AsyncImageFetcher:
     """Asynchronously fetches and validates images from URLs.
 
@@ -252,6 +262,11 @@ class AsyncImageFetcher:
             return None, None, None
 
 
+def _stage_clock() -> tuple[float, float]:
+    """Return (thread CPU time, wall time) at the start of a stage."""
+    return time.thread_time(), time.perf_counter()
+
+
 class ScrapyImageDownloader:
     """Downloads images using Scrapy's built-in downloader.
 
@@ -263,8 +278,24 @@ class ScrapyImageDownloader:
 
     This is the recommended approach for Phase 2 as it provides
     the best integration with Scrapy's ecosystem.
+
+    Responses are processed in stages, cheapest first, so that work is
+    only done for content that needs it:
+
+    1. validate: HTTP status, content type, file size, dimensions (header)
+    2. sha256: content hash
+    3. dedup_lookup: caller-supplied check whether the content is stored
+    4. perceptual_hash: pHash/dHash, only for content not already stored
+
+    Attributes:
+        stage_stats: Per-stage counters (``<stage>_cpu_seconds`` of thread
+            CPU time, ``rejected_validate``, ``perceptual_hashes_computed``,
+            ``perceptual_hashes_skipped``). Wall time per stage is also
+            observed in the crawler_stage_seconds histogram.
     """
 
+    STAGES = ("validate", "sha256", "dedup_lookup", "perceptual_hash")
+
     def __init__(
         self,
         min_file_size: int = 1024,
@@ -284,17 +315,107 @@ class ScrapyImageDownloader:
         self.max_file_size = max_file_size
         self.min_dimensions = (min_width, min_height)
         self.fingerprinter = ImageFingerprinter()
+        self.stage_stats: dict[str, Any] = {f"{stage}_cpu_seconds": 0.0 for stage in self.STAGES}
+        self.stage_stats.update(
+            {
+                "rejected_validate": 0,
+                "perceptual_hashes_computed": 0,
+                "perceptual_hashes_skipped": 0,
+            }
+        )
 
-    def process_response(self, url: str, response: Response) -> ImageFetchResult:
+    def process_response(
+        self,
+        url: str,
+        response: Response,
+        known_content: Callable[[str], bool] | None = None,
+        trace: dict[str, float] | None = None,
+    ) -> ImageFetchResult:
         """Process a Scrapy Response object into an ImageFetchResult.
 
         Args:
             url: The image URL.
             response: Scrapy Response object from image download.
+            known_content: Optional dedup lookup on the SHA-256; when it
+                returns True the content is already stored and perceptual
+                hashes are not computed (see compute_perceptual_hashes).
+            trace: Optional lifecycle trace (see crawler.tracing); gets
+                "validated" and "hashed" timestamps.
 
         Returns:
             ImageFetchResult with parsed metadata.
         """
+        started = _stage_clock()
+        result = self._validate_response(url, response)
+        self._record_stage("validate", started)
+        if trace is not None:
+            trace["validated"] = time.time()
+        if not result.success or result.content is None:
+            self.stage_stats["rejected_validate"] += 1
+            return result
+
+        started = _stage_clock()
+        result.sha256_hash = hashlib.sha256(result.content).hexdigest()
+        self._record_stage("sha256", started)
+
+        known = False
+        if known_content is not None:
+            started = _stage_clock()
+            known = known_content(result.sha256_hash)
+            self._record_stage("dedup_lookup", started)
+
+        if known:
+            self.stage_stats["perceptual_hashes_skipped"] += 1
+        else:
+            self.compute_perceptual_hashes(result)
+        if trace is not None:
+            trace["hashed"] = time.time()
+        return result
+
+    def compute_perceptual_hashes(self, result: ImageFetchResult) -> None:
+        """Fill in pHash/dHash of a fetch result that was processed without them.
+
+        Args:
+            result: Successful ImageFetchResult with content.
+        """
+        if result.content is None:
+            return
+        started = _stage_clock()
+        if result.phash_hash is None:
+            result.phash_hash = self.fingerprinter.compute_phash(result.content)
+        if result.dhash_hash is None:
+            result.dhash_hash = self.fingerprinter.compute_dhash(result.content)
+        self._record_stage("perceptual_hash", started)
+        self.stage_stats["perceptual_hashes_computed"] += 1
+
+    def get_stage_stats(self) -> dict[str, Any]:
+        """Return stage counters plus the estimated perceptual-hash CPU saved.
+
+        The estimate is the number of skipped computations times the mean
+        CPU time of the computed ones.
+        """
+        stats = {
+            key: round(value, 3) if isinstance(value, float) else value
+            for key, value in self.stage_stats.items()
+        }
+        computed = self.stage_stats["perceptual_hashes_computed"]
+        mean = self.stage_stats["perceptual_hash_cpu_seconds"] / computed if computed else 0.0
+        stats["perceptual_hash_cpu_seconds_saved"] = round(
+            mean * self.stage_stats["perceptual_hashes_skipped"], 3
+        )
+        return stats
+
+    def _record_stage(self, stage: str, started: tuple[float, float]) -> None:
+        cpu_started, wall_started = started
+        self.stage_stats[f"{stage}_cpu_seconds"] += time.thread_time() - cpu_started
+        STAGE_SECONDS.observe(time.perf_counter() - wall_started, stage)
+
+    def _validate_response(self, url: str, response: Response) -> ImageFetchResult:
+        """Run the cheap checks: status, content type, size and dimensions.
+
+        Returns:
+            Failed ImageFetchResult, or a successful one without hashes.
+        """
         # Check for download errors
         if response.status != 200:
             return ImageFetchResult(
@@ -334,10 +455,7 @@ class ScrapyImageDownloader:
                 error_message=format_rejection_reason(REJECTION_REASON_FILE_TOO_LARGE, f"{file_size} bytes"),
             )
 
-        # Generate SHA-256 hash
-        sha256_hash = hashlib.sha256(content).hexdigest()
-
-        # Parse image dimensions and validate payload
+        # Parse image dimensions and validate payload (reads the header only)
         width, height, img_format = self._parse_image_dimensions(content)
 
         # If we cannot parse dimensions, reject as invalid payload
@@ -356,10 +474,6 @@ class ScrapyImageDownloader:
                 error_message=format_rejection_reason(REJECTION_REASON_IMAGE_DIMENSIONS_TOO_SMALL, f"{width}x{height}"),
             )
 
-        # Compute perceptual hashes
-        phash_hash = self.fingerprinter.compute_phash(content)
-        dhash_hash = self.fingerprinter.compute_dhash(content)
-
         return ImageFetchResult(
             success=True,
             url=url,
@@ -369,9 +483,8 @@ class ScrapyImageDownloader:
             width=width,
             height=height,
             format=img_format,
-            sha256_hash=sha256_hash,
-            phash_hash=phash_hash,
-            dhash_hash=dhash_hash,
+            etag=_header_text(response, "ETag"),
+            last_modified=_header_text(response, "Last-Modified"),
         )
 
     def _parse_image_dimensions(self, content: bytes) -> tuple[int | None, int | None, str | None]:
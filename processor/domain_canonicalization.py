@@ -13,20 +13,126 @@ Canonicalization Rules:
 - Keep full subdomains by default (configurable via strip_subdomains)
 """
 
+import functools
 import logging
-from urllib.parse import urlparse
+import threading
+from urllib.parse import urlparse, urlsplit
 
 import idna
-from publicsuffix2 import get_sld
+from publicsuffix2 import PublicSuffixList
 
 logger = logging.getLogger(__name__)
 
+# Canonical results are memoized per (netloc, strip_subdomains). Crawl inputs
+# are highly repetitive (every page of a claimed domain shares one netloc), so
+# a modest bound keeps the hit rate near 100% with a small memory footprint.
+CANONICALIZATION_CACHE_SIZE = 65536
+
+_public_suffix_list: PublicSuffixList | None = None
+_public_suffix_lock = threading.Lock()
+
+
+def get_public_suffix_list() -> PublicSuffixList:
+    """Return the process-wide public suffix trie, loading it on first use.
+
+    Parsing the bundled PSL takes tens of milliseconds, so callers that know
+    they will reduce to registrable domains (e.g. the spider with
+    strip_subdomains enabled) call this at startup to preload the trie
+    instead of paying for it on the first crawled page.
+
+    Returns:
+        Loaded PublicSuffixList instance shared by all callers.
+    """
+    global _public_suffix_list
+    if _public_suffix_list is None:
+        with _public_suffix_lock:
+            if _public_suffix_list is None:
+                _public_suffix_list = PublicSuffixList()
+    return _public_suffix_list
+
+
+def _extract_netloc(url: str) -> str:
+    """Return the netloc of a URL that already carries a scheme.
+
+    Plain ``scheme://host/...`` URLs are sliced directly; anything unusual
+    (control characters, bracketed IPv6 hosts, non-ASCII hosts, odd schemes)
+    goes through urlsplit so its validation and quirks are preserved.
+
+    Raises:
+        ValueError: If urlsplit rejects the URL
+    """
+    scheme, sep, rest = url.partition("://")
+    if sep and scheme.isascii() and scheme.isalpha() and rest.isprintable():
+        end = len(rest)
+        for delim in "/?#":
+            pos = rest.find(delim, 0, end)
+            if pos >= 0:
+                end = pos
+        netloc = rest[:end]
+        if netloc.isascii() and "[" not in netloc and "]" not in netloc:
+            return netloc
+    return urlsplit(url).netloc
+
+
+@functools.lru_cache(maxsize=CANONICALIZATION_CACHE_SIZE)
+def _canonicalize_netloc(netloc: str, strip_subdomains: bool) -> str:
+    """Canonicalize a lowercased netloc (memoized).
+
+    Args:
+        netloc: Lowercased network location as returned by urlsplit
+        strip_subdomains: If True, reduce to registrable domain
+
+    Returns:
+        Canonical domain string
+    """
+    domain = netloc
+
+    # Strip default ports only (80/443); keep non-default ports for identity
+    if ":" in domain and not domain.startswith("["):
+        host, _, port = domain.rpartition(":")
+        if port in ("80", "443"):
+            domain = host
+
+    # Strip trailing dot
+    domain = domain.rstrip(".")
+
+    # Strip www prefix
+    if domain.startswith("www."):
+        domain = domain[4:]
+
+    # Handle IDN (Internationalized Domain Name) - convert to punycode.
+    # Lowercased ASCII hostnames are already in their UTS #46 / punycode form
+    # (or are rejected by idna and kept as-is), so only non-ASCII input needs
+    # the IDNA codec.
+    if domain and not domain.isascii():
+        try:
+            # idna.encode returns bytes, decode to string
+            encoded = idna.encode(domain, uts46=True)
+            domain = encoded.decode("ascii")
+        except (idna.IDNAError, UnicodeError, UnicodeDecodeError) as e:
+            # If encoding fails, keep the original domain
+            logger.debug(f"IDN encoding failed for {domain!r}: {e}")
+
+    # Optionally strip to registrable domain
+    if strip_subdomains and domain:
+        try:
+            registrable = get_public_suffix_list().get_sld(domain)
+            if registrable:
+                domain = registrable
+        except Exception as e:
+            # If reduction fails, keep the full domain
+            logger.debug(f"Domain reduction failed for {domain!r}: {e}")
+
+    return domain
+
 
 def canonicalize_domain(url: str | None, strip_subdomains: bool = False) -> str:
     """Canonicalize domain from URL.
 
     Extracts and normalizes the domain from a URL or domain string,
     applying consistent rules to prevent duplicate domain entries.
+    Results are memoized per netloc, so repeated calls for URLs on the
+    same host only pay for the netloc split.
 
     Args:
         url: Full URL (https://example.com/path) or domain (example.com)
@@ -54,53 +160,31 @@ def canonicalize_domain(url: str | None, strip_subdomains: bool = False) -> str:
     if not url or not isinstance(url, str):
         raise ValueError(f"Invalid URL: {url!r}")
 
-    # Add scheme if missing to make urlparse work correctly
+    # Add scheme if missing to make urlsplit work correctly
     if "://" not in url:
         url = f"https://{url}"
 
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        netloc = _extract_netloc(url).lower()
     except ValueError as e:
         logger.warning(f"Failed to parse URL {url!r}: {e}")
         raise ValueError(f"Invalid URL: {url!r}") from e
 
-    # Strip default ports only (80/443); keep non-default ports for identity
-    if ":" in domain and not domain.startswith("["):
-        host, _, port = domain.rpartition(":")
-        if port in ("80", "443"):
-            domain = host
+    return _canonicalize_netloc(netloc, bool(strip_subdomains))
 
-    # Strip trailing dot
-    domain = domain.rstrip(".")
 
-    # Strip www prefix
-    if domain.startswith("www."):
-        domain = domain[4:]
+def clear_canonicalization_cache() -> None:
+    """Drop all memoized canonicalization results."""
+    _canonicalize_netloc.cache_clear()
 
-    # Handle IDN (Internationalized Domain Name) - convert to punycode
-    if domain:
-        try:
-            # idna.encode returns bytes, decode to string
-            encoded = idna.encode(domain, uts46=True)
-            domain = encoded.decode("ascii")
-        except (idna.IDNAError, UnicodeError, UnicodeDecodeError) as e:
-            # If encoding fails, keep the original domain
-            logger.debug(f"IDN encoding failed for {domain!r}: {e}")
-            pass
 
-    # Optionally strip to registrable domain
-    if strip_subdomains and domain:
-        try:
-            registrable = get_sld(domain)
-            if registrable:
-                domain = registrable
-        except Exception as e:
-            # If reduction fails, keep the full domain
-            logger.debug(f"Domain reduction failed for {domain!r}: {e}")
-            pass
+def canonicalization_cache_info() -> functools._CacheInfo:
+    """Return hit/miss statistics for the canonicalization cache.
 
-    return domain
+    Returns:
+        functools cache info (hits, misses, maxsize, currsize)
+    """
+    return _canonicalize_netloc.cache_info()
 
 
 def extract_domain_from_url(url: str | None) -> str | None:
@@ -41,6 +41,8 @@ class ImageFetchResult:
         phash_hash: Perceptual hash (pHash) for similarity matching.
         dhash_hash: Difference hash (dHash) for similarity matching.
         error_message: Description of failure (if unsuccessful).
+        etag: ETag response header (HTTP validator).
+        last_modified: Last-Modified response header (HTTP validator).
     """
 
     success: bool
@@ -55,6 +57,8 @@ class ImageFetchResult:
     phash_hash: str | None = None
     dhash_hash: str | None = None
     error_message: str | None = None
+    etag: str | None = None
+    last_modified: str | None = None
 
 
 class ImageFetcher:
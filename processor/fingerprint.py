@@ -6,6 +6,7 @@ and future similarity matching.
 
 import hashlib
 import logging
+import string
 from io import BytesIO
 from typing import Any
 
@@ -245,3 +246,23 @@ def compute_perceptual_hashes(content: bytes) -> dict[str, str | None]:
         "phash": fingerprinter.compute_phash(content),
         "dhash": fingerprinter.compute_dhash(content),
     }
+
+
+def perceptual_hash_to_bigint(value: str | None) -> int | None:
+    """Convert a 64-bit hex perceptual hash to a signed BIGINT value.
+
+    PostgreSQL has no unsigned 64-bit type, so hashes are stored as the
+    two's complement reinterpretation of the unsigned value. Hamming
+    distance (``bit_count(a # b)``) is unaffected by the sign.
+
+    Args:
+        value: 16-digit hex hash as returned by compute_phash/compute_dhash.
+
+    Returns:
+        Signed 64-bit integer, or None if the value is missing or not a
+        64-bit hex hash.
+    """
+    if not value or len(value) != 16 or not all(c in string.hexdigits for c in value):
+        return None
+    unsigned = int(value, 16)
+    return unsigned - (1 << 64) if unsigned >= 1 << 63 else unsigned
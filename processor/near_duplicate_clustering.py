@@ -0,0 +1,547 @@
+"""Offline near-duplicate clustering over perceptual hashes.
+
+Groups images whose pHash (or dHash) differ by at most a few bits, such as
+the same picture re-encoded or resized on different domains, and assigns
+every member of a group the same cluster ID. The job runs in four phases:
+
+1. Load: stream (image_id, hash) pairs into compact numpy arrays sorted by
+   image ID, so cluster IDs are deterministic.
+2. Compare: cut each 64-bit hash into ``bands`` bit ranges and bucket the
+   hashes by band value. Two hashes within ``threshold`` bits differ in at
+   most ``threshold // bands`` bits of some band (pigeonhole), so each bucket
+   is compared with itself and with every bucket whose band value lies
+   within that radius (multi-probe, as in near_duplicate_index). Any band
+   count finds every pair; fewer, wider bands need more probes but leave
+   fewer hashes per bucket, so the default picks the count with the lowest
+   estimated cost for the corpus size. Candidate pairs are verified with a
+   vectorized popcount, spread over worker processes.
+3. Union: merge matching pairs with union-find; each component's smallest
+   image ID becomes its cluster ID.
+4. Write: hand (image_id, cluster_id) assignments to the caller for a bulk
+   write back.
+"""
+
+import dataclasses
+import itertools
+import logging
+import math
+import multiprocessing
+import os
+import time
+import uuid
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from processor.near_duplicate_index import HASH_BITS, hash_to_int
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 8
+
+# Each band keeps a dense 2**width bucket lookup table, so bands stay at most
+# 22 bits wide
+MIN_BANDS = 3
+
+# Buckets larger than this (e.g. blank or solid-colour images) are skipped:
+# comparing them is quadratic and they are rarely meaningful clusters
+DEFAULT_MAX_BUCKET_SIZE = 5000
+
+# Probe masks handed to a worker per task
+PROBES_PER_TASK = 16
+
+# Candidate pairs expanded per vectorized comparison (bounds temporary memory)
+COMPARE_CHUNK_PAIRS = 1 << 20
+
+# Rows compared per vectorized block inside a large bucket pair
+COMPARE_BLOCK_ROWS = 512
+
+LOAD_PROGRESS_INTERVAL = 1_000_000
+
+if hasattr(np, "bitwise_count"):
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.asarray(np.bitwise_count(values))
+
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        as_bytes = np.ascontiguousarray(values).view(np.uint8)
+        return np.asarray(_POPCOUNT_TABLE[as_bytes].reshape(*values.shape, 8).sum(axis=-1))
+
+
+@dataclasses.dataclass
+class ClusteringStats:
+    """Progress and throughput counters for a clustering run."""
+
+    images: int = 0
+    bands: int = 0
+    probe_radius: int = 0
+    threshold: int = 0
+    buckets_compared: int = 0
+    buckets_skipped: int = 0
+    images_in_skipped_buckets: int = 0
+    comparisons: int = 0
+    matched_pairs: int = 0
+    clusters: int = 0
+    clustered_images: int = 0
+    largest_cluster: int = 0
+    load_seconds: float = 0.0
+    compare_seconds: float = 0.0
+    union_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return counters plus derived throughput figures."""
+        result = dataclasses.asdict(self)
+        result["load_images_per_second"] = _rate(self.images, self.load_seconds)
+        result["comparisons_per_second"] = _rate(self.comparisons, self.compare_seconds)
+        return result
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else 0.0
+
+
+@dataclasses.dataclass
+class ClusteringResult:
+    """Cluster assignments for one run.
+
+    Attributes:
+        image_ids: (n, 16) uint8 array of image UUID bytes, sorted ascending.
+        roots: Position of each image's cluster representative.
+        sizes: Cluster size at each representative position.
+        stats: Run statistics.
+    """
+
+    image_ids: np.ndarray
+    roots: np.ndarray
+    sizes: np.ndarray
+    stats: ClusteringStats
+
+    def assignments(self) -> Iterator[tuple[str, str]]:
+        """Yield (image_id, cluster_id) for images in clusters of two or more."""
+        clustered = np.flatnonzero(self.sizes[self.roots] >= 2)
+        for pos in clustered.tolist():
+            root = int(self.roots[pos])
+            yield (
+                str(uuid.UUID(bytes=self.image_ids[pos].tobytes())),
+                str(uuid.UUID(bytes=self.image_ids[root].tobytes())),
+            )
+
+
+def load_hashes(rows: Iterable[tuple[Any, Any]]) -> tuple[np.ndarray, np.ndarray]:
+    """Load (image_id, hash) rows into arrays sorted by image ID.
+
+    Args:
+        rows: Image IDs (UUID or str) with hashes as hex strings or ints;
+            rows without a valid hash are skipped.
+
+    Returns:
+        Tuple of ((n, 16) uint8 UUID bytes, (n,) uint64 hashes).
+    """
+    id_bytes = bytearray()
+    hashes = array("Q")
+    started = time.monotonic()
+    for image_id, value in rows:
+        hash_value = hash_to_int(value)
+        if hash_value is None:
+            continue
+        id_bytes += uuid.UUID(str(image_id)).bytes
+        hashes.append(hash_value)
+        if len(hashes) % LOAD_PROGRESS_INTERVAL == 0:
+            elapsed = time.monotonic() - started
+            logger.info(f"Loaded {len(hashes)} hashes ({_rate(len(hashes), elapsed)}/s)")
+
+    ids = np.frombuffer(bytes(id_bytes), dtype=np.uint8).reshape(-1, 16)
+    values = np.frombuffer(hashes.tobytes(), dtype=np.uint64)
+
+    # Sort by UUID (big-endian halves) so the smallest ID in a cluster is its root
+    high = ids[:, :8].copy().view(">u8").ravel()
+    low = ids[:, 8:].copy().view(">u8").ravel()
+    order = np.lexsort((low, high))
+    return ids[order], values[order]
+
+
+def _band_ranges(bands: int) -> list[tuple[int, int]]:
+    """Return (shift, width) bit ranges splitting a 64-bit hash into bands."""
+    bounds = [i * HASH_BITS // bands for i in range(bands + 1)]
+    return [(bounds[i], bounds[i + 1] - bounds[i]) for i in range(bands)]
+
+
+def _probe_masks(width: int, radius: int) -> np.ndarray:
+    """Return every ``width``-bit mask with at most ``radius`` bits set, 0 first."""
+    masks = [0]
+    for flips in range(1, radius + 1):
+        for bits in itertools.combinations(range(width), flips):
+            masks.append(sum(1 << bit for bit in bits))
+    return np.array(masks, dtype=np.int64)
+
+
+def _estimated_cost(images: int, bands: int, threshold: int) -> float:
+    radius = threshold // bands
+    cost = 0.0
+    for _, width in _band_ranges(bands):
+        buckets = 1 << width
+        probes = sum(math.comb(width, flips) for flips in range(radius + 1))
+        # Each probe visits every occupied bucket and verifies the pairs it finds
+        cost += probes * (min(images, buckets) + images * images / buckets / 2)
+    return cost
+
+
+def choose_bands(images: int, threshold: int) -> int:
+    """Return the band count with the lowest estimated compare cost.
+
+    Args:
+        images: Number of hashes to cluster
+        threshold: Maximum Hamming distance for a match
+
+    Returns:
+        Band count between MIN_BANDS and threshold + 1 (no probing).
+    """
+    candidates = range(MIN_BANDS, min(HASH_BITS, max(MIN_BANDS, threshold + 1)) + 1)
+    return min(candidates, key=lambda bands: _estimated_cost(images, bands, threshold))
+
+
+class _Band(NamedTuple):
+    """Hashes grouped into buckets by one band's value (oversized buckets dropped).
+
+    Bucket members are contiguous in band order, so candidate pairs are
+    verified on ``values`` and only matches are mapped back through ``order``.
+    """
+
+    order: np.ndarray  # hash positions sorted by band value
+    values: np.ndarray  # hashes in band order
+    keys: np.ndarray  # band value of each bucket, ascending
+    starts: np.ndarray  # bucket offsets into band order
+    sizes: np.ndarray
+    lookup: np.ndarray  # band value -> bucket index, -1 if none
+
+
+# Worker process state, set by _init_worker (inherited directly under fork)
+_worker_bands: list[_Band] = []
+
+
+def _init_worker(bands: list[_Band]) -> None:
+    global _worker_bands
+    _worker_bands = bands
+
+
+def _compare_block(
+    values: np.ndarray, left: slice, right: slice, same: bool, threshold: int
+) -> tuple[list[np.ndarray], list[np.ndarray], int]:
+    """Compare every hash in ``left`` with every hash in ``right`` in row blocks.
+
+    With ``same`` (a bucket against itself) only the upper triangle is compared.
+    Returns band-order positions of matches.
+    """
+    left_values = values[left]
+    right_values = values[right]
+    lefts: list[np.ndarray] = []
+    rights: list[np.ndarray] = []
+    comparisons = 0
+    for row_start in range(0, len(left_values), COMPARE_BLOCK_ROWS):
+        row_end = min(len(left_values), row_start + COMPARE_BLOCK_ROWS)
+        col_start = row_start if same else 0
+        distances = _popcount(left_values[row_start:row_end, None] ^ right_values[None, col_start:])
+        rows, cols = np.nonzero(distances <= threshold)
+        if same:
+            keep = cols > rows
+            rows, cols = rows[keep], cols[keep]
+            block = row_end - row_start
+            comparisons += block * (len(right_values) - row_start) - block * (block + 1) // 2
+        else:
+            comparisons += (row_end - row_start) * len(right_values)
+        lefts.append(left.start + row_start + rows)
+        rights.append(right.start + col_start + cols)
+    return lefts, rights, comparisons
+
+
+def _compare_bucket_pairs(
+    band: _Band, a: np.ndarray, b: np.ndarray, same: bool, threshold: int
+) -> tuple[list[np.ndarray], list[np.ndarray], int]:
+    """Compare all hashes of bucket a[i] with all hashes of bucket b[i].
+
+    Small bucket pairs are expanded into flat candidate arrays and verified in
+    chunks of about COMPARE_CHUNK_PAIRS; larger ones are compared block-wise.
+    Returns band-order positions of matches.
+    """
+    lefts: list[np.ndarray] = []
+    rights: list[np.ndarray] = []
+    comparisons = 0
+    counts = band.sizes[a] * band.sizes[b]
+
+    def verify(left: np.ndarray, right: np.ndarray) -> None:
+        nonlocal comparisons
+        matched = _popcount(band.values[left] ^ band.values[right]) <= threshold
+        comparisons += len(left)
+        lefts.append(left[matched])
+        rights.append(right[matched])
+
+    for pos in np.flatnonzero(counts > COMPARE_CHUNK_PAIRS).tolist():
+        left = slice(band.starts[a[pos]], band.starts[a[pos]] + band.sizes[a[pos]])
+        right = slice(band.starts[b[pos]], band.starts[b[pos]] + band.sizes[b[pos]])
+        block_lefts, block_rights, block_comparisons = _compare_block(
+            band.values, left, right, same, threshold
+        )
+        lefts += block_lefts
+        rights += block_rights
+        comparisons += block_comparisons
+
+    # Most pairs at scale are two single-hash buckets: verify those directly
+    single = counts == 1
+    if single.any():
+        verify(band.starts[a[single]], band.starts[b[single]])
+
+    small = np.flatnonzero((counts > 1) & (counts <= COMPARE_CHUNK_PAIRS))
+    chunk_ids = np.cumsum(counts[small]) // COMPARE_CHUNK_PAIRS
+    for chunk in np.split(small, np.flatnonzero(np.diff(chunk_ids)) + 1):
+        if not len(chunk):
+            continue
+        chunk_counts = counts[chunk]
+        pair = np.repeat(np.arange(len(chunk)), chunk_counts)
+        offset = np.arange(len(pair)) - np.repeat(
+            np.cumsum(chunk_counts) - chunk_counts, chunk_counts
+        )
+        right_sizes = band.sizes[b[chunk]][pair]
+        rows = offset // right_sizes
+        cols = offset % right_sizes
+        if same:
+            keep = cols > rows
+            pair, rows, cols = pair[keep], rows[keep], cols[keep]
+        verify(band.starts[a[chunk]][pair] + rows, band.starts[b[chunk]][pair] + cols)
+
+    return lefts, rights, comparisons
+
+
+def _compare_probes(
+    task: tuple[int, np.ndarray, int],
+) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """Compare every bucket of one band with the buckets at a set of probe masks.
+
+    Args:
+        task: (band index, probe masks, threshold); mask 0 compares each
+            bucket with itself
+
+    Returns:
+        Tuple of (left positions, right positions, comparisons, bucket pairs).
+    """
+    band_index, masks, threshold = task
+    if band_index >= len(_worker_bands):
+        raise RuntimeError("Worker bands not initialized")
+    band = _worker_bands[band_index]
+    lefts: list[np.ndarray] = []
+    rights: list[np.ndarray] = []
+    comparisons = 0
+    bucket_pairs = 0
+
+    # Visit each pair of buckets once, from the one with the smaller value:
+    # buckets whose value has the mask's top bit clear (shared by many masks)
+    sources: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+    for mask in masks.tolist():
+        if mask == 0:
+            a = np.flatnonzero(band.sizes >= 2)
+            b = a
+        else:
+            top_bit = 1 << (mask.bit_length() - 1)
+            if top_bit not in sources:
+                below = np.flatnonzero((band.keys & top_bit) == 0)
+                sources[top_bit] = (below, band.keys[below])
+            below, keys = sources[top_bit]
+            b = band.lookup[keys ^ mask]
+            found = b >= 0
+            a, b = below[found], b[found]
+        bucket_pairs += len(a)
+        pair_lefts, pair_rights, pair_comparisons = _compare_bucket_pairs(
+            band, a, b, mask == 0, threshold
+        )
+        lefts += pair_lefts
+        rights += pair_rights
+        comparisons += pair_comparisons
+
+    if not lefts:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, comparisons, bucket_pairs
+    return (
+        band.order[np.concatenate(lefts)],
+        band.order[np.concatenate(rights)],
+        comparisons,
+        bucket_pairs,
+    )
+
+
+def _plan_tasks(
+    hashes: np.ndarray, bands: int, threshold: int, max_bucket_size: int, stats: ClusteringStats
+) -> tuple[list[_Band], list[tuple[int, np.ndarray, int]]]:
+    """Bucket each band and split its probe masks into comparison tasks."""
+    radius = threshold // bands
+    band_index: list[_Band] = []
+    tasks: list[tuple[int, np.ndarray, int]] = []
+    if not len(hashes):
+        return band_index, tasks
+    in_skipped_bucket = np.zeros(len(hashes), dtype=bool)
+
+    for band, (shift, width) in enumerate(_band_ranges(bands)):
+        values = ((hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)).astype(np.int64)
+        order = np.argsort(values, kind="stable")
+        sorted_values = values[order]
+        starts = np.flatnonzero(np.diff(sorted_values, prepend=-1))
+        sizes = np.diff(starts, append=len(hashes))
+
+        oversized = sizes > max_bucket_size
+        stats.buckets_skipped += int(oversized.sum())
+        for start, size in zip(starts[oversized].tolist(), sizes[oversized].tolist(), strict=True):
+            in_skipped_bucket[order[start : start + size]] = True
+
+        keys = sorted_values[starts[~oversized]]
+        lookup = np.full(1 << width, -1, dtype=np.int32)
+        lookup[keys] = np.arange(len(keys), dtype=np.int32)
+        masks = _probe_masks(width, radius)
+        band_index.append(
+            _Band(order, hashes[order], keys, starts[~oversized], sizes[~oversized], lookup)
+        )
+        for first in range(0, len(masks), PROBES_PER_TASK):
+            tasks.append((band, masks[first : first + PROBES_PER_TASK], threshold))
+
+    stats.images_in_skipped_buckets = int(in_skipped_bucket.sum())
+    return band_index, tasks
+
+
+class _UnionFind:
+    """Union-find over positions; the smaller position always becomes the root."""
+
+    def __init__(self, size: int) -> None:
+        self.parent = array("q", range(size))
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return
+        if root_a < root_b:
+            self.parent[root_b] = root_a
+        else:
+            self.parent[root_a] = root_b
+
+    def roots(self) -> np.ndarray:
+        """Return the root of every position (vectorized pointer jumping)."""
+        parent = np.frombuffer(self.parent.tobytes(), dtype=np.int64)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                return parent
+            parent = jumped
+
+
+def cluster_hashes(
+    rows: Iterable[tuple[Any, Any]],
+    threshold: int = DEFAULT_THRESHOLD,
+    bands: int | None = None,
+    workers: int | None = None,
+    max_bucket_size: int = DEFAULT_MAX_BUCKET_SIZE,
+) -> ClusteringResult:
+    """Cluster images whose hashes are within ``threshold`` bits.
+
+    Args:
+        rows: (image_id, hash) pairs; hashes as hex strings or ints
+        threshold: Maximum Hamming distance for a match (inclusive)
+        bands: Number of bands (3-64; default: lowest estimated cost for the
+            corpus size). Every band count finds every pair within threshold
+        workers: Worker processes for the compare phase (default: CPU count;
+            1 runs in-process)
+        max_bucket_size: Skip band buckets larger than this
+
+    Returns:
+        ClusteringResult with assignments and statistics.
+
+    Raises:
+        ValueError: If bands or threshold are out of range.
+    """
+    if not 0 <= threshold <= HASH_BITS:
+        raise ValueError(f"threshold must be between 0 and {HASH_BITS}")
+    if bands is not None and not MIN_BANDS <= bands <= HASH_BITS:
+        raise ValueError(f"bands must be between {MIN_BANDS} and {HASH_BITS}")
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    # Load
+    started = time.monotonic()
+    image_ids, hashes = load_hashes(rows)
+    if bands is None:
+        bands = choose_bands(len(hashes), threshold)
+    stats = ClusteringStats(
+        images=len(hashes), bands=bands, probe_radius=threshold // bands, threshold=threshold
+    )
+    stats.load_seconds = time.monotonic() - started
+    logger.info(f"Loaded {stats.images} hashes in {stats.load_seconds:.1f}s")
+
+    # Compare
+    started = time.monotonic()
+    band_index, tasks = _plan_tasks(hashes, bands, threshold, max_bucket_size, stats)
+    union_find = _UnionFind(stats.images)
+    union_seconds = 0.0
+    logger.info(
+        f"Comparing {bands} bands within {stats.probe_radius} bits in {len(tasks)} tasks "
+        f"with {workers} workers ({stats.buckets_skipped} oversized buckets skipped)"
+    )
+
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(band_index,))
+        results: Iterator[tuple[np.ndarray, np.ndarray, int, int]] = pool.imap_unordered(
+            _compare_probes, tasks
+        )
+    else:
+        _init_worker(band_index)
+        results = map(_compare_probes, tasks)
+
+    try:
+        progress_step = max(1, len(tasks) // 20)
+        for done, (lefts, rights, comparisons, bucket_pairs) in enumerate(results, start=1):
+            stats.comparisons += comparisons
+            stats.buckets_compared += bucket_pairs
+            stats.matched_pairs += len(lefts)
+
+            union_started = time.monotonic()
+            for a, b in zip(lefts.tolist(), rights.tolist(), strict=True):
+                union_find.union(a, b)
+            union_seconds += time.monotonic() - union_started
+
+            if done % progress_step == 0 or done == len(tasks):
+                elapsed = time.monotonic() - started
+                logger.info(
+                    f"Compared {done}/{len(tasks)} probe tasks: "
+                    f"{stats.comparisons} comparisons "
+                    f"({_rate(stats.comparisons, elapsed)}/s), "
+                    f"{stats.matched_pairs} matches"
+                )
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        _init_worker([])
+    stats.compare_seconds = time.monotonic() - started - union_seconds
+
+    # Union
+    started = time.monotonic()
+    roots = union_find.roots()
+    sizes = np.bincount(roots, minlength=stats.images)
+    cluster_sizes = sizes[sizes >= 2]
+    stats.clusters = len(cluster_sizes)
+    stats.clustered_images = int(cluster_sizes.sum())
+    stats.largest_cluster = int(cluster_sizes.max()) if len(cluster_sizes) else 0
+    stats.union_seconds = union_seconds + time.monotonic() - started
+    logger.info(
+        f"Found {stats.clusters} clusters covering {stats.clustered_images} images "
+        f"(largest: {stats.largest_cluster})"
+    )
+
+    return ClusteringResult(image_ids=image_ids, roots=roots, sizes=sizes, stats=stats)
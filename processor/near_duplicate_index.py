@@ -0,0 +1,350 @@
+"""Near-duplicate search over 64-bit perceptual hashes.
+
+Uses multi-index hashing: every hash is split into four 16-bit bands and each
+band is indexed by exact value. If two hashes differ in at most ``d`` bits,
+at least one band differs in at most ``d // 4`` bits (pigeonhole), so a query
+only probes band values within that radius and verifies the candidates with
+a popcount. For near-duplicate distances (d <= ~15) this touches a small
+fraction of the corpus instead of scanning every row.
+
+Indexes live in memory, accept incremental inserts from the pipeline, and
+persist to one zlib-compressed snapshot file per hash kind. Saves hold an
+exclusive lock on ``<snapshot>.lock`` (flock, POSIX only) so workers
+merging into the same snapshot take turns.
+"""
+
+import functools
+import itertools
+import logging
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+BAND_COUNT = 4
+BAND_BITS = HASH_BITS // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+
+# Beyond this band radius, probing flipped band values costs more than a scan
+MAX_BAND_RADIUS = 3
+
+HASH_KINDS = ("phash", "dhash")
+
+# Snapshot layout: magic + zlib(<count, keys_len> + uint64 hashes + "\n"-joined keys)
+SNAPSHOT_MAGIC = b"NDIX1"
+SNAPSHOT_HEADER = struct.Struct("<QQ")
+SNAPSHOT_SUFFIX = ".idx"
+ZLIB_LEVEL = 6
+
+
+def hash_to_int(value: str | int | None) -> int | None:
+    """Convert a stored perceptual hash to an unsigned 64-bit integer.
+
+    Args:
+        value: Hex string as produced by ImageFingerprinter, or an integer
+            (signed values, e.g. from a BIGINT column, are reinterpreted).
+
+    Returns:
+        Unsigned integer hash, or None if the value is empty or not a
+        64-bit hash.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value & HASH_MASK
+    try:
+        parsed = int(value, 16)
+    except ValueError:
+        return None
+    if parsed >> HASH_BITS:
+        return None
+    return parsed
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Return the number of differing bits between two integer hashes."""
+    return (a ^ b).bit_count()
+
+
+def _band_values(hash_value: int) -> tuple[int, ...]:
+    """Split a 64-bit hash into its 16-bit bands (low band first)."""
+    return tuple((hash_value >> (i * BAND_BITS)) & BAND_MASK for i in range(BAND_COUNT))
+
+
+@functools.cache
+def _flip_masks(radius: int) -> tuple[int, ...]:
+    """Return all band masks with at most ``radius`` bits set."""
+    masks = [0]
+    for bit_count in range(1, radius + 1):
+        for bits in itertools.combinations(range(BAND_BITS), bit_count):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            masks.append(mask)
+    return tuple(masks)
+
+
+class NearDuplicateIndex:
+    """Hamming-distance index of key -> 64-bit hash.
+
+    Keys are opaque strings (image IDs in practice). Adding an existing key
+    replaces its hash.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[str] = []
+        self._hashes = array("Q")
+        self._positions: dict[str, int] = {}
+        self._bands: list[dict[int, list[int]]] = [{} for _ in range(BAND_COUNT)]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._positions
+
+    def get(self, key: str) -> int | None:
+        """Return the indexed hash for a key, or None."""
+        pos = self._positions.get(key)
+        return None if pos is None else self._hashes[pos]
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        """Iterate over (key, hash) pairs in insertion order."""
+        return zip(self._keys, self._hashes, strict=True)
+
+    def add(self, key: str, hash_value: int) -> bool:
+        """Insert or update a key.
+
+        Args:
+            key: Entry key (e.g. image ID)
+            hash_value: Unsigned 64-bit hash
+
+        Returns:
+            True if the index changed, False if the key already had this hash.
+        """
+        pos = self._positions.get(key)
+        if pos is not None:
+            old_value = self._hashes[pos]
+            if old_value == hash_value:
+                return False
+            for band, value in zip(self._bands, _band_values(old_value), strict=True):
+                bucket = band[value]
+                bucket.remove(pos)
+                if not bucket:
+                    del band[value]
+            self._hashes[pos] = hash_value
+        else:
+            pos = len(self._keys)
+            self._keys.append(key)
+            self._hashes.append(hash_value)
+            self._positions[key] = pos
+
+        for band, value in zip(self._bands, _band_values(hash_value), strict=True):
+            band.setdefault(value, []).append(pos)
+        return True
+
+    def merge(self, entries: Iterable[tuple[str, int]]) -> int:
+        """Add (key, hash) pairs, returning how many changed the index."""
+        return sum(1 for key, hash_value in entries if self.add(key, hash_value))
+
+    def query(self, hash_value: int, max_distance: int) -> list[tuple[str, int]]:
+        """Find all entries within a Hamming distance of a hash.
+
+        Args:
+            hash_value: Unsigned 64-bit query hash
+            max_distance: Maximum number of differing bits (inclusive)
+
+        Returns:
+            List of (key, distance) tuples sorted by distance, then key.
+        """
+        if max_distance < 0:
+            return []
+
+        radius = max_distance // BAND_COUNT
+        candidates: Iterable[int]
+        if radius > MAX_BAND_RADIUS:
+            candidates = range(len(self._keys))
+        else:
+            masks = _flip_masks(radius)
+            seen: set[int] = set()
+            for band, value in zip(self._bands, _band_values(hash_value), strict=True):
+                for mask in masks:
+                    bucket = band.get(value ^ mask)
+                    if bucket:
+                        seen.update(bucket)
+            candidates = seen
+
+        hashes = self._hashes
+        keys = self._keys
+        results = []
+        for pos in candidates:
+            distance = (hashes[pos] ^ hash_value).bit_count()
+            if distance <= max_distance:
+                results.append((keys[pos], distance))
+        results.sort(key=lambda result: (result[1], result[0]))
+        return results
+
+    def save(self, path: str | Path) -> None:
+        """Write a snapshot atomically (temp file + rename).
+
+        Args:
+            path: Snapshot file path; parent directories are created.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        hashes = array("Q", self._hashes)
+        if sys.byteorder == "big":
+            hashes.byteswap()
+        keys = "\n".join(self._keys).encode("utf-8")
+        payload = SNAPSHOT_HEADER.pack(len(self._keys), len(keys)) + hashes.tobytes() + keys
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(SNAPSHOT_MAGIC)
+                handle.write(zlib.compress(payload, ZLIB_LEVEL))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: str | Path) -> "NearDuplicateIndex":
+        """Load a snapshot written by :meth:`save`.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a valid snapshot.
+        """
+        raw = Path(path).read_bytes()
+        if not raw.startswith(SNAPSHOT_MAGIC):
+            raise ValueError(f"Not a near-duplicate index snapshot: {path}")
+        try:
+            payload = zlib.decompress(raw[len(SNAPSHOT_MAGIC) :])
+            count, keys_len = SNAPSHOT_HEADER.unpack_from(payload)
+        except (zlib.error, struct.error) as e:
+            raise ValueError(f"Corrupt near-duplicate index snapshot {path}: {e}") from e
+
+        offset = SNAPSHOT_HEADER.size
+        hashes = array("Q")
+        hashes.frombytes(payload[offset : offset + 8 * count])
+        if sys.byteorder == "big":
+            hashes.byteswap()
+        offset += 8 * count
+        keys_blob = payload[offset : offset + keys_len].decode("utf-8")
+        keys = keys_blob.split("\n") if count else []
+        if len(keys) != count or len(hashes) != count:
+            raise ValueError(f"Corrupt near-duplicate index snapshot {path}: size mismatch")
+
+        index = cls()
+        index.merge(zip(keys, hashes, strict=True))
+        return index
+
+
+@contextmanager
+def _snapshot_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive inter-process lock for a snapshot's read-merge-write."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class NearDuplicateIndexSet:
+    """pHash and dHash indexes sharing one snapshot directory.
+
+    Attributes:
+        directory: Directory holding ``phash.idx`` and ``dhash.idx``.
+        indexes: Hash kind -> in-memory index.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.indexes: dict[str, NearDuplicateIndex] = {
+            kind: NearDuplicateIndex() for kind in HASH_KINDS
+        }
+        # Entries added since load, merged into the on-disk snapshot on save
+        self._pending: dict[str, dict[str, int]] = {kind: {} for kind in HASH_KINDS}
+
+    def path_for(self, kind: str) -> Path:
+        """Return the snapshot path for a hash kind."""
+        return self.directory / f"{kind}{SNAPSHOT_SUFFIX}"
+
+    @classmethod
+    def load(cls, directory: str | Path) -> "NearDuplicateIndexSet":
+        """Load existing snapshots from a directory (missing kinds start empty)."""
+        index_set = cls(directory)
+        for kind in HASH_KINDS:
+            path = index_set.path_for(kind)
+            if path.exists():
+                index_set.indexes[kind] = NearDuplicateIndex.load(path)
+        return index_set
+
+    def add(self, key: str, phash: str | int | None = None, dhash: str | int | None = None) -> None:
+        """Add an image's hashes (hex strings or ints; None values are skipped)."""
+        for kind, value in (("phash", phash), ("dhash", dhash)):
+            hash_value = hash_to_int(value)
+            if hash_value is not None and self.indexes[kind].add(key, hash_value):
+                self._pending[kind][key] = hash_value
+
+    def query(self, kind: str, hash_value: str | int, max_distance: int) -> list[tuple[str, int]]:
+        """Query one hash kind; see :meth:`NearDuplicateIndex.query`.
+
+        Raises:
+            ValueError: If the kind or hash value is invalid.
+        """
+        if kind not in self.indexes:
+            raise ValueError(f"Unknown hash kind: {kind}")
+        parsed = hash_to_int(hash_value)
+        if parsed is None:
+            raise ValueError(f"Invalid 64-bit hash: {hash_value!r}")
+        return self.indexes[kind].query(parsed, max_distance)
+
+    def save(self, merge_existing: bool = True) -> None:
+        """Persist snapshots.
+
+        Args:
+            merge_existing: When True, only entries added since load are
+                merged into the current on-disk snapshot under the snapshot
+                lock, so concurrent workers do not overwrite each other's
+                inserts. When False, the in-memory indexes replace the
+                snapshots.
+        """
+        for kind in HASH_KINDS:
+            path = self.path_for(kind)
+            pending = self._pending[kind]
+            if merge_existing and not pending:
+                continue
+            with _snapshot_lock(path):
+                if merge_existing:
+                    snapshot = (
+                        NearDuplicateIndex.load(path) if path.exists() else NearDuplicateIndex()
+                    )
+                    snapshot.merge(pending.items())
+                    snapshot.save(path)
+                else:
+                    self.indexes[kind].save(path)
+            self._pending[kind] = {}
@@ -0,0 +1,366 @@
+"""Immutable asset repository (image_assets + image_observations).
+
+Write path used when ENABLE_IMMUTABLE_ASSETS is on. Instead of the
+read-modify-write sequence on the images table (SELECT by URL, SELECT by
+hash, UPDATE last_seen_at), every sighting of an image is buffered and
+written in batches:
+
+- image_assets rows are inserted with ON CONFLICT (sha256_hash) DO NOTHING,
+  so an asset row is written once and never updated.
+- image_observations rows are appended with COPY into a temporary staging
+  table and linked to their asset by SHA-256 in a single INSERT ... SELECT.
+
+No existing row is ever updated, so concurrent workers never contend on the
+same row locks.
+"""
+
+import io
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any, NamedTuple
+
+from psycopg2.extras import execute_values
+
+from storage.db import get_cursor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ASSET_BATCH_SIZE = 500
+DEFAULT_ASSET_FLUSH_INTERVAL_SECONDS = 5.0
+
+# Consecutive failed writes of a batch before it is dropped
+MAX_ASSET_FLUSH_ATTEMPTS = 3
+
+_OBSERVATION_COLUMNS = (
+    "sha256_hash",
+    "url",
+    "source_page_url",
+    "source_domain",
+    "crawl_run_id",
+    "observed_at",
+)
+
+
+class AssetRecord(NamedTuple):
+    """Immutable properties of an image's content."""
+
+    sha256_hash: str
+    file_size: int | None
+    width: int | None
+    height: int | None
+    mime_type: str | None
+    phash: str | None
+    dhash: str | None
+    phash_int: int | None
+    dhash_int: int | None
+
+
+class ObservationRecord(NamedTuple):
+    """One sighting of an asset at a URL."""
+
+    sha256_hash: str
+    url: str
+    source_page_url: str | None
+    source_domain: str | None
+    crawl_run_id: Any
+    observed_at: datetime
+
+
+def _copy_value(value: Any) -> str:
+    """Format a value for COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def write_assets_and_observations(
+    assets: list[AssetRecord], observations: list[ObservationRecord]
+) -> dict[str, int]:
+    """Insert new assets and append observations in one transaction.
+
+    Args:
+        assets: Asset rows, unique by sha256_hash
+        observations: Observation rows; each must reference an asset in
+            ``assets`` or one already in the table
+
+    Returns:
+        Dict with assets_inserted, assets_existing, bytes_inserted and
+        observations_written counts.
+    """
+    result = {
+        "assets_inserted": 0,
+        "assets_existing": 0,
+        "bytes_inserted": 0,
+        "observations_written": 0,
+    }
+    with get_cursor() as cur:
+        new_hashes: set[str] = set()
+        if assets:
+            inserted = execute_values(
+                cur,
+                """
+                INSERT INTO image_assets (
+                    sha256_hash, file_size, width, height, mime_type,
+                    phash, dhash, phash_int, dhash_int
+                )
+                VALUES %s
+                ON CONFLICT (sha256_hash) DO NOTHING
+                RETURNING sha256_hash
+                """,
+                assets,
+                page_size=len(assets),
+                fetch=True,
+            )
+            new_hashes = {row[0] for row in inserted}
+            result["assets_inserted"] = len(new_hashes)
+            result["assets_existing"] = len(assets) - len(new_hashes)
+            result["bytes_inserted"] = sum(
+                asset.file_size or 0 for asset in assets if asset.sha256_hash in new_hashes
+            )
+
+        if observations:
+            cur.execute("""
+                CREATE TEMP TABLE image_observation_staging (
+                    sha256_hash VARCHAR(64) NOT NULL,
+                    url TEXT NOT NULL,
+                    source_page_url TEXT,
+                    source_domain VARCHAR(255),
+                    crawl_run_id UUID,
+                    observed_at TIMESTAMP WITH TIME ZONE NOT NULL
+                ) ON COMMIT DROP
+                """)
+            buffer = io.StringIO(
+                "".join(
+                    "\t".join(_copy_value(value) for value in observation) + "\n"
+                    for observation in observations
+                )
+            )
+            cur.copy_expert(
+                f"COPY image_observation_staging ({', '.join(_OBSERVATION_COLUMNS)}) FROM STDIN",
+                buffer,
+            )
+            cur.execute("""
+                INSERT INTO image_observations (
+                    image_asset_id, url, source_page_url, source_domain,
+                    crawl_run_id, observed_at
+                )
+                SELECT a.id, s.url, s.source_page_url, s.source_domain,
+                       s.crawl_run_id, s.observed_at
+                FROM image_observation_staging s
+                JOIN image_assets a ON a.sha256_hash = s.sha256_hash
+                """)
+            result["observations_written"] = cur.rowcount
+
+        # Credit each new asset to the first page it was seen on this batch
+        page_counts: Counter[tuple[str, str]] = Counter()
+        credited: set[str] = set()
+        for observation in observations:
+            sha = observation.sha256_hash
+            if sha in new_hashes and sha not in credited:
+                credited.add(sha)
+                if observation.crawl_run_id and observation.source_page_url:
+                    page_counts[(observation.source_page_url, str(observation.crawl_run_id))] += 1
+        if page_counts:
+            execute_values(
+                cur,
+                """
+                UPDATE crawl_log c
+                SET images_downloaded = c.images_downloaded + v.n
+                FROM (VALUES %s) AS v(page_url, crawl_run_id, n)
+                WHERE c.page_url = v.page_url AND c.crawl_run_id = v.crawl_run_id::uuid
+                """,
+                [(page, run_id, count) for (page, run_id), count in page_counts.items()],
+            )
+
+    return result
+
+
+def get_last_observation(url: str) -> tuple[str, datetime] | None:
+    """Return (sha256_hash, observed_at) of the latest observation of a URL."""
+    try:
+        with get_cursor() as cur:
+            cur.execute(
+                """
+                SELECT a.sha256_hash, o.observed_at
+                FROM image_observations o
+                JOIN image_assets a ON a.id = o.image_asset_id
+                WHERE o.url = %s
+                ORDER BY o.observed_at DESC
+                LIMIT 1
+                """,
+                (url,),
+            )
+            row = cur.fetchone()
+            if row:
+                return row[0], row[1]
+    except Exception as e:
+        logger.warning(f"Failed to check last observation for {url}: {e}")
+    return None
+
+
+def asset_exists(sha256_hash: str) -> bool:
+    """Return whether an image_assets row exists for the content hash."""
+    try:
+        with get_cursor() as cur:
+            cur.execute("SELECT 1 FROM image_assets WHERE sha256_hash = %s", (sha256_hash,))
+            return cur.fetchone() is not None
+    except Exception as e:
+        logger.warning(f"Failed to check asset {sha256_hash}: {e}")
+        return False
+
+
+class AssetObservationWriter:
+    """Buffers asset/observation rows and writes them in batches.
+
+    Batches are written when ``batch_size`` observations are pending or the
+    oldest pending row is older than ``flush_interval`` seconds (checked on
+    each add), and on :meth:`flush`.
+
+    A failed write keeps the rows buffered (the write is one transaction,
+    so nothing was committed). Automatic flushes wait ``flush_interval``
+    before retrying; an explicit :meth:`flush` retries immediately. After
+    MAX_ASSET_FLUSH_ATTEMPTS consecutive failures the batch is dropped and
+    counted in observations_failed.
+
+    Attributes:
+        batch_size: Observations per write.
+        flush_interval: Maximum age of a pending row in seconds.
+        stats: Cumulative counters (assets_inserted, assets_existing,
+            bytes_inserted, observations_written, observations_failed,
+            asset_batches_written, asset_batches_failed).
+    """
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_ASSET_BATCH_SIZE,
+        flush_interval: float = DEFAULT_ASSET_FLUSH_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._assets: dict[str, AssetRecord] = {}
+        self._observations: list[ObservationRecord] = []
+        self._oldest: float | None = None
+        self._failed_attempts = 0
+        self._retry_at: float | None = None
+        self.stats: dict[str, int] = {
+            "assets_inserted": 0,
+            "assets_existing": 0,
+            "bytes_inserted": 0,
+            "observations_written": 0,
+            "observations_failed": 0,
+            "asset_batches_written": 0,
+            "asset_batches_failed": 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered observations."""
+        return len(self._observations)
+
+    def has_asset(self, sha256_hash: str) -> bool:
+        """Return whether an asset row for this hash is buffered."""
+        return sha256_hash in self._assets
+
+    def add(
+        self,
+        observation: ObservationRecord,
+        asset: AssetRecord | None = None,
+    ) -> dict[str, int] | None:
+        """Buffer an observation (and its asset, if newly fetched).
+
+        Args:
+            observation: Sighting to append
+            asset: Asset row for the observation's content; omit when the
+                asset is known to exist already
+
+        Returns:
+            Counts of the batch written by this call, or None if nothing
+            was written.
+
+        Raises:
+            Exception: Database errors from a triggered flush (the rows stay
+                buffered for a later retry).
+        """
+        if asset is not None:
+            self._assets.setdefault(asset.sha256_hash, asset)
+        self._observations.append(observation)
+        now = self._clock()
+        if self._oldest is None:
+            self._oldest = now
+
+        if self._retry_at is not None and now < self._retry_at:
+            return None
+        if len(self._observations) >= self.batch_size or now - self._oldest >= self.flush_interval:
+            return self.flush()
+        return None
+
+    def flush(self) -> dict[str, int] | None:
+        """Write all buffered rows.
+
+        Returns:
+            Counts of the written batch, or None if nothing was pending.
+
+        Raises:
+            Exception: Database errors; the rows stay buffered unless this
+                was the batch's last attempt.
+        """
+        if not self._observations and not self._assets:
+            return None
+
+        assets = list(self._assets.values())
+        observations = self._observations
+
+        try:
+            result = write_assets_and_observations(assets, observations)
+        except Exception:
+            self.stats["asset_batches_failed"] += 1
+            self._failed_attempts += 1
+            if self._failed_attempts >= MAX_ASSET_FLUSH_ATTEMPTS:
+                logger.error(
+                    f"Dropping {len(observations)} observations after "
+                    f"{self._failed_attempts} failed writes"
+                )
+                self.stats["observations_failed"] += len(observations)
+                self._clear()
+            else:
+                self._retry_at = self._clock() + self.flush_interval
+            raise
+
+        self._clear()
+        self.stats["asset_batches_written"] += 1
+        for key, value in result.items():
+            self.stats[key] += value
+        return result
+
+    def _clear(self) -> None:
+        self._assets = {}
+        self._observations = []
+        self._oldest = None
+        self._failed_attempts = 0
+        self._retry_at = None
+
+
+def build_observation(
+    url: str,
+    sha256_hash: str,
+    source_page: str | None,
+    source_domain: str | None,
+    crawl_run_id: Any = None,
+) -> ObservationRecord:
+    """Create an observation stamped with the current time."""
+    return ObservationRecord(
+        sha256_hash=sha256_hash,
+        url=url,
+        source_page_url=source_page or None,
+        source_domain=source_domain or None,
+        crawl_run_id=crawl_run_id,
+        observed_at=datetime.now(UTC),
+    )
@@ -0,0 +1,486 @@
+"""Content-addressable blob storage for downloaded image bytes.
+
+Image content is stored once per SHA-256 under a sharded key
+(``{sha256[0:2]}/{sha256[2:4]}/{sha256}``) so it can be reprocessed later
+without recrawling. Two backends are provided:
+
+- LocalBlobStore: sharded directory tree on the local filesystem
+- S3BlobStore: S3-compatible bucket (AWS S3 or MinIO)
+
+BlobWriter puts writes on a background thread in batches so the Scrapy
+reactor never waits on disk or network I/O, and skips hashes it already
+knows are stored.
+"""
+
+import abc
+import logging
+import os
+import queue
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from env_config import (
+    get_blob_store_backend,
+    get_blob_store_batch_size,
+    get_blob_store_path,
+    get_blob_store_queue_size,
+    get_object_store_access_key,
+    get_object_store_bucket,
+    get_object_store_endpoint,
+    get_object_store_region,
+    get_object_store_secret_key,
+    get_object_store_secure,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KNOWN_HASH_CACHE_SIZE = 100_000
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_S3_MAX_WORKERS = 8
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def blob_key(sha256_hash: str) -> str:
+    """Return the sharded storage key for a SHA-256 hex digest.
+
+    Args:
+        sha256_hash: 64-character hex digest
+
+    Returns:
+        Key in the form "ab/cd/abcd..." (matches OBJECT_STORE_PATH_TEMPLATE)
+
+    Raises:
+        ValueError: If the hash is not a lowercase 64-character hex digest
+    """
+    if not _SHA256_RE.match(sha256_hash or ""):
+        raise ValueError(f"Invalid SHA-256 hash: {sha256_hash!r}")
+    return f"{sha256_hash[0:2]}/{sha256_hash[2:4]}/{sha256_hash}"
+
+
+class BlobItem(NamedTuple):
+    """A blob waiting to be written."""
+
+    sha256_hash: str
+    content: bytes
+    content_type: str | None = None
+
+
+class BlobStore(abc.ABC):
+    """Interface for content-addressable blob backends.
+
+    ``put`` is idempotent: writing a hash that already exists is a no-op
+    and returns False.
+    """
+
+    @abc.abstractmethod
+    def exists(self, sha256_hash: str) -> bool:
+        """Return True if a blob with this hash is stored."""
+
+    @abc.abstractmethod
+    def put(self, sha256_hash: str, content: bytes, content_type: str | None = None) -> bool:
+        """Store a blob.
+
+        Args:
+            sha256_hash: SHA-256 hex digest of content
+            content: Raw bytes
+            content_type: Optional MIME type (used as object metadata where supported)
+
+        Returns:
+            True if the blob was written, False if it already existed.
+        """
+
+    @abc.abstractmethod
+    def get(self, sha256_hash: str) -> bytes | None:
+        """Return blob content, or None if not stored."""
+
+    def put_many(self, items: Iterable[BlobItem]) -> list[bool | Exception]:
+        """Store several blobs.
+
+        Args:
+            items: Blobs to store
+
+        Returns:
+            One entry per item: True if written, False if it already existed,
+            or the exception raised while writing it.
+        """
+        results: list[bool | Exception] = []
+        for item in items:
+            try:
+                results.append(self.put(item.sha256_hash, item.content, item.content_type))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class LocalBlobStore(BlobStore):
+    """Blob store backed by a sharded directory tree.
+
+    Files are written to a temporary name and atomically renamed into
+    place, so readers never observe partial blobs.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        """Initialize the store.
+
+        Args:
+            root: Root directory (created on first write)
+        """
+        self.root = Path(root)
+
+    def path_for(self, sha256_hash: str) -> Path:
+        """Return the filesystem path for a hash."""
+        return self.root / blob_key(sha256_hash)
+
+    def exists(self, sha256_hash: str) -> bool:
+        return self.path_for(sha256_hash).exists()
+
+    def put(self, sha256_hash: str, content: bytes, content_type: str | None = None) -> bool:
+        path = self.path_for(sha256_hash)
+        if path.exists():
+            return False
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return True
+
+    def get(self, sha256_hash: str) -> bytes | None:
+        try:
+            return self.path_for(sha256_hash).read_bytes()
+        except FileNotFoundError:
+            return None
+
+
+class S3BlobStore(BlobStore):
+    """Blob store backed by an S3-compatible bucket (AWS S3, MinIO).
+
+    Batches are uploaded concurrently from a small thread pool.
+    """
+
+    def __init__(self, client: Any, bucket: str, max_workers: int = DEFAULT_S3_MAX_WORKERS) -> None:
+        """Initialize the store.
+
+        Args:
+            client: boto3 S3 client (or compatible object)
+            bucket: Bucket name
+            max_workers: Concurrent uploads per batch
+        """
+        self.client = client
+        self.bucket = bucket
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="blob-s3"
+        )
+
+    @classmethod
+    def from_env(cls) -> "S3BlobStore":
+        """Create a store from OBJECT_STORE_* environment settings.
+
+        Returns:
+            Configured S3BlobStore
+        """
+        import boto3
+        from botocore.config import Config
+
+        endpoint = get_object_store_endpoint()
+        if endpoint and "://" not in endpoint:
+            scheme = "https" if get_object_store_secure() else "http"
+            endpoint = f"{scheme}://{endpoint}"
+
+        client = boto3.client(
+            "s3",
+            endpoint_url=endpoint,
+            aws_access_key_id=get_object_store_access_key(),
+            aws_secret_access_key=get_object_store_secret_key(),
+            region_name=get_object_store_region(),
+            config=Config(
+                signature_version="s3v4",
+                retries={"max_attempts": 3, "mode": "standard"},
+                max_pool_connections=DEFAULT_S3_MAX_WORKERS,
+            ),
+        )
+        return cls(client, get_object_store_bucket())
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        response = getattr(error, "response", None) or {}
+        code = str(response.get("Error", {}).get("Code", ""))
+        return code in {"404", "NoSuchKey", "NotFound"}
+
+    def ensure_bucket(self) -> None:
+        """Create the bucket if it does not exist (best-effort)."""
+        try:
+            self.client.head_bucket(Bucket=self.bucket)
+        except Exception:
+            try:
+                self.client.create_bucket(Bucket=self.bucket)
+                logger.info(f"Created object store bucket: {self.bucket}")
+            except Exception as e:
+                logger.warning(f"Could not create bucket {self.bucket}: {e}")
+
+    def exists(self, sha256_hash: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=blob_key(sha256_hash))
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def put(self, sha256_hash: str, content: bytes, content_type: str | None = None) -> bool:
+        if self.exists(sha256_hash):
+            return False
+        extra: dict[str, Any] = {}
+        if content_type:
+            extra["ContentType"] = content_type
+        self.client.put_object(Bucket=self.bucket, Key=blob_key(sha256_hash), Body=content, **extra)
+        return True
+
+    def get(self, sha256_hash: str) -> bytes | None:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=blob_key(sha256_hash))
+        except Exception as e:
+            if self._is_not_found(e):
+                return None
+            raise
+        body: bytes = response["Body"].read()
+        return body
+
+    def put_many(self, items: Iterable[BlobItem]) -> list[bool | Exception]:
+        def _put(item: BlobItem) -> bool | Exception:
+            try:
+                return self.put(item.sha256_hash, item.content, item.content_type)
+            except Exception as e:
+                return e
+
+        return list(self._executor.map(_put, items))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+class BlobWriter:
+    """Batched, non-blocking writer in front of a BlobStore.
+
+    ``submit`` only touches an in-memory LRU of known hashes and a bounded
+    queue, so it is safe to call from the reactor thread. A daemon thread
+    drains the queue in batches of up to ``batch_size``, de-duplicates
+    hashes within the batch and writes them via ``store.put_many``.
+
+    Attributes:
+        stats: Counters for submitted, written, skipped and dropped blobs.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        store: BlobStore,
+        batch_size: int = 32,
+        max_queue_size: int = 1000,
+        known_cache_size: int = DEFAULT_KNOWN_HASH_CACHE_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        """Initialize the writer and start its background thread.
+
+        Args:
+            store: Backend to write to
+            batch_size: Maximum blobs per put_many call
+            max_queue_size: Pending blobs allowed before submit() drops new ones
+            known_cache_size: Number of stored hashes remembered to skip rewrites
+            flush_interval: Seconds to wait for a batch to fill before writing it
+        """
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max(1, max_queue_size))
+        self._known: OrderedDict[str, None] = OrderedDict()
+        self._known_cache_size = known_cache_size
+        self._known_lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "blobs_submitted": 0,
+            "blobs_written": 0,
+            "blobs_skipped_existing": 0,
+            "blobs_dropped": 0,
+            "blobs_failed": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="blob-writer", daemon=True)
+        self._thread.start()
+
+    def _incr(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def is_known(self, sha256_hash: str) -> bool:
+        """Return True if the hash is known to be stored already."""
+        with self._known_lock:
+            if sha256_hash in self._known:
+                self._known.move_to_end(sha256_hash)
+                return True
+        return False
+
+    def _remember(self, sha256_hash: str) -> None:
+        with self._known_lock:
+            self._known[sha256_hash] = None
+            self._known.move_to_end(sha256_hash)
+            while len(self._known) > self._known_cache_size:
+                self._known.popitem(last=False)
+
+    def submit(self, sha256_hash: str, content: bytes, content_type: str | None = None) -> bool:
+        """Queue a blob for writing without blocking.
+
+        Args:
+            sha256_hash: SHA-256 hex digest of content
+            content: Raw bytes
+            content_type: Optional MIME type
+
+        Returns:
+            True if queued, False if skipped (already known) or dropped (queue full).
+        """
+        if self._closed:
+            return False
+        self._incr("blobs_submitted")
+        if self.is_known(sha256_hash):
+            self._incr("blobs_skipped_existing")
+            return False
+        try:
+            self._queue.put_nowait(BlobItem(sha256_hash, content, content_type))
+        except queue.Full:
+            self._incr("blobs_dropped")
+            if self.stats["blobs_dropped"] == 1:
+                logger.warning("Blob write queue full; dropping new blobs until it drains")
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until every queued blob has been processed."""
+        self._queue.join()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Write remaining blobs, stop the background thread and close the store.
+
+        Args:
+            timeout: Seconds to wait for the background thread to finish
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            logger.warning("Blob writer did not finish within %.0fs", timeout)
+        try:
+            self.store.close()
+        except Exception as e:
+            logger.warning(f"Failed to close blob store: {e}")
+
+    def _next_batch(self) -> tuple[list[BlobItem], int, bool]:
+        """Collect up to batch_size items; returns (items, dequeued, stop)."""
+        first = self._queue.get()
+        if first is self._STOP:
+            return [], 1, True
+        batch: list[BlobItem] = [first]
+        dequeued = 1
+        stop = False
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=self.flush_interval if len(batch) == 1 else 0)
+            except queue.Empty:
+                break
+            dequeued += 1
+            if item is self._STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, dequeued, stop
+
+    def _write_batch(self, batch: list[BlobItem]) -> None:
+        pending: dict[str, BlobItem] = {}
+        for item in batch:
+            if item.sha256_hash in pending or self.is_known(item.sha256_hash):
+                self._incr("blobs_skipped_existing")
+                continue
+            pending[item.sha256_hash] = item
+
+        if not pending:
+            return
+
+        items = list(pending.values())
+        try:
+            results = self.store.put_many(items)
+        except Exception as e:
+            results = [e] * len(items)
+
+        for item, result in zip(items, results, strict=True):
+            if isinstance(result, Exception):
+                self._incr("blobs_failed")
+                logger.warning(f"Failed to store blob {item.sha256_hash}: {result}")
+                continue
+            self._remember(item.sha256_hash)
+            if result:
+                self._incr("blobs_written")
+            else:
+                self._incr("blobs_skipped_existing")
+
+    def _run(self) -> None:
+        while True:
+            batch, dequeued, stop = self._next_batch()
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Blob writer batch failed: {e}")
+            finally:
+                for _ in range(dequeued):
+                    self._queue.task_done()
+            if stop:
+                return
+
+
+def create_blob_writer() -> BlobWriter | None:
+    """Build a BlobWriter from environment settings.
+
+    Returns:
+        BlobWriter for the configured backend, or None when BLOB_STORE_BACKEND
+        is "none" or the backend cannot be initialized.
+    """
+    backend = get_blob_store_backend()
+    if backend == "none":
+        return None
+
+    try:
+        store: BlobStore
+        if backend == "s3":
+            s3_store = S3BlobStore.from_env()
+            s3_store.ensure_bucket()
+            store = s3_store
+        else:
+            store = LocalBlobStore(get_blob_store_path())
+    except Exception as e:
+        logger.warning(
+            f"Failed to initialize {backend} blob store, image bytes will not be kept: {e}"
+        )
+        return None
+
+    logger.info(f"Blob store enabled: {backend}")
+    return BlobWriter(
+        store,
+        batch_size=get_blob_store_batch_size(),
+        max_queue_size=get_blob_store_queue_size(),
+    )
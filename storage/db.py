@@ -2,32 +2,229 @@
 
 This module provides database connection management using psycopg2
 with connection pooling support.
+
+The pool blocks (up to DB_POOL_TIMEOUT_SECONDS, or REACTOR_POOL_TIMEOUT_SECONDS
+on the Twisted reactor thread) instead of failing when all connections are
+checked out, and is sized from SCRAPY_CONCURRENT_REQUESTS, the background
+threads that share it and this worker's share of DB_SERVER_CONNECTION_BUDGET
+unless DB_POOL_MAX_CONNECTIONS is set.
+
+Hot queries go through execute_prepared(), which turns them into
+server-side prepared statements (PREPARE once per connection, then
+EXECUTE), so Postgres parses and plans them once instead of on every call.
+Each connection keeps at most DB_PREPARED_STATEMENT_CACHE_SIZE statements.
+With DB_PGBOUNCER_TRANSACTION_MODE (session state does not survive between
+transactions) or a cache size of 0, execute_prepared() sends plain SQL.
+
+get_db_pool_stats() reports pool waits, checkouts, statement cache use and
+statements sent; the discovery spider records it under db/ in the crawl
+stats. How long each
+get_connection() block holds its connection is observed in the
+crawler_db_call_seconds histogram.
 """
 
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
 from collections.abc import Generator
 from contextlib import contextmanager
+from typing import Any
 
 import psycopg2
+import psycopg2.errors
 from psycopg2.extensions import connection
 from psycopg2.extensions import cursor as psycopg_cursor
-from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+from twisted.python import threadable
 
-from env_config import get_database_url
+from crawler.metrics import DB_CALL_SECONDS
+from env_config import (
+    get_database_url,
+    get_db_pgbouncer_transaction_mode,
+    get_db_pool_max_connections,
+    get_db_pool_min_connections,
+    get_db_pool_timeout_seconds,
+    get_db_prepared_statement_cache_size,
+    get_db_server_connection_budget,
+    get_db_worker_processes,
+    get_scrapy_concurrent_requests,
+)
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = get_database_url()
 
+# Connections kept for threads other than the reactor: the claim heartbeat,
+# batched asset/observation flushes and one spare
+BACKGROUND_DB_CONNECTIONS = 3
+
+# Floor for the derived pool size (the fixed size before it was derived)
+MIN_DERIVED_POOL_SIZE = 10
+
+# Longest the reactor thread waits for a connection: while it blocks, no
+# request or callback in the process makes progress
+REACTOR_POOL_TIMEOUT_SECONDS = 1.0
+
 # Global connection pool (initialized lazily)
 _connection_pool: ThreadedConnectionPool | None = None
 
+# Pool and statement cache counters, see get_db_pool_stats()
+_stats_lock = threading.Lock()
+_stats: dict[str, float] = {
+    "connections_created": 0,
+    "checkouts": 0,
+    "waits": 0,
+    "wait_seconds_total": 0.0,
+    "wait_seconds_max": 0.0,
+    "peak_in_use": 0,
+    "statements_prepared": 0,
+    "statement_cache_hits": 0,
+    "statements_evicted": 0,
+    "statement_fallbacks": 0,
+    "statements_executed": 0,
+}
+
+# psycopg2 placeholders: %(name)s, %s, and the %% escape
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+# SQL texts Postgres refused to prepare (e.g. untyped parameters); sent as plain SQL
+_unpreparable: set[str] = set()
+
+
+def _inc(key: str, value: float = 1) -> None:
+    with _stats_lock:
+        _stats[key] += value
+
+
+class CountingCursor(psycopg_cursor):  # type: ignore[misc]
+    """psycopg2 cursor counting the statements it sends (statements_executed)."""
+
+    def execute(self, query: Any, vars: Any = None) -> None:
+        _inc("statements_executed")
+        super().execute(query, vars)
+
+    def executemany(self, query: Any, vars_list: Any) -> None:
+        _inc("statements_executed")
+        super().executemany(query, vars_list)
+
+    def copy_expert(self, sql: Any, file: Any, size: int = 8192) -> None:
+        _inc("statements_executed")
+        super().copy_expert(sql, file, size)
+
+
+class CachingConnection(connection):  # type: ignore[misc]
+    """psycopg2 connection that remembers its server-side prepared statements."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = CountingCursor
+        # Statement name -> None, least recently used first
+        self.prepared_statements: OrderedDict[str, None] = OrderedDict()
+        self.statement_cache_size = (
+            0 if get_db_pgbouncer_transaction_mode() else get_db_prepared_statement_cache_size()
+        )
+        _inc("connections_created")
+
+
+class BlockingConnectionPool(ThreadedConnectionPool):  # type: ignore[misc]
+    """ThreadedConnectionPool that waits for a free connection instead of raising.
+
+    Attributes:
+        timeout: Seconds getconn() waits before raising PoolError.
+        reactor_timeout: Shorter wait for callers on the Twisted reactor thread.
+    """
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        *args: Any,
+        timeout: float = 30.0,
+        reactor_timeout: float = REACTOR_POOL_TIMEOUT_SECONDS,
+        **kwargs: Any,
+    ):
+        """Initialize the pool.
+
+        Args:
+            minconn: Connections opened up front
+            maxconn: Maximum connections checked out at once
+            *args: Passed to psycopg2.connect
+            timeout: Seconds getconn() waits for a free connection
+            reactor_timeout: Seconds getconn() waits on the reactor thread
+            **kwargs: Passed to psycopg2.connect
+        """
+        self.timeout = timeout
+        self.reactor_timeout = min(timeout, reactor_timeout)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._in_use = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key: Any = None) -> Any:
+        """Check out a connection, waiting up to timeout seconds for one."""
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            _inc("waits")
+            on_reactor = threadable.isInIOThread()  # type: ignore[no-untyped-call]
+            timeout = self.reactor_timeout if on_reactor else self.timeout
+            if not self._slots.acquire(timeout=timeout):
+                raise PoolError(f"no database connection available after {timeout}s")
+        waited = time.monotonic() - started
+        try:
+            conn = super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+        with _stats_lock:
+            self._in_use += 1
+            _stats["checkouts"] += 1
+            _stats["wait_seconds_total"] += waited
+            _stats["wait_seconds_max"] = max(_stats["wait_seconds_max"], waited)
+            _stats["peak_in_use"] = max(_stats["peak_in_use"], self._in_use)
+        return conn
+
+    def putconn(self, conn: Any = None, key: Any = None, close: bool = False) -> None:
+        """Return a connection to the pool and wake one waiting caller."""
+        super().putconn(conn, key, close)
+        with _stats_lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    @property
+    def in_use(self) -> int:
+        """Connections currently checked out."""
+        return self._in_use
+
+
+def default_pool_size() -> int:
+    """Return the maximum pool size for this process.
+
+    DB_POOL_MAX_CONNECTIONS when set. Otherwise one connection per 8
+    concurrent requests, one for the reactor thread and
+    BACKGROUND_DB_CONNECTIONS for background threads, capped at this
+    worker's share of DB_SERVER_CONNECTION_BUDGET but never below
+    MIN_DERIVED_POOL_SIZE.
+    """
+    configured = get_db_pool_max_connections()
+    if configured > 0:
+        return configured
+    share = get_db_server_connection_budget() // get_db_worker_processes()
+    wanted = get_scrapy_concurrent_requests() // 8 + 1 + BACKGROUND_DB_CONNECTIONS
+    return max(MIN_DERIVED_POOL_SIZE, min(wanted, share))
+
 
 def init_connection_pool(
-    min_connections: int = 1, max_connections: int = 10
+    min_connections: int | None = None, max_connections: int | None = None
 ) -> ThreadedConnectionPool:
     """Initialize the database connection pool.
 
     Args:
-        min_connections: Minimum number of connections to maintain.
-        max_connections: Maximum number of connections allowed.
+        min_connections: Minimum number of connections to maintain
+            (default: DB_POOL_MIN_CONNECTIONS).
+        max_connections: Maximum number of connections allowed
+            (default: default_pool_size()).
 
     Returns:
         The initialized connection pool.
@@ -38,11 +235,16 @@ def init_connection_pool(
     global _connection_pool
 
     if _connection_pool is None:
-        _connection_pool = ThreadedConnectionPool(
-            minconn=min_connections,
-            maxconn=max_connections,
+        maxconn = max_connections or default_pool_size()
+        minconn = min(min_connections or get_db_pool_min_connections(), maxconn)
+        _connection_pool = BlockingConnectionPool(
+            minconn,
+            maxconn,
             dsn=DATABASE_URL,
+            timeout=get_db_pool_timeout_seconds(),
+            connection_factory=CachingConnection,
         )
+        logger.debug(f"Database pool: {minconn}-{maxconn} connections")
 
     return _connection_pool
 
@@ -62,9 +264,11 @@ def get_connection() -> Generator[connection, None, None]:
     """
     pool = init_connection_pool()
     conn = pool.getconn()
+    started = time.perf_counter()
     try:
         yield conn
     finally:
+        DB_CALL_SECONDS.observe(time.perf_counter() - started)
         pool.putconn(conn)
 
 
@@ -92,6 +296,143 @@ def get_cursor() -> Generator[psycopg_cursor, None, None]:
             cursor.close()
 
 
+def _server_side_sql(sql: str, params: Any) -> tuple[str, list[Any]] | None:
+    """Rewrite psycopg2 placeholders to $n parameters.
+
+    Returns:
+        (SQL with $1..$n, values in parameter order), or None when the
+        placeholders do not match the params (left to cursor.execute).
+    """
+    if params is None:
+        # psycopg2 sends SQL without parameters verbatim
+        return sql, []
+    values: list[Any] = []
+    names: dict[str, int] = {}
+    mismatch = False
+
+    def replace(match: re.Match[str]) -> str:
+        nonlocal mismatch
+        if match.group(0) == "%%":
+            return "%"
+        name = match.group(1)
+        if name is None:
+            if isinstance(params, dict) or len(values) >= len(params):
+                mismatch = True
+                return match.group(0)
+            values.append(params[len(values)])
+            return f"${len(values)}"
+        if not isinstance(params, dict) or name not in params:
+            mismatch = True
+            return match.group(0)
+        if name not in names:
+            values.append(params[name])
+            names[name] = len(values)
+        return f"${names[name]}"
+
+    text = _PLACEHOLDER.sub(replace, sql)
+    if mismatch or (not isinstance(params, dict) and len(values) != len(params)):
+        return None
+    return text, values
+
+
+def _prepare(cursor: Any, prepared: "OrderedDict[str, None]", name: str, text: str) -> bool:
+    """PREPARE a statement on the cursor's connection, evicting the oldest if full.
+
+    Runs inside a savepoint so a statement Postgres cannot prepare does not
+    abort the caller's transaction.
+
+    Returns:
+        True if the statement is prepared on the connection.
+    """
+    savepoint = not cursor.connection.autocommit
+    if savepoint:
+        cursor.execute("SAVEPOINT statement_cache")
+    try:
+        try:
+            cursor.execute(f"PREPARE {name} AS {text}")
+            _inc("statements_prepared")
+        except psycopg2.errors.DuplicatePreparedStatement:
+            # Already on the server (e.g. the pool lost track); still usable
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT statement_cache")
+        prepared[name] = None
+        while len(prepared) > cursor.connection.statement_cache_size:
+            evicted, _ = prepared.popitem(last=False)
+            cursor.execute(f"DEALLOCATE {evicted}")
+            _inc("statements_evicted")
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT statement_cache")
+        return True
+    except psycopg2.Error as e:
+        if savepoint:
+            cursor.execute("ROLLBACK TO SAVEPOINT statement_cache")
+        prepared.pop(name, None)
+        logger.debug(f"Not preparing statement {name}: {e}")
+        return False
+
+
+def execute_prepared(cursor: Any, sql: str, params: Any = None) -> None:
+    """Execute a query as a server-side prepared statement when possible.
+
+    Drop-in replacement for cursor.execute(sql, params) on hot queries. The
+    statement is named after the SQL text, so dynamically built SQL gets one
+    prepared statement per distinct shape. Falls back to cursor.execute()
+    when prepared statements are disabled or Postgres cannot prepare the SQL.
+
+    Args:
+        cursor: Cursor from get_cursor()
+        sql: SQL with psycopg2 placeholders (%s or %(name)s)
+        params: Sequence or mapping of parameters
+    """
+    conn = getattr(cursor, "connection", None)
+    prepared = getattr(conn, "prepared_statements", None)
+    if (
+        not isinstance(prepared, OrderedDict)
+        or getattr(conn, "statement_cache_size", 0) <= 0
+        or sql in _unpreparable
+    ):
+        cursor.execute(sql, params)
+        return
+
+    converted = _server_side_sql(sql, params)
+    name = "stmt_" + hashlib.sha1(sql.encode()).hexdigest()[:20]
+    if name in prepared:
+        prepared.move_to_end(name)
+        _inc("statement_cache_hits")
+    elif converted is None or not _prepare(cursor, prepared, name, converted[0]):
+        _unpreparable.add(sql)
+        _inc("statement_fallbacks")
+        cursor.execute(sql, params)
+        return
+
+    assert converted is not None
+    values = converted[1]
+    if values:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(values))})", values)
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+
+def get_db_pool_stats() -> dict[str, float]:
+    """Return pool and prepared statement counters for this process.
+
+    Returns:
+        Dict with max_connections, in_use, peak_in_use, connections_created,
+        checkouts, waits (checkouts that found the pool exhausted),
+        wait_seconds_total, wait_seconds_max, statements_prepared,
+        statement_cache_hits, statements_evicted, statement_fallbacks and
+        statements_executed (statements sent, PREPARE/EXECUTE included).
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    pool = _connection_pool
+    stats["max_connections"] = pool.maxconn if pool is not None else 0
+    stats["in_use"] = pool.in_use if isinstance(pool, BlockingConnectionPool) else 0
+    stats["wait_seconds_total"] = round(stats["wait_seconds_total"], 4)
+    stats["wait_seconds_max"] = round(stats["wait_seconds_max"], 4)
+    return stats
+
+
 def test_connection() -> bool:
     """Test database connectivity.
 
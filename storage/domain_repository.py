@@ -8,8 +8,10 @@ import logging
 from typing import Any
 from uuid import UUID
 
+from psycopg2.extras import execute_values
+
 from processor.domain_canonicalization import canonicalize_domain
-from storage.db import get_cursor
+from storage.db import execute_prepared, get_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +52,50 @@ def upsert_domain(domain: str, source: str, seed_rank: int | None = None) -> boo
         return False
 
 
+def upsert_domains(domains: list[str], source: str) -> int:
+    """Insert a batch of domains, ignoring ones that already exist.
+
+    Batch variant of :func:`upsert_domain` used while paging through large
+    seed lists: one multi-row INSERT per batch instead of one round trip
+    per seed.
+
+    Args:
+        domains: Canonical domain names (duplicates are collapsed)
+        source: Source of the domains (e.g., "file", "redis")
+
+    Returns:
+        Number of domains newly inserted (0 on error)
+    """
+    unique_domains = list(dict.fromkeys(d for d in domains if d))
+    if not unique_domains:
+        return 0
+
+    try:
+        with get_cursor() as cur:
+            rows = execute_values(
+                cur,
+                """
+                INSERT INTO domains (domain, source, seed_rank, status)
+                VALUES %s
+                ON CONFLICT (domain) DO NOTHING
+                RETURNING id
+                """,
+                [(domain, source) for domain in unique_domains],
+                template="(%s, %s, NULL, 'pending')",
+                page_size=len(unique_domains),
+                fetch=True,
+            )
+            inserted = len(rows)
+            logger.debug(
+                f"Upserted {len(unique_domains)} domains ({inserted} new, source: {source})"
+            )
+            return inserted
+    except Exception as e:
+        logger.error(f"Failed to upsert {len(unique_domains)} domains: {e}")
+        # Don't re-raise; this is best-effort tracking
+        return 0
+
+
 def update_domain_stats(
     domain: str,
     pages_crawled_delta: int = 0,
@@ -375,6 +421,39 @@ def get_domain_stats_summary() -> dict[str, Any]:
         return {"total_domains": 0, "total_images": 0, "by_status": {}, "error": str(e)}
 
 
+def get_frontier_checkpoint_ids(domains: list[str]) -> dict[str, str]:
+    """Fetch frontier checkpoint IDs for a batch of domains.
+
+    Only domains that currently reference a checkpoint are returned, so a
+    missing key means "start fresh".
+
+    Args:
+        domains: Canonical domain names
+
+    Returns:
+        Dict mapping domain to checkpoint ID (empty on error)
+    """
+    unique_domains = list(dict.fromkeys(d for d in domains if d))
+    if not unique_domains:
+        return {}
+
+    try:
+        with get_cursor() as cur:
+            cur.execute(
+                """
+                SELECT domain, frontier_checkpoint_id
+                FROM domains
+                WHERE domain = ANY(%s)
+                  AND frontier_checkpoint_id IS NOT NULL
+                """,
+                (unique_domains,),
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+    except Exception as e:
+        logger.error(f"Failed to fetch frontier checkpoints for {len(unique_domains)} domains: {e}")
+        return {}
+
+
 def update_frontier_checkpoint(domain: str, checkpoint_id: str, frontier_size: int) -> bool:
     """Update domain's frontier checkpoint reference.
 
@@ -467,7 +546,8 @@ def claim_domains(worker_id: str, batch_size: int = 10) -> list[dict[str, Any]]:
     """
     try:
         with get_cursor() as cur:
-            cur.execute(
+            execute_prepared(
+                cur,
                 """
                 WITH candidates AS (
                     SELECT id, version, domain, frontier_checkpoint_id,
@@ -492,7 +572,8 @@ def claim_domains(worker_id: str, batch_size: int = 10) -> list[dict[str, Any]]:
                   AND domains.version = candidates.version
                 RETURNING domains.id, domains.domain, domains.version, domains.frontier_checkpoint_id,
                           domains.status, domains.priority_score, domains.pages_crawled, domains.images_stored,
-                          domains.claimed_by, domains.claim_expires_at;
+                          domains.claimed_by, domains.claim_expires_at,
+                          domains.crawl_concurrency, domains.crawl_delay_ms;
                 """,
                 {"worker_id": worker_id, "batch_size": batch_size},
             )
@@ -512,6 +593,8 @@ def claim_domains(worker_id: str, batch_size: int = 10) -> list[dict[str, Any]]:
                         "images_stored": row[7],
                         "claimed_by": row[8],
                         "claim_expires_at": row[9],
+                        "crawl_concurrency": row[10],
+                        "crawl_delay_ms": row[11],
                     }
                 )
 
@@ -549,7 +632,8 @@ def renew_claim(domain_id: UUID, worker_id: str) -> bool:
     """
     try:
         with get_cursor() as cur:
-            cur.execute(
+            execute_prepared(
+                cur,
                 """
                 UPDATE domains
                 SET claim_expires_at = CURRENT_TIMESTAMP + INTERVAL '30 minutes',
@@ -600,7 +684,8 @@ def release_claim(
             # If status transition requested, validate and execute it first
             if new_status:
                 # Get current status
-                cur.execute(
+                execute_prepared(
+                    cur,
                     """
                     SELECT status FROM domains
                     WHERE id = %(domain_id)s
@@ -625,7 +710,8 @@ def release_claim(
                 current_status = row[0]
 
                 # Use transition function to validate and perform status change
-                cur.execute(
+                execute_prepared(
+                    cur,
                     """
                     SELECT transition_domain_status(
                         %(domain_id)s::UUID,
@@ -680,7 +766,8 @@ def release_claim(
                     set_clauses.append(f"{key} = %({key})s")
                 params[key] = value
 
-            cur.execute(
+            execute_prepared(
+                cur,
                 f"""
                 UPDATE domains
                 SET {", ".join(set_clauses)}
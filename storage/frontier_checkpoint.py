@@ -1,11 +1,18 @@
 """Frontier checkpoint storage for resume support.
 
 This module provides Redis-based storage for frontier URLs when a domain's
-crawl budget is exhausted. Checkpoints are saved as Redis sorted sets
-with depth as the score for BFS ordering.
+crawl budget is exhausted. Checkpoints are saved as a Redis list holding a
+small header followed by zlib-compressed batches of depth-ordered URLs, so
+large frontiers cost a few commands to save and can be streamed back lazily.
+
+Checkpoints written by older workers as sorted sets (depth as score) are
+still readable.
 """
 
 import logging
+import os
+import zlib
+from collections.abc import Iterator
 from typing import Any
 
 logger = logging.getLogger(__name__)
@@ -13,6 +20,61 @@ logger = logging.getLogger(__name__)
 # Default TTL for checkpoints (30 days in seconds)
 DEFAULT_CHECKPOINT_TTL = 86400 * 30
 
+# Number of URLs packed into a single compressed blob
+DEFAULT_CHECKPOINT_BATCH_SIZE = 1000
+
+# Number of blobs (or legacy sorted-set members) fetched per round trip on load
+LOAD_BATCHES_PER_FETCH = 4
+LEGACY_LOAD_PAGE_SIZE = 1000
+
+# First list element of a compressed checkpoint: "<marker> <url_count>"
+CHECKPOINT_FORMAT_MARKER = "ckpt1"
+
+ZLIB_LEVEL = 6
+
+
+def _decode(value: Any) -> str:
+    """Decode a Redis reply to str."""
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _encode_batch(entries: list[tuple[int, str]]) -> bytes:
+    """Compress a batch of (depth, url) pairs.
+
+    The batch's common URL prefix (typically ``https://example.com/``) is
+    written once on the first line; each following line is
+    ``<depth>\\t<url suffix>``.
+    """
+    prefix = os.path.commonprefix([url for _, url in entries])
+    lines = [prefix]
+    lines.extend(f"{depth}\t{url[len(prefix):]}" for depth, url in entries)
+    return zlib.compress("\n".join(lines).encode("utf-8"), ZLIB_LEVEL)
+
+
+def _decode_batch(blob: bytes) -> Iterator[dict[str, Any]]:
+    """Decompress a batch produced by :func:`_encode_batch`."""
+    text = zlib.decompress(blob).decode("utf-8")
+    prefix, _, body = text.partition("\n")
+    for line in body.split("\n"):
+        depth, _, suffix = line.partition("\t")
+        yield {"url": prefix + suffix, "depth": int(depth)}
+
+
+def _iter_legacy_checkpoint(key: str, redis_client: Any) -> Iterator[dict[str, Any]]:
+    """Page through a legacy sorted-set checkpoint in score order."""
+    start = 0
+    while True:
+        members = redis_client.zrange(
+            key, start, start + LEGACY_LOAD_PAGE_SIZE - 1, withscores=True
+        )
+        if not members:
+            break
+        for url, depth in members:
+            yield {"url": _decode(url), "depth": int(depth)}
+        if len(members) < LEGACY_LOAD_PAGE_SIZE:
+            break
+        start += len(members)
+
 
 def save_checkpoint(
     domain: str,
@@ -20,11 +82,15 @@ def save_checkpoint(
     urls: list[dict[str, Any]],
     redis_client: Any,
     ttl: int = DEFAULT_CHECKPOINT_TTL,
+    batch_size: int = DEFAULT_CHECKPOINT_BATCH_SIZE,
 ) -> str:
-    """Save frontier URLs to Redis sorted set.
+    """Save frontier URLs to Redis as compressed batches.
 
-    Stores URLs as a sorted set with depth as the score for BFS ordering.
-    The checkpoint is automatically expired after the specified TTL to
+    URLs are sorted by depth (stable, so discovery order is kept within a
+    depth level) and packed into zlib-compressed blobs of ``batch_size``
+    entries. The whole checkpoint is written with a single pipelined
+    DEL/RPUSH/EXPIRE, regardless of how many URLs it contains. The
+    checkpoint is automatically expired after the specified TTL to
     prevent Redis bloat.
 
     Args:
@@ -33,6 +99,7 @@ def save_checkpoint(
         urls: List of URL entries, each with 'url' and 'depth' keys
         redis_client: Redis client instance
         ttl: Time-to-live in seconds (default: 30 days)
+        batch_size: Maximum number of URLs per compressed blob
 
     Returns:
         Checkpoint ID in format "{domain}:{run_id}"
@@ -49,20 +116,26 @@ def save_checkpoint(
         return checkpoint_id
 
     try:
-        pipeline = redis_client.pipeline()
+        entries = [(int(entry.get("depth", 0)), entry["url"]) for entry in urls if entry.get("url")]
+        entries.sort(key=lambda item: item[0])
 
-        # Store URLs as sorted set: url as member, depth as score
-        for entry in urls:
-            url = entry.get("url")
-            depth = entry.get("depth", 0)
-            if url:
-                pipeline.zadd(key, {url: depth})
+        blobs = [
+            _encode_batch(entries[i : i + batch_size])
+            for i in range(0, len(entries), max(1, batch_size))
+        ]
+        header = f"{CHECKPOINT_FORMAT_MARKER} {len(entries)}".encode("ascii")
 
+        pipeline = redis_client.pipeline()
+        pipeline.delete(key)
+        pipeline.rpush(key, header, *blobs)
         # Set expiration to prevent Redis bloat
         pipeline.expire(key, ttl)
         pipeline.execute()
 
-        logger.debug(f"Saved checkpoint {checkpoint_id} with {len(urls)} URLs")
+        logger.debug(
+            f"Saved checkpoint {checkpoint_id} with {len(entries)} URLs "
+            f"in {len(blobs)} batches ({sum(len(b) for b in blobs)} bytes)"
+        )
         return checkpoint_id
 
     except Exception as e:
@@ -70,43 +143,75 @@ def save_checkpoint(
         raise
 
 
-def load_checkpoint(checkpoint_id: str, redis_client: Any) -> list[dict[str, Any]]:
-    """Load frontier URLs from Redis checkpoint.
+def iter_checkpoint(checkpoint_id: str, redis_client: Any) -> Iterator[dict[str, Any]]:
+    """Lazily yield frontier URLs from a Redis checkpoint in depth order.
 
-    Retrieves URLs from a Redis sorted set, ordered by depth (BFS order).
+    Compressed checkpoints are fetched and decoded one batch at a time, so
+    memory use is bounded by the batch size rather than the frontier size.
+    Legacy sorted-set checkpoints are paged through with ZRANGE.
 
     Args:
         checkpoint_id: Checkpoint ID in format "{domain}:{run_id}"
         redis_client: Redis client instance
 
-    Returns:
-        List of URL entries with 'url' and 'depth' keys, ordered by depth
+    Yields:
+        URL entries with 'url' and 'depth' keys, ordered by depth
 
     Example:
-        >>> urls = load_checkpoint('example.com:run-123', redis)
-        >>> print(urls[0])
+        >>> for entry in iter_checkpoint('example.com:run-123', redis):
+        ...     print(entry)
         {'url': 'https://example.com/page1', 'depth': 1}
     """
     key = f"frontier:{checkpoint_id}"
 
     try:
-        # Get all members with scores (depth), ordered by score
-        members = redis_client.zrange(key, 0, -1, withscores=True)
+        key_type = _decode(redis_client.type(key))
 
-        result = []
-        for url, depth in members:
-            # Decode bytes to string if necessary
-            url_str = url.decode("utf-8") if isinstance(url, bytes) else url
-            result.append({"url": url_str, "depth": int(depth)})
+        if key_type == "zset":
+            yield from _iter_legacy_checkpoint(key, redis_client)
+            return
+
+        if key_type != "list":
+            return
 
-        logger.debug(f"Loaded checkpoint {checkpoint_id} with {len(result)} URLs")
-        return result
+        # Index 0 holds the header; batches start at index 1
+        index = 1
+        while True:
+            batch = redis_client.lrange(key, index, index + LOAD_BATCHES_PER_FETCH - 1)
+            if not batch:
+                break
+            for blob in batch:
+                yield from _decode_batch(blob)
+            index += len(batch)
 
     except Exception as e:
         logger.error(f"Failed to load checkpoint {checkpoint_id}: {e}")
         raise
 
 
+def load_checkpoint(checkpoint_id: str, redis_client: Any) -> list[dict[str, Any]]:
+    """Load frontier URLs from Redis checkpoint.
+
+    Materializes :func:`iter_checkpoint` into a list. Prefer the iterator
+    for large frontiers.
+
+    Args:
+        checkpoint_id: Checkpoint ID in format "{domain}:{run_id}"
+        redis_client: Redis client instance
+
+    Returns:
+        List of URL entries with 'url' and 'depth' keys, ordered by depth
+
+    Example:
+        >>> urls = load_checkpoint('example.com:run-123', redis)
+        >>> print(urls[0])
+        {'url': 'https://example.com/page1', 'depth': 1}
+    """
+    result = list(iter_checkpoint(checkpoint_id, redis_client))
+    logger.debug(f"Loaded checkpoint {checkpoint_id} with {len(result)} URLs")
+    return result
+
+
 def delete_checkpoint(checkpoint_id: str, redis_client: Any) -> bool:
     """Delete checkpoint from Redis.
 
@@ -172,7 +277,14 @@ def get_checkpoint_size(checkpoint_id: str, redis_client: Any) -> int:
     key = f"frontier:{checkpoint_id}"
 
     try:
-        return redis_client.zcard(key) or 0
+        key_type = _decode(redis_client.type(key))
+        if key_type == "zset":
+            return redis_client.zcard(key) or 0
+        if key_type != "list":
+            return 0
+        header = _decode(redis_client.lindex(key, 0) or b"")
+        marker, _, count = header.partition(" ")
+        return int(count) if marker == CHECKPOINT_FORMAT_MARKER else 0
     except Exception as e:
         logger.error(f"Failed to get checkpoint size for {checkpoint_id}: {e}")
         return 0
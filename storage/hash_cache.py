@@ -0,0 +1,232 @@
+"""Process-wide cache of known image content hashes.
+
+Maps SHA-256 digests of stored images to their images.id so the pipeline
+can recognise content it has already stored (CDNs serve the same bytes
+from many URLs) without a ``SELECT id FROM images WHERE sha256_hash = ...``
+round trip, and without computing perceptual hashes for it.
+
+Entries are kept in a bounded LRU keyed by the raw 32-byte digest with
+the 16-byte UUID as value, so 100k entries cost roughly 20 MB. Optionally
+entries are also written to Redis with a TTL so workers share what they
+have stored; Redis errors are logged and treated as misses.
+
+Only positive results are cached: another worker may insert the same
+content at any time, so "not found" is never remembered.
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from env_config import (
+    get_enable_image_hash_cache_redis,
+    get_image_hash_cache_redis_ttl_seconds,
+    get_image_hash_cache_size,
+    get_queue_namespace,
+)
+from storage.image_repository import get_recent_image_hashes
+from storage.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_cache: "ImageHashCache | None" = None
+_cache_lock = threading.Lock()
+
+
+def _digest(sha256_hash: str) -> bytes | None:
+    """Return the 32-byte digest of a hex SHA-256, or None if malformed."""
+    try:
+        digest = bytes.fromhex(sha256_hash)
+    except (TypeError, ValueError):
+        return None
+    return digest if len(digest) == 32 else None
+
+
+class ImageHashCache:
+    """Bounded LRU of sha256 -> image_id with an optional Redis tier.
+
+    Attributes:
+        max_entries: Maximum entries held in process.
+        redis_ttl: TTL in seconds of entries written to Redis.
+        stats: Counters (hits, redis_hits, misses, stores, evictions,
+            redis_errors).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        redis_client: Any = None,
+        redis_prefix: str = "image_sha256:",
+        redis_ttl: int = 7 * 24 * 3600,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries held in process
+            redis_client: Optional Redis client shared by all workers
+            redis_prefix: Key prefix for Redis entries
+            redis_ttl: TTL in seconds of Redis entries
+        """
+        self.max_entries = max(1, max_entries)
+        self.redis_ttl = redis_ttl
+        self._redis = redis_client
+        self._redis_prefix = redis_prefix.encode()
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats: dict[str, int] = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, sha256_hash: str) -> str | None:
+        """Return the image ID stored for a content hash, or None if unknown.
+
+        Args:
+            sha256_hash: Hex SHA-256 of the content
+
+        Returns:
+            Image UUID as str, or None.
+        """
+        digest = _digest(sha256_hash)
+        if digest is None:
+            return None
+
+        with self._lock:
+            image_id = self._entries.get(digest)
+            if image_id is not None:
+                self._entries.move_to_end(digest)
+                self.stats["hits"] += 1
+                return str(uuid.UUID(bytes=image_id))
+
+        if self._redis is not None:
+            try:
+                value = self._redis.get(self._redis_prefix + digest)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.debug(f"Image hash cache Redis lookup failed: {e}")
+                value = None
+            if value is not None and len(value) == 16:
+                self._store_local(digest, bytes(value))
+                self.stats["redis_hits"] += 1
+                return str(uuid.UUID(bytes=bytes(value)))
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, sha256_hash: str, image_id: Any) -> None:
+        """Remember that content is stored as an image.
+
+        Args:
+            sha256_hash: Hex SHA-256 of the content
+            image_id: images.id (UUID or str)
+        """
+        digest = _digest(sha256_hash)
+        if digest is None:
+            return
+        try:
+            value = uuid.UUID(str(image_id)).bytes
+        except ValueError:
+            return
+
+        self._store_local(digest, value)
+        self.stats["stores"] += 1
+        if self._redis is not None:
+            try:
+                self._redis.set(self._redis_prefix + digest, value, ex=self.redis_ttl)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.debug(f"Image hash cache Redis write failed: {e}")
+
+    def discard(self, sha256_hash: str) -> None:
+        """Forget a content hash (e.g. its image row no longer exists)."""
+        digest = _digest(sha256_hash)
+        if digest is None:
+            return
+        with self._lock:
+            self._entries.pop(digest, None)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._redis_prefix + digest)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                logger.debug(f"Image hash cache Redis delete failed: {e}")
+
+    def warm(self, limit: int, domains: list[str] | None = None) -> int:
+        """Load recently discovered images into the in-process tier.
+
+        Args:
+            limit: Maximum rows to load (capped at max_entries)
+            domains: Prefer images from these source domains
+
+        Returns:
+            Number of entries loaded.
+        """
+        try:
+            rows = get_recent_image_hashes(min(limit, self.max_entries), domains)
+        except Exception as e:
+            logger.warning(f"Failed to warm image hash cache: {e}")
+            return 0
+
+        loaded = 0
+        # Oldest first so the newest rows end up most recently used
+        for sha256_hash, image_id in reversed(rows):
+            digest = _digest(sha256_hash)
+            if digest is None:
+                continue
+            self._store_local(digest, uuid.UUID(image_id).bytes)
+            loaded += 1
+        return loaded
+
+    def _store_local(self, digest: bytes, image_id: bytes) -> None:
+        with self._lock:
+            self._entries[digest] = image_id
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+
+def get_image_hash_cache() -> ImageHashCache | None:
+    """Return the process-wide cache, creating it from the environment.
+
+    Returns:
+        The shared ImageHashCache, or None when IMAGE_HASH_CACHE_SIZE is 0.
+    """
+    global _cache
+    max_entries = get_image_hash_cache_size()
+    if max_entries <= 0:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            redis_client = None
+            if get_enable_image_hash_cache_redis():
+                try:
+                    redis_client = get_redis_client()
+                except Exception as e:
+                    logger.warning(f"Image hash cache running without Redis: {e}")
+
+            namespace = get_queue_namespace()
+            _cache = ImageHashCache(
+                max_entries,
+                redis_client=redis_client,
+                redis_prefix=f"{namespace}:image_sha256:" if namespace else "image_sha256:",
+                redis_ttl=get_image_hash_cache_redis_ttl_seconds(),
+            )
+        return _cache
+
+
+def reset_image_hash_cache() -> None:
+    """Drop the process-wide cache (tests and CLI runs against another DB)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
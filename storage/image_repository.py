@@ -0,0 +1,439 @@
+"""Image repository for database operations.
+
+This module provides helpers over the images table used by the
+similarity tooling (near-duplicate index builds, lookups and cluster
+write back), the BIGINT perceptual hash backfill, warming the
+sha256 -> image_id cache, conditional (304) refreshes and the refresh
+spider's staleness scan.
+"""
+
+import io
+import itertools
+import logging
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from storage.db import get_connection, get_cursor
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip when streaming the images table
+DEFAULT_SCAN_BATCH_SIZE = 10000
+
+# Rows updated per committed transaction when backfilling BIGINT hashes
+DEFAULT_BACKFILL_BATCH_SIZE = 5000
+
+# Tables with BIGINT hash columns -> (hex pHash column, hex dHash column)
+PERCEPTUAL_HASH_TABLES = {
+    "images": ("phash_hash", "dhash_hash"),
+    "image_assets": ("phash", "dhash"),
+}
+
+# Cluster assignments sent per COPY when writing near-duplicate clusters
+DEFAULT_COPY_CHUNK_SIZE = 100000
+
+_MIN_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def iter_image_hashes(
+    batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+) -> Iterator[tuple[str, Any, Any]]:
+    """Stream (image_id, phash, dhash) for every image with a perceptual hash.
+
+    Uses a server-side cursor so the table is never materialized in memory.
+    Hashes come from the BIGINT columns, falling back to converting the hex
+    columns for rows that have not been backfilled yet.
+
+    Args:
+        batch_size: Rows fetched per round trip
+
+    Yields:
+        Tuples of (image_id as str, phash, dhash) with hashes as signed
+        64-bit integers (or None).
+    """
+    with get_connection() as conn:
+        try:
+            with conn.cursor(name="image_hash_scan") as cur:
+                cur.itersize = batch_size
+                cur.execute("""
+                    SELECT id,
+                           COALESCE(phash_int, perceptual_hash_to_bigint(phash_hash)),
+                           COALESCE(dhash_int, perceptual_hash_to_bigint(dhash_hash))
+                    FROM images
+                    WHERE phash_hash IS NOT NULL OR dhash_hash IS NOT NULL
+                    """)
+                for image_id, phash, dhash in cur:
+                    yield str(image_id), phash, dhash
+        finally:
+            # Read-only scan: end the transaction the named cursor opened
+            conn.rollback()
+
+
+def find_image(reference: str) -> dict[str, Any] | None:
+    """Look up an image by ID or SHA-256 hash.
+
+    Args:
+        reference: Image UUID or hex SHA-256 of the content
+
+    Returns:
+        Dict with id, url, sha256_hash, phash and dhash, or None if not found.
+    """
+    # Resolve the reference kind here so each query can use its index;
+    # casting id to text would force a sequential scan.
+    try:
+        image_id: uuid.UUID | None = uuid.UUID(reference)
+    except ValueError:
+        image_id = None
+
+    try:
+        with get_cursor() as cur:
+            if image_id is not None:
+                cur.execute(
+                    """
+                    SELECT id, url, sha256_hash, phash_hash, dhash_hash
+                    FROM images
+                    WHERE id = %s
+                    """,
+                    (str(image_id),),
+                )
+            else:
+                cur.execute(
+                    """
+                    SELECT id, url, sha256_hash, phash_hash, dhash_hash
+                    FROM images
+                    WHERE sha256_hash = %s
+                    LIMIT 1
+                    """,
+                    (reference.lower(),),
+                )
+            row = cur.fetchone()
+            if row:
+                return {
+                    "id": str(row[0]),
+                    "url": row[1],
+                    "sha256_hash": row[2],
+                    "phash": row[3],
+                    "dhash": row[4],
+                }
+            return None
+    except Exception as e:
+        logger.error(f"Failed to fetch image {reference!r}: {e}")
+        return None
+
+
+def get_image_urls(image_ids: list[str]) -> dict[str, str]:
+    """Return image_id -> url for the given image IDs (missing IDs are omitted)."""
+    if not image_ids:
+        return {}
+    try:
+        with get_cursor() as cur:
+            cur.execute(
+                "SELECT id::text, url FROM images WHERE id = ANY(%s::uuid[])",
+                (image_ids,),
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+    except Exception as e:
+        logger.error(f"Failed to fetch image URLs: {e}")
+        return {}
+
+
+def count_missing_hash_ints() -> dict[str, int]:
+    """Count rows whose hex hashes have not been copied to the BIGINT columns.
+
+    Returns:
+        Dict of table name -> number of rows still to backfill.
+    """
+    counts: dict[str, int] = {}
+    with get_cursor() as cur:
+        for table, (phash_col, dhash_col) in PERCEPTUAL_HASH_TABLES.items():
+            cur.execute(f"""
+                SELECT COUNT(*) FROM {table}
+                WHERE ({phash_col} IS NOT NULL AND phash_int IS NULL)
+                   OR ({dhash_col} IS NOT NULL AND dhash_int IS NULL)
+                """)
+            counts[table] = cur.fetchone()[0]
+    return counts
+
+
+def backfill_hash_ints(batch_size: int = DEFAULT_BACKFILL_BATCH_SIZE) -> dict[str, int]:
+    """Copy hex pHash/dHash values into the BIGINT columns in batches.
+
+    Walks each table in primary key order and commits every batch, so the
+    backfill can run against a live database and be resumed after an
+    interruption. Rows whose hex value is not a 64-bit hash stay NULL.
+
+    Args:
+        batch_size: Rows updated per transaction
+
+    Returns:
+        Dict of table name -> rows updated.
+    """
+    updated: dict[str, int] = {}
+    for table, (phash_col, dhash_col) in PERCEPTUAL_HASH_TABLES.items():
+        updated[table] = 0
+        last_id = _MIN_UUID
+        while True:
+            with get_cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT id FROM {table}
+                    WHERE id > %s
+                      AND (({phash_col} IS NOT NULL AND phash_int IS NULL)
+                           OR ({dhash_col} IS NOT NULL AND dhash_int IS NULL))
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (last_id, batch_size),
+                )
+                ids = [row[0] for row in cur.fetchall()]
+                if not ids:
+                    break
+
+                cur.execute(
+                    f"""
+                    UPDATE {table}
+                    SET phash_int = COALESCE(phash_int, perceptual_hash_to_bigint({phash_col})),
+                        dhash_int = COALESCE(dhash_int, perceptual_hash_to_bigint({dhash_col}))
+                    WHERE id = ANY(%s::uuid[])
+                    """,
+                    ([str(image_id) for image_id in ids],),
+                )
+                updated[table] += cur.rowcount
+                last_id = str(ids[-1])
+
+            logger.info(f"Backfilled {updated[table]} {table} rows...")
+            if len(ids) < batch_size:
+                break
+    return updated
+
+
+def write_near_duplicate_clusters(
+    assignments: Iterable[tuple[str, str]],
+    chunk_size: int = DEFAULT_COPY_CHUNK_SIZE,
+) -> dict[str, int]:
+    """Replace images.near_duplicate_cluster_id with a new clustering.
+
+    Assignments are streamed into a temporary table with COPY, then applied
+    with one UPDATE ... FROM join. Images that are no longer in any cluster
+    are reset to NULL. Everything happens in a single transaction, so
+    readers see either the previous clustering or the new one.
+
+    Args:
+        assignments: (image_id, cluster_id) pairs for clustered images
+        chunk_size: Rows sent per COPY
+
+    Returns:
+        Dict with staged, assigned (rows changed) and cleared counts.
+    """
+    result = {"staged": 0, "assigned": 0, "cleared": 0}
+    rows = iter(assignments)
+    with get_cursor() as cur:
+        cur.execute("""
+            CREATE TEMP TABLE near_duplicate_assignments (
+                image_id UUID PRIMARY KEY,
+                cluster_id UUID NOT NULL
+            ) ON COMMIT DROP
+            """)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            lines = (f"{image_id}\t{cluster_id}\n" for image_id, cluster_id in chunk)
+            buffer = io.StringIO("".join(lines))
+            cur.copy_expert(
+                "COPY near_duplicate_assignments (image_id, cluster_id) FROM STDIN", buffer
+            )
+            result["staged"] += len(chunk)
+        cur.execute("ANALYZE near_duplicate_assignments")
+
+        cur.execute("""
+            UPDATE images i
+            SET near_duplicate_cluster_id = a.cluster_id
+            FROM near_duplicate_assignments a
+            WHERE i.id = a.image_id
+              AND i.near_duplicate_cluster_id IS DISTINCT FROM a.cluster_id
+            """)
+        result["assigned"] = cur.rowcount
+
+        cur.execute("""
+            UPDATE images i
+            SET near_duplicate_cluster_id = NULL
+            WHERE i.near_duplicate_cluster_id IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM near_duplicate_assignments a WHERE a.image_id = i.id
+              )
+            """)
+        result["cleared"] = cur.rowcount
+    return result
+
+
+def get_recent_image_hashes(limit: int, domains: list[str] | None = None) -> list[tuple[str, str]]:
+    """Return (sha256_hash, image_id) of recently discovered images.
+
+    Args:
+        limit: Maximum rows returned
+        domains: Only images with provenance on these source domains;
+            None or empty means any domain
+
+    Returns:
+        List of (sha256_hash, image_id as str), newest first.
+    """
+    if limit <= 0:
+        return []
+    with get_cursor() as cur:
+        if domains:
+            cur.execute(
+                """
+                SELECT i.sha256_hash, i.id::text
+                FROM provenance p
+                JOIN images i ON i.id = p.image_id
+                WHERE p.source_domain = ANY(%s)
+                ORDER BY p.discovered_at DESC
+                LIMIT %s
+                """,
+                (domains, limit),
+            )
+        else:
+            cur.execute(
+                """
+                SELECT sha256_hash, id::text
+                FROM images
+                ORDER BY discovered_at DESC
+                LIMIT %s
+                """,
+                (limit,),
+            )
+        return [(row[0], row[1]) for row in cur.fetchall()]
+
+
+def get_image_validators(urls: list[str]) -> dict[str, tuple[str | None, str | None, int | None]]:
+    """Return stored HTTP validators for image URLs.
+
+    Args:
+        urls: Image URLs (typically all images found on one page)
+
+    Returns:
+        Dict of url -> (etag, last_modified, file_size_bytes) for stored
+        URLs that have at least one validator.
+    """
+    if not urls:
+        return {}
+    with get_cursor() as cur:
+        cur.execute(
+            """
+            SELECT url, etag, last_modified, file_size_bytes
+            FROM images
+            WHERE url = ANY(%s)
+              AND (etag IS NOT NULL OR last_modified IS NOT NULL)
+            """,
+            (urls,),
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in cur.fetchall()}
+
+
+def touch_images(urls: list[str]) -> int:
+    """Bump last_seen_at of unchanged (HTTP 304) images in one statement.
+
+    Args:
+        urls: Image URLs confirmed unchanged
+
+    Returns:
+        Number of rows updated.
+    """
+    if not urls:
+        return 0
+    with get_cursor() as cur:
+        cur.execute(
+            "UPDATE images SET last_seen_at = CURRENT_TIMESTAMP WHERE url = ANY(%s)",
+            (sorted(set(urls)),),
+        )
+        return int(cur.rowcount)
+
+
+class StaleImage(NamedTuple):
+    """A stored image due for refresh, with its HTTP validators."""
+
+    id: str
+    url: str
+    etag: str | None
+    last_modified: str | None
+    file_size: int | None
+    last_seen_at: datetime
+
+
+def iter_stale_images(
+    seen_before: datetime,
+    batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+    shard: int = 0,
+    shards: int = 1,
+) -> Iterator[list[StaleImage]]:
+    """Page through retrievable images last seen before a cutoff, stalest first.
+
+    Keyset pagination over (last_seen_at, id) with one short transaction per
+    page, so rows refreshed meanwhile (whose last_seen_at moves past the
+    cutoff) are simply not revisited.
+
+    Args:
+        seen_before: Only images with last_seen_at earlier than this
+        batch_size: Rows per page
+        shard: This worker's shard (0-based)
+        shards: Number of workers splitting the scan by image ID
+
+    Yields:
+        Lists of StaleImage ordered by (last_seen_at, id).
+    """
+    # Mask the sign bit rather than abs(): abs(hashtext()) overflows on INT_MIN.
+    shard_filter = (
+        "AND mod(hashtext(id::text) & 2147483647, %(shards)s) = %(shard)s" if shards > 1 else ""
+    )
+    after: tuple[Any, str] | None = None
+    while True:
+        params: dict[str, Any] = {
+            "seen_before": seen_before,
+            "limit": batch_size,
+            "shard": shard,
+            "shards": shards,
+        }
+        keyset = ""
+        if after is not None:
+            keyset = "AND (last_seen_at, id) > (%(after_seen)s, %(after_id)s)"
+            params["after_seen"], params["after_id"] = after
+        with get_cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT id::text, url, etag, last_modified, file_size_bytes, last_seen_at
+                FROM images
+                WHERE download_success
+                  AND last_seen_at < %(seen_before)s
+                  {keyset}
+                  {shard_filter}
+                ORDER BY last_seen_at, id
+                LIMIT %(limit)s
+                """,
+                params,
+            )
+            rows = [StaleImage(*row) for row in cur.fetchall()]
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].last_seen_at, rows[-1].id)
+
+
+def mark_images_gone(image_ids: list[str]) -> int:
+    """Flag images whose URL now returns 404/410 so refreshes skip them.
+
+    Args:
+        image_ids: IDs of images that are gone
+
+    Returns:
+        Number of rows updated.
+    """
+    if not image_ids:
+        return 0
+    with get_cursor() as cur:
+        cur.execute(
+            "UPDATE images SET download_success = FALSE WHERE id = ANY(%s::uuid[])",
+            (image_ids,),
+        )
+        return int(cur.rowcount)
@@ -0,0 +1,60 @@
+"""add_integer_perceptual_hashes
+
+Revision ID: 7b2d4f6a8c1e
+Revises: 6f0a8c3d4e5b
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2d4f6a8c1e"
+down_revision: str | Sequence[str] | None = "6f0a8c3d4e5b"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add BIGINT pHash/dHash columns and Hamming distance helpers.
+
+    Existing rows are backfilled separately in committed batches with
+    ``python -m crawler.cli backfill-perceptual-hashes`` so the migration
+    does not rewrite the images table inside one transaction.
+    """
+    # 64-bit hashes stored as signed BIGINT (two's complement of the unsigned value)
+    op.add_column("images", sa.Column("phash_int", sa.BigInteger(), nullable=True))
+    op.add_column("images", sa.Column("dhash_int", sa.BigInteger(), nullable=True))
+    op.add_column("image_assets", sa.Column("phash_int", sa.BigInteger(), nullable=True))
+    op.add_column("image_assets", sa.Column("dhash_int", sa.BigInteger(), nullable=True))
+
+    # Hex string (as produced by ImageFingerprinter) -> BIGINT; NULL for anything else
+    op.execute("""
+        CREATE OR REPLACE FUNCTION perceptual_hash_to_bigint(p_hash TEXT)
+        RETURNS BIGINT AS $$
+            SELECT CASE
+                WHEN p_hash ~ '^[0-9a-fA-F]{16}$' THEN ('x' || p_hash)::bit(64)::bigint
+            END
+        $$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+    """)
+
+    # Number of differing bits between two 64-bit hashes (bit_count requires PostgreSQL 14+)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION hamming_distance(p_a BIGINT, p_b BIGINT)
+        RETURNS INTEGER AS $$
+            SELECT bit_count((p_a # p_b)::bit(64))::integer
+        $$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove BIGINT hash columns and helper functions."""
+    op.execute("DROP FUNCTION IF EXISTS hamming_distance(BIGINT, BIGINT)")
+    op.execute("DROP FUNCTION IF EXISTS perceptual_hash_to_bigint(TEXT)")
+    op.drop_column("image_assets", "dhash_int")
+    op.drop_column("image_assets", "phash_int")
+    op.drop_column("images", "dhash_int")
+    op.drop_column("images", "phash_int")
@@ -0,0 +1,43 @@
+"""add_near_duplicate_cluster_id
+
+Revision ID: 8c4e6a2b9d3f
+Revises: 7b2d4f6a8c1e
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8c4e6a2b9d3f"
+down_revision: str | Sequence[str] | None = "7b2d4f6a8c1e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add near-duplicate cluster assignment to images.
+
+    The cluster ID is the smallest image ID in the cluster; images without
+    a near-duplicate keep NULL. Populated by ``cluster-near-duplicates``.
+    """
+    op.add_column(
+        "images",
+        sa.Column("near_duplicate_cluster_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_index(
+        "idx_images_near_duplicate_cluster",
+        "images",
+        ["near_duplicate_cluster_id"],
+        postgresql_where=sa.text("near_duplicate_cluster_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove near-duplicate cluster assignment."""
+    op.drop_index("idx_images_near_duplicate_cluster", table_name="images")
+    op.drop_column("images", "near_duplicate_cluster_id")
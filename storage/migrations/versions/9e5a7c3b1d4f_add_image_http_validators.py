@@ -0,0 +1,35 @@
+"""add_image_http_validators
+
+Revision ID: 9e5a7c3b1d4f
+Revises: 8c4e6a2b9d3f
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e5a7c3b1d4f"
+down_revision: str | Sequence[str] | None = "8c4e6a2b9d3f"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - add HTTP cache validators to images.
+
+    ETag and Last-Modified are stored verbatim from the last 200 response
+    and replayed as If-None-Match / If-Modified-Since on refresh requests.
+    The response size is already kept in file_size_bytes.
+    """
+    op.add_column("images", sa.Column("etag", sa.Text(), nullable=True))
+    op.add_column("images", sa.Column("last_modified", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove HTTP cache validators."""
+    op.drop_column("images", "last_modified")
+    op.drop_column("images", "etag")
@@ -0,0 +1,38 @@
+"""add_images_refresh_index
+
+Revision ID: a3c5e7f9b1d2
+Revises: 9e5a7c3b1d4f
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c5e7f9b1d2"
+down_revision: str | Sequence[str] | None = "9e5a7c3b1d4f"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - index images by staleness for the refresh spider.
+
+    The refresh spider pages through retrievable images ordered by
+    (last_seen_at, id); gone images have download_success = FALSE and
+    drop out of the partial index.
+    """
+    op.create_index(
+        "idx_images_refresh_order",
+        "images",
+        ["last_seen_at", "id"],
+        postgresql_where=sa.text("download_success"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove the refresh ordering index."""
+    op.drop_index("idx_images_refresh_order", table_name="images")
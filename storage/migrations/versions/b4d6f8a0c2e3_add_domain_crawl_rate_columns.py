@@ -0,0 +1,35 @@
+"""add_domain_crawl_rate_columns
+
+Revision ID: b4d6f8a0c2e3
+Revises: a3c5e7f9b1d2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b4d6f8a0c2e3"
+down_revision: str | Sequence[str] | None = "a3c5e7f9b1d2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema - store learned per-domain crawl rates.
+
+    Adaptive concurrency writes the concurrency and download delay it
+    settled on when a claim is released; the next claim starts from them.
+    NULL means no rate has been learned yet (use the global settings).
+    """
+    op.add_column("domains", sa.Column("crawl_concurrency", sa.SmallInteger(), nullable=True))
+    op.add_column("domains", sa.Column("crawl_delay_ms", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove learned crawl rate columns."""
+    op.drop_column("domains", "crawl_delay_ms")
+    op.drop_column("domains", "crawl_concurrency")
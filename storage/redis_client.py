@@ -0,0 +1,160 @@
+"""Process-wide Redis clients with shared connection pools.
+
+Every Redis user (spider checkpoints and seed paging, the Redis scheduler
+and dupefilter, the robots.txt, DNS and image hash caches, the CLI) gets
+its client from get_redis_client(). Clients for the same URL share one
+BlockingConnectionPool, so a process keeps a few long-lived TCP
+connections to Redis instead of opening one per call.
+
+Pools hold at most REDIS_MAX_CONNECTIONS connections (callers wait up to
+REDIS_SOCKET_TIMEOUT for a free one), PING connections that sat idle for
+REDIS_HEALTH_CHECK_INTERVAL_SECONDS before reusing them, and parse replies
+with hiredis when that package is installed (redis-py picks it up).
+
+get_redis_pool_stats() reports pool usage; the discovery spider records it
+under redis/ in the crawl stats. How long each command or pipeline holds
+its connection is observed in the crawler_redis_call_seconds histogram.
+"""
+
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Any
+
+from crawler.metrics import REDIS_CALL_SECONDS
+from env_config import (
+    get_redis_health_check_interval_seconds,
+    get_redis_max_connections,
+    get_redis_socket_connect_timeout,
+    get_redis_socket_timeout,
+    get_redis_url,
+)
+
+logger = logging.getLogger(__name__)
+
+# (url, decode_responses) -> client; clients own their pool
+_clients: dict[tuple[str, bool], Any] = {}
+_clients_lock = threading.Lock()
+_lookups = 0
+
+
+@lru_cache(maxsize=1)
+def _pool_class() -> Any:
+    """Return a BlockingConnectionPool subclass that counts checkouts."""
+    from redis import BlockingConnectionPool
+
+    class CountingConnectionPool(BlockingConnectionPool):
+        """BlockingConnectionPool with usage counters for get_redis_pool_stats()."""
+
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            self.usage = {"created": 0, "checkouts": 0, "peak_in_use": 0}
+            # id(connection) -> perf_counter() at checkout
+            self._checked_out: dict[int, float] = {}
+            self._usage_lock = threading.Lock()
+            super().__init__(*args, **kwargs)  # type: ignore[no-untyped-call]
+
+        def make_connection(self) -> Any:
+            with self._usage_lock:
+                self.usage["created"] += 1
+            return super().make_connection()  # type: ignore[no-untyped-call]
+
+        def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+            connection = super().get_connection(*args, **kwargs)  # type: ignore[no-untyped-call]
+            with self._usage_lock:
+                self._checked_out[id(connection)] = time.perf_counter()
+                self.usage["checkouts"] += 1
+                self.usage["peak_in_use"] = max(self.usage["peak_in_use"], len(self._checked_out))
+            return connection
+
+        def release(self, connection: Any) -> None:
+            with self._usage_lock:
+                started = self._checked_out.pop(id(connection), None)
+            if started is not None:
+                REDIS_CALL_SECONDS.observe(time.perf_counter() - started)
+            super().release(connection)  # type: ignore[no-untyped-call]
+
+        def in_use(self) -> int:
+            with self._usage_lock:
+                return len(self._checked_out)
+
+    return CountingConnectionPool
+
+
+def get_redis_client(url: str | None = None, decode_responses: bool = False) -> Any:
+    """Return the shared Redis client for a URL, creating its pool on first use.
+
+    Creating the client does not connect; connection errors surface on the
+    first command, as with redis.from_url().
+
+    Args:
+        url: Redis URL (defaults to REDIS_URL)
+        decode_responses: Return str instead of bytes (separate pool)
+
+    Returns:
+        redis.Redis client backed by the process-wide pool for the URL.
+    """
+    global _lookups
+    url = url or get_redis_url()
+    key = (url, decode_responses)
+    with _clients_lock:
+        _lookups += 1
+        client = _clients.get(key)
+        if client is None:
+            import redis
+            from redis.utils import HIREDIS_AVAILABLE
+
+            socket_timeout = get_redis_socket_timeout()
+            pool = _pool_class().from_url(
+                url,
+                max_connections=get_redis_max_connections(),
+                timeout=socket_timeout,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=get_redis_socket_connect_timeout(),
+                health_check_interval=get_redis_health_check_interval_seconds(),
+                decode_responses=decode_responses,
+            )
+            client = _clients[key] = redis.Redis(connection_pool=pool)
+            logger.debug(
+                f"Created Redis pool for {pool.connection_kwargs.get('host')} "
+                f"(max {pool.max_connections} connections, "
+                f"parser: {'hiredis' if HIREDIS_AVAILABLE else 'python'})"
+            )
+        return client
+
+
+def get_redis_pool_stats() -> dict[str, int]:
+    """Return usage counters summed over the process-wide pools.
+
+    Returns:
+        Dict with pools, client_lookups, connections_created, checkouts,
+        in_use, peak_in_use and hiredis (1 when replies are parsed by hiredis).
+    """
+    with _clients_lock:
+        pools = [client.connection_pool for client in _clients.values()]
+        stats = {"pools": len(pools), "client_lookups": _lookups}
+    stats["connections_created"] = sum(pool.usage["created"] for pool in pools)
+    stats["checkouts"] = sum(pool.usage["checkouts"] for pool in pools)
+    stats["in_use"] = sum(pool.in_use() for pool in pools)
+    stats["peak_in_use"] = sum(pool.usage["peak_in_use"] for pool in pools)
+    try:
+        from redis.utils import HIREDIS_AVAILABLE
+
+        stats["hiredis"] = int(HIREDIS_AVAILABLE)
+    except ImportError:
+        stats["hiredis"] = 0
+    return stats
+
+
+def close_redis_clients() -> None:
+    """Disconnect and drop all shared clients (end of CLI commands, tests)."""
+    global _lookups
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _lookups = 0
+    for client in clients:
+        try:
+            client.connection_pool.disconnect()
+        except Exception as e:
+            logger.debug(f"Failed to disconnect Redis pool: {e}")
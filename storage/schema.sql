@@ -17,10 +17,15 @@ CREATE TABLE IF NOT EXISTS images (
     discovered_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     last_seen_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     download_success BOOLEAN DEFAULT FALSE,
+    etag TEXT,  -- HTTP validators from the last 200 response (conditional refresh)
+    last_modified TEXT,
     
     -- Perceptual hashes (Phase 2)
     phash_hash VARCHAR(16),
     dhash_hash VARCHAR(16),
+    phash_int BIGINT,  -- Same hashes as signed 64-bit integers for bit_count(a # b)
+    dhash_int BIGINT,
+    near_duplicate_cluster_id UUID,  -- Smallest image ID among its near-duplicates
     
     -- Future InvisibleID fields (reserved, initially empty)
     invisible_id_detected BOOLEAN DEFAULT NULL,
@@ -37,6 +42,23 @@ CREATE INDEX IF NOT EXISTS idx_images_download_success ON images(download_succes
 CREATE INDEX IF NOT EXISTS idx_images_url ON images(url);
 CREATE INDEX IF NOT EXISTS idx_images_phash ON images(phash_hash);
 CREATE INDEX IF NOT EXISTS idx_images_dhash ON images(dhash_hash);
+CREATE INDEX IF NOT EXISTS idx_images_near_duplicate_cluster ON images(near_duplicate_cluster_id)
+    WHERE near_duplicate_cluster_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_images_refresh_order ON images(last_seen_at, id)
+    WHERE download_success;
+
+-- Perceptual hash helpers (bit_count requires PostgreSQL 14+)
+CREATE OR REPLACE FUNCTION perceptual_hash_to_bigint(p_hash TEXT)
+RETURNS BIGINT AS $$
+    SELECT CASE
+        WHEN p_hash ~ '^[0-9a-fA-F]{16}$' THEN ('x' || p_hash)::bit(64)::bigint
+    END
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION hamming_distance(p_a BIGINT, p_b BIGINT)
+RETURNS INTEGER AS $$
+    SELECT bit_count((p_a # p_b)::bit(64))::integer
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
 
 -- Crawl runs table: tracks high-level crawl runs (Phase 2)
 CREATE TABLE IF NOT EXISTS crawl_runs (
@@ -0,0 +1,188 @@
+"""Tests for adaptive per-domain concurrency (AIMD)."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from crawler import throttle
+from crawler.throttle import AdaptiveConcurrency, AimdController
+
+
+def _controller(**overrides):
+    params = {
+        "start_concurrency": 1,
+        "start_delay": 1.0,
+        "max_concurrency": 4,
+        "min_delay": 0.0,
+        "max_delay": 10.0,
+        "target_latency": 1.0,
+    }
+    params.update(overrides)
+    return AimdController(**params)
+
+
+def _extension(settings=None):
+    crawler = get_crawler(
+        settings_dict={"CONCURRENT_REQUESTS_PER_DOMAIN": 1, "DOWNLOAD_DELAY": 0, **(settings or {})}
+    )
+    crawler.stats.open_spider()
+    crawler.engine = MagicMock()
+    crawler.engine.downloader.slots = {}
+    with patch("crawler.throttle.get_enable_adaptive_concurrency", return_value=True):
+        return AdaptiveConcurrency(crawler)
+
+
+def _request(slot="a.com", domain="a.com", latency=0.1):
+    return Request(
+        f"https://{slot}/",
+        meta={"download_slot": slot, "domain": domain, "download_latency": latency},
+    )
+
+
+class TestAimdController:
+    """Test the additive-increase / multiplicative-decrease rules."""
+
+    def test_fast_windows_shed_delay_then_add_concurrency(self):
+        controller = _controller(start_delay=0.1)
+
+        rate = controller.on_response("a.com", 0.2)
+        assert rate.delay == pytest.approx(0.075)
+        assert rate.concurrency == 1
+
+        while controller.get("a.com").delay > 0:
+            controller.on_response("a.com", 0.2)
+        controller.on_response("a.com", 0.2)
+        assert controller.get("a.com").concurrency == 2
+
+        # A window is as many successes as the current concurrency
+        controller.on_response("a.com", 0.2)
+        assert controller.get("a.com").concurrency == 2
+        controller.on_response("a.com", 0.2)
+        assert controller.get("a.com").concurrency == 3
+
+    def test_slow_responses_hold_rate(self):
+        controller = _controller(start_delay=0.0)
+
+        for _ in range(5):
+            rate = controller.on_response("a.com", 2.5)
+
+        assert (rate.concurrency, rate.delay) == (1, 0.0)
+        assert rate.observations == 5
+
+    def test_backoff_halves_concurrency_and_doubles_delay(self):
+        controller = _controller(start_concurrency=4, start_delay=0.0)
+
+        rate = controller.on_backoff("a.com")
+        assert (rate.concurrency, rate.delay) == (2, 1.0)
+        rate = controller.on_backoff("a.com")
+        assert (rate.concurrency, rate.delay) == (1, 2.0)
+
+    def test_backoff_honors_retry_after_within_cap(self):
+        controller = _controller()
+
+        assert controller.on_backoff("a.com", retry_after=5).delay == 5.0
+        assert controller.on_backoff("b.com", retry_after=120).delay == 10.0
+
+    def test_limits_clamped(self):
+        controller = _controller(start_delay=0.0, max_concurrency=2)
+
+        for _ in range(10):
+            controller.on_response("a.com", 0.1)
+        rate = controller.get("b.com", seed=(50, 99.0))
+
+        assert controller.get("a.com").concurrency == 2
+        assert (rate.concurrency, rate.delay) == (2, 10.0)
+
+
+class TestAdaptiveConcurrencyExtension:
+    """Test slot updates driven by downloader signals."""
+
+    def test_not_configured_when_disabled(self):
+        with (
+            patch("crawler.throttle.get_enable_adaptive_concurrency", return_value=False),
+            pytest.raises(NotConfigured),
+        ):
+            AdaptiveConcurrency(get_crawler())
+
+    def test_seeded_limits_applied_to_new_slot(self):
+        extension = _extension()
+        slot = MagicMock(concurrency=1, delay=0.0)
+        extension.crawler.engine.downloader.slots["www.a.com"] = slot
+        extension.seed("a.com", 3, 0.5)
+
+        extension.request_reached_downloader(_request(slot="www.a.com"), None)
+
+        assert (slot.concurrency, slot.delay) == (3, 0.5)
+        assert extension.crawler.stats.get_value("adaptive/slots") == 1
+
+    def test_congestion_status_backs_off_slot(self):
+        extension = _extension()
+        slot = MagicMock(concurrency=1, delay=0.0)
+        extension.crawler.engine.downloader.slots["a.com"] = slot
+        request = _request()
+        extension.request_reached_downloader(request, None)
+
+        response = Response(request.url, status=429, headers={"Retry-After": "7"})
+        extension.response_downloaded(response, request, None)
+        extension.request_left_downloader(request, None)
+
+        assert slot.delay == 7.0
+        assert extension.crawler.stats.get_value("adaptive/backoffs") == 1
+
+    def test_failed_download_backs_off_slot(self):
+        extension = _extension()
+        slot = MagicMock(concurrency=1, delay=0.0)
+        extension.crawler.engine.downloader.slots["a.com"] = slot
+        request = _request()
+
+        extension.request_reached_downloader(request, None)
+        extension.request_left_downloader(request, None)
+
+        assert slot.delay == 1.0
+
+    def test_fast_responses_raise_concurrency(self):
+        extension = _extension()
+        slot = MagicMock(concurrency=1, delay=0.0)
+        extension.crawler.engine.downloader.slots["a.com"] = slot
+
+        for _ in range(3):
+            request = _request()
+            extension.request_reached_downloader(request, None)
+            extension.response_downloaded(Response(request.url), request, None)
+            extension.request_left_downloader(request, None)
+
+        assert slot.concurrency == 3
+        assert extension.crawler.stats.get_value("adaptive/increases") == 2
+
+    def test_learned_limits_need_observations(self):
+        extension = _extension()
+        for _ in range(throttle.MIN_OBSERVATIONS_TO_PERSIST - 1):
+            request = _request()
+            extension.request_reached_downloader(request, None)
+            extension.response_downloaded(Response(request.url, status=503), request, None)
+
+        assert extension.learned_limits("a.com") is None
+        extension.response_downloaded(Response("https://a.com/", status=503), _request(), None)
+        assert extension.learned_limits("a.com") == (1, 10.0)
+
+    def test_module_helpers(self):
+        extension = _extension()
+        with patch.object(throttle, "_controller", extension):
+            throttle.seed_domain_limits("a.com", 2, 250)
+            for _ in range(throttle.MIN_OBSERVATIONS_TO_PERSIST):
+                request = _request()
+                extension.request_reached_downloader(request, None)
+                extension.response_downloaded(Response(request.url, status=500), request, None)
+
+            assert extension._seeds["a.com"] == (2, 0.25)
+            assert throttle.learned_domain_limits("a.com") == {
+                "crawl_concurrency": 1,
+                "crawl_delay_ms": 10000,
+            }
+
+        with patch.object(throttle, "_controller", None):
+            throttle.seed_domain_limits("a.com", 2, 250)
+            assert throttle.learned_domain_limits("a.com") == {}
@@ -0,0 +1,248 @@
+"""Tests for the batched image_assets/image_observations write path."""
+
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from processor.fetcher import ImageFetchResult
+from storage.asset_repository import (
+    MAX_ASSET_FLUSH_ATTEMPTS,
+    AssetObservationWriter,
+    AssetRecord,
+    ObservationRecord,
+    _copy_value,
+    write_assets_and_observations,
+)
+
+OBSERVED_AT = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _asset(sha: str, size: int = 100) -> AssetRecord:
+    return AssetRecord(sha, size, 10, 10, "image/png", None, None, None, None)
+
+
+def _observation(sha: str, url: str = "https://example.com/a.png") -> ObservationRecord:
+    return ObservationRecord(sha, url, "https://example.com/", "example.com", "run-1", OBSERVED_AT)
+
+
+class TestCopyValue:
+    """Test COPY text formatting."""
+
+    def test_null_and_escapes(self):
+        assert _copy_value(None) == "\\N"
+        assert _copy_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+        assert _copy_value(OBSERVED_AT) == "2026-01-01T00:00:00+00:00"
+
+
+class TestWriteAssetsAndObservations:
+    """Test the single-transaction batch write."""
+
+    @patch("storage.asset_repository.execute_values")
+    @patch("storage.asset_repository.get_cursor")
+    def test_inserts_assets_and_copies_observations(self, mock_get_cursor, mock_execute_values):
+        cursor = MagicMock()
+        cursor.rowcount = 3
+        mock_get_cursor.return_value.__enter__.return_value = cursor
+        # Only "a" is new; "b" already existed
+        mock_execute_values.side_effect = [[("a",)], None]
+
+        result = write_assets_and_observations(
+            [_asset("a", 100), _asset("b", 50)],
+            [_observation("a"), _observation("a", "https://example.com/b.png"), _observation("b")],
+        )
+
+        assert result == {
+            "assets_inserted": 1,
+            "assets_existing": 1,
+            "bytes_inserted": 100,
+            "observations_written": 3,
+        }
+        assert (
+            "ON CONFLICT (sha256_hash) DO NOTHING" in mock_execute_values.call_args_list[0].args[1]
+        )
+        buffer = cursor.copy_expert.call_args.args[1]
+        assert buffer.getvalue().count("\n") == 3
+        # New asset credited once to its first page
+        crawl_log_rows = mock_execute_values.call_args_list[1].args[2]
+        assert crawl_log_rows == [("https://example.com/", "run-1", 1)]
+        # Append-only: no UPDATE of assets or observations
+        for call in cursor.execute.call_args_list:
+            assert not call.args[0].lstrip().startswith("UPDATE")
+
+
+class TestAssetObservationWriter:
+    """Test buffering and flush triggers."""
+
+    @patch("storage.asset_repository.write_assets_and_observations")
+    def test_flushes_on_batch_size(self, mock_write):
+        mock_write.return_value = {
+            "assets_inserted": 1,
+            "assets_existing": 0,
+            "bytes_inserted": 100,
+            "observations_written": 2,
+        }
+        writer = AssetObservationWriter(batch_size=2, flush_interval=60, clock=lambda: 0.0)
+
+        assert writer.add(_observation("a"), _asset("a")) is None
+        assert writer.pending == 1
+        result = writer.add(_observation("a"), _asset("a"))
+
+        assert result["observations_written"] == 2
+        assets, observations = mock_write.call_args.args
+        assert len(assets) == 1  # duplicate asset rows collapsed
+        assert len(observations) == 2
+        assert writer.pending == 0
+        assert writer.stats["asset_batches_written"] == 1
+
+    @patch("storage.asset_repository.write_assets_and_observations")
+    def test_flushes_on_interval(self, mock_write):
+        mock_write.return_value = {
+            "assets_inserted": 0,
+            "assets_existing": 0,
+            "bytes_inserted": 0,
+            "observations_written": 2,
+        }
+        now = [0.0]
+        writer = AssetObservationWriter(batch_size=100, flush_interval=5, clock=lambda: now[0])
+
+        writer.add(_observation("a"))
+        now[0] = 6.0
+        assert writer.add(_observation("b")) is not None
+        mock_write.assert_called_once()
+
+    @patch("storage.asset_repository.write_assets_and_observations")
+    def test_failed_batch_kept_and_retried(self, mock_write):
+        written = {
+            "assets_inserted": 1,
+            "assets_existing": 0,
+            "bytes_inserted": 100,
+            "observations_written": 2,
+        }
+        mock_write.side_effect = [RuntimeError("db down"), written]
+        writer = AssetObservationWriter(batch_size=10, clock=lambda: 0.0)
+        writer.add(_observation("a"), _asset("a"))
+
+        with pytest.raises(RuntimeError):
+            writer.flush()
+        assert writer.pending == 1
+        assert writer.has_asset("a")
+
+        writer.add(_observation("b"))
+        assert writer.flush() == written
+
+        assets, observations = mock_write.call_args.args
+        assert [asset.sha256_hash for asset in assets] == ["a"]
+        assert len(observations) == 2
+        assert writer.pending == 0
+        assert writer.stats["asset_batches_failed"] == 1
+        assert writer.stats["observations_failed"] == 0
+        assert writer.stats["observations_written"] == 2
+
+    @patch("storage.asset_repository.write_assets_and_observations")
+    def test_automatic_retry_waits_for_interval(self, mock_write):
+        mock_write.side_effect = RuntimeError("db down")
+        now = [0.0]
+        writer = AssetObservationWriter(batch_size=1, flush_interval=5, clock=lambda: now[0])
+
+        with pytest.raises(RuntimeError):
+            writer.add(_observation("a"))
+        assert writer.add(_observation("b")) is None
+        assert mock_write.call_count == 1
+
+        now[0] = 6.0
+        with pytest.raises(RuntimeError):
+            writer.add(_observation("c"))
+        assert mock_write.call_count == 2
+
+    @patch("storage.asset_repository.write_assets_and_observations")
+    def test_batch_dropped_after_max_attempts(self, mock_write):
+        mock_write.side_effect = RuntimeError("db down")
+        writer = AssetObservationWriter(batch_size=10, clock=lambda: 0.0)
+        writer.add(_observation("a"))
+
+        for _ in range(MAX_ASSET_FLUSH_ATTEMPTS):
+            with pytest.raises(RuntimeError):
+                writer.flush()
+
+        assert writer.stats["asset_batches_failed"] == MAX_ASSET_FLUSH_ATTEMPTS
+        assert writer.stats["observations_failed"] == 1
+        assert writer.pending == 0
+        assert writer.flush() is None
+
+
+class TestPipelineImmutableAssets:
+    """Test pipeline wiring when ENABLE_IMMUTABLE_ASSETS is on."""
+
+    def test_store_buffers_asset_instead_of_images_row(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        pipeline = ImageProcessingPipeline()
+        pipeline.asset_writer = MagicMock()
+        pipeline.asset_writer.add.return_value = {
+            "assets_inserted": 1,
+            "assets_existing": 0,
+            "bytes_inserted": 42,
+            "observations_written": 1,
+        }
+        pipeline.downloader = MagicMock()
+        pipeline.downloader.process_response.return_value = ImageFetchResult(
+            success=True,
+            url="https://example.com/a.png",
+            sha256_hash="a" * 64,
+            file_size=42,
+            phash_hash="ffffffffffffffff",
+        )
+        item = {
+            "url": "https://example.com/a.png",
+            "source_page": "https://example.com/",
+            "source_domain": "example.com",
+            "crawl_type": "discovery",
+            "type": "image",
+            "response": MagicMock(),
+        }
+
+        with (
+            patch("crawler.pipelines.get_last_observation", return_value=None),
+            patch("crawler.pipelines.asset_exists", return_value=False),
+            patch.object(pipeline, "_store_image_metadata") as mock_store,
+        ):
+            pipeline.process_item(item, MagicMock())
+
+        mock_store.assert_not_called()
+        observation, asset = pipeline.asset_writer.add.call_args.args
+        assert asset.sha256_hash == "a" * 64
+        assert asset.phash_int == -1
+        assert observation.url == "https://example.com/a.png"
+        assert pipeline.stats["images_downloaded"] == 1
+        assert pipeline.stats["total_bytes_downloaded"] == 42
+
+    def test_known_asset_appends_observation_only(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        pipeline = ImageProcessingPipeline()
+        pipeline.asset_writer = AssetObservationWriter(batch_size=10, clock=lambda: 0.0)
+        pipeline.downloader = MagicMock()
+
+        def process_response(url, response, known_content, trace=None):
+            assert known_content("a" * 64)
+            return ImageFetchResult(success=True, url=url, sha256_hash="a" * 64, file_size=42)
+
+        pipeline.downloader.process_response.side_effect = process_response
+        item = {
+            "url": "https://cdn.example/a.png",
+            "source_page": "https://example.com/",
+            "source_domain": "example.com",
+            "type": "image",
+            "response": MagicMock(),
+        }
+
+        with (
+            patch("crawler.pipelines.get_last_observation", return_value=None),
+            patch("crawler.pipelines.asset_exists", return_value=True),
+        ):
+            pipeline.process_item(item, MagicMock())
+
+        assert pipeline.asset_writer.pending == 1
+        assert not pipeline.asset_writer.has_asset("a" * 64)
+        assert pipeline.stats["images_deduplicated"] == 1
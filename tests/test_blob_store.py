@@ -0,0 +1,226 @@
+"""Tests for content-addressable blob storage."""
+
+import hashlib
+import queue
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from storage.blob_store import (
+    BlobItem,
+    BlobStore,
+    BlobWriter,
+    LocalBlobStore,
+    S3BlobStore,
+    blob_key,
+    create_blob_writer,
+)
+
+
+def _sha(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class FakeS3Client:
+    """In-memory stand-in for a MinIO/S3 client (head/put/get object)."""
+
+    def __init__(self) -> None:
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.put_calls = 0
+
+    @staticmethod
+    def _not_found(operation: str) -> ClientError:
+        return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+
+    def head_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        if (Bucket, Key) not in self.objects:
+            raise self._not_found("HeadObject")
+        return {"ContentLength": len(self.objects[(Bucket, Key)])}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> dict:  # noqa: N803
+        self.put_calls += 1
+        self.objects[(Bucket, Key)] = Body
+        return {}
+
+    def get_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        body = MagicMock()
+        body.read.return_value = self.objects[(Bucket, Key)]
+        return {"Body": body}
+
+
+class TestBlobKey:
+    """Test sharded key layout."""
+
+    def test_key_is_sharded_by_prefix(self):
+        sha = _sha(b"image")
+        assert blob_key(sha) == f"{sha[0:2]}/{sha[2:4]}/{sha}"
+
+    def test_rejects_invalid_hash(self):
+        with pytest.raises(ValueError, match="Invalid SHA-256"):
+            blob_key("../../etc/passwd")
+
+
+class TestBlobStoreInterface:
+    """Test the abstract backend contract."""
+
+    def test_base_class_cannot_be_instantiated(self):
+        with pytest.raises(TypeError):
+            BlobStore()  # type: ignore[abstract]
+
+    def test_backend_missing_method_cannot_be_instantiated(self):
+        class PartialStore(BlobStore):
+            def exists(self, sha256_hash: str) -> bool:
+                return False
+
+        with pytest.raises(TypeError):
+            PartialStore()  # type: ignore[abstract]
+
+
+class TestLocalBlobStore:
+    """Test filesystem backend."""
+
+    def test_put_get_roundtrip(self, tmp_path):
+        store = LocalBlobStore(tmp_path)
+        sha = _sha(b"jpeg-bytes")
+
+        assert store.put(sha, b"jpeg-bytes") is True
+        assert (tmp_path / sha[0:2] / sha[2:4] / sha).read_bytes() == b"jpeg-bytes"
+        assert store.exists(sha)
+        assert store.get(sha) == b"jpeg-bytes"
+
+    def test_put_existing_is_noop(self, tmp_path):
+        store = LocalBlobStore(tmp_path)
+        sha = _sha(b"x")
+        store.put(sha, b"x")
+
+        assert store.put(sha, b"x") is False
+        assert list((tmp_path / sha[0:2] / sha[2:4]).iterdir()) == [
+            tmp_path / sha[0:2] / sha[2:4] / sha
+        ]
+
+    def test_get_missing_returns_none(self, tmp_path):
+        assert LocalBlobStore(tmp_path).get(_sha(b"missing")) is None
+
+
+class TestS3BlobStore:
+    """Test S3-compatible backend against an in-memory MinIO stand-in."""
+
+    def test_put_get_roundtrip(self):
+        client = FakeS3Client()
+        store = S3BlobStore(client, "invisible-images")
+        sha = _sha(b"png-bytes")
+
+        assert store.put(sha, b"png-bytes", "image/png") is True
+        assert client.objects[("invisible-images", blob_key(sha))] == b"png-bytes"
+        assert store.get(sha) == b"png-bytes"
+        store.close()
+
+    def test_existing_object_not_reuploaded(self):
+        client = FakeS3Client()
+        store = S3BlobStore(client, "bucket")
+        sha = _sha(b"a")
+
+        results = store.put_many([BlobItem(sha, b"a"), BlobItem(_sha(b"b"), b"b")])
+        assert results == [True, True]
+        assert store.put(sha, b"a") is False
+        assert client.put_calls == 2
+        store.close()
+
+    def test_missing_object(self):
+        store = S3BlobStore(FakeS3Client(), "bucket")
+        assert store.exists(_sha(b"nope")) is False
+        assert store.get(_sha(b"nope")) is None
+        store.close()
+
+
+class TestBlobWriter:
+    """Test background batched writer."""
+
+    def test_writes_batch_and_dedups(self, tmp_path):
+        store = LocalBlobStore(tmp_path)
+        writer = BlobWriter(store, batch_size=8, flush_interval=0.01)
+        sha = _sha(b"same")
+
+        assert writer.submit(sha, b"same") is True
+        writer.submit(sha, b"same")
+        writer.flush()
+
+        assert store.get(sha) == b"same"
+        assert writer.stats["blobs_written"] == 1
+
+        # Now known: rejected without queuing
+        assert writer.submit(sha, b"same") is False
+        writer.close()
+        assert writer.stats["blobs_skipped_existing"] == 2
+
+    def test_drops_when_queue_full(self):
+        store = MagicMock()
+        store.put_many.side_effect = lambda items: [True] * len(items)
+        writer = BlobWriter(store, batch_size=1, max_queue_size=1, flush_interval=0.01)
+        with patch.object(writer._queue, "put_nowait", side_effect=queue.Full):
+            assert writer.submit(_sha(b"x"), b"x") is False
+        assert writer.stats["blobs_dropped"] == 1
+        writer.close()
+
+    def test_store_errors_counted_not_raised(self):
+        store = MagicMock()
+        store.put_many.side_effect = RuntimeError("disk full")
+        writer = BlobWriter(store, flush_interval=0.01)
+
+        writer.submit(_sha(b"x"), b"x")
+        writer.close()
+
+        assert writer.stats["blobs_failed"] == 1
+        store.close.assert_called_once()
+
+
+class TestCreateBlobWriter:
+    """Test env-driven construction."""
+
+    def test_disabled_by_default(self):
+        with patch.dict("os.environ", {}, clear=True):
+            assert create_blob_writer() is None
+
+    def test_local_backend(self, tmp_path):
+        env = {"BLOB_STORE_BACKEND": "local", "BLOB_STORE_PATH": str(tmp_path)}
+        with patch.dict("os.environ", env, clear=True):
+            writer = create_blob_writer()
+        assert isinstance(writer, BlobWriter)
+        assert isinstance(writer.store, LocalBlobStore)
+        writer.close()
+
+
+class TestPipelineBlobStorage:
+    """Test that the pipeline hands validated bytes to the blob writer."""
+
+    def test_pipeline_submits_content(self):
+        from crawler.pipelines import ImageProcessingPipeline
+        from processor.fetcher import ImageFetchResult
+
+        pipeline = ImageProcessingPipeline()
+        pipeline.open_spider(MagicMock())
+        pipeline.blob_writer = MagicMock()
+        sha = _sha(b"content")
+        pipeline.downloader = MagicMock()
+        pipeline.downloader.process_response.return_value = ImageFetchResult(
+            success=True,
+            url="https://example.com/a.jpg",
+            content=b"content",
+            content_type="image/jpeg",
+            file_size=7,
+            sha256_hash=sha,
+        )
+        pipeline._store_image_metadata = MagicMock(return_value={"status": "downloaded"})
+
+        item = {
+            "type": "image",
+            "url": "https://example.com/a.jpg",
+            "crawl_type": "refresh",
+            "response": MagicMock(),
+        }
+        pipeline.process_item(item, MagicMock())
+
+        pipeline.blob_writer.submit.assert_called_once_with(sha, b"content", "image/jpeg")
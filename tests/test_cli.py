@@ -3,6 +3,8 @@
 import uuid
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 
 class TestReleaseStuckClaimsCLI:
     """Test release-stuck-claims CLI command with force options."""
@@ -257,3 +259,32 @@ class TestCleanupStaleRunsCLI:
         # Verify: run marked failed
         db_cursor.execute("SELECT status FROM crawl_runs WHERE id = %s", (run_id,))
         assert db_cursor.fetchone()[0] == "failed"
+
+
+class TestMainCLI:
+    """Test the CLI entry point."""
+
+    def test_closes_redis_clients_after_command(self):
+        from crawler.cli import main
+
+        with (
+            patch("sys.argv", ["cli", "queue-status"]),
+            patch("crawler.cli.queue_status_command", return_value=0),
+            patch("crawler.cli.close_redis_clients") as mock_close,
+        ):
+            assert main() == 0
+
+        mock_close.assert_called_once()
+
+    def test_closes_redis_clients_when_command_raises(self):
+        from crawler.cli import main
+
+        with (
+            patch("sys.argv", ["cli", "queue-status"]),
+            patch("crawler.cli.queue_status_command", side_effect=RuntimeError("boom")),
+            patch("crawler.cli.close_redis_clients") as mock_close,
+        ):
+            with pytest.raises(RuntimeError, match="boom"):
+                main()
+
+        mock_close.assert_called_once()
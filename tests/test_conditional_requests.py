@@ -0,0 +1,148 @@
+"""Tests for conditional GET (ETag / Last-Modified) image refreshes."""
+
+from unittest.mock import MagicMock, patch
+
+from scrapy.http import HtmlResponse, Request, Response
+
+PAGE_HTML = b"""
+<html><body>
+    <img src="https://example.com/known.jpg" />
+    <img src="https://example.com/new.jpg" />
+</body></html>
+"""
+
+
+def _page_response() -> HtmlResponse:
+    request = Request(url="https://example.com/page", meta={"domain": "example.com", "depth": 0})
+    return HtmlResponse(
+        url="https://example.com/page", body=PAGE_HTML, encoding="utf-8", request=request
+    )
+
+
+def _image_requests(spider) -> dict[str, Request]:
+    return {
+        r.url.rsplit("/", 1)[-1]: r
+        for r in spider.parse(_page_response())
+        if isinstance(r, Request) and r.url.endswith(".jpg")
+    }
+
+
+class TestSpiderConditionalHeaders:
+    """Test validators are replayed on refresh image requests."""
+
+    def test_refresh_requests_carry_validators(self):
+        from crawler.spiders.discovery_spider import DiscoverySpider
+
+        spider = DiscoverySpider(seeds=None, crawl_type="refresh")
+        validators = {
+            "https://example.com/known.jpg": ('"abc"', "Tue, 01 Sep 2026 10:00:00 GMT", 5000)
+        }
+
+        with patch(
+            "crawler.spiders.discovery_spider.get_image_validators", return_value=validators
+        ) as mock_validators:
+            requests = _image_requests(spider)
+
+        mock_validators.assert_called_once()
+        known = requests["known.jpg"]
+        assert known.headers.get("If-None-Match") == b'"abc"'
+        assert known.headers.get("If-Modified-Since") == b"Tue, 01 Sep 2026 10:00:00 GMT"
+        assert known.meta["handle_httpstatus_list"] == [304]
+        assert known.meta["content_length"] == 5000
+        assert b"If-None-Match" not in requests["new.jpg"].headers
+        assert spider.conditional_image_requests == 1
+
+    def test_discovery_skips_lookup_by_default(self):
+        from crawler.spiders.discovery_spider import DiscoverySpider
+
+        spider = DiscoverySpider(seeds=None, crawl_type="discovery")
+        with patch("crawler.spiders.discovery_spider.get_image_validators") as mock_validators:
+            requests = _image_requests(spider)
+
+        mock_validators.assert_not_called()
+        assert "handle_httpstatus_list" not in requests["known.jpg"].meta
+
+    def test_all_mode_applies_to_discovery(self):
+        from crawler.spiders.discovery_spider import DiscoverySpider
+
+        with patch.dict("os.environ", {"CONDITIONAL_IMAGE_REQUESTS": "all"}):
+            spider = DiscoverySpider(seeds=None, crawl_type="discovery")
+        assert spider.use_conditional_image_requests
+
+
+class TestPipelineNotModified:
+    """Test 304 handling in the pipeline."""
+
+    def _item(self, status: int = 304) -> dict:
+        url = "https://example.com/known.jpg"
+        return {
+            "type": "image",
+            "url": url,
+            "source_page": "https://example.com/page",
+            "source_domain": "example.com",
+            "crawl_type": "refresh",
+            "content_length": 5000,
+            "response": Response(url=url, status=status, request=Request(url)),
+        }
+
+    def test_304_batches_last_seen_bump(self):
+        from crawler import pipelines
+        from crawler.pipelines import ImageProcessingPipeline
+
+        pipeline = ImageProcessingPipeline()
+        pipeline.downloader = MagicMock()
+
+        with (
+            patch.object(pipelines, "UNCHANGED_FLUSH_BATCH_SIZE", 2),
+            patch("crawler.pipelines.touch_images") as mock_touch,
+        ):
+            pipeline.process_item(self._item(), MagicMock())
+            mock_touch.assert_not_called()
+            pipeline.process_item(self._item(), MagicMock())
+
+        mock_touch.assert_called_once_with(["https://example.com/known.jpg"] * 2)
+        pipeline.downloader.process_response.assert_not_called()
+        assert pipeline.stats["images_unchanged"] == 2
+        assert pipeline.stats["bytes_saved_by_conditional_requests"] == 10000
+        assert pipeline.unchanged_urls == []
+
+    @patch("storage.image_repository.get_cursor")
+    def test_touch_images_single_statement(self, mock_get_cursor):
+        from storage.image_repository import touch_images
+
+        cursor = MagicMock()
+        cursor.rowcount = 2
+        mock_get_cursor.return_value.__enter__.return_value = cursor
+
+        assert touch_images(["b", "a", "b"]) == 2
+        cursor.execute.assert_called_once()
+        assert cursor.execute.call_args.args[1] == (["a", "b"],)
+
+    def test_validators_stored_on_insert(self):
+        from crawler.pipelines import ImageProcessingPipeline
+        from processor.fetcher import ImageFetchResult
+
+        pipeline = ImageProcessingPipeline()
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [None, None, ("new-id",)]
+        fetch_result = ImageFetchResult(
+            success=True,
+            url="https://example.com/new.jpg",
+            sha256_hash="a" * 64,
+            etag='"v1"',
+            last_modified="Tue, 01 Sep 2026 10:00:00 GMT",
+            phash_hash="0000000000000001",
+        )
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = cursor
+            pipeline._store_image_metadata(
+                url="https://example.com/new.jpg",
+                source_page="https://example.com/page",
+                source_domain="example.com",
+                fetch_result=fetch_result,
+            )
+
+        insert = next(c for c in cursor.execute.call_args_list if "INSERT INTO images" in c.args[0])
+        assert '"v1"' in insert.args[1]
+        assert "Tue, 01 Sep 2026 10:00:00 GMT" in insert.args[1]
@@ -0,0 +1,182 @@
+"""Tests for Postgres pool sizing, waits and prepared statements."""
+
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from storage import db
+from storage.db import (
+    BlockingConnectionPool,
+    CachingConnection,
+    _server_side_sql,
+    default_pool_size,
+    execute_prepared,
+)
+
+
+def _pool(maxconn=1, timeout=5.0):
+    if not os.getenv("DATABASE_URL"):
+        pytest.skip("DATABASE_URL not set, skipping DB test")
+    return BlockingConnectionPool(
+        1,
+        maxconn,
+        dsn=os.environ["DATABASE_URL"],
+        timeout=timeout,
+        connection_factory=CachingConnection,
+    )
+
+
+class TestServerSideSql:
+    """Test placeholder rewriting for PREPARE."""
+
+    def test_positional(self):
+        assert _server_side_sql("SELECT %s, %s", ("a", 1)) == ("SELECT $1, $2", ["a", 1])
+
+    def test_named_parameters_reused(self):
+        sql = "UPDATE t SET a = %(a)s WHERE id = %(id)s AND a <> %(a)s"
+
+        assert _server_side_sql(sql, {"id": 7, "a": "x", "unused": 0}) == (
+            "UPDATE t SET a = $1 WHERE id = $2 AND a <> $1",
+            ["x", 7],
+        )
+
+    def test_percent_escape(self):
+        assert _server_side_sql("SELECT %s LIKE 'a%%'", ("b",)) == (
+            "SELECT $1 LIKE 'a%'",
+            ["b"],
+        )
+
+    def test_mismatched_params(self):
+        assert _server_side_sql("SELECT %s, %s", ("a",)) is None
+        assert _server_side_sql("SELECT %(a)s", {"b": 1}) is None
+
+
+class TestPoolSizing:
+    """Test the derived pool size."""
+
+    def test_scales_with_concurrency_capped_by_worker_share(self):
+        env = {"DB_SERVER_CONNECTION_BUDGET": "60", "DB_WORKER_PROCESSES": "4"}
+        with (
+            patch.dict(os.environ, env),
+            patch("storage.db.get_scrapy_concurrent_requests", return_value=80),
+        ):
+            assert default_pool_size() == 80 // 8 + 1 + db.BACKGROUND_DB_CONNECTIONS
+        with (
+            patch.dict(os.environ, env),
+            patch("storage.db.get_scrapy_concurrent_requests", return_value=256),
+        ):
+            assert default_pool_size() == 15
+
+    def test_derived_size_never_below_floor(self):
+        env = {"DB_SERVER_CONNECTION_BUDGET": "40", "DB_WORKER_PROCESSES": "8"}
+        with (
+            patch.dict(os.environ, env),
+            patch("storage.db.get_scrapy_concurrent_requests", return_value=16),
+        ):
+            assert default_pool_size() == db.MIN_DERIVED_POOL_SIZE
+
+    def test_explicit_size_wins(self):
+        with patch.dict(os.environ, {"DB_POOL_MAX_CONNECTIONS": "3"}):
+            assert default_pool_size() == 3
+
+
+class TestExecutePrepared:
+    """Test prepared statement reuse and fallbacks."""
+
+    def test_plain_cursor_executes_sql(self):
+        cursor = MagicMock()
+
+        execute_prepared(cursor, "SELECT %s", (1,))
+
+        cursor.execute.assert_called_once_with("SELECT %s", (1,))
+
+    def test_statement_prepared_once_per_connection(self):
+        pool = _pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                for value in (1, 2):
+                    execute_prepared(cursor, "SELECT %(v)s::int + 1", {"v": value})
+                    assert cursor.fetchone() == (value + 1,)
+            assert len(conn.prepared_statements) == 1
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+            pool.closeall()
+
+    def test_unpreparable_sql_keeps_transaction_usable(self):
+        pool = _pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                # $1 has no inferable type, so PREPARE fails
+                execute_prepared(cursor, "SELECT %s IS NULL", (None,))
+                assert cursor.fetchone() == (True,)
+                cursor.execute("SELECT 1")
+                assert cursor.fetchone() == (1,)
+            assert conn.prepared_statements == {}
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+            pool.closeall()
+            db._unpreparable.discard("SELECT %s IS NULL")
+
+    def test_statements_counted(self):
+        pool = _pool()
+        conn = pool.getconn()
+        before = db.get_db_pool_stats()["statements_executed"]
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.executemany("SELECT %s", [(1,), (2,)])
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+            pool.closeall()
+        assert db.get_db_pool_stats()["statements_executed"] == before + 2
+
+
+class TestBlockingConnectionPool:
+    """Test waiting for a free connection."""
+
+    def test_waits_for_released_connection(self):
+        pool = _pool(maxconn=1)
+        waits_before = db.get_db_pool_stats()["waits"]
+        held = pool.getconn()
+        threading.Timer(0.1, pool.putconn, args=(held,)).start()
+        try:
+            started = time.monotonic()
+            conn = pool.getconn()
+            assert time.monotonic() - started >= 0.05
+            assert conn is held
+            assert db.get_db_pool_stats()["waits"] == waits_before + 1
+            pool.putconn(conn)
+        finally:
+            pool.closeall()
+
+    def test_reactor_thread_waits_briefly(self):
+        pool = _pool(maxconn=1, timeout=30.0)
+        pool.reactor_timeout = 0.1
+        held = pool.getconn()
+        try:
+            with patch("storage.db.threadable.isInIOThread", return_value=True):
+                started = time.monotonic()
+                with pytest.raises(db.PoolError, match="after 0.1s"):
+                    pool.getconn()
+                assert time.monotonic() - started < 5
+        finally:
+            pool.putconn(held)
+            pool.closeall()
+
+    def test_times_out_when_exhausted(self):
+        pool = _pool(maxconn=1, timeout=0.1)
+        held = pool.getconn()
+        try:
+            with pytest.raises(db.PoolError):
+                pool.getconn()
+        finally:
+            pool.putconn(held)
+            pool.closeall()
@@ -0,0 +1,228 @@
+"""Tests for the caching DNS resolver."""
+
+import socket
+from unittest.mock import MagicMock, patch
+
+from twisted.internet.error import DNSLookupError
+
+from crawler import dns
+from crawler.dns import NameNotFoundError, SharedCachingResolver
+
+
+class FakeThreadPool:
+    """Runs 'threaded' calls immediately, or holds them until release()."""
+
+    def __init__(self):
+        self.held = []
+        self.hold = False
+
+    def callInThreadWithCallback(self, on_result, func, *args):  # noqa: N802
+        if self.hold:
+            self.held.append((on_result, func, args))
+            return
+        self._run(on_result, func, args)
+
+    def release(self):
+        held, self.held = self.held, []
+        for on_result, func, args in held:
+            self._run(on_result, func, args)
+
+    @staticmethod
+    def _run(on_result, func, args):
+        try:
+            result = func(*args)
+        except Exception:
+            from twisted.python.failure import Failure
+
+            on_result(False, Failure())
+        else:
+            on_result(True, result)
+
+
+class FakeReactor:
+    """Minimal reactor: synchronous thread pool, inert timers."""
+
+    def __init__(self):
+        self.pool = FakeThreadPool()
+
+    def getThreadPool(self):  # noqa: N802
+        return self.pool
+
+    def callFromThread(self, func, *args, **kwargs):  # noqa: N802
+        func(*args, **kwargs)
+
+    def callLater(self, *args, **kwargs):  # noqa: N802
+        return MagicMock()
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the Redis calls the resolver makes."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def pipeline(self, transaction=True):
+        redis = self
+        results = []
+
+        class Pipe:
+            def get(self, key):
+                results.append(redis.data.get(key))
+
+            def ttl(self, key):
+                results.append(redis.ttls.get(key, -2))
+
+            def execute(self):
+                return list(results)
+
+        return Pipe()
+
+
+def _resolver(resolve, redis=None, now=None, max_entries=100):
+    clock = (lambda: now[0]) if now is not None else (lambda: 0.0)
+    return SharedCachingResolver(
+        FakeReactor(),
+        max_entries=max_entries,
+        timeout=5,
+        ttl=300,
+        negative_ttl=3600,
+        redis_client=redis,
+        resolve=resolve,
+        clock=clock,
+    )
+
+
+def _result(deferred):
+    results = []
+    deferred.addBoth(results.append)
+    return results[0]
+
+
+class StubResolve:
+    """Local stub resolver: fixed answers, NXDOMAIN for anything else."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        if name in self.answers:
+            return self.answers[name]
+        raise NameNotFoundError(name)
+
+
+class TestSharedCachingResolver:
+    """Test caching tiers, expiry and negative caching."""
+
+    def test_positive_answers_cached_until_expiry(self):
+        now = [0.0]
+        stub = StubResolve({"a.com": "10.0.0.1"})
+        resolver = _resolver(stub, now=now)
+
+        assert _result(resolver.getHostByName("A.com")) == "10.0.0.1"
+        assert _result(resolver.getHostByName("a.com")) == "10.0.0.1"
+        assert stub.calls == ["a.com"]
+        assert resolver.stats["local_hit"] == 1
+
+        now[0] = 301.0
+        _result(resolver.getHostByName("a.com"))
+        assert stub.calls == ["a.com", "a.com"]
+
+    def test_nxdomain_negatively_cached(self):
+        stub = StubResolve({})
+        resolver = _resolver(stub)
+
+        first = _result(resolver.getHostByName("missing.example"))
+        second = _result(resolver.getHostByName("missing.example"))
+
+        assert first.check(DNSLookupError)
+        assert second.check(DNSLookupError)
+        assert stub.calls == ["missing.example"]
+        assert resolver.is_nxdomain("missing.example")
+        assert resolver.stats["negative_hit"] == 1
+
+    def test_temporary_failures_not_cached(self):
+        def flaky(name):
+            raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure")
+
+        resolver = _resolver(flaky)
+
+        assert _result(resolver.getHostByName("a.com")).check(DNSLookupError)
+        assert not resolver.is_nxdomain("a.com")
+        assert resolver.stats["failed"] == 1
+        assert len(resolver._entries) == 0
+
+    def test_concurrent_lookups_coalesced(self):
+        stub = StubResolve({"a.com": "10.0.0.1"})
+        resolver = _resolver(stub)
+        resolver.reactor.pool.hold = True
+
+        first = resolver.getHostByName("a.com")
+        second = resolver.getHostByName("a.com")
+        resolver.reactor.pool.release()
+
+        assert _result(first) == _result(second) == "10.0.0.1"
+        assert stub.calls == ["a.com"]
+        assert resolver.stats["coalesced"] == 1
+
+    def test_redis_tier_shared_between_processes(self):
+        redis = FakeRedis()
+        _result(_resolver(StubResolve({"a.com": "10.0.0.1"}), redis).getHostByName("a.com"))
+        _result(_resolver(StubResolve({}), redis).getHostByName("gone.example"))
+
+        stub = StubResolve({})
+        other = _resolver(stub, redis)
+        assert _result(other.getHostByName("a.com")) == "10.0.0.1"
+        assert _result(other.getHostByName("gone.example")).check(DNSLookupError)
+        assert stub.calls == []
+        assert redis.ttls["dns:gone.example"] == 3600
+        assert other.stats["redis_hit"] == 2
+
+    def test_lru_eviction(self):
+        resolver = _resolver(StubResolve({"a.com": "1.1.1.1", "b.com": "2.2.2.2"}), max_entries=1)
+        _result(resolver.getHostByName("a.com"))
+        _result(resolver.getHostByName("b.com"))
+
+        assert list(resolver._entries) == ["b.com"]
+        assert resolver.stats["evictions"] == 1
+
+    def test_prefetch_skips_cached_names(self):
+        stub = StubResolve({"a.com": "10.0.0.1", "b.com": "10.0.0.2"})
+        resolver = _resolver(stub)
+        _result(resolver.getHostByName("a.com"))
+
+        assert resolver.prefetch(["a.com", "b.com", "c.com"]) == 2
+        assert stub.calls == ["a.com", "b.com", "c.com"]
+        assert resolver.is_nxdomain("c.com")
+
+    def test_module_helpers_without_resolver(self):
+        with patch.object(dns, "_resolver", None):
+            assert dns.prefetch_hostnames(["a.com"]) == 0
+            assert not dns.is_nxdomain("a.com")
+
+
+class TestSpiderUnreachable:
+    """Test NXDOMAIN failures feed the unreachable domain status."""
+
+    def test_nxdomain_error_marks_domain_unreachable(self):
+        from crawler.spiders.discovery_spider import DiscoverySpider
+
+        spider = DiscoverySpider(seeds=None)
+        spider.enable_domain_tracking = True
+        failure = MagicMock()
+        failure.request.url = "https://missing.example/"
+        failure.value = DNSLookupError("missing.example")
+
+        with (
+            patch("crawler.spiders.discovery_spider.is_nxdomain", return_value=True),
+            patch.object(spider, "_log_crawl_entry"),
+        ):
+            spider.handle_error(failure)
+
+        assert "missing.example" in spider._unreachable_domains_canonical
@@ -9,9 +9,17 @@ Tests domain normalization rules including:
 - Subdomain handling
 """
 
+from unittest.mock import patch
+
 import pytest
 
-from processor.domain_canonicalization import canonicalize_domain, extract_domain_from_url
+from processor.domain_canonicalization import (
+    canonicalization_cache_info,
+    canonicalize_domain,
+    clear_canonicalization_cache,
+    extract_domain_from_url,
+    get_public_suffix_list,
+)
 
 
 class TestCanonicalizeDomain:
@@ -98,6 +106,48 @@ class TestCanonicalizeDomain:
             canonicalize_domain("")
 
 
+class TestCanonicalizationCache:
+    """Test memoization and fast paths of canonicalization."""
+
+    def setup_method(self):
+        clear_canonicalization_cache()
+
+    def test_urls_on_same_host_share_cache_entry(self):
+        """Test that different paths on one host hit the same cache entry."""
+        assert canonicalize_domain("https://example.com/a") == "example.com"
+        assert canonicalize_domain("https://example.com/b?x=1") == "example.com"
+        assert canonicalize_domain("example.com") == "example.com"
+
+        info = canonicalization_cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+
+    def test_strip_subdomains_cached_separately(self):
+        """Test that strip_subdomains is part of the cache key."""
+        assert canonicalize_domain("blog.example.com") == "blog.example.com"
+        assert canonicalize_domain("blog.example.com", strip_subdomains=True) == "example.com"
+
+    def test_ascii_host_skips_idna(self):
+        """Test that ASCII hostnames do not go through the IDNA codec."""
+        with patch("processor.domain_canonicalization.idna.encode") as mock_encode:
+            assert canonicalize_domain("https://Blog.Example.com/") == "blog.example.com"
+
+        mock_encode.assert_not_called()
+
+    def test_non_ascii_host_uses_idna(self):
+        """Test that IDN hostnames are still converted to punycode."""
+        assert canonicalize_domain("https://München.de/path") == "xn--mnchen-3ya.de"
+
+    def test_invalid_ipv6_still_raises(self):
+        """Test that urlsplit validation is preserved for bracketed hosts."""
+        with pytest.raises(ValueError, match="Invalid URL"):
+            canonicalize_domain("https://[::1/path")
+
+    def test_public_suffix_list_is_shared(self):
+        """Test that the PSL trie is loaded once and reused."""
+        assert get_public_suffix_list() is get_public_suffix_list()
+
+
 class TestExtractDomainFromUrl:
     """Test domain extraction without full canonicalization."""
 
@@ -0,0 +1,117 @@
+"""Tests for the per-domain crawl state registry."""
+
+import uuid
+from unittest.mock import patch
+
+import pytest
+from scrapy.http import HtmlResponse, Request
+
+from crawler.domain_registry import DomainRegistry, DomainState
+from crawler.spiders.discovery_spider import DiscoverySpider
+
+
+class TestDomainState:
+    """Test DomainState record behavior."""
+
+    def test_uses_slots(self):
+        """Records should not carry a per-instance __dict__."""
+        state = DomainState("example.com")
+        assert not hasattr(state, "__dict__")
+        with pytest.raises(AttributeError):
+            state.unknown = 1  # type: ignore[attr-defined]
+
+    def test_unflushed_deltas_and_mark_flushed(self):
+        """Deltas are computed against the last flushed snapshot."""
+        state = DomainState("example.com")
+        state.pages, state.images_found, state.errors, state.links_discovered = 12, 30, 2, 40
+        assert state.unflushed_deltas() == (12, 30, 2, 40)
+
+        state.mark_flushed()
+        state.pages += 3
+        state.links_discovered += 5
+        assert state.unflushed_deltas() == (3, 0, 0, 5)
+
+    def test_has_stats(self):
+        """Only pages or errors count as recorded activity."""
+        state = DomainState("example.com")
+        assert not state.has_stats
+        state.errors = 1
+        assert state.has_stats
+
+
+class TestDomainRegistry:
+    """Test DomainRegistry lookups and claims."""
+
+    def test_get_or_create_returns_same_record(self):
+        """Repeated lookups return a single record per domain."""
+        registry = DomainRegistry()
+        first = registry.get_or_create("example.com")
+        assert registry.get_or_create("example.com") is first
+        assert registry.get("other.com") is None
+        assert len(registry) == 1
+
+    def test_claimed_lists_only_claimed_records(self):
+        """Only records holding a claim are returned by claimed()."""
+        registry = DomainRegistry()
+        domain_id = uuid.uuid4()
+        registry.get_or_create("unclaimed.com")
+        state = registry.claim("claimed.com", domain_id, 3)
+
+        assert registry.claimed() == [state]
+        assert state.domain_id == domain_id
+        assert state.version == 3
+        assert registry.has_claims()
+
+
+class TestSpiderRegistryIntegration:
+    """Test spider use of the registry."""
+
+    @pytest.fixture
+    def spider(self) -> DiscoverySpider:
+        spider = DiscoverySpider(seeds="config/test_seeds.txt")
+        spider.enable_domain_tracking = True
+        spider.enable_per_domain_budget = True
+        spider.max_pages_per_run = 5
+        return spider
+
+    def test_www_and_bare_host_share_state(self, spider):
+        """Pages and frontier are keyed by canonical domain."""
+        for host in ("www.example.com", "example.com"):
+            request = Request(url=f"https://{host}/", meta={"domain": host, "depth": 0})
+            response = HtmlResponse(
+                url=f"https://{host}/",
+                request=request,
+                body=b"<html><body>Test</body></html>",
+                headers={"Content-Type": "text/html"},
+            )
+            list(spider.parse(response))
+
+        spider.enqueue_url("www.example.com", "https://www.example.com/next", 1)
+
+        state = spider._domain_registry.get("example.com")
+        assert state.pages == 2
+        assert spider.get_frontier_size("example.com") == 1
+        assert len(spider._domain_registry) == 1
+
+    def test_flush_finds_claim_without_scanning(self, spider):
+        """Mid-crawl flush resolves domain_id from the record, not by canonicalizing claims."""
+        spider.enable_claim_protocol = True
+        spider.flush_interval = 10
+        domain_id = uuid.uuid4()
+        state = spider._domain_registry.claim("example.com", domain_id, 1)
+        state.pages = 10
+        state.images_found = 4
+
+        with (
+            patch("crawler.spiders.discovery_spider.canonicalize_domain") as mock_canonicalize,
+            patch(
+                "crawler.spiders.discovery_spider.increment_domain_stats_claimed",
+                return_value=True,
+            ) as mock_increment,
+        ):
+            spider._maybe_flush_domain_stats("example.com")
+
+        mock_canonicalize.assert_not_called()
+        assert mock_increment.call_args.kwargs["domain_id"] == domain_id
+        assert mock_increment.call_args.kwargs["pages_crawled_delta"] == 10
+        assert state.unflushed_deltas() == (0, 0, 0, 0)
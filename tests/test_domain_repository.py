@@ -15,8 +15,10 @@ from storage.domain_repository import (
     backfill_domains_from_crawl_log,
     get_domain,
     get_domain_stats_summary,
+    get_frontier_checkpoint_ids,
     update_domain_stats,
     upsert_domain,
+    upsert_domains,
 )
 
 
@@ -59,6 +61,60 @@ class TestUpsertDomain:
         assert result is False
 
 
+class TestBatchDomainOperations:
+    """Test batched seed-time domain operations."""
+
+    @patch("storage.domain_repository.execute_values")
+    @patch("storage.domain_repository.get_cursor")
+    def test_upsert_domains_single_statement(self, mock_get_cursor, mock_execute_values):
+        """A batch of domains is inserted with one multi-row statement."""
+        mock_cursor = MagicMock()
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+        mock_execute_values.return_value = [("id-1",)]
+
+        result = upsert_domains(["a.com", "b.com", "a.com"], "redis")
+
+        assert result == 1
+        mock_execute_values.assert_called_once()
+        args = mock_execute_values.call_args
+        assert "ON CONFLICT (domain) DO NOTHING" in args.args[1]
+        assert args.args[2] == [("a.com", "redis"), ("b.com", "redis")]
+
+    @patch("storage.domain_repository.get_cursor")
+    def test_upsert_domains_empty_batch_skips_db(self, mock_get_cursor):
+        """Empty batches do not touch the database."""
+        assert upsert_domains([], "redis") == 0
+        mock_get_cursor.assert_not_called()
+
+    @patch("storage.domain_repository.get_cursor")
+    def test_upsert_domains_handles_exception(self, mock_get_cursor):
+        """Errors are logged and reported as zero inserts."""
+        mock_get_cursor.side_effect = Exception("DB error")
+
+        assert upsert_domains(["a.com"], "redis") == 0
+
+    @patch("storage.domain_repository.get_cursor")
+    def test_get_frontier_checkpoint_ids(self, mock_get_cursor):
+        """Checkpoint IDs for a batch are fetched with a single ANY() query."""
+        mock_cursor = MagicMock()
+        mock_cursor.fetchall.return_value = [("a.com", "a.com:run-1")]
+        mock_get_cursor.return_value.__enter__.return_value = mock_cursor
+
+        result = get_frontier_checkpoint_ids(["a.com", "b.com"])
+
+        assert result == {"a.com": "a.com:run-1"}
+        mock_cursor.execute.assert_called_once()
+        assert "ANY(%s)" in mock_cursor.execute.call_args.args[0]
+        assert mock_cursor.execute.call_args.args[1] == (["a.com", "b.com"],)
+
+    @patch("storage.domain_repository.get_cursor")
+    def test_get_frontier_checkpoint_ids_handles_exception(self, mock_get_cursor):
+        """Errors degrade to "no checkpoints"."""
+        mock_get_cursor.side_effect = Exception("DB error")
+
+        assert get_frontier_checkpoint_ids(["a.com"]) == {}
+
+
 class TestUpdateDomainStats:
     """Test domain stats update operations."""
 
@@ -25,10 +25,18 @@ class TestDomainTrackingIntegration:
     @patch("crawler.spiders.discovery_spider.get_enable_domain_tracking")
     @patch("crawler.spiders.discovery_spider.get_enable_smart_scheduling")
     @patch("crawler.spiders.discovery_spider.get_enable_claim_protocol")
-    @patch("crawler.spiders.discovery_spider.upsert_domain")
+    @patch("crawler.spiders.discovery_spider.get_frontier_checkpoint_ids", return_value={})
+    @patch("crawler.spiders.discovery_spider.upsert_domains")
     @patch("crawler.spiders.discovery_spider.canonicalize_domain")
     def test_spider_upserts_domains_when_enabled(
-        self, mock_canonicalize, mock_upsert, mock_claim_protocol, mock_smart_scheduling, mock_get_enabled, seed_file
+        self,
+        mock_canonicalize,
+        mock_upsert,
+        mock_checkpoints,
+        mock_claim_protocol,
+        mock_smart_scheduling,
+        mock_get_enabled,
+        seed_file,
     ):
         """Test that spider upserts domains when tracking is enabled."""
         from crawler.spiders.discovery_spider import DiscoverySpider
@@ -43,16 +51,14 @@ class TestDomainTrackingIntegration:
         # Simulate starting requests
         list(spider.start_requests())
 
-        # Should have upserted domains
-        assert mock_upsert.called
-        # Check that upsert was called (with actual path which may vary)
-        assert mock_upsert.called
-        call_kwargs = mock_upsert.call_args.kwargs
-        assert call_kwargs["domain"] == "example.com"
-        assert call_kwargs["seed_rank"] is None
+        # Should have upserted the whole seed batch in one call
+        mock_upsert.assert_called_once()
+        domains = mock_upsert.call_args.args[0]
+        assert domains == ["example.com", "example.com"]
+        assert mock_upsert.call_args.kwargs["source"] == seed_file
 
     @patch("crawler.spiders.discovery_spider.get_enable_domain_tracking")
-    @patch("crawler.spiders.discovery_spider.upsert_domain")
+    @patch("crawler.spiders.discovery_spider.upsert_domains")
     def test_spider_skips_upsert_when_disabled(self, mock_upsert, mock_get_enabled, seed_file):
         """Test that spider skips upsert when tracking is disabled."""
         from crawler.spiders.discovery_spider import DiscoverySpider
@@ -90,9 +96,10 @@ class TestDomainTrackingIntegration:
         list(spider.parse(response))
 
         # Check that domain stats were tracked
-        assert "example.com" in spider._domain_stats
-        assert spider._domain_stats["example.com"]["pages"] == 1
-        assert spider._domain_stats["example.com"]["images_found"] == 1
+        state = spider._domain_registry.get("example.com")
+        assert state is not None
+        assert state.pages == 1
+        assert state.images_found == 1
 
     @patch("crawler.spiders.discovery_spider.get_enable_domain_tracking")
     @patch("crawler.spiders.discovery_spider.update_domain_stats")
@@ -110,7 +117,9 @@ class TestDomainTrackingIntegration:
         spider.crawl_run_id = "test-run-id"
 
         # Simulate domain stats from crawl
-        spider._domain_stats = {"example.com": {"pages": 5, "images_found": 20}}
+        state = spider._domain_registry.get_or_create("example.com")
+        state.pages = 5
+        state.images_found = 20
 
         # Close spider
         spider.closed("finished")
@@ -137,7 +146,6 @@ class TestDomainTrackingIntegration:
         mock_get_enabled.return_value = True
 
         spider = DiscoverySpider(seeds="test_seeds.txt")
-        spider._domain_stats = {}
 
         spider.closed("finished")
 
@@ -153,7 +161,7 @@ class TestDomainTrackingIntegration:
 
         spider = DiscoverySpider(seeds="test_seeds.txt")
         spider.crawl_run_id = "test-run-id"
-        spider._domain_stats = {"blocked.com": {"pages": 1, "images_found": 0}}
+        spider._domain_registry.get_or_create("blocked.com").pages = 1
         spider._blocked_domains_canonical.add("blocked.com")
 
         with patch("crawler.spiders.discovery_spider.update_domain_stats") as mock_update:
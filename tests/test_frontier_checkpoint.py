@@ -12,16 +12,57 @@ from storage.frontier_checkpoint import (
     checkpoint_exists,
     delete_checkpoint,
     get_checkpoint_size,
+    iter_checkpoint,
     load_checkpoint,
     save_checkpoint,
 )
 
 
+class FakeListRedis:
+    """Minimal in-memory Redis supporting the commands used by checkpoints."""
+
+    def __init__(self) -> None:
+        self.lists: dict[str, list[bytes]] = {}
+        self.expirations: dict[str, int] = {}
+        self.commands: list[str] = []
+
+    def pipeline(self) -> "FakeListRedis":
+        return self
+
+    def execute(self) -> list:
+        return []
+
+    def delete(self, key: str) -> int:
+        self.commands.append("delete")
+        return 1 if self.lists.pop(key, None) is not None else 0
+
+    def rpush(self, key: str, *values: bytes) -> int:
+        self.commands.append("rpush")
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    def expire(self, key: str, ttl: int) -> bool:
+        self.commands.append("expire")
+        self.expirations[key] = ttl
+        return True
+
+    def type(self, key: str) -> bytes:
+        return b"list" if key in self.lists else b"none"
+
+    def lrange(self, key: str, start: int, end: int) -> list[bytes]:
+        self.commands.append("lrange")
+        return self.lists.get(key, [])[start : end + 1]
+
+    def lindex(self, key: str, index: int) -> bytes | None:
+        items = self.lists.get(key, [])
+        return items[index] if index < len(items) else None
+
+
 class TestSaveCheckpoint:
     """Tests for save_checkpoint function."""
 
-    def test_save_checkpoint_creates_sorted_set(self):
-        """Checkpoint is saved as Redis sorted set with depth as score."""
+    def test_save_checkpoint_writes_compressed_batches(self):
+        """Checkpoint is written as a header plus compressed batches in one pipeline."""
         mock_redis = MagicMock()
         mock_pipeline = MagicMock()
         mock_redis.pipeline.return_value = mock_pipeline
@@ -37,13 +78,33 @@ class TestSaveCheckpoint:
         assert checkpoint_id == "example.com:run-123"
         # Verify pipeline was used
         mock_redis.pipeline.assert_called_once()
-        # Verify zadd was called for each URL
-        assert mock_pipeline.zadd.call_count == 3
+        # One DEL + one RPUSH regardless of URL count
+        mock_pipeline.delete.assert_called_once_with("frontier:example.com:run-123")
+        mock_pipeline.rpush.assert_called_once()
+        args = mock_pipeline.rpush.call_args.args
+        assert args[0] == "frontier:example.com:run-123"
+        assert args[1] == b"ckpt1 3"
+        assert len(args) == 3  # key, header, one batch
+        mock_pipeline.zadd.assert_not_called()
         # Verify expire was set
         mock_pipeline.expire.assert_called_once_with("frontier:example.com:run-123", 2592000)
         # Verify pipeline was executed
         mock_pipeline.execute.assert_called_once()
 
+    def test_save_checkpoint_splits_batches(self):
+        """Large frontiers are split into batch_size blobs."""
+        mock_redis = MagicMock()
+        mock_pipeline = MagicMock()
+        mock_redis.pipeline.return_value = mock_pipeline
+
+        urls = [{"url": f"https://example.com/p{i}", "depth": 1} for i in range(25)]
+
+        save_checkpoint("example.com", "run-123", urls, mock_redis, batch_size=10)
+
+        args = mock_pipeline.rpush.call_args.args
+        assert args[1] == b"ckpt1 25"
+        assert len(args) == 2 + 3  # key, header, three batches
+
     def test_save_checkpoint_with_custom_ttl(self):
         """Custom TTL is respected."""
         mock_redis = MagicMock()
@@ -66,15 +127,13 @@ class TestSaveCheckpoint:
 
         assert checkpoint_id == "example.com:run-123"
         # Early return: no pipeline operations for empty list
-        mock_pipeline.zadd.assert_not_called()
+        mock_pipeline.rpush.assert_not_called()
         mock_pipeline.expire.assert_not_called()
         mock_pipeline.execute.assert_not_called()
 
     def test_save_checkpoint_skips_invalid_entries(self):
         """Entries without 'url' key are skipped."""
-        mock_redis = MagicMock()
-        mock_pipeline = MagicMock()
-        mock_redis.pipeline.return_value = mock_pipeline
+        redis_client = FakeListRedis()
 
         urls = [
             {"url": "https://example.com/page1", "depth": 1},
@@ -82,10 +141,14 @@ class TestSaveCheckpoint:
             {"url": "https://example.com/page3"},  # Missing depth (default 0)
         ]
 
-        save_checkpoint("example.com", "run-123", urls, mock_redis)
+        save_checkpoint("example.com", "run-123", urls, redis_client)
 
-        # Only 2 valid URLs should be added
-        assert mock_pipeline.zadd.call_count == 2
+        # Only 2 valid URLs should be stored
+        assert get_checkpoint_size("example.com:run-123", redis_client) == 2
+        assert load_checkpoint("example.com:run-123", redis_client) == [
+            {"url": "https://example.com/page3", "depth": 0},
+            {"url": "https://example.com/page1", "depth": 1},
+        ]
 
     def test_save_checkpoint_raises_on_redis_error(self):
         """Redis errors are propagated."""
@@ -97,13 +160,82 @@ class TestSaveCheckpoint:
         with pytest.raises(Exception, match="Redis connection failed"):
             save_checkpoint("example.com", "run-123", urls, mock_redis)
 
+    def test_compressed_checkpoint_is_smaller_than_raw_urls(self):
+        """Stripping the shared prefix and compressing shrinks the payload."""
+        redis_client = FakeListRedis()
+        urls = [
+            {"url": f"https://example.com/category/products/item-{i}", "depth": 3}
+            for i in range(1000)
+        ]
+
+        save_checkpoint("example.com", "run-123", urls, redis_client)
+
+        stored = sum(len(v) for v in redis_client.lists["frontier:example.com:run-123"])
+        raw = sum(len(u["url"]) for u in urls)
+        assert stored < raw / 5
+
 
 class TestLoadCheckpoint:
-    """Tests for load_checkpoint function."""
+    """Tests for load_checkpoint and iter_checkpoint."""
+
+    def test_round_trip_preserves_depth_order(self):
+        """URLs are returned ordered by depth, stable within a depth level."""
+        redis_client = FakeListRedis()
+        urls = [
+            {"url": "https://example.com/page2", "depth": 2},
+            {"url": "https://example.com/page1", "depth": 1},
+            {"url": "https://example.com/page3", "depth": 1},
+        ]
 
-    def test_load_checkpoint_returns_ordered_urls(self):
-        """URLs are returned ordered by depth (BFS order)."""
+        save_checkpoint("example.com", "run-123", urls, redis_client)
+        result = load_checkpoint("example.com:run-123", redis_client)
+
+        assert result == [
+            {"url": "https://example.com/page1", "depth": 1},
+            {"url": "https://example.com/page3", "depth": 1},
+            {"url": "https://example.com/page2", "depth": 2},
+        ]
+
+    def test_iter_checkpoint_is_lazy(self):
+        """Batches are fetched on demand, not all at once."""
+        redis_client = FakeListRedis()
+        urls = [{"url": f"https://example.com/p{i}", "depth": i} for i in range(100)]
+        save_checkpoint("example.com", "run-123", urls, redis_client, batch_size=5)
+        redis_client.commands.clear()
+
+        iterator = iter_checkpoint("example.com:run-123", redis_client)
+        first = next(iterator)
+
+        assert first == {"url": "https://example.com/p0", "depth": 0}
+        assert redis_client.commands == ["lrange"]
+
+        rest = list(iterator)
+        assert len(rest) == 99
+        assert rest[-1] == {"url": "https://example.com/p99", "depth": 99}
+
+    def test_round_trip_mixed_hosts(self):
+        """Batches without a long shared prefix still round-trip."""
+        redis_client = FakeListRedis()
+        urls = [
+            {"url": "https://a.example.com/x", "depth": 1},
+            {"url": "http://b.example.org/y?q=1", "depth": 1},
+        ]
+
+        save_checkpoint("example.com", "run-123", urls, redis_client)
+
+        assert load_checkpoint("example.com:run-123", redis_client) == urls
+
+    def test_load_missing_checkpoint_returns_empty(self):
+        """Missing key yields nothing."""
+        redis_client = FakeListRedis()
+
+        assert load_checkpoint("example.com:run-123", redis_client) == []
+        assert get_checkpoint_size("example.com:run-123", redis_client) == 0
+
+    def test_load_legacy_checkpoint_returns_ordered_urls(self):
+        """Legacy sorted-set checkpoints are still readable."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         # Redis returns list of (member, score) tuples
         mock_redis.zrange.return_value = [
             (b"https://example.com/page1", 1.0),
@@ -118,9 +250,10 @@ class TestLoadCheckpoint:
         assert result[1] == {"url": "https://example.com/page3", "depth": 1}
         assert result[2] == {"url": "https://example.com/page2", "depth": 2}
 
-    def test_load_checkpoint_handles_string_members(self):
+    def test_load_legacy_checkpoint_handles_string_members(self):
         """Handles both bytes and string members from Redis."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = "zset"
         mock_redis.zrange.return_value = [
             ("https://example.com/page1", 1.0),  # String instead of bytes
             (b"https://example.com/page2", 2.0),
@@ -131,30 +264,23 @@ class TestLoadCheckpoint:
         assert result[0]["url"] == "https://example.com/page1"
         assert result[1]["url"] == "https://example.com/page2"
 
-    def test_load_checkpoint_empty_checkpoint(self):
-        """Empty checkpoint returns empty list."""
-        mock_redis = MagicMock()
-        mock_redis.zrange.return_value = []
-
-        result = load_checkpoint("example.com:run-123", mock_redis)
-
-        assert result == []
-
-    def test_load_checkpoint_uses_correct_key(self):
-        """Correct Redis key format is used."""
+    def test_load_legacy_checkpoint_uses_correct_key(self):
+        """Correct Redis key format is used and legacy sets are paged."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         mock_redis.zrange.return_value = []
 
         load_checkpoint("example.com:run-123", mock_redis)
 
+        mock_redis.type.assert_called_once_with("frontier:example.com:run-123")
         mock_redis.zrange.assert_called_once_with(
-            "frontier:example.com:run-123", 0, -1, withscores=True
+            "frontier:example.com:run-123", 0, 999, withscores=True
         )
 
     def test_load_checkpoint_raises_on_redis_error(self):
         """Redis errors are propagated."""
         mock_redis = MagicMock()
-        mock_redis.zrange.side_effect = Exception("Redis connection failed")
+        mock_redis.type.side_effect = Exception("Redis connection failed")
 
         with pytest.raises(Exception, match="Redis connection failed"):
             load_checkpoint("example.com:run-123", mock_redis)
@@ -229,6 +355,7 @@ class TestGetCheckpointSize:
     def test_get_checkpoint_size_returns_count(self):
         """Returns number of URLs in checkpoint."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         mock_redis.zcard.return_value = 42
 
         result = get_checkpoint_size("example.com:run-123", mock_redis)
@@ -236,9 +363,20 @@ class TestGetCheckpointSize:
         assert result == 42
         mock_redis.zcard.assert_called_once_with("frontier:example.com:run-123")
 
+    def test_get_checkpoint_size_reads_compressed_header(self):
+        """Compressed checkpoints report size from the header without decoding."""
+        redis_client = FakeListRedis()
+        urls = [{"url": f"https://example.com/p{i}", "depth": 1} for i in range(42)]
+        save_checkpoint("example.com", "run-123", urls, redis_client, batch_size=10)
+        redis_client.commands.clear()
+
+        assert get_checkpoint_size("example.com:run-123", redis_client) == 42
+        assert "lrange" not in redis_client.commands
+
     def test_get_checkpoint_size_returns_zero_when_empty(self):
         """Returns 0 when checkpoint is empty."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         mock_redis.zcard.return_value = 0
 
         result = get_checkpoint_size("example.com:run-123", mock_redis)
@@ -248,6 +386,7 @@ class TestGetCheckpointSize:
     def test_get_checkpoint_size_returns_zero_when_not_exists(self):
         """Returns 0 when checkpoint doesn't exist."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         mock_redis.zcard.return_value = None
 
         result = get_checkpoint_size("example.com:run-123", mock_redis)
@@ -257,6 +396,7 @@ class TestGetCheckpointSize:
     def test_get_checkpoint_size_returns_zero_on_error(self):
         """Returns 0 on Redis error (graceful degradation)."""
         mock_redis = MagicMock()
+        mock_redis.type.return_value = b"zset"
         mock_redis.zcard.side_effect = Exception("Redis connection failed")
 
         result = get_checkpoint_size("example.com:run-123", mock_redis)
@@ -269,9 +409,7 @@ class TestCheckpointIntegration:
 
     def test_full_checkpoint_lifecycle(self):
         """Save, load, and delete a checkpoint."""
-        mock_redis = MagicMock()
-        mock_pipeline = MagicMock()
-        mock_redis.pipeline.return_value = mock_pipeline
+        redis_client = FakeListRedis()
 
         urls = [
             {"url": "https://example.com/page1", "depth": 1},
@@ -279,27 +417,17 @@ class TestCheckpointIntegration:
         ]
 
         # Save
-        checkpoint_id = save_checkpoint("example.com", "run-123", urls, mock_redis)
+        checkpoint_id = save_checkpoint("example.com", "run-123", urls, redis_client)
         assert checkpoint_id == "example.com:run-123"
 
-        # Reset mock for load
-        mock_redis.reset_mock()
-        mock_redis.zrange.return_value = [
-            (b"https://example.com/page1", 1.0),
-            (b"https://example.com/page2", 2.0),
-        ]
-
         # Load
-        loaded = load_checkpoint(checkpoint_id, mock_redis)
-        assert len(loaded) == 2
-
-        # Reset mock for delete
-        mock_redis.reset_mock()
-        mock_redis.delete.return_value = 1
+        loaded = load_checkpoint(checkpoint_id, redis_client)
+        assert loaded == urls
 
         # Delete
-        deleted = delete_checkpoint(checkpoint_id, mock_redis)
+        deleted = delete_checkpoint(checkpoint_id, redis_client)
         assert deleted is True
+        assert load_checkpoint(checkpoint_id, redis_client) == []
 
     def test_checkpoint_survives_empty_url_list(self):
         """Checkpoint can be saved with empty URL list."""
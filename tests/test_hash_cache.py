@@ -0,0 +1,219 @@
+"""Tests for the sha256 -> image_id cache and its pipeline short-circuit."""
+
+import hashlib
+import io
+import uuid
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+from scrapy.http import Request, Response
+
+from processor.async_fetcher import ScrapyImageDownloader
+from processor.fetcher import ImageFetchResult
+from storage.hash_cache import ImageHashCache
+
+SHA_A = "a" * 64
+SHA_B = "b" * 64
+SHA_C = "c" * 64
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the few Redis calls the cache makes."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class TestImageHashCache:
+    """Test LRU behaviour and the Redis tier."""
+
+    def test_lru_eviction(self):
+        cache = ImageHashCache(max_entries=2)
+        ids = [uuid.uuid4() for _ in range(3)]
+        cache.put(SHA_A, ids[0])
+        cache.put(SHA_B, ids[1])
+        assert cache.get(SHA_A) == str(ids[0])  # A is now most recent
+        cache.put(SHA_C, ids[2])
+
+        assert cache.get(SHA_B) is None
+        assert cache.get(SHA_A) == str(ids[0])
+        assert len(cache) == 2
+        assert cache.stats["evictions"] == 1
+
+    def test_malformed_hash_ignored(self):
+        cache = ImageHashCache(max_entries=10)
+        cache.put("not-hex", uuid.uuid4())
+        cache.put(SHA_A, "not-a-uuid")
+        assert len(cache) == 0
+        assert cache.get("not-hex") is None
+
+    def test_redis_tier_shared_between_caches(self):
+        redis = FakeRedis()
+        image_id = uuid.uuid4()
+        ImageHashCache(10, redis_client=redis).put(SHA_A, image_id)
+
+        other = ImageHashCache(10, redis_client=redis)
+        assert other.get(SHA_A) == str(image_id)
+        assert other.stats["redis_hits"] == 1
+        # Promoted to the local tier
+        assert other.get(SHA_A) == str(image_id)
+        assert other.stats["hits"] == 1
+
+        other.discard(SHA_A)
+        assert redis.data == {}
+
+    def test_redis_errors_are_misses(self):
+        redis = MagicMock()
+        redis.get.side_effect = ConnectionError("down")
+        cache = ImageHashCache(10, redis_client=redis)
+
+        assert cache.get(SHA_A) is None
+        assert cache.stats["redis_errors"] == 1
+        assert cache.stats["misses"] == 1
+
+    @patch("storage.hash_cache.get_recent_image_hashes")
+    def test_warm_loads_recent_rows(self, mock_recent):
+        ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+        mock_recent.return_value = [(SHA_A, ids[0]), (SHA_B, ids[1])]
+        cache = ImageHashCache(max_entries=1)
+
+        assert cache.warm(100, ["example.com"]) == 2
+        mock_recent.assert_called_once_with(1, ["example.com"])
+        # Newest row (first returned) survives
+        assert cache.get(SHA_A) == ids[0]
+
+
+def _png_response(url: str) -> Response:
+    buffer = io.BytesIO()
+    Image.new("RGB", (300, 300), (200, 10, 10)).save(buffer, format="PNG")
+    return Response(
+        url=url,
+        status=200,
+        headers={"Content-Type": "image/png"},
+        body=buffer.getvalue(),
+        request=Request(url),
+    )
+
+
+class TestKnownContentShortCircuit:
+    """Test that known content skips perceptual hashing and the hash SELECT."""
+
+    def test_downloader_skips_perceptual_hashes_for_known_content(self):
+        downloader = ScrapyImageDownloader(min_file_size=10)
+        response = _png_response("https://example.com/a.png")
+
+        result = downloader.process_response(response.url, response, known_content=lambda _: True)
+
+        assert result.success
+        assert result.sha256_hash == hashlib.sha256(response.body).hexdigest()
+        assert result.phash_hash is None
+
+        downloader.compute_perceptual_hashes(result)
+        assert result.phash_hash is not None
+
+    def test_cache_hit_skips_hash_select(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        image_id = str(uuid.uuid4())
+        pipeline = ImageProcessingPipeline()
+        pipeline.hash_cache = ImageHashCache(10)
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None  # URL not stored yet
+        cursor.rowcount = 1
+        fetch_result = ImageFetchResult(
+            success=True, url="https://cdn.example/a.png", sha256_hash=SHA_A
+        )
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = cursor
+            result = pipeline._store_image_metadata(
+                url="https://cdn.example/a.png",
+                source_page="https://example.com/",
+                source_domain="example.com",
+                fetch_result=fetch_result,
+                known_image_id=image_id,
+            )
+
+        assert result == {"status": "deduplicated", "image_id": image_id, "file_size": 0}
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert not any("WHERE sha256_hash" in sql for sql in statements)
+
+    def test_stale_cache_entry_falls_back_to_select(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        pipeline = ImageProcessingPipeline()
+        pipeline.hash_cache = ImageHashCache(10)
+        stale_id = str(uuid.uuid4())
+        new_id = uuid.uuid4()
+        pipeline.hash_cache.put(SHA_A, stale_id)
+        pipeline.downloader = MagicMock()
+        cursor = MagicMock()
+        cursor.rowcount = 0  # cached image row is gone
+        cursor.fetchone.side_effect = [None, None, (new_id,)]
+        fetch_result = ImageFetchResult(
+            success=True, url="https://cdn.example/a.png", sha256_hash=SHA_A
+        )
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = cursor
+            result = pipeline._store_image_metadata(
+                url="https://cdn.example/a.png",
+                source_page="https://example.com/",
+                source_domain="example.com",
+                fetch_result=fetch_result,
+                known_image_id=stale_id,
+            )
+
+        assert result["status"] == "downloaded"
+        # Perceptual hashes computed now that the content turned out to be new
+        pipeline.downloader.compute_perceptual_hashes.assert_called_once_with(fetch_result)
+        assert pipeline.hash_cache.get(SHA_A) == str(new_id)
+
+    def test_dedup_stage_miss_skips_second_select(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        pipeline = ImageProcessingPipeline()
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [None, ("new-id",)]  # URL lookup, INSERT
+        fetch_result = ImageFetchResult(
+            success=True, url="https://cdn.example/a.png", sha256_hash=SHA_A
+        )
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = cursor
+            result = pipeline._store_image_metadata(
+                url="https://cdn.example/a.png",
+                source_page="https://example.com/",
+                source_domain="example.com",
+                fetch_result=fetch_result,
+                hash_checked=True,
+            )
+
+        assert result["status"] == "downloaded"
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert not any("WHERE sha256_hash" in sql for sql in statements)
+
+    def test_lookup_image_by_hash_populates_cache(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        image_id = uuid.uuid4()
+        pipeline = ImageProcessingPipeline()
+        pipeline.hash_cache = ImageHashCache(10)
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (image_id,)
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            mock_get_cursor.return_value.__enter__.return_value = cursor
+            assert pipeline._lookup_image_by_hash(SHA_A) == (True, str(image_id))
+            assert pipeline._lookup_image_by_hash(SHA_A) == (True, str(image_id))
+
+        assert cursor.execute.call_count == 1
@@ -0,0 +1,117 @@
+"""Tests for the HTTP/2 image download handler."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from scrapy.exceptions import DownloadFailedError, DownloadTimeoutError
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+from twisted.python.failure import Failure
+from twisted.web.client import ResponseFailed
+
+from crawler.http2 import ImageHttp2DownloadHandler
+from crawler.lanes import IMAGE_LANE
+
+
+def _handler(enabled=True, max_streams=100):
+    crawler = get_crawler()
+    crawler.stats.open_spider()
+    with (
+        patch("crawler.http2.get_enable_http2_images", return_value=enabled),
+        patch("crawler.http2.get_http2_max_concurrent_streams", return_value=max_streams),
+        patch("crawler.http2.build_from_crawler", side_effect=lambda *_: AsyncMock()),
+    ):
+        handler = ImageHttp2DownloadHandler(crawler)
+    handler._http11.download_request.side_effect = lambda request: Response(request.url)
+    if enabled:
+        handler._h2.download_request.side_effect = lambda request: Response(request.url)
+    return handler
+
+
+def _image(url="https://cdn.a.net/a.jpg"):
+    return Request(url, meta={"lane": IMAGE_LANE})
+
+
+def _download_failure(reason):
+    """DownloadFailedError chained from ResponseFailed, as Scrapy raises it."""
+    error = DownloadFailedError("failed")
+    error.__cause__ = ResponseFailed([Failure(reason)])
+    return error
+
+
+class TestImageHttp2DownloadHandler:
+    """Test routing, stream limits and HTTP/1.1 fallback."""
+
+    def test_images_use_http2_pages_use_http11(self):
+        handler = _handler()
+
+        asyncio.run(handler.download_request(_image()))
+        asyncio.run(handler.download_request(Request("https://a.com/page")))
+        asyncio.run(handler.download_request(_image("http://cdn.a.net/a.jpg")))
+
+        assert handler._h2.download_request.call_count == 1
+        assert handler._http11.download_request.call_count == 2
+        assert handler.crawler.stats.get_value("http2/requests") == 1
+
+    def test_disabled_uses_http11(self):
+        handler = _handler(enabled=False)
+
+        asyncio.run(handler.download_request(_image()))
+
+        assert handler._h2 is None
+        handler._http11.download_request.assert_called_once()
+
+    def test_host_without_http2_falls_back(self):
+        handler = _handler()
+        handler._h2.download_request.side_effect = _download_failure(ConnectionError("alert"))
+
+        response = asyncio.run(handler.download_request(_image()))
+        asyncio.run(handler.download_request(_image("https://cdn.a.net/b.jpg")))
+
+        assert response.url == "https://cdn.a.net/a.jpg"
+        assert handler._h2.download_request.call_count == 1
+        assert handler._http11.download_request.call_count == 2
+        stats = handler.crawler.stats
+        assert stats.get_value("http2/fallback_hosts") == 1
+        assert stats.get_value("http2/fallback_requests") == 1
+
+    def test_failures_on_http2_host_are_raised(self):
+        handler = _handler()
+        asyncio.run(handler.download_request(_image()))
+        handler._h2.download_request.side_effect = _download_failure(ConnectionError("reset"))
+
+        with pytest.raises(DownloadFailedError):
+            asyncio.run(handler.download_request(_image("https://cdn.a.net/b.jpg")))
+        handler._http11.download_request.assert_not_called()
+
+    def test_timeouts_do_not_fall_back(self):
+        handler = _handler()
+        handler._h2.download_request.side_effect = DownloadTimeoutError("slow")
+
+        with pytest.raises(DownloadTimeoutError):
+            asyncio.run(handler.download_request(_image()))
+        assert "cdn.a.net" not in handler._http11_hosts
+
+    def test_streams_limited_per_host(self):
+        handler = _handler(max_streams=2)
+        active = {"now": 0, "max": 0}
+
+        async def download(request):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0)
+            active["now"] -= 1
+            return Response(request.url)
+
+        handler._h2.download_request.side_effect = download
+
+        async def run():
+            await asyncio.gather(
+                *(handler.download_request(_image(f"https://cdn.a.net/{i}.jpg")) for i in range(6))
+            )
+
+        asyncio.run(run())
+
+        assert active["max"] == 2
+        assert handler._h2.download_request.call_count == 6
@@ -0,0 +1,128 @@
+"""Tests for the separate page/image download lanes."""
+
+from unittest.mock import MagicMock, patch
+
+from scrapy import Spider
+from scrapy.http import Request, Response
+from scrapy.utils.httpobj import urlparse_cached
+from scrapy.utils.test import get_crawler
+
+from crawler.lanes import IMAGE_LANE, ImageLaneMiddleware, LaneScheduler
+
+
+def _page(n):
+    return Request(f"https://a.com/page{n}")
+
+
+def _image(n, host="cdn.a.net"):
+    return Request(f"https://{host}/img{n}.jpg", meta={"lane": IMAGE_LANE})
+
+
+def _scheduler(page_budget=2, image_budget=1):
+    crawler = get_crawler(Spider)
+    crawler.stats.open_spider()
+    crawler.engine = MagicMock()
+    crawler.engine.downloader.active = set()
+    crawler.engine.downloader.slots = {}
+    crawler.engine.downloader.get_slot_key = lambda request: request.meta.get(
+        "download_slot", urlparse_cached(request).hostname
+    )
+    scheduler = LaneScheduler.from_crawler(crawler)
+    with (
+        patch("crawler.lanes.get_scrapy_concurrent_requests", return_value=page_budget),
+        patch("crawler.lanes.get_image_concurrent_requests", return_value=image_budget),
+    ):
+        scheduler.open(Spider.from_crawler(crawler, name="test"))
+    return scheduler
+
+
+class TestLaneScheduler:
+    """Test lane queues, budgets and alternation."""
+
+    def test_lanes_alternate_when_both_have_room(self):
+        scheduler = _scheduler(page_budget=5, image_budget=5)
+        for n in range(2):
+            scheduler.enqueue_request(_page(n))
+            scheduler.enqueue_request(_image(n))
+
+        hosts = [urlparse_cached(scheduler.next_request()).hostname for _ in range(4)]
+
+        assert hosts == ["a.com", "cdn.a.net", "a.com", "cdn.a.net"]
+        assert len(scheduler) == 0
+        assert scheduler.stats.get_value("scheduler/dequeued/image") == 2
+
+    def test_full_image_budget_does_not_block_pages(self):
+        scheduler = _scheduler(page_budget=2, image_budget=1)
+        scheduler.crawler.engine.downloader.active = {_image(0)}
+        scheduler.enqueue_request(_image(1))
+        scheduler.enqueue_request(_page(0))
+
+        assert scheduler.next_request().url == "https://a.com/page0"
+        assert scheduler.next_request() is None
+        assert len(scheduler) == 1
+
+    def test_full_page_budget_does_not_block_images(self):
+        scheduler = _scheduler(page_budget=1, image_budget=1)
+        scheduler.crawler.engine.downloader.active = {_page(9)}
+        scheduler.enqueue_request(_page(0))
+        scheduler.enqueue_request(_image(0))
+
+        assert scheduler.next_request().url == "https://cdn.a.net/img0.jpg"
+        assert scheduler.next_request() is None
+
+    def test_image_duplicates_filtered(self):
+        scheduler = _scheduler()
+
+        request = _image(0)
+        assert scheduler.enqueue_request(request)
+        assert not scheduler.enqueue_request(_image(0))
+        assert request.meta["download_slot"] == "img:cdn.a.net"
+        assert scheduler.stats.get_value("scheduler/enqueued/image") == 1
+
+
+class TestImageLaneMiddleware:
+    """Test image slot routing and lane stats."""
+
+    def _middleware(self):
+        crawler = get_crawler()
+        crawler.stats.open_spider()
+        crawler.engine = MagicMock()
+        crawler.engine.downloader.per_slot_settings = {}
+        with (
+            patch("crawler.lanes.get_image_concurrent_requests_per_host", return_value=6),
+            patch("crawler.lanes.get_image_download_delay", return_value=0.0),
+        ):
+            return ImageLaneMiddleware(crawler)
+
+    def test_image_requests_use_image_host_slot(self):
+        middleware = self._middleware()
+        request = _image(0)
+
+        middleware.process_request(request)
+
+        assert request.meta["download_slot"] == "img:cdn.a.net"
+        per_slot = middleware.crawler.engine.downloader.per_slot_settings
+        assert per_slot["img:cdn.a.net"] == {"concurrency": 6, "delay": 0.0}
+
+    def test_page_requests_keep_default_slot(self):
+        middleware = self._middleware()
+        request = _page(0)
+
+        middleware.process_request(request)
+
+        assert "download_slot" not in request.meta
+        assert middleware.crawler.engine.downloader.per_slot_settings == {}
+
+    def test_stats_per_lane(self):
+        middleware = self._middleware()
+        image, page = _image(0), _page(0)
+        for request in (image, page):
+            middleware.process_request(request)
+        middleware.process_response(image, Response(image.url, body=b"12345"))
+        middleware.process_exception(page, TimeoutError())
+
+        stats = middleware.stats
+        assert stats.get_value("lanes/image/request_count") == 1
+        assert stats.get_value("lanes/image/response_bytes") == 5
+        assert stats.get_value("lanes/page/request_count") == 1
+        assert stats.get_value("lanes/page/exception_count") == 1
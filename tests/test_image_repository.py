@@ -0,0 +1,109 @@
+"""Tests for images table helpers and BIGINT perceptual hash writes."""
+
+import uuid
+from unittest.mock import MagicMock, patch
+
+from processor.fetcher import ImageFetchResult
+
+
+def _mock_cursor_context(mock_get_cursor, cursor):
+    mock_get_cursor.return_value.__enter__.return_value = cursor
+
+
+class TestBackfillHashInts:
+    """Test batched BIGINT backfill."""
+
+    @patch("storage.image_repository.get_cursor")
+    def test_walks_tables_in_keyset_batches(self, mock_get_cursor):
+        from storage.image_repository import backfill_hash_ints
+
+        ids = [uuid.UUID(int=i) for i in range(1, 4)]
+        cursor = MagicMock()
+        # images: one full batch of 2, then a short batch of 1; image_assets: empty
+        cursor.fetchall.side_effect = [[(ids[0],), (ids[1],)], [(ids[2],)], []]
+        cursor.rowcount = 0
+        _mock_cursor_context(mock_get_cursor, cursor)
+
+        def execute(sql, params=None):
+            if sql.lstrip().startswith("UPDATE"):
+                cursor.rowcount = len(params[0])
+
+        cursor.execute.side_effect = execute
+
+        result = backfill_hash_ints(batch_size=2)
+
+        assert result == {"images": 3, "image_assets": 0}
+        selects = [
+            c for c in cursor.execute.call_args_list if c.args[0].lstrip().startswith("SELECT")
+        ]
+        # Second images batch resumes after the last id of the first
+        assert selects[1].args[1] == (str(ids[1]), 2)
+        assert "FROM image_assets" in selects[2].args[0]
+
+
+class TestFindImage:
+    """Test that find_image queries by ID or hash, never both."""
+
+    @patch("storage.image_repository.get_cursor")
+    def test_uuid_reference_queries_primary_key(self, mock_get_cursor):
+        from storage.image_repository import find_image
+
+        image_id = uuid.uuid4()
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (image_id, "http://x/a.jpg", "ab" * 32, None, None)
+        _mock_cursor_context(mock_get_cursor, cursor)
+
+        image = find_image(str(image_id).upper())
+
+        sql, params = cursor.execute.call_args.args
+        assert "WHERE id = %s" in sql
+        assert "sha256_hash =" not in sql
+        assert params == (str(image_id),)
+        assert image is not None and image["id"] == str(image_id)
+
+    @patch("storage.image_repository.get_cursor")
+    def test_hash_reference_queries_sha256(self, mock_get_cursor):
+        from storage.image_repository import find_image
+
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+        _mock_cursor_context(mock_get_cursor, cursor)
+
+        assert find_image("AB" * 32) is None
+
+        sql, params = cursor.execute.call_args.args
+        assert "WHERE sha256_hash = %s" in sql
+        assert "id::text" not in sql
+        assert params == ("ab" * 32,)
+
+
+class TestPipelineHashWrites:
+    """Test that the pipeline writes integer hashes alongside hex."""
+
+    def test_insert_includes_bigint_hashes(self):
+        from crawler.pipelines import ImageProcessingPipeline
+
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [None, None, ("new-id",)]
+        pipeline = ImageProcessingPipeline()
+        fetch_result = ImageFetchResult(
+            success=True,
+            url="https://example.com/a.jpg",
+            sha256_hash="a" * 64,
+            phash_hash="ffffffffffffffff",
+            dhash_hash="0000000000000010",
+        )
+
+        with patch("crawler.pipelines.get_cursor") as mock_get_cursor:
+            _mock_cursor_context(mock_get_cursor, cursor)
+            result = pipeline._store_image_metadata(
+                url="https://example.com/a.jpg",
+                source_page="https://example.com/",
+                source_domain="example.com",
+                fetch_result=fetch_result,
+            )
+
+        assert result["status"] == "downloaded"
+        insert = next(c for c in cursor.execute.call_args_list if "INSERT INTO images" in c.args[0])
+        assert insert.args[0].count("%s") == len(insert.args[1])
+        assert insert.args[1][-2:] == (-1, 16)
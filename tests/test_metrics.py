@@ -0,0 +1,163 @@
+"""Tests for the metrics registry and the /metrics endpoint."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+from twisted.web.test.requesthelper import DummyRequest
+
+from crawler import metrics
+from crawler.domain_registry import DomainRegistry
+from crawler.lanes import IMAGE_LANE
+from crawler.metrics import MetricsRegistry
+from crawler.metrics_server import MetricsResource, MetricsServer
+from crawler.pipelines import ImageProcessingPipeline
+
+
+def _server():
+    crawler = get_crawler()
+    crawler.engine = MagicMock()
+    crawler.engine.downloader.active = set()
+    with patch("crawler.metrics_server.get_enable_metrics", return_value=True):
+        return MetricsServer(crawler)
+
+
+class TestMetricsRegistry:
+    """Test recording and text exposition."""
+
+    def test_metric_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            metrics.Metric("base", "Base")  # type: ignore[abstract]
+
+    def test_counter_and_gauge_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("pages_total", "Pages", ("lane",))
+        gauge = registry.gauge("queue_size", "Queue")
+        counter.inc("page")
+        counter.inc("page", amount=2)
+        counter.inc('we"ird')
+        gauge.set(4.5)
+
+        text = registry.render()
+
+        assert "# TYPE pages_total counter" in text
+        assert 'pages_total{lane="page"} 3' in text
+        assert 'pages_total{lane="we\\"ird"} 1' in text
+        assert "# TYPE queue_size gauge\nqueue_size 4.5" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("stage",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "hash")
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{stage="hash",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{stage="hash",le="1"} 3' in text
+        assert 'latency_seconds_bucket{stage="hash",le="+Inf"} 4' in text
+        assert 'latency_seconds_sum{stage="hash"} 3.65' in text
+        assert 'latency_seconds_count{stage="hash"} 4' in text
+
+    def test_callback_read_at_render_and_failures_isolated(self):
+        registry = MetricsRegistry()
+        frontier = registry.gauge("frontier", "Frontier", ("queue",))
+        broken = registry.gauge("broken", "Broken")
+        source = {"deferred": 3}
+        frontier.set_callback(lambda: {("deferred",): source["deferred"]})
+        broken.set_callback(lambda: 1 / 0)
+        source["deferred"] = 7
+
+        text = registry.render()
+
+        assert 'frontier{queue="deferred"} 7' in text
+        assert "# broken unavailable" in text
+
+    def test_labels_must_match(self):
+        counter = MetricsRegistry().counter("x_total", "X", ("lane",))
+
+        with pytest.raises(ValueError):
+            counter.inc()
+
+
+class TestMetricsServer:
+    """Test the extension's signal handlers, gauges and resource."""
+
+    def test_disabled_by_default(self):
+        with pytest.raises(NotConfigured):
+            MetricsServer(get_crawler())
+
+    def test_downloads_counted_per_lane(self):
+        server = _server()
+        page = Request("https://a.com/", meta={"download_latency": 0.2})
+        image = Request("https://cdn.a.net/a.jpg", meta={"lane": IMAGE_LANE})
+        failed = Request("https://b.com/")
+        before = (
+            metrics.RESPONSES.get("page", "2xx"),
+            metrics.RESPONSE_BYTES.get("image"),
+            metrics.DOWNLOAD_ERRORS.get("page"),
+            metrics.DOWNLOAD_SECONDS.count("page"),
+        )
+
+        server.response_downloaded(Response(page.url, body=b"<html>"), page, None)
+        server.response_downloaded(Response(image.url, status=404, body=b"xyz"), image, None)
+        server.request_left_downloader(page, None)
+        server.request_left_downloader(failed, None)
+
+        assert metrics.RESPONSES.get("page", "2xx") == before[0] + 1
+        assert metrics.RESPONSES.get("image", "4xx") >= 1
+        assert metrics.RESPONSE_BYTES.get("image") == before[1] + 3
+        assert metrics.DOWNLOAD_ERRORS.get("page") == before[2] + 1
+        assert metrics.DOWNLOAD_SECONDS.count("page") == before[3] + 1
+
+    def test_crawl_state_gauges(self):
+        server = _server()
+        spider = MagicMock()
+        spider._domain_registry = DomainRegistry()
+        spider._domain_registry.get_or_create("a.com").frontier.extend([{"url": "u"}] * 3)
+        spider._domain_registry.claim("b.com", MagicMock(), 1)
+        server.crawler.engine.scheduler.__len__.return_value = 5
+        server.crawler.engine.downloader.active = {
+            Request("https://a.com/"),
+            Request("https://cdn.a.net/a.jpg", meta={"lane": IMAGE_LANE}),
+        }
+
+        with patch("crawler.metrics_server.listen_tcp") as listen:
+            server.spider_opened(spider)
+        try:
+            assert metrics.FRONTIER_SIZE.get("scheduler") == 5
+            assert metrics.FRONTIER_SIZE.get("deferred") == 3
+            assert metrics.CLAIMED_DOMAINS.get() == 1
+            assert metrics.IN_FLIGHT.get("image") == 1
+        finally:
+            server.spider_closed(spider)
+        listen.return_value.stopListening.assert_called_once()
+        assert metrics.FRONTIER_SIZE.get("deferred") == 0
+
+    def test_resource_renders_registry(self):
+        registry = MetricsRegistry()
+        registry.counter("pages_total", "Pages").inc()
+        request = DummyRequest([b"metrics"])
+
+        body = MetricsResource(registry).render_GET(request)
+
+        assert b"pages_total 1" in body
+        assert request.responseHeaders.getRawHeaders(b"content-type")[0].startswith(b"text/plain")
+
+
+class TestPipelineMetrics:
+    """Test that pipeline counters are exposed live."""
+
+    def test_image_counters_read_from_pipeline(self):
+        pipeline = ImageProcessingPipeline()
+        with patch("crawler.pipelines.get_image_hash_cache", return_value=None):
+            pipeline.open_spider(MagicMock())
+        pipeline.stats["images_downloaded"] = 4
+        pipeline.stats["total_bytes_downloaded"] = 2048
+        pipeline._increment_rejection_reason("file_too_small")
+
+        assert metrics.IMAGES.get("downloaded") == 4
+        assert metrics.IMAGE_BYTES.get() == 2048
+        assert metrics.IMAGE_REJECTIONS.get("file_too_small") == 1
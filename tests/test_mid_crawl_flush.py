@@ -44,14 +44,11 @@ class TestMidCrawlFlush:
             claimed_domain = claims[0]
 
             # Simulate processing 25 pages with flushes
-            spider._domain_stats["example.com"] = {
-                "pages": 25,
-                "images_found": 5,
-            }
-            spider._claimed_domains[claimed_domain["id"]] = {
-                "domain": "example.com",
-                "version": claimed_domain["version"],
-            }
+            state = spider._domain_registry.claim(
+                "example.com", claimed_domain["id"], claimed_domain["version"]
+            )
+            state.pages = 25
+            state.images_found = 5
 
             # Mock increment function at usage point
             with patch(
@@ -103,14 +100,11 @@ class TestMidCrawlFlush:
             claimed_domain = claims[0]
 
             # Simulate processing 35 pages (below flush threshold)
-            spider._domain_stats["example.com"] = {
-                "pages": 35,
-                "images_found": 7,
-            }
-            spider._claimed_domains[claimed_domain["id"]] = {
-                "domain": "example.com",
-                "version": claimed_domain["version"],
-            }
+            state = spider._domain_registry.claim(
+                "example.com", claimed_domain["id"], claimed_domain["version"]
+            )
+            state.pages = 35
+            state.images_found = 7
 
             # Mock release_claim to verify final stats
             with patch("crawler.spiders.discovery_spider.release_claim") as mock_release:
@@ -208,14 +202,11 @@ class TestMidCrawlFlush:
             claimed_domain = claims[0]
 
             # Simulate processing many pages
-            spider._domain_stats["example.com"] = {
-                "pages": 1000,
-                "images_found": 50,
-            }
-            spider._claimed_domains[claimed_domain["id"]] = {
-                "domain": "example.com",
-                "version": claimed_domain["version"],
-            }
+            state = spider._domain_registry.claim(
+                "example.com", claimed_domain["id"], claimed_domain["version"]
+            )
+            state.pages = 1000
+            state.images_found = 50
 
             # Mock increment function
 
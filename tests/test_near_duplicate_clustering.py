@@ -0,0 +1,217 @@
+"""Tests for offline near-duplicate clustering."""
+
+import random
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from processor import near_duplicate_clustering
+from processor.near_duplicate_clustering import choose_bands, cluster_hashes
+
+
+def _flip(value: int, bits: list[int]) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+@pytest.fixture
+def corpus():
+    """Random background hashes plus three planted near-duplicate groups."""
+    rng = random.Random(7)
+    rows = [(uuid.UUID(int=rng.getrandbits(128)), rng.getrandbits(64)) for _ in range(2000)]
+    groups = []
+    for _ in range(3):
+        base = rng.getrandbits(64)
+        members = []
+        for flips in (0, 1, 2, 3):
+            image_id = uuid.UUID(int=rng.getrandbits(128))
+            rows.append((image_id, _flip(base, rng.sample(range(64), flips))))
+            members.append(str(image_id))
+        groups.append(members)
+    rng.shuffle(rows)
+    return rows, groups
+
+
+def _clusters(result) -> dict[str, set[str]]:
+    clusters: dict[str, set[str]] = {}
+    for image_id, cluster_id in result.assignments():
+        clusters.setdefault(cluster_id, set()).add(image_id)
+    return clusters
+
+
+class TestClusterHashes:
+    """Test LSH bucketing + union-find clustering."""
+
+    def test_finds_planted_groups(self, corpus):
+        rows, groups = corpus
+        result = cluster_hashes(rows, threshold=3, workers=1)
+
+        clusters = _clusters(result)
+        assert sorted(map(sorted, clusters.values())) == sorted(map(sorted, groups))
+        # Cluster ID is the smallest image ID of the group
+        for cluster_id, members in clusters.items():
+            assert cluster_id == min(members, key=uuid.UUID)
+
+        stats = result.stats
+        assert stats.images == len(rows)
+        assert stats.clusters == 3
+        assert stats.clustered_images == 12
+        assert stats.largest_cluster == 4
+        assert stats.comparisons > 0
+
+    def test_distance_over_threshold_not_clustered(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        rows = [(a, 0), (b, _flip(0, [0, 1, 2]))]
+
+        assert list(cluster_hashes(rows, threshold=2, workers=1).assignments()) == []
+        assert len(list(cluster_hashes(rows, threshold=3, workers=1).assignments())) == 2
+
+    def test_oversized_buckets_skipped(self):
+        rows = [(uuid.uuid4(), 0) for _ in range(10)]
+        result = cluster_hashes(rows, threshold=0, bands=4, workers=1, max_bucket_size=5)
+
+        assert result.stats.buckets_skipped == 4  # one per band
+        assert result.stats.images_in_skipped_buckets == 10
+        assert result.stats.clusters == 0
+
+    def test_invalid_hashes_ignored(self):
+        rows = [(uuid.uuid4(), None), (uuid.uuid4(), "not-hex"), (uuid.uuid4(), "00000000000000ff")]
+        assert cluster_hashes(rows, workers=1).stats.images == 1
+
+    def test_empty_corpus(self):
+        result = cluster_hashes([], workers=1)
+        assert result.stats.clusters == 0
+        assert list(result.assignments()) == []
+
+    def test_worker_pool_matches_in_process(self, corpus):
+        rows, _ = corpus
+        serial = _clusters(cluster_hashes(rows, threshold=3, bands=3, workers=1))
+
+        with patch.object(near_duplicate_clustering, "PROBES_PER_TASK", 4):
+            parallel = _clusters(cluster_hashes(rows, threshold=3, bands=3, workers=2))
+
+        assert parallel == serial
+
+    @pytest.mark.parametrize("bands", [3, 4, 9, None])
+    def test_any_band_count_finds_pairs_differing_in_every_band(self, bands):
+        # Two bits flipped in each 16-bit quarter: no shared value in any of 4 bands
+        a, b = uuid.uuid4(), uuid.uuid4()
+        rows = [(a, 0), (b, _flip(0, [0, 1, 16, 17, 32, 33, 48, 49]))]
+
+        assert cluster_hashes(rows, threshold=8, bands=bands, workers=1).stats.clusters == 1
+        assert cluster_hashes(rows, threshold=7, bands=bands, workers=1).stats.clusters == 0
+
+    def test_exact_recall_at_scale_without_skipping(self):
+        # At 1M hashes, threshold + 1 narrow bands put ~8k hashes in every bucket
+        rng = random.Random(11)
+        rows = [(uuid.UUID(int=i), rng.getrandbits(64)) for i in range(1, 1_000_001)]
+        pairs = []
+        for distance in range(1, 9):
+            for _ in range(2):
+                base = rng.getrandbits(64)
+                a, b = uuid.UUID(int=rng.getrandbits(128)), uuid.UUID(int=rng.getrandbits(128))
+                rows += [(a, base), (b, _flip(base, rng.sample(range(64), distance)))]
+                pairs.append((str(a), str(b)))
+
+        result = cluster_hashes(rows, threshold=8, workers=1)
+
+        assert result.stats.buckets_skipped == 0
+        assert result.stats.images_in_skipped_buckets == 0
+        clusters = dict(result.assignments())
+        for a, b in pairs:
+            assert a in clusters and clusters[a] == clusters.get(b)
+
+    def test_choose_bands_widens_bands_as_corpus_grows(self):
+        assert choose_bands(100, 8) == 9  # tiny corpus: no probing
+        assert choose_bands(1_000_000, 8) == 3
+        assert choose_bands(1_000_000, 2) == 3
+
+    def test_rejects_invalid_bands(self):
+        with pytest.raises(ValueError):
+            cluster_hashes([], bands=1)
+        with pytest.raises(ValueError):
+            cluster_hashes([], bands=2)
+
+
+class TestWriteNearDuplicateClusters:
+    """Test bulk COPY write back."""
+
+    @patch("storage.image_repository.get_cursor")
+    def test_copies_in_chunks_and_updates(self, mock_get_cursor):
+        from storage.image_repository import write_near_duplicate_clusters
+
+        cursor = MagicMock()
+        cursor.rowcount = 2
+        mock_get_cursor.return_value.__enter__.return_value = cursor
+        assignments = [(f"id-{i}", "id-0") for i in range(5)]
+
+        result = write_near_duplicate_clusters(iter(assignments), chunk_size=2)
+
+        assert cursor.copy_expert.call_count == 3
+        first_buffer = cursor.copy_expert.call_args_list[0].args[1]
+        assert first_buffer.getvalue() == "id-0\tid-0\nid-1\tid-0\n"
+        assert result == {"staged": 5, "assigned": 2, "cleared": 2}
+
+
+class TestClusterNearDuplicatesCLI:
+    """Test cluster-near-duplicates command wiring."""
+
+    def test_dry_run_does_not_write(self, capsys):
+        from crawler.cli import cluster_near_duplicates_command
+
+        a, b = str(uuid.uuid4()), str(uuid.uuid4())
+        rows = [(a, 255, None), (b, 254, None)]
+        args = MagicMock(
+            hash="phash",
+            threshold=2,
+            bands=4,
+            workers=1,
+            max_bucket_size=5000,
+            batch_size=100,
+            dry_run=True,
+        )
+        with (
+            patch("storage.image_repository.iter_image_hashes", return_value=iter(rows)),
+            patch("storage.image_repository.write_near_duplicate_clusters") as mock_write,
+        ):
+            assert cluster_near_duplicates_command(args) == 0
+
+        mock_write.assert_not_called()
+        out = capsys.readouterr().out
+        assert "clusters: 1" in out
+        assert "clustered_images: 2" in out
+
+    @pytest.mark.parametrize("force", [False, True])
+    def test_skipped_buckets_block_write_unless_forced(self, force, capsys):
+        from crawler.cli import cluster_near_duplicates_command
+
+        rows = [(str(uuid.uuid4()), 255, None) for _ in range(6)]
+        args = MagicMock(
+            hash="phash",
+            threshold=2,
+            bands=None,
+            workers=1,
+            max_bucket_size=5,
+            batch_size=100,
+            dry_run=False,
+            force=force,
+        )
+        with (
+            patch("storage.image_repository.iter_image_hashes", return_value=iter(rows)),
+            patch(
+                "storage.image_repository.write_near_duplicate_clusters", return_value={}
+            ) as mock_write,
+        ):
+            exit_code = cluster_near_duplicates_command(args)
+
+        if force:
+            assert exit_code == 0
+            mock_write.assert_called_once()
+        else:
+            assert exit_code == 1
+            mock_write.assert_not_called()
+            assert "Refusing to write: 3 oversized buckets skipped (6 images)" in (
+                capsys.readouterr().out
+            )
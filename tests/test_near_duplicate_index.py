@@ -0,0 +1,214 @@
+"""Tests for the multi-index-hashing near-duplicate index."""
+
+import random
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from processor.near_duplicate_index import (
+    NearDuplicateIndex,
+    NearDuplicateIndexSet,
+    hamming_distance,
+    hash_to_int,
+)
+
+
+def _flip(value: int, bits: list[int]) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+class TestHashToInt:
+    """Test hash parsing."""
+
+    def test_hex_string(self):
+        assert hash_to_int("ffffffffffffffff") == 2**64 - 1
+        assert hash_to_int("00000000000000ff") == 255
+
+    def test_signed_bigint_reinterpreted(self):
+        assert hash_to_int(-1) == 2**64 - 1
+
+    def test_invalid_values(self):
+        assert hash_to_int(None) is None
+        assert hash_to_int("") is None
+        assert hash_to_int("not-hex") is None
+        assert hash_to_int("f" * 64) is None  # 256-bit hash
+
+
+class TestNearDuplicateIndex:
+    """Test insert/query semantics."""
+
+    def test_query_matches_brute_force(self):
+        rng = random.Random(42)
+        base = [rng.getrandbits(64) for _ in range(50)]
+        entries = {}
+        for i, value in enumerate(base):
+            entries[f"base-{i}"] = value
+            for j in range(4):
+                bits = rng.sample(range(64), rng.randint(1, 20))
+                entries[f"near-{i}-{j}"] = _flip(value, bits)
+
+        index = NearDuplicateIndex()
+        index.merge(entries.items())
+
+        for distance in (0, 3, 4, 8, 12, 15, 20):
+            for query in base[:10]:
+                expected = sorted(
+                    ((key, hamming_distance(query, value)) for key, value in entries.items()),
+                    key=lambda r: (r[1], r[0]),
+                )
+                expected = [r for r in expected if r[1] <= distance]
+                assert index.query(query, distance) == expected
+
+    def test_update_replaces_hash(self):
+        index = NearDuplicateIndex()
+        index.add("img", 0)
+        assert index.add("img", 0) is False
+        assert index.add("img", 2**64 - 1) is True
+
+        assert len(index) == 1
+        assert index.query(0, 4) == []
+        assert index.query(2**64 - 1, 0) == [("img", 0)]
+
+    def test_save_load_roundtrip(self, tmp_path):
+        index = NearDuplicateIndex()
+        index.add("a", 0x0123456789ABCDEF)
+        index.add("b", 2**64 - 1)
+        path = tmp_path / "nested" / "phash.idx"
+
+        index.save(path)
+        loaded = NearDuplicateIndex.load(path)
+
+        assert list(loaded.items()) == list(index.items())
+        assert loaded.query(0x0123456789ABCDEE, 1) == [("a", 1)]
+
+    def test_empty_roundtrip(self, tmp_path):
+        NearDuplicateIndex().save(tmp_path / "empty.idx")
+        assert len(NearDuplicateIndex.load(tmp_path / "empty.idx")) == 0
+
+    def test_load_rejects_garbage(self, tmp_path):
+        path = tmp_path / "bad.idx"
+        path.write_bytes(b"not an index")
+        with pytest.raises(ValueError):
+            NearDuplicateIndex.load(path)
+
+
+class TestNearDuplicateIndexSet:
+    """Test the per-kind snapshot directory."""
+
+    def test_save_merges_with_concurrent_snapshot(self, tmp_path):
+        worker_a = NearDuplicateIndexSet(tmp_path)
+        worker_b = NearDuplicateIndexSet(tmp_path)
+        worker_a.add("img-a", "00000000000000ff", "0f0f0f0f0f0f0f0f")
+        worker_b.add("img-b", "00000000000000fe", None)
+
+        worker_a.save()
+        worker_b.save()
+
+        loaded = NearDuplicateIndexSet.load(tmp_path)
+        assert loaded.query("phash", "00000000000000ff", 1) == [("img-a", 0), ("img-b", 1)]
+        assert loaded.query("dhash", "0f0f0f0f0f0f0f0f", 0) == [("img-a", 0)]
+
+    def test_interleaved_saves_keep_both_inserts(self, tmp_path):
+        NearDuplicateIndexSet(tmp_path).save(merge_existing=False)
+        workers = [NearDuplicateIndexSet(tmp_path) for _ in range(2)]
+        workers[0].add("img-a", "00000000000000ff")
+        workers[1].add("img-b", "00000000000000fe")
+        original_load = NearDuplicateIndex.load.__func__
+
+        def slow_load(cls, path):
+            index = original_load(cls, path)
+            time.sleep(0.2)  # both savers would read the old snapshot without the lock
+            return index
+
+        with patch.object(NearDuplicateIndex, "load", classmethod(slow_load)):
+            threads = [threading.Thread(target=worker.save) for worker in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        loaded = NearDuplicateIndexSet.load(tmp_path)
+        assert loaded.query("phash", "00000000000000ff", 1) == [("img-a", 0), ("img-b", 1)]
+
+    def test_query_rejects_bad_input(self, tmp_path):
+        index_set = NearDuplicateIndexSet(tmp_path)
+        with pytest.raises(ValueError):
+            index_set.query("ahash", "00", 1)
+        with pytest.raises(ValueError):
+            index_set.query("phash", "xyz", 1)
+
+
+class TestPipelineNearDuplicateIndex:
+    """Test incremental inserts from the pipeline."""
+
+    def test_new_images_added_and_saved(self, tmp_path):
+        from crawler.pipelines import ImageProcessingPipeline
+        from processor.fetcher import ImageFetchResult
+
+        env = {"ENABLE_NEAR_DUPLICATE_INDEX": "true", "NEAR_DUPLICATE_INDEX_PATH": str(tmp_path)}
+        with patch.dict("os.environ", env):
+            pipeline = ImageProcessingPipeline()
+            pipeline.open_spider(MagicMock())
+        assert pipeline.near_duplicate_index is not None
+
+        pipeline.downloader = MagicMock()
+        pipeline.downloader.process_response.return_value = ImageFetchResult(
+            success=True,
+            url="https://example.com/a.jpg",
+            file_size=10,
+            sha256_hash="a" * 64,
+            phash_hash="00000000000000ff",
+            dhash_hash="ff00000000000000",
+        )
+        pipeline._store_image_metadata = MagicMock(
+            return_value={"status": "downloaded", "image_id": "img-1"}
+        )
+        item = {
+            "type": "image",
+            "url": "https://example.com/a.jpg",
+            "crawl_type": "refresh",
+            "response": MagicMock(),
+        }
+        pipeline.process_item(item, MagicMock())
+
+        with patch("storage.db.close_all_connections"):
+            pipeline.close_spider(MagicMock())
+
+        loaded = NearDuplicateIndexSet.load(tmp_path)
+        assert loaded.query("phash", "00000000000000fe", 1) == [("img-1", 1)]
+
+
+class TestFindNearDuplicatesCLI:
+    """Test find-near-duplicates command against a snapshot on disk."""
+
+    def test_query_by_hash(self, tmp_path, capsys):
+        from crawler.cli import find_near_duplicates_command
+
+        index_set = NearDuplicateIndexSet(tmp_path)
+        index_set.add("11111111-1111-1111-1111-111111111111", "00000000000000ff")
+        index_set.add("22222222-2222-2222-2222-222222222222", "ffffffffffffffff")
+        index_set.save(merge_existing=False)
+
+        args = MagicMock(
+            target="00000000000000fe", distance=2, hash="phash", limit=10, index=str(tmp_path)
+        )
+        with patch(
+            "storage.image_repository.get_image_urls",
+            return_value={"11111111-1111-1111-1111-111111111111": "https://a.example/x.jpg"},
+        ):
+            assert find_near_duplicates_command(args) == 0
+
+        out = capsys.readouterr().out
+        assert "1 images within 2 bits" in out
+        assert "https://a.example/x.jpg" in out
+        assert "22222222" not in out
+
+    def test_missing_index_fails(self, tmp_path):
+        from crawler.cli import find_near_duplicates_command
+
+        args = MagicMock(target="00000000000000fe", distance=2, hash="phash", index=str(tmp_path))
+        assert find_near_duplicates_command(args) == 1
@@ -43,16 +43,14 @@ class TestPerDomainBudget:
         """Per-domain budget mode initializes tracking dicts."""
         assert spider_with_budget.enable_per_domain_budget is True
         assert spider_with_budget.max_pages_per_run == 5
-        assert spider_with_budget._domain_pages_crawled == {}
-        assert spider_with_budget._domain_frontier_queue == {}
+        assert len(spider_with_budget._domain_registry) == 0
 
     def test_per_domain_budget_disabled_no_tracking(
         self, spider_without_budget: DiscoverySpider
     ) -> None:
         """Disabled mode doesn't use per-domain tracking."""
         assert spider_without_budget.enable_per_domain_budget is False
-        assert spider_without_budget._domain_pages_crawled == {}
-        assert spider_without_budget._domain_frontier_queue == {}
+        assert len(spider_without_budget._domain_registry) == 0
 
     def test_parse_tracks_per_domain_page_count(self, spider_with_budget: DiscoverySpider) -> None:
         """Parse tracks pages crawled per domain."""
@@ -66,11 +64,11 @@ class TestPerDomainBudget:
 
         # First parse
         list(spider_with_budget.parse(response))
-        assert spider_with_budget._domain_pages_crawled.get("example.com") == 1
+        assert spider_with_budget._domain_registry.get("example.com").pages == 1
 
         # Second parse
         list(spider_with_budget.parse(response))
-        assert spider_with_budget._domain_pages_crawled.get("example.com") == 2
+        assert spider_with_budget._domain_registry.get("example.com").pages == 2
 
     def test_parse_tracks_different_domains_separately(
         self, spider_with_budget: DiscoverySpider
@@ -97,15 +95,16 @@ class TestPerDomainBudget:
         list(spider_with_budget.parse(response2))
         list(spider_with_budget.parse(response2))
 
-        assert spider_with_budget._domain_pages_crawled.get("example.com") == 1
-        assert spider_with_budget._domain_pages_crawled.get("other.com") == 2
+        assert spider_with_budget._domain_registry.get("example.com").pages == 1
+        assert spider_with_budget._domain_registry.get("other.com").pages == 2
 
     def test_budget_enforcement_stops_following_links(
         self, spider_with_budget: DiscoverySpider
     ) -> None:
         """When budget reached, no more links are followed for that domain."""
         spider_with_budget.max_pages_per_run = 2
-        spider_with_budget._domain_pages_crawled["example.com"] = 2  # Budget already reached
+        # Budget already reached
+        spider_with_budget._domain_registry.get_or_create("example.com").pages = 2
 
         request = Request(url="https://example.com/", meta={"domain": "example.com", "depth": 0})
         response = HtmlResponse(
@@ -138,7 +137,7 @@ class TestPerDomainBudget:
         list(spider_with_budget.parse(response1))
 
         # After first page, no URLs should be in frontier (they were yielded)
-        assert "example.com" not in spider_with_budget._domain_frontier_queue
+        assert spider_with_budget.get_frontier_size("example.com") == 0
 
         # Second request: budget now hit (1 >= 1), links are ENQUEUED
         request2 = Request(
@@ -153,8 +152,8 @@ class TestPerDomainBudget:
         list(spider_with_budget.parse(response2))
 
         # Now budget exhausted, URLs should be enqueued to frontier for checkpoint
-        assert "example.com" in spider_with_budget._domain_frontier_queue
-        queue = spider_with_budget._domain_frontier_queue["example.com"]
+        assert spider_with_budget.get_frontier_size("example.com") > 0
+        queue = spider_with_budget._domain_registry.get("example.com").frontier
         assert len(queue) == 1
         assert queue[0]["url"] == "https://example.com/page3"
 
@@ -203,7 +202,7 @@ class TestPerDomainBudget:
     def test_unlimited_pages_per_run_when_zero(self, spider_with_budget: DiscoverySpider) -> None:
         """max_pages_per_run=0 means unlimited per domain."""
         spider_with_budget.max_pages_per_run = 0
-        spider_with_budget._domain_pages_crawled["example.com"] = 1000
+        spider_with_budget._domain_registry.get_or_create("example.com").pages = 1000
 
         request = Request(url="https://example.com/", meta={"domain": "example.com", "depth": 0})
         response = HtmlResponse(
@@ -247,8 +246,8 @@ class TestPerDomainBudget:
             )
             list(spider.parse(response_b))
 
-            assert spider._domain_pages_crawled.get("a.com") == 3
-            assert spider._domain_pages_crawled.get("b.com") == 1
+            assert spider._domain_registry.get("a.com").pages == 3
+            assert spider._domain_registry.get("b.com").pages == 1
 
             # Both should still be under budget and follow links
             items_a = list(spider.parse(response_a))
@@ -312,5 +311,5 @@ class TestPerDomainBudgetWithRealHTML:
         assert len(link_requests_3) == 0
 
         # But pending URLs should be tracked in frontier queue
-        assert "example.com" in spider._domain_frontier_queue
-        assert len(spider._domain_frontier_queue["example.com"]) > 0
+        assert spider.get_frontier_size("example.com") > 0
+        assert spider.get_frontier_size("example.com") > 0
@@ -4,9 +4,15 @@ import io
 
 import pytest
 from PIL import Image
+from scrapy.http import Request, Response
 
+from processor.async_fetcher import ScrapyImageDownloader
 from processor.fetcher import ImageFetcher, ImageFetchResult
-from processor.fingerprint import ImageFingerprinter, compute_sha256
+from processor.fingerprint import (
+    ImageFingerprinter,
+    compute_sha256,
+    perceptual_hash_to_bigint,
+)
 
 
 class TestImageFetcher:
@@ -215,3 +221,97 @@ class TestImageFingerprinter:
 
         assert len(hash1) == 64
         assert hash1 == hash2
+
+
+class TestPerceptualHashToBigint:
+    """Test hex -> signed BIGINT conversion for perceptual hashes."""
+
+    def test_low_values_unchanged(self) -> None:
+        assert perceptual_hash_to_bigint("0000000000000000") == 0
+        assert perceptual_hash_to_bigint("7fffffffffffffff") == 2**63 - 1
+
+    def test_high_bit_wraps_negative(self) -> None:
+        assert perceptual_hash_to_bigint("8000000000000000") == -(2**63)
+        assert perceptual_hash_to_bigint("ffffffffffffffff") == -1
+
+    def test_hamming_distance_preserved(self) -> None:
+        a = perceptual_hash_to_bigint("f0f0f0f0f0f0f0f0")
+        b = perceptual_hash_to_bigint("f0f0f0f0f0f0f0f1")
+        assert a is not None and b is not None
+        assert ((a ^ b) & (2**64 - 1)).bit_count() == 1
+
+    def test_fingerprinter_output_converts(self) -> None:
+        img = Image.new("RGB", (64, 64), color="purple")
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        phash = ImageFingerprinter().compute_phash(buffer.getvalue())
+
+        value = perceptual_hash_to_bigint(phash)
+        assert value is not None
+        assert value & (2**64 - 1) == int(phash, 16)
+
+    @pytest.mark.parametrize(
+        "value", [None, "", "abc", "0x00000000000000", "-fffffffffffffff", "g" * 16]
+    )
+    def test_invalid_values(self, value: str | None) -> None:
+        assert perceptual_hash_to_bigint(value) is None
+
+
+class TestStagedProcessing:
+    """Test ScrapyImageDownloader's staged processing and counters."""
+
+    @staticmethod
+    def _response(status: int = 200, size: tuple[int, int] = (300, 300)) -> Response:
+        buffer = io.BytesIO()
+        Image.new("RGB", size, color="teal").save(buffer, format="PNG")
+        url = "https://example.com/a.png"
+        return Response(
+            url=url,
+            status=status,
+            headers={"Content-Type": "image/png"},
+            body=buffer.getvalue(),
+            request=Request(url),
+        )
+
+    def test_new_content_is_perceptually_hashed(self) -> None:
+        downloader = ScrapyImageDownloader(min_file_size=10)
+        seen: list[str] = []
+
+        def known(sha256_hash: str) -> bool:
+            seen.append(sha256_hash)
+            return False
+
+        result = downloader.process_response("https://example.com/a.png", self._response(), known)
+
+        assert result.success
+        assert seen == [result.sha256_hash]
+        assert result.phash_hash is not None and result.dhash_hash is not None
+        assert downloader.stage_stats["perceptual_hashes_computed"] == 1
+        assert downloader.stage_stats["perceptual_hashes_skipped"] == 0
+
+    def test_known_content_skips_perceptual_hashes(self) -> None:
+        downloader = ScrapyImageDownloader(min_file_size=10)
+        downloader.process_response("https://example.com/a.png", self._response())
+        result = downloader.process_response(
+            "https://example.com/a.png", self._response(), lambda _: True
+        )
+
+        assert result.success and result.sha256_hash
+        assert result.phash_hash is None
+        stats = downloader.get_stage_stats()
+        assert stats["perceptual_hashes_skipped"] == 1
+        assert stats["perceptual_hash_cpu_seconds_saved"] >= 0
+
+    def test_rejected_before_hashing(self) -> None:
+        downloader = ScrapyImageDownloader(min_file_size=10)
+        lookups: list[str] = []
+
+        result = downloader.process_response(
+            "https://example.com/a.png", self._response(size=(50, 50)), lookups.append
+        )
+
+        assert not result.success
+        assert result.sha256_hash is None
+        assert lookups == []
+        assert downloader.stage_stats["rejected_validate"] == 1
+        assert downloader.stage_stats["sha256_cpu_seconds"] == 0.0
@@ -0,0 +1,148 @@
+"""Tests for on-demand worker profiling."""
+
+import json
+import os
+import signal
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.test import get_crawler
+
+from crawler.domain_registry import DomainRegistry
+from crawler.profiling import StackSampler, WorkerProfiler, request_profile
+from crawler.redis_keys import profile_request_key
+
+
+def _profiler(output_dir, seconds=1):
+    crawler = get_crawler()
+    crawler.stats.open_spider()
+    with (
+        patch("crawler.profiling.get_enable_profiling", return_value=True),
+        patch("crawler.profiling.get_profile_output_dir", return_value=str(output_dir)),
+        patch("crawler.profiling.get_profile_duration_seconds", return_value=seconds),
+        patch("crawler.profiling.get_profile_sample_interval_ms", return_value=1),
+    ):
+        profiler = WorkerProfiler(crawler)
+    profiler.spider = MagicMock(worker_id="host-42", crawl_run_id="run-1")
+    return profiler
+
+
+def _busy(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestStackSampler:
+    """Test stack collection."""
+
+    def test_samples_other_threads_as_collapsed_stacks(self, tmp_path):
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy, args=(stop,), name="busy")
+        worker.start()
+        sampler = StackSampler(0.001)
+        try:
+            for _ in range(5):
+                sampler.sample()
+        finally:
+            stop.set()
+            worker.join()
+
+        path = tmp_path / "cpu.collapsed"
+        sampler.write(str(path))
+
+        lines = path.read_text().splitlines()
+        assert sampler.samples == 5
+        busy = [line for line in lines if line.startswith("busy;")]
+        assert busy and all("_busy_(test_profiling.py:" in line for line in busy)
+        assert not any("sample_(profiling.py" in line for line in lines)
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) == 5
+
+
+class TestWorkerProfiler:
+    """Test request handling and profile output."""
+
+    def test_disabled_by_default(self):
+        with pytest.raises(NotConfigured):
+            WorkerProfiler(get_crawler())
+
+    def test_cpu_profile_tagged_with_worker_and_run(self, tmp_path):
+        profiler = _profiler(tmp_path)
+
+        assert profiler.start("cpu", 0.05)
+        profiler._thread.join(timeout=5)
+
+        (path,) = tmp_path.glob("cpu-host-42-run-1-*.collapsed")
+        assert path.read_text()
+        assert profiler.crawler.stats.get_value("profiling/cpu_profiles") == 1
+
+    def test_one_profile_at_a_time(self, tmp_path):
+        profiler = _profiler(tmp_path)
+
+        assert profiler.start("cpu", 5)
+        try:
+            assert not profiler.start("memory", 5)
+        finally:
+            profiler._stop.set()
+            profiler._thread.join(timeout=5)
+        with pytest.raises(ValueError):
+            profiler.start("wall")
+
+    def test_memory_profile_reports_domain_state(self, tmp_path):
+        profiler = _profiler(tmp_path)
+        registry = DomainRegistry()
+        registry.get_or_create("a.com").frontier.extend([{"url": "u"}] * 4)
+        registry.claim("b.com", MagicMock(), 1)
+        profiler.spider._domain_registry = registry
+
+        profiler.start("memory", 0.05)
+        profiler._thread.join(timeout=10)
+
+        (path,) = tmp_path.glob("memory-host-42-run-1-*.txt")
+        report = path.read_text()
+        assert "domains tracked: 2 (claimed 1), deferred frontier URLs: 4" in report
+        assert "Top 30 allocation sites by growth:" in report
+        assert "Domain state and frontier growth:" in report
+
+    def test_redis_request_consumed(self, tmp_path):
+        profiler = _profiler(tmp_path)
+        client = MagicMock()
+        client.getdel.return_value = json.dumps({"mode": "cpu", "seconds": 2})
+
+        with (
+            patch("crawler.profiling.get_redis_client", return_value=client),
+            patch.object(profiler, "start") as start,
+        ):
+            profiler.poll_requests()
+            client.getdel.return_value = None
+            profiler.poll_requests()
+
+        client.getdel.assert_called_with(profile_request_key("host-42"))
+        start.assert_called_once_with("cpu", 2)
+
+    def test_request_profile_sets_expiring_key(self):
+        client = MagicMock()
+
+        with patch("crawler.profiling.get_redis_client", return_value=client):
+            request_profile("host-42", "memory", 20)
+
+        key, payload = client.set.call_args.args
+        assert key == profile_request_key("host-42")
+        assert json.loads(payload) == {"mode": "memory", "seconds": 20}
+        assert client.set.call_args.kwargs["ex"] == 60
+
+    def test_signal_starts_cpu_profile(self, tmp_path):
+        profiler = _profiler(tmp_path)
+        spider = profiler.spider
+
+        with patch.object(profiler, "start") as start:
+            profiler.spider_opened(spider)
+            try:
+                os.kill(os.getpid(), signal.SIGUSR1)
+                time.sleep(0.01)
+            finally:
+                profiler.spider_closed(spider)
+
+        start.assert_called_once_with("cpu")
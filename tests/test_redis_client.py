@@ -0,0 +1,79 @@
+"""Tests for the process-wide Redis client registry."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+from redis.connection import Connection
+
+from crawler.metrics import REDIS_CALL_SECONDS
+from storage.redis_client import close_redis_clients, get_redis_client, get_redis_pool_stats
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    close_redis_clients()
+    yield
+    close_redis_clients()
+
+
+class TestRedisClientRegistry:
+    """Test client reuse, pool configuration and usage stats."""
+
+    def test_same_url_shares_client_and_pool(self):
+        first = get_redis_client("redis://cache:6379/0")
+        second = get_redis_client("redis://cache:6379/0")
+        decoded = get_redis_client("redis://cache:6379/0", decode_responses=True)
+        other = get_redis_client("redis://cache:6379/1")
+
+        assert first is second
+        assert decoded is not first
+        assert other.connection_pool is not first.connection_pool
+        assert get_redis_pool_stats()["pools"] == 3
+        assert get_redis_pool_stats()["client_lookups"] == 4
+
+    def test_pool_configured_from_environment(self):
+        env = {
+            "REDIS_URL": "redis://cache:6379/2",
+            "REDIS_MAX_CONNECTIONS": "7",
+            "REDIS_SOCKET_TIMEOUT": "3.5",
+            "REDIS_HEALTH_CHECK_INTERVAL_SECONDS": "15",
+        }
+        with patch.dict(os.environ, env):
+            pool = get_redis_client().connection_pool
+
+        assert pool.max_connections == 7
+        assert pool.timeout == 3.5
+        assert pool.connection_kwargs["db"] == 2
+        assert pool.connection_kwargs["socket_timeout"] == 3.5
+        assert pool.connection_kwargs["health_check_interval"] == 15
+
+    def test_connections_reused_and_counted(self):
+        pool = get_redis_client("redis://cache:6379/0").connection_pool
+        observed = REDIS_CALL_SECONDS.count()
+
+        with (
+            patch.object(Connection, "connect"),
+            patch.object(Connection, "can_read", return_value=False),
+        ):
+            first = pool.get_connection()
+            second = pool.get_connection()
+            pool.release(first)
+            pool.release(second)
+            third = pool.get_connection()
+
+        stats = get_redis_pool_stats()
+        assert third in (first, second)
+        assert stats["connections_created"] == 2
+        assert stats["checkouts"] == 3
+        assert stats["in_use"] == 1
+        assert stats["peak_in_use"] == 2
+        assert REDIS_CALL_SECONDS.count() == observed + 2
+
+    def test_close_drops_clients(self):
+        client = get_redis_client("redis://cache:6379/0")
+
+        close_redis_clients()
+
+        assert get_redis_pool_stats()["pools"] == 0
+        assert get_redis_client("redis://cache:6379/0") is not client
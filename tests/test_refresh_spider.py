@@ -0,0 +1,147 @@
+"""Tests for the refresh spider and the images.last_seen_at staleness scan."""
+
+from datetime import UTC, datetime
+from unittest.mock import MagicMock, patch
+
+from scrapy.downloadermiddlewares.redirect import RedirectMiddleware
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from crawler.spiders.refresh_spider import RefreshSpider, interleave_by_host
+from storage.image_repository import StaleImage, iter_stale_images
+
+SEEN = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _stale(url: str, image_id: str = "id-1", etag: str | None = None) -> StaleImage:
+    return StaleImage(image_id, url, etag, None, 1000, SEEN)
+
+
+class TestInterleaveByHost:
+    """Test round-robin ordering across hosts."""
+
+    def test_round_robin_preserves_per_host_order(self):
+        images = [
+            _stale("https://a.com/1.jpg"),
+            _stale("https://a.com/2.jpg"),
+            _stale("https://a.com/3.jpg"),
+            _stale("https://b.com/1.jpg"),
+            _stale("https://c.com/1.jpg"),
+        ]
+
+        urls = [image.url for image in interleave_by_host(images)]
+
+        assert urls == [
+            "https://a.com/1.jpg",
+            "https://b.com/1.jpg",
+            "https://c.com/1.jpg",
+            "https://a.com/2.jpg",
+            "https://a.com/3.jpg",
+        ]
+
+
+class TestIterStaleImages:
+    """Test keyset pagination over (last_seen_at, id)."""
+
+    @patch("storage.image_repository.get_cursor")
+    def test_pages_by_keyset(self, mock_get_cursor):
+        cursor = MagicMock()
+        mock_get_cursor.return_value.__enter__.return_value = cursor
+        page_one = [
+            ("id-1", "https://a.com/1.jpg", None, None, 10, SEEN),
+            ("id-2", "https://a.com/2.jpg", None, None, 10, SEEN),
+        ]
+        page_two = [("id-3", "https://a.com/3.jpg", None, None, 10, SEEN)]
+        cursor.fetchall.side_effect = [page_one, page_two]
+
+        pages = list(iter_stale_images(SEEN, batch_size=2, shard=1, shards=4))
+
+        assert [len(page) for page in pages] == [2, 1]
+        first_sql, first_params = cursor.execute.call_args_list[0].args
+        second_sql, second_params = cursor.execute.call_args_list[1].args
+        assert "(last_seen_at, id) >" not in first_sql
+        assert "(last_seen_at, id) >" in second_sql
+        assert (second_params["after_seen"], second_params["after_id"]) == (SEEN, "id-2")
+        assert "hashtext(id::text) & 2147483647" in first_sql
+        assert (first_params["shard"], first_params["shards"]) == (1, 4)
+
+
+class TestRefreshSpider:
+    """Test request building, gone handling and outcome counting."""
+
+    def test_start_requests_are_conditional(self):
+        spider = RefreshSpider(stale_days="7", max_images="2")
+        batch = [
+            _stale("https://a.com/1.jpg", "id-1", '"v1"'),
+            _stale("https://a.com/2.jpg", "id-2"),
+            _stale("https://b.com/1.jpg", "id-3"),
+        ]
+
+        with patch(
+            "crawler.spiders.refresh_spider.iter_stale_images", return_value=iter([batch])
+        ) as mock_iter:
+            requests = list(spider.start_requests())
+
+        assert mock_iter.call_args.args[2:] == (0, 1)
+        assert [r.url for r in requests] == ["https://a.com/1.jpg", "https://b.com/1.jpg"]
+        first = requests[0]
+        assert first.headers.get("If-None-Match") == b'"v1"'
+        assert first.meta["handle_httpstatus_list"] == [304, 404, 410]
+        assert first.meta["image_id"] == "id-1"
+        assert first.dont_filter
+        assert spider.refresh_stats["requested"] == 2
+
+    def test_gone_images_flagged_in_batch(self):
+        spider = RefreshSpider()
+        request = Request("https://a.com/1.jpg", meta={"image_id": "id-1"})
+        response = Response(url=request.url, status=404, request=request)
+
+        assert list(spider.parse_image(response)) == []
+        with patch("crawler.spiders.refresh_spider.mark_images_gone") as mock_gone:
+            spider.closed("finished")
+
+        mock_gone.assert_called_once_with(["id-1"])
+        assert spider.refresh_stats["gone"] == 1
+
+    def test_image_responses_become_pageless_items(self):
+        spider = RefreshSpider()
+        request = Request("https://a.com/1.jpg", meta={"image_id": "id-1", "content_length": 10})
+        response = Response(url=request.url, status=304, request=request)
+
+        (item,) = spider.parse_image(response)
+
+        assert item["source_page"] is None
+        assert item["source_domain"] == "a.com"
+        assert item["crawl_type"] == "refresh"
+        assert item["content_length"] == 10
+
+    def test_redirected_image_reported_under_stored_url(self):
+        spider = RefreshSpider()
+        request = spider._build_request(_stale("https://a.com/old.jpg"))
+        middleware = RedirectMiddleware.from_crawler(get_crawler(RefreshSpider))
+        moved = Response(
+            url=request.url,
+            status=301,
+            headers={"Location": "https://cdn.b.com/new.jpg"},
+            request=request,
+        )
+        redirected = middleware.process_response(request, moved)
+        assert isinstance(redirected, Request)
+        response = Response(url=redirected.url, status=200, body=b"jpeg", request=redirected)
+
+        (item,) = spider.parse_image(response)
+
+        assert item["url"] == "https://a.com/old.jpg"
+        assert item["source_domain"] == "a.com"
+        assert item["response"] is response
+
+    def test_outcomes_counted_from_pipeline_status(self):
+        spider = RefreshSpider()
+        for status in ("unchanged", "deduplicated", "downloaded"):
+            spider.item_scraped({"store_status": status}, MagicMock(), spider)
+        spider.item_dropped({}, MagicMock(), Exception("bad"), spider)
+
+        assert spider.refresh_stats["refreshed"] == 3
+        assert spider.refresh_stats["unchanged"] == 2
+        assert spider.refresh_stats["changed"] == 1
+        assert spider.refresh_stats["failed"] == 1
@@ -5,7 +5,7 @@ including checkpoint loading, clearing, and graceful fallback behavior.
 """
 
 from collections import deque
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 from scrapy.http import Request
@@ -119,27 +119,26 @@ class TestCheckpointSaveOnClose:
                 spider.enable_domain_tracking = True
                 spider.max_pages_per_run = 5
                 spider.crawl_run_id = None  # Skip crawl run DB updates
-                spider._domain_pages_crawled = {"example.com": 5}  # Budget reached
-                spider._domain_frontier_queue = {
-                    "example.com": deque(
-                        [
-                            {"url": "https://example.com/page1", "depth": 1},
-                            {"url": "https://example.com/page2", "depth": 2},
-                        ]
-                    )
-                }
+                state = spider._domain_registry.get_or_create("example.com")
+                state.pages = 5  # Budget reached
+                state.frontier = deque(
+                    [
+                        {"url": "https://example.com/page1", "depth": 1},
+                        {"url": "https://example.com/page2", "depth": 2},
+                    ]
+                )
                 return spider
 
     def test_no_checkpoint_without_pending_urls(self, spider_with_budget: DiscoverySpider) -> None:
         """No checkpoint saved if no pending URLs."""
-        spider_with_budget._domain_frontier_queue = {"example.com": deque()}
+        spider_with_budget._domain_registry.get("example.com").frontier.clear()
 
         # Should not raise exception
         spider_with_budget.closed("finished")
 
     def test_no_checkpoint_if_budget_not_reached(self, spider_with_budget: DiscoverySpider) -> None:
         """No checkpoint saved if budget wasn't reached."""
-        spider_with_budget._domain_pages_crawled = {"example.com": 3}  # Under budget
+        spider_with_budget._domain_registry.get("example.com").pages = 3  # Under budget
 
         # Should not raise exception
         spider_with_budget.closed("finished")
@@ -162,20 +161,19 @@ class TestCheckpointSaveOnClose:
         self, spider_with_budget: DiscoverySpider
     ) -> None:
         """Redis errors during checkpoint save are logged but don't crash."""
-        with patch("redis.from_url", side_effect=Exception("Redis down")):
+        with patch(
+            "crawler.spiders.discovery_spider.get_redis_client",
+            side_effect=Exception("Redis down"),
+        ):
             # Should not raise exception
             spider_with_budget.closed("finished")
 
     def test_multiple_domains_tracked_separately(self, spider_with_budget: DiscoverySpider) -> None:
         """Each domain with pending URLs is tracked separately."""
-        spider_with_budget._domain_pages_crawled = {
-            "example.com": 5,
-            "other.com": 5,
-        }
-        spider_with_budget._domain_frontier_queue = {
-            "example.com": deque([{"url": "https://example.com/page1", "depth": 1}]),
-            "other.com": deque([{"url": "https://other.com/page1", "depth": 1}]),
-        }
+        for domain in ("example.com", "other.com"):
+            state = spider_with_budget._domain_registry.get_or_create(domain)
+            state.pages = 5
+            state.frontier = deque([{"url": f"https://{domain}/page1", "depth": 1}])
 
         # Should not raise exception
         spider_with_budget.closed("finished")
@@ -215,8 +213,8 @@ class TestResumeState:
                 list(spider.parse(response))
 
                 # Only the last parse's links should be in frontier queue
-                assert "example.com" in spider._domain_frontier_queue
-                pending = spider._domain_frontier_queue["example.com"]
+                assert spider.get_frontier_size("example.com") > 0
+                pending = spider._domain_registry.get("example.com").frontier
                 # 2 links from the 3rd parse
                 assert len(pending) == 2
 
@@ -244,4 +242,87 @@ class TestResumeState:
             list(spider.parse(response))
             list(spider.parse(response))
 
-            assert spider._domain_pages_crawled.get("example.com") == 3
+            assert spider._domain_registry.get("example.com").pages == 3
+
+
+class TestBatchedSeedScheduling:
+    """Tests for paged Redis seeds with per-batch DB lookups (Phase A/B)."""
+
+    @pytest.fixture
+    def spider(self) -> DiscoverySpider:
+        """Create spider with tracking + budget enabled and a small seed batch."""
+        spider = DiscoverySpider(seeds="config/test_seeds.txt")
+        spider.enable_smart_scheduling = False
+        spider.enable_claim_protocol = False
+        spider.enable_per_domain_budget = True
+        spider.enable_domain_tracking = True
+        spider._allowlist = set()
+        spider._blocklist = set()
+        spider.seed_batch_size = 2
+        return spider
+
+    def _redis_with_seeds(self, seeds: list[bytes]) -> MagicMock:
+        client = MagicMock()
+        client.zrange.side_effect = lambda key, start, end: seeds[start : end + 1]
+        return client
+
+    def test_redis_seeds_are_paged_and_batched(self, spider: DiscoverySpider) -> None:
+        """Seeds are read with bounded ZRANGE pages; DB work happens once per page."""
+        client = self._redis_with_seeds([b"https://a.com", b"https://b.com", b"https://c.com"])
+
+        with (
+            patch("crawler.spiders.discovery_spider.get_redis_client", return_value=client),
+            patch("crawler.spiders.discovery_spider.upsert_domains") as mock_upsert,
+            patch(
+                "crawler.spiders.discovery_spider.get_frontier_checkpoint_ids", return_value={}
+            ) as mock_checkpoints,
+            patch("crawler.spiders.discovery_spider.get_domain") as mock_get_domain,
+        ):
+            requests = list(spider.start_requests())
+
+        assert [r.url for r in requests] == ["https://a.com", "https://b.com", "https://c.com"]
+        assert [c.args[1:] for c in client.zrange.call_args_list] == [(0, 1), (2, 3)]
+        assert mock_upsert.call_count == 2
+        assert mock_upsert.call_args_list[0].args[0] == ["a.com", "b.com"]
+        assert mock_checkpoints.call_count == 2
+        mock_get_domain.assert_not_called()
+
+    def test_redis_seeds_are_yielded_lazily(self, spider: DiscoverySpider) -> None:
+        """The first request is available before later pages are fetched."""
+        client = self._redis_with_seeds([f"https://s{i}.com".encode() for i in range(10)])
+
+        with (
+            patch("crawler.spiders.discovery_spider.get_redis_client", return_value=client),
+            patch("crawler.spiders.discovery_spider.upsert_domains"),
+            patch("crawler.spiders.discovery_spider.get_frontier_checkpoint_ids", return_value={}),
+        ):
+            first = next(iter(spider.start_requests()))
+
+        assert first.url == "https://s0.com"
+        assert client.zrange.call_count == 1
+
+    def test_batch_checkpoint_map_drives_resume(self, spider: DiscoverySpider) -> None:
+        """Checkpoint IDs fetched for the batch are used without per-seed lookups."""
+        client = self._redis_with_seeds([b"https://example.com", b"https://fresh.com"])
+        checkpoint_urls = [{"url": "https://example.com/page1", "depth": 1}]
+
+        with (
+            patch("crawler.spiders.discovery_spider.get_redis_client", return_value=client),
+            patch("crawler.spiders.discovery_spider.upsert_domains"),
+            patch(
+                "crawler.spiders.discovery_spider.get_frontier_checkpoint_ids",
+                return_value={"example.com": "example.com:run-1"},
+            ),
+            patch(
+                "crawler.spiders.discovery_spider.iter_checkpoint",
+                return_value=iter(checkpoint_urls),
+            ),
+            patch("crawler.spiders.discovery_spider.delete_checkpoint"),
+            patch("crawler.spiders.discovery_spider.clear_frontier_checkpoint"),
+            patch("crawler.spiders.discovery_spider.get_domain") as mock_get_domain,
+        ):
+            requests = list(spider.start_requests())
+
+        assert [r.url for r in requests] == ["https://example.com/page1", "https://fresh.com"]
+        assert requests[0].meta == {"depth": 1, "domain": "example.com"}
+        mock_get_domain.assert_not_called()
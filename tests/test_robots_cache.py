@@ -0,0 +1,162 @@
+"""Tests for the shared robots.txt cache middleware."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from crawler.middlewares import SharedRobotsTxtMiddleware, robots_cache_ttl
+
+ROBOTS = b"User-agent: *\nDisallow: /private\n"
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the Redis calls the middleware makes."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    def pipeline(self, transaction=True):
+        redis = self
+        results = []
+
+        class Pipe:
+            def get(self, key):
+                results.append(redis.data.get(key))
+
+            def ttl(self, key):
+                results.append(redis.ttls.get(key, -2))
+
+            def execute(self):
+                return list(results)
+
+        return Pipe()
+
+
+def _middleware(redis=None, body=ROBOTS, status=200, headers=None, now=None):
+    crawler = get_crawler(settings_dict={"ROBOTSTXT_OBEY": True})
+    crawler.stats.open_spider()
+    crawler.engine = MagicMock()
+    crawler.engine.download_async = AsyncMock(
+        side_effect=lambda request: Response(
+            request.url, status=status, body=body, headers=headers or {}
+        )
+    )
+    clock = (lambda: now[0]) if now is not None else (lambda: 0.0)
+    return SharedRobotsTxtMiddleware(crawler, redis, clock=clock)
+
+
+def _allowed(middleware, url):
+    try:
+        asyncio.run(middleware.process_request(Request(url)))
+    except IgnoreRequest:
+        return False
+    return True
+
+
+class TestRobotsCacheTtl:
+    """Test Cache-Control handling."""
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, 86400),
+            ("public, max-age=3600", 3600),
+            ("max-age=3600, s-maxage=7200", 7200),
+            ("max-age=999999", 86400),
+            ("max-age=5", 60),
+            ("no-store", 60),
+        ],
+    )
+    def test_ttl(self, header, expected):
+        headers = {"Cache-Control": header} if header else {}
+        response = Response("https://a.com/robots.txt", headers=headers)
+        assert robots_cache_ttl(response, 86400, 86400) == expected
+
+
+class TestSharedRobotsTxtMiddleware:
+    """Test the local and Redis tiers."""
+
+    def test_fetch_populates_both_tiers(self):
+        redis = FakeRedis()
+        middleware = _middleware(redis, headers={"Cache-Control": "max-age=600"})
+
+        assert not _allowed(middleware, "https://a.com/private/x")
+        assert _allowed(middleware, "https://a.com/public")
+
+        assert middleware.crawler.engine.download_async.call_count == 1
+        assert redis.data["robots:a.com"] == b"+" + ROBOTS
+        assert redis.ttls["robots:a.com"] == 600
+        stats = middleware.crawler.stats
+        assert stats.get_value("robotstxt/cache/miss") == 1
+        assert stats.get_value("robotstxt/cache/local_hit") == 1
+
+    def test_other_worker_reuses_redis_body(self):
+        redis = FakeRedis()
+        _allowed(_middleware(redis), "https://a.com/")
+        other = _middleware(redis)
+
+        assert not _allowed(other, "https://a.com/private/x")
+
+        other.crawler.engine.download_async.assert_not_called()
+        assert other.crawler.stats.get_value("robotstxt/cache/redis_hit") == 1
+
+    def test_missing_robots_negatively_cached(self):
+        redis = FakeRedis()
+        middleware = _middleware(redis, body=b"<html>not found</html>", status=404)
+
+        assert _allowed(middleware, "https://a.com/private/x")
+
+        assert redis.data["robots:a.com"] == b"-"
+        assert redis.ttls["robots:a.com"] == middleware.negative_ttl
+        other = _middleware(redis)
+        assert _allowed(other, "https://a.com/private/x")
+        assert other.crawler.stats.get_value("robotstxt/cache/negative_hit") == 1
+
+    def test_local_rules_expire(self):
+        now = [0.0]
+        middleware = _middleware(headers={"Cache-Control": "max-age=600"}, now=now)
+        _allowed(middleware, "https://a.com/")
+        now[0] = 601.0
+        _allowed(middleware, "https://a.com/")
+
+        assert middleware.crawler.engine.download_async.call_count == 2
+
+    def test_redis_errors_fall_back_to_fetch(self):
+        redis = MagicMock()
+        redis.pipeline.side_effect = ConnectionError("down")
+        redis.set.side_effect = ConnectionError("down")
+        middleware = _middleware(redis)
+
+        assert not _allowed(middleware, "https://a.com/private/x")
+        assert middleware.crawler.stats.get_value("robotstxt/cache/redis_error") == 2
+
+    def test_hit_rate_recorded_on_close(self):
+        middleware = _middleware()
+        for _ in range(4):
+            _allowed(middleware, "https://a.com/")
+        middleware.spider_closed(None)
+
+        assert middleware.crawler.stats.get_value("robotstxt/cache/hit_rate") == 0.75
+
+    def test_prefetch_loads_rules_once(self):
+        middleware = _middleware()
+
+        async def prefetch():
+            started = middleware.prefetch(["https://a.com/", "https://a.com/other"])
+            await asyncio.sleep(0)
+            return started, middleware.prefetch(["https://a.com/"])
+
+        assert asyncio.run(prefetch()) == (1, 0)
+        assert not _allowed(middleware, "https://a.com/private/x")
+
+        assert middleware.crawler.engine.download_async.call_count == 1
+        assert middleware.crawler.stats.get_value("robotstxt/cache/prefetch") == 1
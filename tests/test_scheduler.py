@@ -320,7 +320,7 @@ class TestDomainPriorityQueue:
 class TestRedisAvailability:
     """Test cases for Redis availability checking."""
 
-    @patch("redis.from_url")
+    @patch("crawler.scheduler.get_redis_client")
     def test_redis_available(self, mock_from_url: MagicMock) -> None:
         """Test detecting available Redis."""
         mock_client = MagicMock()
@@ -332,7 +332,7 @@ class TestRedisAvailability:
         assert result is True
         mock_client.ping.assert_called_once()
 
-    @patch("redis.from_url")
+    @patch("crawler.scheduler.get_redis_client")
     def test_redis_unavailable(self, mock_from_url: MagicMock) -> None:
         """Test detecting unavailable Redis."""
         import redis
@@ -343,7 +343,7 @@ class TestRedisAvailability:
 
         assert result is False
 
-    @patch("redis.from_url")
+    @patch("crawler.scheduler.get_redis_client")
     def test_redis_default_url(self, mock_from_url: MagicMock) -> None:
         """Test using default Redis URL from environment."""
         mock_client = MagicMock()
@@ -10,9 +10,21 @@ from unittest.mock import MagicMock, patch
 import pytest
 from scrapy.http import Request
 
+from crawler.domain_registry import DomainRegistry
 from crawler.spiders.discovery_spider import DiscoverySpider
 
 
+def _track_domain(spider, domain, domain_id=None, version=1, **counters):
+    """Register a domain (optionally claimed) with preset stats counters."""
+    if domain_id is not None:
+        state = spider._domain_registry.claim(domain, domain_id, version)
+    else:
+        state = spider._domain_registry.get_or_create(domain)
+    for name, value in counters.items():
+        setattr(state, name, value)
+    return state
+
+
 class TestSmartScheduling:
     """Test smart scheduling integration."""
 
@@ -65,8 +77,10 @@ class TestSmartScheduling:
         ):
             list(spider.start_requests())
 
-        assert mock_domain["id"] in spider._claimed_domains
-        assert spider._claimed_domains[mock_domain["id"]]["domain"] == "example.com"
+        state = spider._domain_registry.get("example.com")
+        assert state is not None
+        assert state.domain_id == mock_domain["id"]
+        assert state.version == 1
 
     def test_spider_resumes_from_checkpoint(self, spider):
         """Spider should resume domains with frontier checkpoints."""
@@ -88,8 +102,8 @@ class TestSmartScheduling:
                 return_value=[mock_domain],
             ),
             patch(
-                "crawler.spiders.discovery_spider.load_checkpoint",
-                return_value=checkpoint_urls,
+                "crawler.spiders.discovery_spider.iter_checkpoint",
+                return_value=iter(checkpoint_urls),
             ),
             patch(
                 "crawler.spiders.discovery_spider.delete_checkpoint",
@@ -151,10 +165,14 @@ class TestClaimRelease:
             spider = DiscoverySpider()
             spider.crawler = MagicMock()
             spider.crawl_run_id = uuid.uuid4()
-            spider._claimed_domains = {str(uuid.uuid4()): {"domain": "example.com", "version": 1}}
-            spider._domain_stats = {
-                "example.com": {"pages": 10, "images_found": 5, "errors": 0, "links_discovered": 3}
-            }
+            _track_domain(
+                spider,
+                "example.com",
+                str(uuid.uuid4()),
+                pages=10,
+                images_found=5,
+                links_discovered=3,
+            )
             # Mock DB-dependent method for computing images_stored
             spider._compute_domain_images_stored = MagicMock(return_value={"example.com": 3})
             return spider
@@ -201,11 +219,13 @@ class TestClaimRelease:
         domain_id_1 = str(uuid.uuid4())
         str(uuid.uuid4())
 
-        spider._claimed_domains = {domain_id_1: {"domain": "claimed.com", "version": 1}}
-        spider._domain_stats = {
-            "claimed.com": {"pages": 10, "images_found": 5, "errors": 0, "links_discovered": 3},
-            "unclaimed.com": {"pages": 8, "images_found": 2, "errors": 1, "links_discovered": 4},
-        }
+        spider._domain_registry = DomainRegistry()
+        _track_domain(
+            spider, "claimed.com", domain_id_1, pages=10, images_found=5, links_discovered=3
+        )
+        _track_domain(
+            spider, "unclaimed.com", pages=8, images_found=2, errors=1, links_discovered=4
+        )
         spider._compute_domain_images_stored = MagicMock(
             return_value={"claimed.com": 3, "unclaimed.com": 1}
         )
@@ -229,11 +249,9 @@ class TestClaimRelease:
     def test_exhausted_status_preserved(self, spider):
         """Should preserve terminal status from release_claim (Workstream B)."""
         domain_id = str(uuid.uuid4())
-        spider._claimed_domains = {domain_id: {"domain": "example.com", "version": 1}}
-        spider._domain_stats = {
-            "example.com": {"pages": 100, "images_found": 50, "errors": 0, "links_discovered": 0}
-        }
-        spider._domain_frontier_queue = {}  # No pending URLs = exhausted
+        spider._domain_registry = DomainRegistry()
+        # No pending URLs in the frontier = exhausted
+        _track_domain(spider, "example.com", domain_id, pages=100, images_found=50)
         spider._compute_domain_images_stored = MagicMock(return_value={"example.com": 40})
 
         with (
@@ -251,3 +269,69 @@ class TestClaimRelease:
 
         # Verify: update_domain_stats was NOT called for this domain (no overwrite)
         assert mock_update_stats.call_count == 0
+
+
+class TestClaimWarmup:
+    """Test claim-time warmup of DNS, robots.txt and redirects."""
+
+    @pytest.fixture
+    def spider(self):
+        """Create a Phase C spider with the HEAD probe enabled."""
+        with (
+            patch(
+                "crawler.spiders.discovery_spider.get_enable_smart_scheduling", return_value=True
+            ),
+            patch("crawler.spiders.discovery_spider.get_enable_claim_protocol", return_value=True),
+            patch(
+                "crawler.spiders.discovery_spider.get_enable_claim_warmup_head", return_value=True
+            ),
+        ):
+            spider = DiscoverySpider()
+            spider.crawler = MagicMock()
+            return spider
+
+    def test_claimed_batch_warmed_before_requests(self, spider):
+        claimed = [
+            {"id": str(uuid.uuid4()), "domain": d, "version": 1, "frontier_checkpoint_id": None}
+            for d in ("a.com", "b.com")
+        ]
+
+        with (
+            patch("crawler.spiders.discovery_spider.claim_domains", return_value=claimed),
+            patch("crawler.spiders.discovery_spider.prefetch_hostnames") as mock_dns,
+            patch("crawler.spiders.discovery_spider.prefetch_robots") as mock_robots,
+        ):
+            requests = list(spider.start_requests())
+
+        assert mock_dns.call_args.args[0] == ["a.com", "b.com"]
+        assert list(mock_robots.call_args.args[0]) == ["https://a.com/", "https://b.com/"]
+        assert [r.method for r in requests] == ["HEAD", "HEAD"]
+
+    def test_head_redirect_sets_root_get_url(self, spider):
+        from scrapy.http import Response
+
+        meta = {"depth": 0, "domain": "a.com", "domain_id": "id-1"}
+        request = Request(
+            "https://www.a.com/",
+            method="HEAD",
+            meta={**meta, "redirect_urls": ["https://a.com"]},
+        )
+        response = Response("https://www.a.com/", request=request)
+
+        (get,) = spider._parse_warmup(response)
+
+        assert get.method == "GET"
+        assert get.url == "https://www.a.com/"
+        assert get.meta == meta
+        assert get.callback == spider.parse
+        assert spider.warmup_redirects == 1
+
+    def test_failed_head_falls_back_to_get(self, spider):
+        failure = MagicMock()
+        failure.request = spider._root_request("a.com", "id-1")
+
+        (get,) = spider._warmup_failed(failure)
+
+        assert get.method == "GET"
+        assert get.url == "https://a.com"
+        assert get.errback == spider.handle_error
@@ -0,0 +1,165 @@
+"""Tests for image lifecycle tracing."""
+
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from scrapy.utils.test import get_crawler
+
+from crawler.lanes import IMAGE_LANE
+from crawler.metrics import IMAGE_SPAN_SECONDS
+from crawler.tracing import ImageTracing, TraceLog, trace_spans
+from processor.async_fetcher import ScrapyImageDownloader
+
+
+def _tracing(log_path=None, sample_rate=0.0, slow_seconds=0.0):
+    crawler = get_crawler()
+    crawler.stats.open_spider()
+    with (
+        patch("crawler.tracing.get_enable_image_tracing", return_value=True),
+        patch("crawler.tracing.get_image_trace_sample_rate", return_value=sample_rate),
+        patch("crawler.tracing.get_image_trace_slow_seconds", return_value=slow_seconds),
+    ):
+        tracing = ImageTracing(crawler)
+    with patch("crawler.tracing.get_image_trace_log_path", return_value=log_path):
+        tracing.spider_opened(None)
+    return tracing
+
+
+def _item(trace, domain="a.com"):
+    return {
+        "type": "image",
+        "url": "https://cdn.a.net/a.jpg",
+        "source_domain": domain,
+        "trace": trace,
+    }
+
+
+FULL_TRACE = {
+    "scheduled": 100.0,
+    "download_start": 101.0,
+    "download_end": 101.5,
+    "pipeline_enter": 101.6,
+    "validated": 101.65,
+    "hashed": 101.7,
+    "stored": 101.9,
+}
+
+
+class TestTraceSpans:
+    """Test span derivation from marks."""
+
+    def test_full_lifecycle(self):
+        spans = {name: end - start for name, start, end in trace_spans(FULL_TRACE)}
+
+        assert list(spans) == ["queue", "download", "callback", "validate", "hash", "db_write"]
+        assert spans["queue"] == pytest.approx(1.0)
+        assert spans["db_write"] == pytest.approx(0.2)
+
+    def test_missing_marks_bridge_to_earlier_mark(self):
+        trace = {"scheduled": 1.0, "download_start": 2.0, "download_end": 3.0, "stored": 5.0}
+
+        assert trace_spans(trace) == [
+            ("queue", 1.0, 2.0),
+            ("download", 2.0, 3.0),
+            ("db_write", 3.0, 5.0),
+        ]
+
+    def test_downloader_stamps_processing_marks(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (300, 300), color="red").save(buffer, format="JPEG")
+        response = Response(
+            "https://cdn.a.net/a.jpg",
+            body=buffer.getvalue(),
+            headers={"Content-Type": "image/jpeg"},
+        )
+        trace = {"pipeline_enter": 1.0}
+
+        ScrapyImageDownloader().process_response(response.url, response, trace=trace)
+
+        assert trace["pipeline_enter"] < trace["validated"] <= trace["hashed"]
+
+
+class TestImageTracing:
+    """Test stamping, aggregation and the sampled trace log."""
+
+    def test_disabled_by_default(self):
+        with pytest.raises(NotConfigured):
+            ImageTracing(get_crawler())
+
+    def test_image_requests_stamped(self):
+        tracing = _tracing()
+        image = Request("https://cdn.a.net/a.jpg", meta={"lane": IMAGE_LANE})
+        page = Request("https://a.com/")
+
+        for request in (image, page):
+            tracing.request_scheduled(request, None)
+            tracing.request_reached_downloader(request, None)
+            tracing.response_downloaded(Response(request.url), request, None)
+
+        assert list(image.meta["trace"]) == ["scheduled", "download_start", "download_end"]
+        assert "trace" not in page.meta
+
+    def test_finished_traces_observed(self):
+        tracing = _tracing()
+        before = IMAGE_SPAN_SECONDS.count("total"), IMAGE_SPAN_SECONDS.count("db_write")
+
+        tracing.item_scraped(_item(dict(FULL_TRACE)), None, None)
+        tracing.item_dropped(_item({"scheduled": 1.0, "download_start": 2.0}), None, None, None)
+        tracing.item_scraped({"type": "image", "trace": None}, None, None)
+
+        assert IMAGE_SPAN_SECONDS.count("total") == before[0] + 2
+        assert IMAGE_SPAN_SECONDS.count("db_write") == before[1] + 1
+        assert tracing.crawler.stats.get_value("tracing/images") == 2
+        assert tracing.domain_totals["a.com"] == [2, pytest.approx(1.9)]
+
+    def test_slow_traces_logged_as_chrome_events(self, tmp_path):
+        path = tmp_path / "trace-{pid}.json"
+        tracing = _tracing(log_path=str(path), slow_seconds=1.5)
+
+        tracing.item_scraped(_item(dict(FULL_TRACE), domain="slow.com"), None, None)
+        fast = {"scheduled": 1.0, "download_start": 1.1}
+        tracing.item_scraped(_item(fast, domain="fast.com"), None, None)
+        tracing.spider_closed(None)
+
+        written = tracing.trace_log.path
+        assert "{pid}" not in written
+        with open(written, encoding="utf-8") as handle:
+            events = json.loads(handle.read().rstrip(",\n") + "]")
+        assert events[0]["ph"] == "M"
+        assert events[0]["args"] == {"name": "slow.com"}
+        image = events[1]
+        assert image["name"] == "image"
+        assert image["dur"] == 1_900_000
+        assert [event["name"] for event in events[2:]] == [
+            "queue",
+            "download",
+            "callback",
+            "validate",
+            "hash",
+            "db_write",
+        ]
+        assert tracing.crawler.stats.get_value("tracing/logged") == 1
+
+
+class TestTraceLog:
+    """Test the trace file writer."""
+
+    def test_domains_get_one_track_each(self, tmp_path):
+        log = TraceLog(str(tmp_path / "t.json"))
+        trace = {"scheduled": 1.0, "download_start": 2.0}
+
+        log.write(trace, "u1", "a.com", "stored")
+        log.write(trace, "u2", "a.com", "stored")
+        log.write(trace, "u3", "b.com", "dropped")
+        log.close()
+
+        events = json.loads((tmp_path / "t.json").read_text().rstrip(",\n") + "]")
+        names = [event["args"]["name"] for event in events if event["ph"] == "M"]
+        assert names == ["a.com", "b.com"]
+        assert {event["tid"] for event in events if event["name"] == "image"} == {1, 2}
+        assert log.written == 3